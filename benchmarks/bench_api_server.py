@@ -0,0 +1,83 @@
+"""
+Бенчмарки сервера данных (src/api/server.py): задержка вызова и создание
+заказов несколькими клиентами одновременно
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import text
+
+from src.api.client import ApiClient
+from src.api.server import ApiServer
+from src.database.write_queue import order_write_queue
+from src.sync_database import SyncDatabaseManager
+
+CLIENTS = 8
+
+
+@pytest.fixture(scope='module')
+def server(bench_db_path):
+    """Сервер в отдельном потоке со своим циклом событий"""
+    SyncDatabaseManager.init_db({'type': 'sqlite', 'database': bench_db_path})
+    enabled, order_write_queue.enabled = order_write_queue.enabled, True
+
+    loop = asyncio.new_event_loop()
+    server = ApiServer(port=0)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server
+
+    asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+    order_write_queue.stop()
+    order_write_queue.enabled = enabled
+    SyncDatabaseManager.close()
+
+
+@pytest.fixture(scope='module')
+def sample(server):
+    connection = SyncDatabaseManager._connection
+    result = {
+        'order_id': connection.execute(text("SELECT MAX(order_id) FROM Orders")).scalar(),
+        'customer_id': connection.execute(text("SELECT MIN(customer_id) FROM Customers")).scalar(),
+        'dish_id': connection.execute(text("SELECT MIN(dish_id) FROM Dishes")).scalar(),
+    }
+    connection.commit()
+    return result
+
+
+@pytest.fixture(scope='module')
+def clients(server):
+    clients = [ApiClient(port=server.port) for _ in range(CLIENTS)]
+    yield clients
+    for client in clients:
+        client.close()
+
+
+def bench_api_ping(bench, clients):
+    """Накладные расходы протокола: ping, 100 вызовов"""
+    client = clients[0]
+    bench(lambda: [client.call('ping') for _ in range(100)])
+
+
+def bench_api_get_order_full(bench, clients, sample):
+    order = bench(clients[0].call, 'get_order_full', order_id=sample['order_id'], repeat=50)
+    assert order['order_id'] == sample['order_id']
+
+
+def bench_api_create_orders_concurrent(bench, clients, sample):
+    """8 клиентов по 20 заказов: заказы разных клиентов фиксируются пакетами"""
+    dish_quantities = [[sample['dish_id'], 1]]
+
+    def client_orders(client):
+        return [client.call('create_order', sample['customer_id'], dish_quantities) for _ in range(20)]
+
+    with ThreadPoolExecutor(max_workers=CLIENTS) as executor:
+        created = bench(lambda: [order_id for ids in executor.map(client_orders, clients) for order_id in ids])
+    assert len(set(created)) == CLIENTS * 20
@@ -0,0 +1,59 @@
+"""
+Бенчмарки отрисовки графиков дашборда (src/charts): отрисовка в PNG и кэш
+"""
+
+import os
+
+import pytest
+
+from src.charts.dashboard import orders_by_status_chart, popular_dishes_chart, restaurant_ratings_chart
+from src.charts.renderer import ChartRenderer, render_png
+from src.charts.timeseries import LTTB, MINMAX, downsample
+
+SPECS = {
+    'pie': orders_by_status_chart({'Принят': 120, 'Готовится': 40, 'В доставке': 35, 'Доставлен': 9000, 'Отменен': 600}),
+    'bar': popular_dishes_chart([('Хинкали с сыром', 10636), ('Купаты с орехами', 6031), ('Лобио домашнее', 5382),
+                                 ('Лобио на мангале', 3942), ('Мчади с томатами', 3235)]),
+    'barh': restaurant_ratings_chart([('Тбилиси', 4.9), ('Пиросмани #1', 4.6), ('Мимино', 4.2),
+                                      ('Кутаиси #5', 3.8), ('Батуми', 3.1)]),
+}
+
+
+@pytest.mark.parametrize('kind', sorted(SPECS))
+def bench_render_png(bench, kind):
+    """Отрисовка без кэша (так рисовался каждый график дашборда при обновлении)"""
+    png = bench(render_png, SPECS[kind], repeat=5)
+    assert png.startswith(b'\x89PNG')
+
+
+def bench_render_cached(bench):
+    """Повторный запрос того же графика: хэш описания и чтение из кэша"""
+    renderer = ChartRenderer()
+    renderer.render(SPECS['bar'])
+    bench(lambda: [renderer.render(SPECS['bar'].with_size(800, 600)) for _ in range(100)])
+    assert renderer.renders == 1
+
+
+@pytest.mark.parametrize('kind', sorted(SPECS))
+def bench_native_paint(bench, kind):
+    """Отрисовка тем же описанием средствами Qt (NativeChartView дашборда)"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    QtWidgets = pytest.importorskip('PyQt6.QtWidgets')
+    charts = pytest.importorskip('src.ui.charts')
+    from PyQt6.QtGui import QImage
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    view = charts.NativeChartView()
+    view.resize(SPECS[kind].width, SPECS[kind].height)
+    view.set_spec(SPECS[kind])
+    image = QImage(view.size(), QImage.Format.Format_ARGB32)
+    bench(view.render, image, repeat=5)
+    assert app is not None and not image.isNull()
+
+
+@pytest.mark.parametrize('method', [LTTB, MINMAX])
+def bench_downsample(bench, method):
+    """Прореживание почасового ряда за два года (17 520 точек) до ширины графика"""
+    points = [(hour * 3600.0, float((hour * 7919) % 97 + (hour % 24) * 10)) for hour in range(2 * 365 * 24)]
+    sampled = bench(downsample, points, 1200, method, repeat=5)
+    assert len(sampled) <= 1200
@@ -0,0 +1,234 @@
+"""
+Бенчмарки DatabaseManager (асинхронный интерфейс общего движка) на сгенерированной базе SQLite
+"""
+
+import asyncio
+import itertools
+
+import pytest
+
+pytest.importorskip('tortoise')
+
+from sqlalchemy import text
+
+from src.database.query_cache import order_details_cache, query_cache
+from src.database.records import ModelRecord
+from src.database_manager import DatabaseManager
+from src.models import Customers, Dishes, Orders, Restaurants
+from src.sync_database import SyncDatabaseManager
+
+
+@pytest.fixture(scope='module')
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope='module')
+def db(loop, bench_db_path):
+    DatabaseManager.set_db_config({'type': 'sqlite', 'host': 'localhost', 'database': bench_db_path})
+    loop.run_until_complete(DatabaseManager.init_db())
+    yield DatabaseManager
+    loop.run_until_complete(DatabaseManager.close())
+
+
+def _ids(query):
+    connection = SyncDatabaseManager._connection
+    ids = [row[0] for row in connection.execute(text(query))]
+    connection.commit()
+    return ids
+
+
+@pytest.fixture(scope='module')
+def sample(db):
+    return {
+        'customer_id': _ids("SELECT customer_id FROM Orders GROUP BY customer_id ORDER BY COUNT(*) DESC LIMIT 1")[0],
+        'restaurant_id': _ids("SELECT restaurant_id FROM Dishes GROUP BY restaurant_id ORDER BY COUNT(*) DESC LIMIT 1")[0],
+        'order_id': _ids("SELECT MAX(order_id) FROM Orders")[0],
+        'dish_ids': _ids("SELECT dish_id FROM Dishes LIMIT 3"),
+        'restaurant_ids': _ids("SELECT restaurant_id FROM Restaurants LIMIT 100"),
+    }
+
+
+def run(loop, coroutine_function, *args, **kwargs):
+    """Синхронная обертка асинхронного метода для замера"""
+    return lambda: loop.run_until_complete(coroutine_function(*args, **kwargs))
+
+
+@pytest.mark.parametrize('model', [Customers, Restaurants, Dishes, Orders], ids=lambda m: m.__name__)
+def bench_get_all(bench, loop, db, model):
+    bench(run(loop, db.get_all, model))
+
+
+def bench_get_all_fields(bench, loop, db):
+    bench(run(loop, db.get_all, Restaurants, fields=('name', 'rating')))
+
+
+def bench_values_list(bench, loop, db):
+    bench(run(loop, db.values_list, Orders, 'order_id', flat=True))
+
+
+def bench_get_orders_statistics(bench, loop, db):
+    bench(run(loop, db.get_orders_statistics))
+
+
+def bench_get_popular_dishes(bench, loop, db):
+    bench(run(loop, db.get_popular_dishes))
+
+
+def bench_get_orders_with_details(bench, loop, db):
+    bench(run(loop, db.get_orders_with_details))
+
+
+def bench_get_order_full_cold(bench, loop, db, sample):
+    bench(run(loop, db.get_order_full, sample['order_id']), setup=order_details_cache.clear, repeat=50)
+
+
+def bench_get_order_details(bench, loop, db, sample):
+    bench(run(loop, db.get_order_details, sample['order_id']), setup=order_details_cache.clear, repeat=50)
+
+
+def bench_get_order_items(bench, loop, db, sample):
+    bench(run(loop, db.get_order_items, sample['order_id']), setup=order_details_cache.clear, repeat=50)
+
+
+def bench_get_customer_orders(bench, loop, db, sample):
+    bench(run(loop, db.get_customer_orders, sample['customer_id']), repeat=20)
+
+
+def bench_get_dishes_by_restaurant(bench, loop, db, sample):
+    bench(run(loop, db.get_dishes_by_restaurant, sample['restaurant_id']), repeat=50)
+
+
+def bench_get_dependency_report(bench, loop, db, sample):
+    bench(run(loop, db.get_dependency_report, 'Restaurants', sample['restaurant_ids']))
+
+
+def bench_check_dependencies(bench, loop, db, sample):
+    customer = ModelRecord(Customers, {'customer_id': sample['customer_id']})
+    bench(run(loop, db.check_dependencies, customer), repeat=20)
+
+
+def bench_run_query_batch(bench, loop, db):
+    queries = {
+        'orders_by_status': "SELECT status_id, COUNT(*) AS cnt FROM Orders GROUP BY status_id",
+        'items_by_dish': "SELECT dish_id, SUM(quantity) AS qty FROM OrderItems GROUP BY dish_id",
+    }
+    bench(run(loop, db.run_query_batch, queries), setup=query_cache.clear)
+
+
+def bench_get_orders_changed_since(bench, loop, db, sample):
+    """Изменения списка заказов после watermark: 20 новых заказов"""
+    from src.database.change_tracking import current_change_seq
+
+    watermark = []
+
+    def create_changes():
+        watermark[:] = [current_change_seq(SyncDatabaseManager._connection)]
+        SyncDatabaseManager._connection.commit()
+        SyncDatabaseManager.create_orders([(sample['customer_id'], [(sample['dish_ids'][0], 1)], None)] * 20)
+
+    changes = bench(lambda: loop.run_until_complete(db.get_orders_changed_since(watermark[0])),
+                    setup=create_changes, repeat=5)
+    assert len(changes['rows']) == 20
+
+
+def bench_rebuild_courier_index(bench, loop, db):
+    bench(run(loop, db.rebuild_courier_index))
+
+
+def bench_create_order_with_items(bench, loop, db, sample):
+    dish_quantities = [(dish_id, 1) for dish_id in sample['dish_ids']]
+    bench(lambda: loop.run_until_complete(
+        db.create_order_with_items(sample['customer_id'], dish_quantities)
+    ), repeat=20)
+
+
+def bench_delete_orders_cascade(bench, loop, db):
+    def delete_batch():
+        order_ids = _ids("SELECT order_id FROM Orders ORDER BY order_id LIMIT 200")
+        success, message = loop.run_until_complete(db.delete_orders_cascade(order_ids))
+        assert success, message
+
+    bench(delete_batch, repeat=3)
+
+
+def _create(loop, db, model, **values):
+    return loop.run_until_complete(db.create_record(model, **values))
+
+
+def _create_restaurant_with_dishes(loop, db, dishes):
+    """Новый ресторан с блюдами без заказов (их можно удалить)"""
+    restaurant = _create(loop, db, Restaurants, name='Бенчмарк', location='Тбилиси', rating=4.5)
+    dish_ids = [_create(loop, db, Dishes, restaurant_id=restaurant.restaurant_id, name=f'Блюдо {i}').dish_id
+                for i in range(dishes)]
+    return restaurant.restaurant_id, dish_ids
+
+
+def bench_create_record(bench, loop, db):
+    phones = itertools.count()
+    created = []
+
+    def create():
+        created.append(_create(loop, db, Customers, phone_number=f'+7300{next(phones):07d}',
+                               first_name='Бенчмарк', last_name='Создание'))
+
+    bench(create, repeat=20)
+    assert all(record.customer_id for record in created)
+
+
+def bench_update_record(bench, loop, db, sample):
+    customer = ModelRecord(Customers, {'customer_id': sample['customer_id']})
+    names = itertools.cycle(['Иван', 'Мария'])
+    bench(lambda: loop.run_until_complete(db.update_record(customer, first_name=next(names))), repeat=20)
+
+
+def bench_delete_record(bench, loop, db):
+    """Удаление клиента без заказов (с проверкой зависимостей)"""
+    phones = itertools.count()
+    customers = []
+
+    def create_customer():
+        customers[:] = [_create(loop, db, Customers, phone_number=f'+7400{next(phones):07d}', first_name='Удаление')]
+
+    success, message = bench(lambda: loop.run_until_complete(db.delete_record(customers[0])),
+                             setup=create_customer, repeat=20)
+    assert success, message
+
+
+def bench_transition_orders(bench, loop, db, sample):
+    """Перевод 200 новых заказов "Принят" -> "Готовится" одним запросом"""
+    from src.database.order_lifecycle import ACCEPTED, COOKING
+
+    batch = []
+
+    def create_batch():
+        orders = [(sample['customer_id'], [(sample['dish_ids'][0], 1)], None)] * 200
+        batch[:] = SyncDatabaseManager.create_orders(orders)
+
+    result = bench(run(loop, db.transition_orders, batch, ACCEPTED, COOKING), setup=create_batch)
+    assert result.ok and len(result.moved) == 200
+
+
+def bench_delete_dishes_cascade(bench, loop, db):
+    """Удаление 50 блюд без заказов (отчет о зависимостях + удаление)"""
+    dish_ids = []
+
+    def create_dishes():
+        dish_ids[:] = _create_restaurant_with_dishes(loop, db, 50)[1]
+
+    success, message = bench(run(loop, db.delete_dishes_cascade, dish_ids), setup=create_dishes, repeat=3)
+    assert success, message
+
+
+def bench_delete_restaurants_cascade(bench, loop, db):
+    """Удаление 5 ресторанов по 10 блюд без заказов"""
+    restaurant_ids = []
+
+    def create_restaurants():
+        restaurant_ids[:] = [_create_restaurant_with_dishes(loop, db, 10)[0] for _ in range(5)]
+
+    success, message = bench(run(loop, db.delete_restaurants_cascade, restaurant_ids),
+                             setup=create_restaurants, repeat=3)
+    assert success, message
@@ -0,0 +1,422 @@
+"""
+Бенчмарки SyncDatabaseManager на сгенерированной базе SQLite
+"""
+
+import itertools
+import json
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from src.database.analytics_cube import (
+    ALL_TIME, BY_CATEGORY, BY_RESTAURANT, CUSTOMERS, DELIVERY, LAST_MONTH, ORDERS, analytics_cube
+)
+from src.database.query_cache import order_details_cache, query_cache
+from src.sync_database import SyncDatabaseManager
+from src.utils.search_index import search_indexes
+
+
+@pytest.fixture(scope='module')
+def db(bench_db_path):
+    SyncDatabaseManager.init_db({'type': 'sqlite', 'database': bench_db_path})
+    yield SyncDatabaseManager
+    SyncDatabaseManager.close()
+
+
+@pytest.fixture(scope='module')
+def sample(db):
+    """Идентификаторы для параметров запросов: самые "тяжелые" клиент и ресторан"""
+    connection = db._connection
+    scalar = lambda query: connection.execute(text(query)).scalar()
+    result = {
+        'customer_id': scalar("SELECT customer_id FROM Orders GROUP BY customer_id ORDER BY COUNT(*) DESC LIMIT 1"),
+        'restaurant_id': scalar("SELECT restaurant_id FROM Dishes GROUP BY restaurant_id ORDER BY COUNT(*) DESC LIMIT 1"),
+        'order_id': scalar("SELECT MAX(order_id) FROM Orders"),
+        'dish_ids': [row[0] for row in connection.execute(text("SELECT dish_id FROM Dishes LIMIT 3"))],
+        'restaurant_ids': [row[0] for row in connection.execute(text("SELECT restaurant_id FROM Restaurants LIMIT 100"))],
+    }
+    connection.commit()
+    return result
+
+
+def _create_restaurant_with_dishes(db, dishes: int) -> dict:
+    """Новый ресторан с блюдами без заказов (их можно удалить)"""
+    restaurant = db.create_record('Restaurants', {'name': 'Бенчмарк', 'location': 'Тбилиси', 'rating': 4.5})
+    restaurant['dish_ids'] = [
+        db.create_record('Dishes', {'restaurant_id': restaurant['restaurant_id'], 'name': f'Блюдо {i}'})['dish_id']
+        for i in range(dishes)
+    ]
+    return restaurant
+
+
+def _reset_search_caches():
+    search_indexes.invalidate_tables(['Customers', 'Restaurants'])
+
+
+@pytest.mark.parametrize('table_name', ['Customers', 'Restaurants', 'Dishes', 'Couriers', 'Orders'])
+def bench_get_all(bench, db, table_name):
+    bench(db.get_all, table_name)
+
+
+def bench_get_all_projection(bench, db):
+    bench(db.get_all, 'Orders', ['order_id', 'status_id'])
+
+
+def bench_get_all_to_columns(bench, db):
+    bench(lambda: db.get_all('Orders').to_columns())
+
+
+def bench_get_customers(bench, db):
+    bench(db.get_customers)
+
+
+def bench_get_restaurants(bench, db):
+    bench(db.get_restaurants)
+
+
+def bench_get_dishes(bench, db):
+    bench(db.get_dishes)
+
+
+def bench_get_couriers(bench, db):
+    bench(db.get_couriers)
+
+
+def bench_get_orders(bench, db):
+    bench(db.get_orders)
+
+
+def bench_get_orders_with_details(bench, db):
+    rows = bench(db.get_orders_with_details)
+    assert rows
+
+
+def bench_get_orders_changed_since(bench, db, sample):
+    """Изменения списка заказов после watermark: 20 новых заказов (сравнить с bench_get_orders_with_details)"""
+    from src.database.change_tracking import current_change_seq
+
+    watermark = []
+
+    def create_changes():
+        watermark[:] = [current_change_seq(db._connection)]
+        db._connection.commit()
+        db.create_orders([(sample['customer_id'], [(sample['dish_ids'][0], 1)], None)] * 20)
+
+    changes = bench(lambda: db.get_orders_changed_since(watermark[0]), setup=create_changes, repeat=5)
+    assert len(changes['rows']) == 20
+
+
+def bench_get_customer_orders_page_first(bench, db, sample):
+    bench(db.get_customer_orders_page, sample['customer_id'], repeat=50)
+
+
+def bench_get_customer_orders_page_deep(bench, db, sample):
+    cursor = (None, None)
+    # Курсор десятой страницы: замеряем чтение глубоко в истории
+    for _ in range(10):
+        page = db.get_customer_orders_page(sample['customer_id'], before_time=cursor[0], before_order_id=cursor[1])
+        if not page:
+            break
+        cursor = (page[-1]['order_time'], page[-1]['order_id'])
+    bench(db.get_customer_orders_page, sample['customer_id'],
+          before_time=cursor[0], before_order_id=cursor[1], repeat=50)
+
+
+def bench_get_order_full_cold(bench, db, sample):
+    order = bench(db.get_order_full, sample['order_id'], setup=order_details_cache.clear, repeat=50)
+    assert order is not None
+
+
+def bench_get_order_full_cached(bench, db, sample):
+    bench(db.get_order_full, sample['order_id'], repeat=200)
+
+
+def bench_get_dishes_by_restaurant(bench, db, sample):
+    bench(db.get_dishes_by_restaurant, sample['restaurant_id'], repeat=50)
+
+
+def bench_get_record(bench, db, sample):
+    bench(db.get_record, 'Orders', {'order_id': sample['order_id']}, repeat=200)
+
+
+def bench_get_orders_statistics(bench, db):
+    bench(db.get_orders_statistics, setup=query_cache.clear)
+
+
+def bench_get_popular_dishes(bench, db):
+    bench(db.get_popular_dishes, setup=query_cache.clear)
+
+
+def bench_get_customer_orders(bench, db, sample):
+    bench(db.get_customer_orders, sample['customer_id'], repeat=20)
+
+
+def bench_get_dependency_report(bench, db, sample):
+    report = bench(db.get_dependency_report, 'Restaurants', sample['restaurant_ids'])
+    assert len(report) == len(sample['restaurant_ids'])
+
+
+def bench_check_dependencies(bench, db, sample):
+    bench(db.check_dependencies, 'Customers', sample['customer_id'], repeat=20)
+
+
+@pytest.mark.parametrize('query', ['хинкали', 'хач', 'острое с сыром'], ids=['word', 'prefix', 'several_words'])
+def bench_search_dishes(bench, db, query):
+    bench(db.search_dishes, query, repeat=20)
+
+
+@pytest.mark.parametrize('query', ['ива', 'Мария Ив', '+7942'], ids=['prefix', 'name_surname', 'phone'])
+def bench_search_customers(bench, db, query):
+    bench(db.search_customers, query, repeat=50)
+
+
+def bench_search_customers_index_build(bench, db):
+    bench(db.search_customers, 'ива', setup=_reset_search_caches)
+
+
+def bench_search_customers_after_edit(bench, db, sample):
+    """Поиск сразу после изменения клиента: изменение применяется к индексу без перестроения"""
+    db.search_customers('ива')
+    names = itertools.cycle(['Иванна', 'Мария'])
+
+    def edit_customer():
+        db.update_record('Customers', {'customer_id': sample['customer_id']}, {'first_name': next(names)})
+
+    results = bench(db.search_customers, 'ива', setup=edit_customer, repeat=10)
+    assert results
+
+
+def bench_search_restaurants(bench, db):
+    bench(db.search_restaurants, 'тби', repeat=50)
+
+
+def bench_run_query_batch(bench, db):
+    queries = {
+        'orders_by_status': "SELECT status_id, COUNT(*) FROM Orders GROUP BY status_id",
+        'items_by_dish': "SELECT dish_id, SUM(quantity) FROM OrderItems GROUP BY dish_id",
+        'open_deliveries': "SELECT courier_id, COUNT(*) FROM Deliveries WHERE delivery_time IS NULL GROUP BY courier_id",
+    }
+    results = bench(db.run_query_batch, queries, setup=query_cache.clear)
+    assert all(rows is not None for rows in results.values())
+
+
+def bench_refresh_order_rollups_full(bench, db):
+    result = bench(db.refresh_order_rollups, full=True)
+    assert result['rows'] > 0
+
+
+def bench_refresh_order_rollups_incremental(bench, db, sample):
+    """Пересчет сводок после 20 новых заказов (сравнить с полным пересчетом)"""
+    db.refresh_order_rollups()
+
+    def create_changes():
+        db.create_orders([(sample['customer_id'], [(sample['dish_ids'][0], 1)], None)] * 20)
+
+    result = bench(db.refresh_order_rollups, setup=create_changes, repeat=5)
+    assert result['ranges'] == 1
+
+
+@pytest.mark.parametrize('max_points', [200, 4000])
+def bench_get_order_timeseries(bench, db, max_points):
+    """Ряд заказов за весь период из сводок: по дням (200) и по часам (4000)"""
+    db.refresh_order_rollups()
+    result = bench(db.get_order_timeseries, max_points=max_points, refresh=False)
+    assert result['points'] and len(result['points']) <= max_points
+
+
+def bench_refresh_analytics_cube_full(bench, db):
+    result = bench(db.refresh_analytics_cube, full=True, repeat=3)
+    assert result['full'] and result['days'] > 0
+
+
+def bench_refresh_analytics_cube_incremental(bench, db, sample):
+    """Пересчет дня куба после 20 новых заказов (сравнить с полным построением)"""
+    db.refresh_analytics_cube()
+
+    def create_changes():
+        db.create_orders([(sample['customer_id'], [(sample['dish_ids'][0], 1)], None)] * 20)
+
+    result = bench(db.refresh_analytics_cube, setup=create_changes, repeat=5)
+    assert not result['full'] and result['days'] == 1
+
+
+@pytest.mark.parametrize('analysis', [ORDERS, CUSTOMERS, DELIVERY])
+def bench_analytics_cube_query(bench, db, analysis):
+    """Срез куба за все время по категориям без готового ответа (сложение ячеек в памяти)"""
+    db.refresh_analytics_cube()
+    result = bench(analytics_cube.query, ALL_TIME, analysis, BY_CATEGORY,
+                   setup=analytics_cube._answers.clear, repeat=5)
+    assert result['total']
+
+
+def bench_get_analytics_cached(bench, db):
+    """Повторный срез вкладки аналитики: готовый ответ из памяти"""
+    db.get_analytics()
+    bench(lambda: [db.get_analytics(LAST_MONTH, CUSTOMERS, BY_RESTAURANT) for _ in range(100)])
+
+
+def bench_short_lived_threads(bench, db):
+    """Запросы из 20 новых потоков подряд: соединения возвращаются в пул, а не остаются за потоками"""
+    checked_out = db._engine.pool.checkedout()
+
+    def query_in_thread():
+        db.get_record('Customers', {'customer_id': 1})
+        db.release_connection()
+
+    def run_threads():
+        for _ in range(20):
+            thread = threading.Thread(target=query_in_thread)
+            thread.start()
+            thread.join()
+
+    bench(run_threads, repeat=3)
+    assert db._engine.pool.checkedout() == checked_out
+
+
+def bench_rebuild_courier_index(bench, db):
+    bench(db.rebuild_courier_index)
+
+
+def bench_create_order(bench, db, sample):
+    dish_quantities = [(dish_id, 1) for dish_id in sample['dish_ids']]
+    created = []
+
+    def create():
+        created.append(db.create_order(sample['customer_id'], dish_quantities))
+
+    bench(create, repeat=20)
+    assert all(created)
+
+
+def bench_create_orders_group_commit(bench, db, sample):
+    """Пакет из 20 заказов одной фиксацией (сравнить с 20 x bench_create_order)"""
+    orders = [(sample['customer_id'], [(dish_id, 1) for dish_id in sample['dish_ids']], None)] * 20
+    results = bench(db.create_orders, orders, repeat=10)
+    assert not any(isinstance(result, Exception) for result in results)
+
+
+def bench_create_orders_all_failing(bench, db, sample):
+    """Пакет, в котором не создается ни один заказ: у каждого заказа своя ошибка"""
+    # Повтор блюда в заказе нарушает первичный ключ OrderItems
+    dish_id = sample['dish_ids'][0]
+    orders = [(sample['customer_id'], [(dish_id, 1), (dish_id, 1)], None)] * 2
+    results = bench(db.create_orders, orders, repeat=3)
+    assert len(results) == 2 and all(isinstance(result, Exception) for result in results)
+
+
+def bench_transition_orders(bench, db, sample):
+    """Перевод 200 новых заказов "Принят" -> "Готовится" одним запросом"""
+    from src.database.order_lifecycle import ACCEPTED, COOKING
+
+    batch = []
+
+    def create_batch():
+        orders = [(sample['customer_id'], [(sample['dish_ids'][0], 1)], None)] * 200
+        batch[:] = db.create_orders(orders)
+
+    result = bench(lambda: db.transition_orders(batch, ACCEPTED, COOKING), setup=create_batch)
+    assert result.ok and len(result.moved) == 200
+
+
+def bench_transition_orders_partial_versions(bench, db, sample):
+    """Перевод с версиями диспетчера, где версий части заказов нет: они возвращаются конфликтами"""
+    from src.database.order_lifecycle import ACCEPTED, COOKING
+
+    batch = []
+    versions = {}
+
+    def create_batch():
+        orders = [(sample['customer_id'], [(sample['dish_ids'][0], 1)], None)] * 200
+        batch[:] = db.create_orders(orders)
+        versions.clear()
+        versions.update((order_id, 0) for order_id in batch[:150])
+
+    result = bench(lambda: db.transition_orders(batch, ACCEPTED, COOKING, versions), setup=create_batch)
+    assert len(result.moved) == 150 and result.conflicts == batch[150:]
+
+
+def bench_complete_delivery(bench, db):
+    open_orders = iter([
+        row[0] for row in db._connection.execute(
+            text("SELECT d.order_id FROM Deliveries d JOIN Orders o ON o.order_id = d.order_id "
+                 "WHERE d.delivery_time IS NULL AND o.status_id NOT IN (5, 6) LIMIT 100")
+        )
+    ])
+    db._connection.commit()
+    completed = bench(lambda: db.complete_delivery(next(open_orders)), repeat=20)
+    assert completed
+
+
+def bench_create_record(bench, db):
+    phones = itertools.count()
+    created = []
+
+    def create():
+        created.append(db.create_record('Customers', {
+            'phone_number': f'+7100{next(phones):07d}', 'first_name': 'Бенчмарк', 'last_name': 'Создание'
+        }))
+
+    bench(create, repeat=20)
+    assert all(record['customer_id'] for record in created)
+
+
+def bench_delete_record(bench, db):
+    """Удаление клиента без заказов (с проверкой зависимостей)"""
+    phones = itertools.count()
+    keys = []
+
+    def create_customer():
+        record = db.create_record('Customers', {'phone_number': f'+7200{next(phones):07d}', 'first_name': 'Удаление'})
+        keys[:] = [{'customer_id': record['customer_id']}]
+
+    success, message = bench(lambda: db.delete_record('Customers', keys[0]), setup=create_customer, repeat=20)
+    assert success, message
+
+
+def bench_delete_orders_cascade(bench, db, sample):
+    """Удаление 200 заказов с позициями, доставками и отзывами одной транзакцией"""
+    batch = []
+
+    def create_batch():
+        orders = [(sample['customer_id'], [(dish_id, 1) for dish_id in sample['dish_ids']], None)] * 200
+        batch[:] = db.create_orders(orders)
+
+    success, message = bench(lambda: db.delete_orders_cascade(batch), setup=create_batch, repeat=3)
+    assert success, message
+
+
+def bench_delete_dishes_cascade(bench, db):
+    """Удаление 50 блюд без заказов (отчет о зависимостях + удаление)"""
+    dish_ids = []
+
+    def create_dishes():
+        dish_ids[:] = _create_restaurant_with_dishes(db, 50)['dish_ids']
+
+    success, message = bench(lambda: db.delete_dishes_cascade(dish_ids), setup=create_dishes, repeat=3)
+    assert success, message
+
+
+def bench_delete_restaurants_cascade(bench, db):
+    """Удаление 5 ресторанов по 10 блюд без заказов"""
+    restaurant_ids = []
+
+    def create_restaurants():
+        restaurant_ids[:] = [_create_restaurant_with_dishes(db, 10)['restaurant_id'] for _ in range(5)]
+
+    success, message = bench(lambda: db.delete_restaurants_cascade(restaurant_ids), setup=create_restaurants, repeat=3)
+    assert success, message
+
+
+def bench_import_file(bench, db, tmp_path):
+    counter = itertools.count()
+
+    def write_file():
+        batch = next(counter)
+        rows = [{'phone_number': f'+7000{batch:03d}{i:05d}', 'first_name': 'Импорт', 'last_name': str(i)}
+                for i in range(10_000)]
+        with open(tmp_path / 'customers.json', 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False)
+
+    reports = bench(db.import_file, str(tmp_path / 'customers.json'), setup=write_file, repeat=3)
+    assert reports[0].inserted == 10_000
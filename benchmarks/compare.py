@@ -0,0 +1,42 @@
+"""
+Сравнение двух прогонов бенчмарков
+
+    python benchmarks/compare.py benchmarks/results/old.json benchmarks/results/latest.json
+"""
+
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    return report['meta'], {(r['group'], r['name']): r for r in report['results']}
+
+
+def main(argv):
+    if len(argv) != 3:
+        print(__doc__.strip())
+        return 2
+
+    base_meta, base = load(argv[1])
+    new_meta, new = load(argv[2])
+    print(f"База: {base_meta.get('git_revision')} ({base_meta.get('orders')} заказов), "
+          f"новый: {new_meta.get('git_revision')} ({new_meta.get('orders')} заказов)")
+    print(f"{'группа':<18} {'бенчмарк':<45} {'было, мс':>10} {'стало, мс':>10} {'изм.':>8}")
+
+    for key in sorted(set(base) | set(new)):
+        old_ms = base.get(key, {}).get('median_ms')
+        new_ms = new.get(key, {}).get('median_ms')
+        if old_ms and new_ms:
+            change = f"{(new_ms - old_ms) / old_ms * 100:+.1f}%"
+        else:
+            change = 'н/д'
+        print(f"{key[0]:<18} {key[1]:<45} "
+              f"{old_ms if old_ms is not None else float('nan'):>10.2f} "
+              f"{new_ms if new_ms is not None else float('nan'):>10.2f} {change:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
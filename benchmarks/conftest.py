@@ -0,0 +1,162 @@
+"""
+Общие фикстуры бенчмарков слоя данных
+
+База SQLite генерируется один раз (src/database/datagen.py) и кэшируется в
+benchmarks/.data; каждый прогон работает с копией. Результаты сохраняются в
+benchmarks/results/<время>.json, сравнение прогонов - benchmarks/compare.py.
+
+Переменные окружения:
+    BENCH_ORDERS  - число заказов в базе (по умолчанию 200000)
+    BENCH_SEED    - seed генератора (по умолчанию 42)
+    BENCH_REPEAT  - число замеров каждого метода (по умолчанию 5)
+"""
+
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+BENCH_ORDERS = int(os.getenv('BENCH_ORDERS', '200000'))
+BENCH_SEED = int(os.getenv('BENCH_SEED', '42'))
+BENCH_REPEAT = int(os.getenv('BENCH_REPEAT', '5'))
+DATA_DIR = os.getenv('BENCH_DATA_DIR', os.path.join(BENCH_DIR, '.data'))
+RESULTS_DIR = os.getenv('BENCH_RESULTS_DIR', os.path.join(BENCH_DIR, 'results'))
+
+# Фиксированная "текущая" дата генератора: база одинакова между прогонами
+BENCH_NOW = datetime(2026, 1, 1, 12)
+
+_results = []
+
+
+def _generate_pristine_database() -> str:
+    """Путь к эталонной базе (генерируется при первом запуске)"""
+    path = os.path.join(DATA_DIR, f'bench_s{BENCH_SEED}_o{BENCH_ORDERS}.db')
+    marker = path + '.ok'
+    if os.path.exists(path) and os.path.exists(marker):
+        return path
+
+    from src.database.datagen import generate_sqlite_database
+    from src.sync_database import SyncDatabaseManager
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    for stale in (path, marker):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    generate_sqlite_database(path, seed=BENCH_SEED, orders=BENCH_ORDERS, now=BENCH_NOW)
+    SyncDatabaseManager.close()
+    open(marker, 'w').close()
+    return path
+
+
+@pytest.fixture(scope='session')
+def bench_db_path(tmp_path_factory):
+    """Копия эталонной базы для текущего прогона (бенчмарки записи ее меняют)"""
+    path = tmp_path_factory.mktemp('bench') / 'bench.db'
+    shutil.copyfile(_generate_pristine_database(), path)
+    return str(path)
+
+
+class Bench:
+    """Замер времени выполнения функции с сохранением результата"""
+
+    def __init__(self, group: str, name: str):
+        self.group = group
+        self.name = name
+
+    def __call__(self, func, *args, repeat: int = None, warmup: int = 1, setup=None, **kwargs):
+        repeat = repeat or BENCH_REPEAT
+
+        for _ in range(warmup):
+            if setup:
+                setup()
+            func(*args, **kwargs)
+
+        timings = []
+        result = None
+        for _ in range(repeat):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            result = func(*args, **kwargs)
+            timings.append(time.perf_counter() - started)
+
+        _results.append({
+            'group': self.group,
+            'name': self.name,
+            'repeat': repeat,
+            'min_ms': min(timings) * 1000,
+            'median_ms': statistics.median(timings) * 1000,
+            'mean_ms': statistics.mean(timings) * 1000,
+            'max_ms': max(timings) * 1000,
+        })
+        return result
+
+
+@pytest.fixture
+def bench(request):
+    """Фикстура замера: bench(func, *args, setup=..., repeat=...)"""
+    return Bench(request.module.__name__.replace('bench_', ''), request.node.name)
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        return ''
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Сохранение результатов прогона на диск"""
+    if not _results:
+        return
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    started = datetime.now().strftime('%Y%m%d_%H%M%S')
+    report = {
+        'meta': {
+            'timestamp': started,
+            'git_revision': _git_revision(),
+            'orders': BENCH_ORDERS,
+            'seed': BENCH_SEED,
+            'repeat': BENCH_REPEAT,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+        },
+        'results': _results,
+    }
+
+    path = os.path.join(RESULTS_DIR, f'{started}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    shutil.copyfile(path, os.path.join(RESULTS_DIR, 'latest.json'))
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Таблица результатов в конце прогона"""
+    if not _results:
+        return
+
+    terminalreporter.section(f"Бенчмарки ({BENCH_ORDERS} заказов, медиана из {BENCH_REPEAT})")
+    for result in _results:
+        terminalreporter.write_line(
+            f"{result['group']:<18} {result['name']:<45} {result['median_ms']:>10.2f} мс"
+        )
+    terminalreporter.write_line(f"Результаты сохранены в {RESULTS_DIR}")
@@ -0,0 +1,3 @@
+"""
+Сервер данных для нескольких клиентов и его клиент
+"""
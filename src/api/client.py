@@ -0,0 +1,77 @@
+"""
+Клиент сервера данных (src/api/server.py)
+
+Блокирующий клиент для тонких клиентов и нагрузочного тестирования: один
+запрос за раз на соединение, для параллельных запросов нужен клиент на поток.
+"""
+
+import collections
+import itertools
+import socket
+import threading
+from typing import Any, Deque, Dict, Optional
+
+from src.api.protocol import ApiError, decode, encode
+
+
+class ApiClient:
+    """Соединение с сервером данных"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, path: Optional[str] = None,
+                 timeout: Optional[float] = 30.0):
+        if path:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(timeout)
+            self._socket.connect(path)
+        else:
+            self._socket = socket.create_connection((host, port), timeout=timeout)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._socket.makefile('rb')
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # События, пришедшие между ответами (после subscribe)
+        self.events: Deque[Dict[str, Any]] = collections.deque(maxlen=10000)
+
+    def call(self, method: str, *args, **kwargs) -> Any:
+        """Вызов метода сервера; ApiError при ошибке на сервере"""
+        if args and kwargs:
+            raise ValueError("Передайте аргументы либо по порядку, либо по имени")
+        request_id = next(self._ids)
+        with self._lock:
+            self._socket.sendall(encode({'id': request_id, 'method': method, 'params': kwargs or list(args)}))
+            while True:
+                message = self._read()
+                if 'event' in message:
+                    self.events.append(message)
+                    continue
+                if message.get('id') != request_id:
+                    continue
+                if 'error' in message:
+                    raise ApiError(message['error']['type'], message['error']['message'])
+                return message['result']
+
+    def wait_event(self) -> Dict[str, Any]:
+        """Следующее событие (сначала уже полученные)"""
+        with self._lock:
+            if self.events:
+                return self.events.popleft()
+            while True:
+                message = self._read()
+                if 'event' in message:
+                    return message
+
+    def _read(self) -> Dict[str, Any]:
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Сервер закрыл соединение")
+        return decode(line)
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self) -> 'ApiClient':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
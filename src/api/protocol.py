@@ -0,0 +1,80 @@
+"""
+Протокол сервера данных: JSON, одна строка на сообщение
+
+Запрос:   {"id": 1, "method": "get_order_full", "params": {"order_id": 5}}
+Ответ:    {"id": 1, "result": {...}}
+Ошибка:   {"id": 1, "error": {"type": "ValueError", "message": "..."}}
+Событие:  {"event": "OrdersCreated", "data": {...}}
+
+params - словарь именованных или список позиционных аргументов метода.
+Ответы на запросы одного соединения могут приходить не по порядку: клиент
+сопоставляет их по id. События приходят только после вызова subscribe.
+"""
+
+import dataclasses
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from src.database.records import ResultSet, Row
+
+# Наибольшая длина строки сообщения
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+class ApiError(Exception):
+    """Ошибка вызова метода сервера (тип и текст исключения на сервере)"""
+
+    def __init__(self, type_name: str, message: str):
+        super().__init__(f"{type_name}: {message}")
+        self.type_name = type_name
+        self.message = message
+
+
+def json_default(value: Any) -> Any:
+    """Значения, которые json не сериализует сам"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, ResultSet):
+        # Компактно: имена столбцов один раз, строки - массивами
+        return {'columns': list(value.columns), 'rows': value.rows}
+    if isinstance(value, Row):
+        return dict(value)
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+
+def encode(message: Dict[str, Any]) -> bytes:
+    """Сообщение - строка JSON с переводом строки"""
+    return json.dumps(message, ensure_ascii=False, default=json_default, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def decode(line: bytes) -> Dict[str, Any]:
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError("Сообщение должно быть объектом JSON")
+    return message
+
+
+def error_message(request_id: Optional[Any], error: BaseException) -> Dict[str, Any]:
+    return {'id': request_id, 'error': {'type': type(error).__name__, 'message': str(error)}}
+
+
+def event_message(event) -> Dict[str, Any]:
+    """Событие изменения данных (src/database/events.py) для клиентов"""
+    data = dataclasses.asdict(event)
+    data['tables'] = list(event.tables)
+    return {'event': type(event).__name__, 'data': data}
+
+
+def result_rows(result: Dict[str, Any]) -> ResultSet:
+    """ResultSet из ответа ({'columns': [...], 'rows': [[...], ...]})"""
+    return ResultSet(result['columns'], [tuple(row) for row in result['rows']])
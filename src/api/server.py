@@ -0,0 +1,240 @@
+"""
+Сервер данных: операции с заказами, каталогом и аналитикой по локальному сокету
+
+Все клиенты работают через один процесс: один пул соединений с БД (общий
+движок), общие кэши запросов и деталей заказов, общая очередь групповой
+фиксации заказов. Методы SyncDatabaseManager выполняются в потоках
+исполнителя движка (DatabaseEngine.run), цикл событий только читает и
+пишет сообщения. Протокол описан в src/api/protocol.py.
+"""
+
+import asyncio
+import logging
+import socket
+from typing import Any, Callable, Dict, Optional, Set
+
+from src.api.protocol import MAX_MESSAGE_BYTES, decode, encode, error_message, event_message
+from src.database.engine import DatabaseEngine
+from src.database.events import DataEvent, event_bus
+from src.database.write_queue import order_write_queue
+from src.sync_database import SyncDatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+def _create_orders(orders):
+    # Ошибки отдельных заказов передаются описанием, а не исключением
+    results = SyncDatabaseManager.create_orders(orders)
+    return [
+        error_message(None, result)['error'] if isinstance(result, Exception) else result
+        for result in results
+    ]
+
+
+def _transition_orders(order_ids, from_status, to_status, versions=None):
+    # Ключи объектов JSON - строки
+    if versions is not None:
+        versions = {int(order_id): version for order_id, version in versions.items()}
+    return SyncDatabaseManager.transition_orders(order_ids, from_status, to_status, versions)
+
+
+# Методы, доступные клиентам
+METHODS: Dict[str, Callable[..., Any]] = {
+    # Заказы
+    'create_orders': _create_orders,
+    'transition_orders': _transition_orders,
+    'complete_delivery': SyncDatabaseManager.complete_delivery,
+    'get_order_full': SyncDatabaseManager.get_order_full,
+    'get_customer_orders_page': SyncDatabaseManager.get_customer_orders_page,
+    'get_orders_changed_since': SyncDatabaseManager.get_orders_changed_since,
+    'delete_orders_cascade': SyncDatabaseManager.delete_orders_cascade,
+    # Каталог и справочники
+    'get_all': SyncDatabaseManager.get_all,
+    'get_record': SyncDatabaseManager.get_record,
+    'create_record': SyncDatabaseManager.create_record,
+    'update_record': SyncDatabaseManager.update_record,
+    'delete_record': SyncDatabaseManager.delete_record,
+    'get_dishes_by_restaurant': SyncDatabaseManager.get_dishes_by_restaurant,
+    'search_dishes': SyncDatabaseManager.search_dishes,
+    'search_customers': SyncDatabaseManager.search_customers,
+    'search_restaurants': SyncDatabaseManager.search_restaurants,
+    'get_dependency_report': SyncDatabaseManager.get_dependency_report,
+    # Аналитика
+    'get_orders_statistics': SyncDatabaseManager.get_orders_statistics,
+    'get_popular_dishes': SyncDatabaseManager.get_popular_dishes,
+    'get_order_timeseries': SyncDatabaseManager.get_order_timeseries,
+    'get_analytics': SyncDatabaseManager.get_analytics,
+}
+
+
+class ClientSession:
+    """Соединение клиента: запись ответов по одному сообщению"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.peer = writer.get_extra_info('peername') or writer.get_extra_info('sockname')
+        self.subscribed = False
+        self._write_lock = asyncio.Lock()
+
+    async def send(self, message: Dict[str, Any]):
+        data = encode(message)
+        async with self._write_lock:
+            self.writer.write(data)
+            await self.writer.drain()
+
+
+class ApiServer:
+    """Сервер JSON-сообщений по TCP (localhost) или Unix-сокету"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, path: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.path = path
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sessions: Set[ClientSession] = set()
+        self._unsubscribe: Optional[Callable[[], None]] = None
+        self._stats = {'connections': 0, 'requests': 0, 'errors': 0}
+
+    @property
+    def address(self) -> str:
+        return self.path or f"{self.host}:{self.port}"
+
+    async def start(self):
+        """Открытие сокета; при port=0 порт выбирается системой"""
+        self._loop = asyncio.get_running_loop()
+        if self.path:
+            self._server = await asyncio.start_unix_server(self._handle_client, self.path, limit=MAX_MESSAGE_BYTES)
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_client, self.host, self.port, limit=MAX_MESSAGE_BYTES
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+        self._unsubscribe = event_bus.subscribe(DataEvent, self._on_event)
+        logger.info(f"Сервер данных слушает {self.address}")
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        """Закрытие сокета и соединений клиентов"""
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for session in list(self._sessions):
+            session.writer.close()
+        logger.info("Сервер данных остановлен")
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats, clients=len(self._sessions), write_queue=order_write_queue.stats())
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = ClientSession(reader, writer)
+        sock = writer.get_extra_info('socket')
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sessions.add(session)
+        self._stats['connections'] += 1
+        logger.debug(f"Клиент подключен: {session.peer}")
+
+        tasks: Set[asyncio.Task] = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    await session.send(error_message(None, ValueError("Слишком длинное сообщение")))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                # Запросы соединения выполняются параллельно, ответы - по готовности
+                task = asyncio.create_task(self._dispatch(session, line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self._sessions.discard(session)
+            writer.close()
+            logger.debug(f"Клиент отключен: {session.peer}")
+
+    async def _dispatch(self, session: ClientSession, line: bytes):
+        request_id = None
+        try:
+            request = decode(line)
+            request_id = request.get('id')
+            self._stats['requests'] += 1
+            result = await self._call(session, request.get('method'), request.get('params') or {})
+            response = {'id': request_id, 'result': result}
+        except Exception as e:
+            self._stats['errors'] += 1
+            logger.debug(f"Ошибка запроса {request_id} от {session.peer}: {str(e)}")
+            response = error_message(request_id, e)
+        try:
+            await session.send(response)
+        except ConnectionError:
+            pass
+        except TypeError as e:
+            logger.error(f"Ответ на запрос {request_id} не сериализуется: {str(e)}")
+            await session.send(error_message(request_id, e))
+
+    async def _call(self, session: ClientSession, method: str, params) -> Any:
+        # Служебные методы выполняются в цикле событий
+        if method == 'ping':
+            return 'pong'
+        if method == 'methods':
+            return sorted(list(METHODS) + ['create_order', 'subscribe', 'unsubscribe', 'stats', 'ping'])
+        if method == 'subscribe':
+            session.subscribed = True
+            return True
+        if method == 'unsubscribe':
+            session.subscribed = False
+            return True
+        if method == 'stats':
+            return self.stats()
+
+        args, kwargs = ((), params) if isinstance(params, dict) else (params, {})
+        if method == 'create_order':
+            return await self._create_order(*args, **kwargs)
+        func = METHODS.get(method)
+        if func is None:
+            raise LookupError(f"Неизвестный метод: {method}")
+        return await DatabaseEngine.run(func, *args, **kwargs)
+
+    async def _create_order(self, customer_id, dish_quantities, courier_id=None) -> int:
+        """Заказ через очередь групповой фиксации без занятия потока на время ожидания пакета"""
+        dish_quantities = [tuple(item) for item in dish_quantities]
+        if not order_write_queue.enabled:
+            return await DatabaseEngine.run(SyncDatabaseManager.create_order, customer_id, dish_quantities, courier_id)
+        return await asyncio.wrap_future(order_write_queue.submit(customer_id, dish_quantities, courier_id))
+
+    def _on_event(self, event: DataEvent):
+        # Вызывается в потоке, выполнившем запись: рассылка - в цикле событий
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._broadcast, event)
+
+    def _broadcast(self, event: DataEvent):
+        subscribers = [session for session in self._sessions if session.subscribed]
+        if not subscribers:
+            return
+        message = event_message(event)
+        for session in subscribers:
+            asyncio.ensure_future(self._send_event(session, message))
+
+    async def _send_event(self, session: ClientSession, message: Dict[str, Any]):
+        try:
+            await session.send(message)
+        except ConnectionError:
+            self._sessions.discard(session)
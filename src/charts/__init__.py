@@ -0,0 +1,7 @@
+"""
+Графики: описания (ChartSpec) и их отрисовка без графического интерфейса
+
+Дашборд и отчеты строят одни и те же описания графиков (dashboard.py), а
+отрисовка в PNG (renderer.py) кэшируется по хэшу описания: одинаковый
+график не рисуется дважды.
+"""
@@ -0,0 +1,78 @@
+"""
+Графики дашборда: описания по данным SyncDatabaseManager
+
+Используются и панелью управления, и экспортом графиков в отчеты
+(python -m src.cli charts), поэтому картинки совпадают и берутся из
+общего кэша отрисовки.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.charts.specs import BAR, BARH, DARK_STYLE, PIE, ChartSpec, ChartStyle
+
+# Оценки ресторанов: порог, цвет и подпись легенды
+RATING_GRADES = (
+    (4.5, '#4CAF50', 'Отлично (4.5+)'),
+    (4.0, '#2196F3', 'Хорошо (4.0-4.5)'),
+    (3.5, '#FF9800', 'Удовлетворительно (3.5-4.0)'),
+    (float('-inf'), '#F44336', 'Плохо (<3.5)'),
+)
+
+
+def _shorten(name: str, length: int) -> str:
+    return name[:length] + '...' if len(name) > length else name
+
+
+def rating_color(rating: float) -> str:
+    return next(color for threshold, color, _ in RATING_GRADES if rating >= threshold)
+
+
+def orders_by_status_chart(status_counts: Dict[str, int], style: ChartStyle = DARK_STYLE) -> ChartSpec:
+    """Распределение заказов по статусам (get_orders_statistics()['status_counts'])"""
+    return ChartSpec(
+        kind=PIE,
+        labels=tuple(status_counts),
+        values=tuple(status_counts.values()),
+        title='Распределение заказов по статусам',
+        value_format='{:.1f}%',
+        legend_title='Статусы',
+        empty_text='Нет данных о заказах',
+        style=style,
+    )
+
+
+def popular_dishes_chart(dishes: Iterable[Tuple[str, int]], style: ChartStyle = DARK_STYLE) -> ChartSpec:
+    """Топ блюд: пары (название, количество заказов)"""
+    dishes = list(dishes)
+    return ChartSpec(
+        kind=BAR,
+        labels=tuple(_shorten(name, 20) for name, _ in dishes),
+        values=tuple(count for _, count in dishes),
+        title='Топ-5 популярных блюд',
+        xlabel='Блюда',
+        ylabel='Количество заказов',
+        value_format='{:g}',
+        empty_text='Нет данных о заказах блюд' if dishes else 'Нет данных о популярных блюдах',
+        style=style,
+    )
+
+
+def restaurant_ratings_chart(restaurants: Iterable[Tuple[str, Optional[float]]], limit: int = 5,
+                             style: ChartStyle = DARK_STYLE) -> ChartSpec:
+    """Лучшие рестораны по рейтингу: пары (название, рейтинг), без рейтинга не показываются"""
+    rated = sorted(((name, float(rating)) for name, rating in restaurants if rating is not None),
+                   key=lambda item: item[1], reverse=True)[:limit]
+    return ChartSpec(
+        kind=BARH,
+        labels=tuple(_shorten(name, 25) for name, _ in rated),
+        values=tuple(rating for _, rating in rated),
+        colors=tuple(rating_color(rating) for _, rating in rated),
+        title='Рейтинги ресторанов',
+        xlabel='Рейтинг',
+        value_format='{:.2f}',
+        value_range=(0, 5),
+        legend=tuple((color, label) for _, color, label in RATING_GRADES),
+        empty_text='Нет данных о рейтингах ресторанов',
+        style=style,
+        width=1600,
+    )
@@ -0,0 +1,228 @@
+"""
+Отрисовка графиков в PNG (matplotlib, Agg) с кэшем по хэшу описания
+
+Рисует объектный API matplotlib (Figure + FigureCanvasAgg) без pyplot и
+без Qt, поэтому работает в фоновых потоках, в сервере и в командной
+строке. matplotlib импортируется при первой отрисовке. Отрисовки идут по
+одной (matplotlib не рассчитан на параллельную работу потоков), а запросы
+одного и того же графика во время отрисовки ждут ее результата.
+
+Кэш в памяти - LRU по объему PNG; с CHART_CACHE_DIR картинки сохраняются
+еще и в каталог, общий для приложения и командной строки.
+"""
+
+import io
+import logging
+import os
+import threading
+import warnings
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+
+from src.charts.specs import BAR, BARH, PIE, ChartSpec
+from src.database.query_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def _style_axes(ax, spec: ChartSpec):
+    style = spec.style
+    ax.set_facecolor(style.background)
+    ax.tick_params(colors=style.foreground, labelsize=10)
+    for spine in ax.spines.values():
+        spine.set_color(style.grid)
+    if spec.title:
+        ax.set_title(spec.title, color=style.foreground, fontsize=14, fontweight='bold', pad=20)
+    if spec.xlabel:
+        ax.set_xlabel(spec.xlabel, color=style.foreground, fontsize=12, fontweight='bold')
+    if spec.ylabel:
+        ax.set_ylabel(spec.ylabel, color=style.foreground, fontsize=12, fontweight='bold')
+
+
+def _draw_pie(ax, spec: ChartSpec):
+    foreground = spec.style.foreground
+    wedges, texts, autotexts = ax.pie(
+        spec.values,
+        labels=spec.labels,
+        colors=[spec.color(i) for i in range(len(spec.values))],
+        autopct=lambda percent: spec.value_format.format(percent),
+        startangle=90,
+        textprops={'color': foreground, 'fontsize': 10}
+    )
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+    for text in texts:
+        text.set_fontsize(11)
+    ax.axis('equal')
+    # Место справа под легенду
+    ax.figure.subplots_adjust(left=0.02, right=0.72)
+    if spec.title:
+        ax.set_title(spec.title, color=foreground, fontsize=14, fontweight='bold', pad=20)
+
+    legend = ax.legend(wedges, spec.labels, title=spec.legend_title or None, loc='center left',
+                       bbox_to_anchor=(1, 0, 0.5, 1), fontsize=10,
+                       facecolor=spec.style.background, labelcolor=foreground)
+    legend.get_title().set_color(foreground)
+    legend.get_title().set_fontweight('bold')
+
+
+def _draw_bars(ax, spec: ChartSpec):
+    foreground = spec.style.foreground
+    colors = [spec.color(i) for i in range(len(spec.values))]
+    positions = range(len(spec.values))
+
+    if spec.kind == BARH:
+        bars = ax.barh(positions, spec.values, color=colors, alpha=0.8, edgecolor='white', linewidth=1, height=0.7)
+        ax.set_yticks(positions)
+        ax.set_yticklabels(spec.labels, fontsize=11)
+        # Первое значение - сверху
+        ax.invert_yaxis()
+        if spec.value_range:
+            ax.set_xlim(*spec.value_range)
+        offset = (spec.value_range[1] - spec.value_range[0]) / 50 if spec.value_range else 0
+        for bar, value in zip(bars, spec.values):
+            ax.text(bar.get_width() + offset, bar.get_y() + bar.get_height() / 2., spec.value_format.format(value),
+                    ha='left', va='center', color=foreground, fontweight='bold', fontsize=11)
+        ax.grid(True, alpha=0.3, color=spec.style.grid, axis='x')
+    else:
+        bars = ax.bar(positions, spec.values, color=colors, alpha=0.8, edgecolor='white', linewidth=1)
+        ax.set_xticks(positions)
+        ax.set_xticklabels(spec.labels, rotation=45, ha='right')
+        if spec.value_range:
+            ax.set_ylim(*spec.value_range)
+        for bar, value in zip(bars, spec.values):
+            ax.text(bar.get_x() + bar.get_width() / 2., bar.get_height(), spec.value_format.format(value),
+                    ha='center', va='bottom', color=foreground, fontweight='bold', fontsize=11)
+        ax.grid(True, alpha=0.3, color=spec.style.grid)
+    ax.set_axisbelow(True)
+
+    if spec.legend:
+        from matplotlib.patches import Patch
+        handles = [Patch(facecolor=color, alpha=0.8, label=label) for color, label in spec.legend]
+        ax.legend(handles=handles, loc='lower right', fontsize=10, framealpha=0.9,
+                  facecolor=spec.style.background, labelcolor=foreground)
+
+
+def render_png(spec: ChartSpec) -> bytes:
+    """Отрисовка графика в PNG размером spec.width x spec.height пикселей"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(spec.width / spec.dpi, spec.height / spec.dpi), dpi=spec.dpi)
+    FigureCanvasAgg(figure)
+    figure.patch.set_facecolor(spec.style.background)
+    ax = figure.add_subplot()
+
+    if spec.is_empty:
+        ax.set_facecolor(spec.style.background)
+        ax.set_axis_off()
+        ax.text(0.5, 0.5, spec.empty_text, ha='center', va='center', color=spec.style.foreground,
+                fontsize=12, transform=ax.transAxes)
+    elif spec.kind == PIE:
+        _draw_pie(ax, spec)
+    elif spec.kind in (BAR, BARH):
+        _style_axes(ax, spec)
+        _draw_bars(ax, spec)
+    else:
+        raise ValueError(f"Неизвестный вид графика: {spec.kind}")
+
+    if spec.kind != PIE:
+        # В маленьком виджете подписи могут не поместиться: это не ошибка
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            figure.tight_layout()
+    output = io.BytesIO()
+    figure.savefig(output, format='png', dpi=spec.dpi, facecolor=spec.style.background)
+    return output.getvalue()
+
+
+class ChartRenderer:
+    """Отрисовка графиков с кэшем PNG по хэшу описания"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, cache_dir: Optional[str] = None):
+        self.cache = LRUCache(max_bytes=max_bytes)
+        self.cache_dir = cache_dir
+        self._render_lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._pending_lock = threading.Lock()
+        self.renders = 0
+        self.disk_hits = 0
+
+    def cached(self, spec: ChartSpec) -> Optional[bytes]:
+        """Готовая картинка из памяти (без отрисовки и чтения с диска)"""
+        return self.cache.get(spec.key)
+
+    def render(self, spec: ChartSpec) -> bytes:
+        """PNG графика: из кэша или отрисовкой (потокобезопасно)"""
+        key = spec.key
+        png = self.cache.get(key)
+        if png is not None:
+            return png
+
+        with self._pending_lock:
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = self._pending[key] = Future()
+        if not owner:
+            # Этот же график уже рисуется в другом потоке
+            return future.result()
+
+        try:
+            png = self._load(key)
+            if png is None:
+                with self._render_lock:
+                    png = render_png(spec)
+                    self.renders += 1
+                self._store(key, png)
+            self.cache.set(key, png, size=len(png))
+            future.set_result(png)
+            return png
+        except Exception as e:
+            logger.error(f"Ошибка отрисовки графика '{spec.title}': {str(e)}")
+            future.set_exception(e)
+            raise
+        finally:
+            with self._pending_lock:
+                self._pending.pop(key, None)
+
+    def save(self, spec: ChartSpec, path: str) -> str:
+        """Сохранение графика в файл PNG (для отчетов)"""
+        with open(path, 'wb') as output:
+            output.write(self.render(spec))
+        return path
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def _load(self, key: str) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), 'rb') as source:
+                png = source.read()
+        except OSError:
+            return None
+        self.disk_hits += 1
+        return png
+
+    def _store(self, key: str, png: bytes):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Запись через временный файл: другой процесс не прочитает половину картинки
+            temporary = f"{self._path(key)}.{os.getpid()}.tmp"
+            with open(temporary, 'wb') as output:
+                output.write(png)
+            os.replace(temporary, self._path(key))
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить график в кэш {self.cache_dir}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.cache.stats(), renders=self.renders, disk_hits=self.disk_hits)
+
+
+# Глобальный отрисовщик графиков
+chart_renderer = ChartRenderer(cache_dir=os.getenv('CHART_CACHE_DIR') or None)
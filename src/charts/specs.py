@@ -0,0 +1,73 @@
+"""
+Описание графика: данные и оформление без привязки к способу отрисовки
+"""
+
+import dataclasses
+import hashlib
+import json
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Optional, Tuple
+
+PIE = 'pie'
+BAR = 'bar'
+BARH = 'barh'
+
+# Цвета рядов по умолчанию
+PALETTE = ('#4CAF50', '#2196F3', '#FF9800', '#F44336', '#9C27B0', '#00BCD4', '#E91E63')
+
+
+@dataclass(frozen=True)
+class ChartStyle:
+    """Цвета фона, текста и сетки"""
+    background: str = '#2b2b2b'
+    foreground: str = 'white'
+    grid: str = 'gray'
+
+
+DARK_STYLE = ChartStyle()
+LIGHT_STYLE = ChartStyle(background='white', foreground='#222222', grid='#bbbbbb')
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    """
+    График: вид (PIE, BAR, BARH), подписи и значения, оформление и размер
+    в пикселях. Одинаковые описания дают одинаковую картинку, поэтому
+    хэш описания (key) - ключ кэша отрисовки.
+    """
+    kind: str
+    labels: Tuple[str, ...]
+    values: Tuple[float, ...]
+    colors: Tuple[str, ...] = PALETTE
+    title: str = ''
+    xlabel: str = ''
+    ylabel: str = ''
+    # Формат подписей значений (для круговой диаграммы - доли в процентах)
+    value_format: str = '{:g}'
+    # Пределы оси значений
+    value_range: Optional[Tuple[float, float]] = None
+    # Легенда: пары (цвет, подпись); у круговой диаграммы - по подписям секторов
+    legend: Tuple[Tuple[str, str], ...] = ()
+    legend_title: str = ''
+    empty_text: str = 'Нет данных'
+    style: ChartStyle = field(default=DARK_STYLE)
+    width: int = 800
+    height: int = 600
+    dpi: int = 100
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.values or not any(self.values)
+
+    def color(self, index: int) -> str:
+        return self.colors[index % len(self.colors)] if self.colors else PALETTE[index % len(PALETTE)]
+
+    def with_size(self, width: int, height: int, dpi: int = 100) -> 'ChartSpec':
+        return dataclasses.replace(self, width=max(int(width), 1), height=max(int(height), 1), dpi=dpi)
+
+    @cached_property
+    def key(self) -> str:
+        """Хэш описания (данные, оформление и размер)"""
+        payload = json.dumps(dataclasses.asdict(self), ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
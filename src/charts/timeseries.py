@@ -0,0 +1,97 @@
+"""
+Прореживание временных рядов до ширины графика
+
+Ряд из десятков тысяч точек на графике шириной в тысячу пикселей рисуется
+не быстрее и не точнее, чем из тысячи: лишние точки ложатся в те же
+пиксели. Перед отрисовкой ряд сокращается до числа точек порядка ширины:
+
+- lttb (Largest-Triangle-Three-Buckets) сохраняет форму линии: из каждой
+  группы точек берется та, что дает наибольший треугольник с соседними
+  выбранными точками, поэтому пики и провалы не теряются;
+- minmax_buckets оставляет минимум и максимум каждой группы (огибающая
+  ряда) - для рядов с резкими всплесками.
+
+Точки - пары (x, y) с возрастающим x.
+"""
+
+from typing import List, Sequence, Tuple
+
+Point = Tuple[float, float]
+
+LTTB = 'lttb'
+MINMAX = 'minmax'
+
+
+def lttb(points: Sequence[Point], threshold: int) -> List[Point]:
+    """Не больше threshold точек ряда с сохранением формы линии"""
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    # Первая и последняя точки сохраняются, остальные делятся на threshold - 2 групп
+    step = (count - 2) / (threshold - 2)
+    selected = 0
+    for group in range(threshold - 2):
+        start = int(group * step) + 1
+        end = int((group + 1) * step) + 1
+
+        # Следующая группа представлена средней точкой
+        next_end = min(int((group + 2) * step) + 1, count)
+        next_points = points[end:next_end] or points[-1:]
+        average_x = sum(x for x, _ in next_points) / len(next_points)
+        average_y = sum(y for _, y in next_points) / len(next_points)
+
+        selected_x, selected_y = points[selected]
+        best_area = -1.0
+        best = start
+        for index in range(start, end):
+            x, y = points[index]
+            area = abs((selected_x - average_x) * (y - selected_y) - (selected_x - x) * (average_y - selected_y))
+            if area > best_area:
+                best_area = area
+                best = index
+        sampled.append(points[best])
+        selected = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def minmax_buckets(points: Sequence[Point], buckets: int) -> List[Point]:
+    """Минимум и максимум каждой из buckets равных по x групп (не больше 2 * buckets точек)"""
+    count = len(points)
+    if count <= 2 * buckets or buckets < 1:
+        return list(points)
+
+    first_x = points[0][0]
+    width = (points[-1][0] - first_x) / buckets or 1.0
+    sampled: List[Point] = []
+    group: List[Point] = []
+    current = 0
+    for point in points:
+        index = min(int((point[0] - first_x) / width), buckets - 1)
+        if index != current and group:
+            sampled.extend(_extremes(group))
+            group = []
+        current = index
+        group.append(point)
+    if group:
+        sampled.extend(_extremes(group))
+    return sampled
+
+
+def _extremes(group: List[Point]) -> List[Point]:
+    low = min(group, key=lambda point: point[1])
+    high = max(group, key=lambda point: point[1])
+    if low is high:
+        return [low]
+    # Порядок по x, чтобы линия не шла назад
+    return [low, high] if low[0] <= high[0] else [high, low]
+
+
+def downsample(points: Sequence[Point], width: int, method: str = LTTB) -> List[Point]:
+    """Ряд для графика шириной width пикселей"""
+    if method == MINMAX:
+        return minmax_buckets(points, max(width // 2, 1))
+    return lttb(points, max(width, 3))
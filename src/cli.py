@@ -0,0 +1,293 @@
+"""
+Командная строка для отчетов и обслуживания базы (без графического интерфейса)
+
+Не импортирует PyQt6 и matplotlib и не требует файла .env: настройки БД
+берутся из переменных окружения (или .env, если он есть) либо из --sqlite.
+Подходит для запуска по расписанию (cron) на серверах без дисплея.
+
+Запуск:
+    python -m src.cli report statistical --output stats.json
+    python -m src.cli report analytical --format csv --output reports/
+    python -m src.cli export Orders OrderItems --output export/
+    python -m src.cli import customers.csv --entity customers
+    python -m src.cli rollup
+    python -m src.cli analytics --period month --analysis customers --by category
+    python -m src.cli charts --output charts/ --style light
+    python -m src.cli bench -k orders
+
+Код возврата: 0 - успешно, 1 - ошибка, 2 - часть запросов отчета не выполнилась.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Iterable, List, Optional, Sequence
+
+# Корень проекта в sys.path, чтобы можно было импортировать модули из src
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+logger = logging.getLogger('src.cli')
+
+# Каталоги запросов src/database/queries.py
+REPORT_CATALOGS = {
+    'statistical': 'statistical_queries',
+    'detailed': 'detailed_queries',
+    'analytical': 'analytical_queries',
+    'dashboard': 'dashboard_queries',
+}
+
+
+def _init_db(args):
+    from src.sync_database import SyncDatabaseManager
+    from src.utils.config import get_db_config
+
+    db_config = {'type': 'sqlite', 'database': args.sqlite} if args.sqlite else get_db_config()
+    SyncDatabaseManager.init_db(db_config)
+    return SyncDatabaseManager
+
+
+def _open_output(path: str):
+    if path == '-':
+        return sys.stdout
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def _write_json(path: str, data: Any):
+    from src.api.protocol import json_default
+
+    output = _open_output(path)
+    try:
+        json.dump(data, output, ensure_ascii=False, indent=2, default=json_default)
+        output.write('\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def _write_csv(path: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]):
+    output = _open_output(path)
+    try:
+        writer = csv.writer(output)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def command_report(args) -> int:
+    """Отчет по каталогу запросов: JSON одним файлом или CSV по запросу"""
+    from src.database import queries as query_catalogs
+
+    catalog = getattr(query_catalogs, REPORT_CATALOGS[args.catalog])
+    if args.query:
+        unknown = [name for name in args.query if name not in catalog]
+        if unknown:
+            print(f"Неизвестные запросы каталога {args.catalog}: {', '.join(unknown)}", file=sys.stderr)
+            return 1
+        catalog = {name: catalog[name] for name in args.query}
+
+    manager = _init_db(args)
+    started = time.perf_counter()
+    timeouts = {name: args.timeout for name in catalog} if args.timeout else None
+    results = manager.run_query_batch(catalog, timeouts=timeouts, max_workers=args.workers)
+    failed = [name for name, rows in results.items() if rows is None]
+    logger.info(f"Отчет {args.catalog}: {len(catalog)} запросов за {time.perf_counter() - started:.2f} с")
+
+    if args.format == 'json':
+        _write_json(args.output or '-', results)
+    else:
+        directory = args.output or '.'
+        for name, rows in results.items():
+            if rows is None:
+                continue
+            columns = list(rows[0]) if rows else []
+            _write_csv(os.path.join(directory, f"{args.catalog}_{name}.csv"),
+                       columns, ([row[column] for column in columns] for row in rows))
+
+    if failed:
+        print(f"Не выполнены запросы: {', '.join(failed)}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def command_export(args) -> int:
+    """Выгрузка таблиц в CSV или JSON, файл на таблицу"""
+    manager = _init_db(args)
+    for table in args.tables:
+        result = manager.get_all(table)
+        if args.output == '-':
+            path = '-'
+        else:
+            path = os.path.join(args.output, f"{table}.{args.format}")
+        if args.format == 'csv':
+            _write_csv(path, result.columns, result.rows)
+        else:
+            _write_json(path, result.to_dicts())
+        if path != '-':
+            print(f"{table}: {len(result)} строк -> {path}", file=sys.stderr)
+    return 0
+
+
+def command_import(args) -> int:
+    """Пакетный импорт CSV/JSON (src/database/importer.py)"""
+    manager = _init_db(args)
+
+    def report_progress(entity, processed, total):
+        print(f"\r{entity}: {processed}/{total}", end='', file=sys.stderr, flush=True)
+
+    reports = manager.import_file(args.path, args.entity, batch_size=args.batch_size,
+                                  progress=None if args.quiet else report_progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    for report in reports:
+        print(report.summary())
+    return 1 if any(report.errors for report in reports) else 0
+
+
+def command_rollup(args) -> int:
+    """Обновление почасовых сводок заказов (src/database/rollups.py)"""
+    manager = _init_db(args)
+    started = time.perf_counter()
+    result = manager.refresh_order_rollups(full=args.full)
+    print(f"Сводки заказов: изменение {result['watermark']}, интервалов {result['ranges']}, "
+          f"строк {result['rows']}, {time.perf_counter() - started:.2f} с")
+    return 0
+
+
+def command_analytics(args) -> int:
+    """Срез аналитического куба (как на вкладке аналитики)"""
+    manager = _init_db(args)
+    result = manager.get_analytics(args.period, args.analysis, args.by)
+    rows = result['rows'] + [result['total']]
+    if args.format == 'csv':
+        _write_csv(args.output, result['columns'], rows)
+    else:
+        _write_json(args.output, [dict(zip(result['columns'], row)) for row in rows])
+    return 0
+
+
+def command_charts(args) -> int:
+    """Графики дашборда в PNG для отчетов (src/charts, общий кэш отрисовки)"""
+    from src.charts.dashboard import orders_by_status_chart, popular_dishes_chart, restaurant_ratings_chart
+    from src.charts.renderer import chart_renderer
+    from src.charts.specs import DARK_STYLE, LIGHT_STYLE
+
+    manager = _init_db(args)
+    style = LIGHT_STYLE if args.style == 'light' else DARK_STYLE
+    stats = manager.get_orders_statistics()
+    dishes = manager.get_popular_dishes()
+    restaurants = manager.get_all('Restaurants', columns=('name', 'rating'))
+    specs = {
+        'orders_by_status': orders_by_status_chart(stats['status_counts'], style=style),
+        'popular_dishes': popular_dishes_chart(
+            ((item['dish']['name'], item['order_count']) for item in dishes), style=style
+        ),
+        'restaurant_ratings': restaurant_ratings_chart(
+            ((row['name'], row['rating']) for row in restaurants), style=style
+        ),
+    }
+
+    os.makedirs(args.output, exist_ok=True)
+    for name, spec in specs.items():
+        spec = spec.with_size(spec.width * args.scale, spec.height * args.scale, dpi=round(100 * args.scale))
+        print(chart_renderer.save(spec, os.path.join(args.output, f"{name}.png")))
+    logger.info(f"Отрисовка графиков: {chart_renderer.stats()}")
+    return 0
+
+
+def command_bench(args) -> int:
+    """Бенчмарки (benchmarks/, pytest) в отдельном процессе"""
+    command = [sys.executable, '-m', 'pytest', os.path.join(root_dir, 'benchmarks'), *args.extra]
+    return subprocess.call(command, cwd=root_dir)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m src.cli',
+                                     description="Отчеты и обслуживание базы службы доставки")
+    parser.add_argument('--sqlite', help="Файл базы SQLite вместо настроек из окружения")
+    parser.add_argument('--log-level', default=os.getenv('CLI_LOG_LEVEL', 'WARNING'),
+                        help="Уровень журнала в stderr (по умолчанию WARNING)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    report = commands.add_parser('report', help="Отчет по каталогу запросов")
+    report.add_argument('catalog', choices=sorted(REPORT_CATALOGS))
+    report.add_argument('--query', action='append', help="Только этот запрос каталога (можно несколько)")
+    report.add_argument('--format', choices=('json', 'csv'), default='json')
+    report.add_argument('--output', help="Файл JSON (по умолчанию stdout) или каталог для CSV")
+    report.add_argument('--workers', type=int, default=4, help="Параллельных запросов")
+    report.add_argument('--timeout', type=float, help="Ограничение времени запроса, с")
+    report.set_defaults(handler=command_report)
+
+    export = commands.add_parser('export', help="Выгрузка таблиц")
+    export.add_argument('tables', nargs='+')
+    export.add_argument('--format', choices=('csv', 'json'), default='csv')
+    export.add_argument('--output', default='.', help="Каталог файлов или - для stdout")
+    export.set_defaults(handler=command_export)
+
+    import_ = commands.add_parser('import', help="Импорт CSV/JSON")
+    import_.add_argument('path')
+    import_.add_argument('--entity', help="Сущность (по умолчанию по имени файла)")
+    import_.add_argument('--batch-size', type=int, default=5000)
+    import_.add_argument('--quiet', action='store_true', help="Без индикатора прогресса")
+    import_.set_defaults(handler=command_import)
+
+    rollup = commands.add_parser('rollup', help="Обновление сводок заказов")
+    rollup.add_argument('--full', action='store_true', help="Полный пересчет")
+    rollup.set_defaults(handler=command_rollup)
+
+    analytics = commands.add_parser('analytics', help="Срез аналитического куба")
+    analytics.add_argument('--period', choices=('all', 'month', 'week'), default='all')
+    analytics.add_argument('--analysis', choices=('orders', 'customers', 'delivery'), default='orders')
+    analytics.add_argument('--by', choices=('restaurant', 'category', 'status'), default='restaurant')
+    analytics.add_argument('--format', choices=('json', 'csv'), default='csv')
+    analytics.add_argument('--output', default='-', help="Файл или - для stdout")
+    analytics.set_defaults(handler=command_analytics)
+
+    charts = commands.add_parser('charts', help="Графики дашборда в PNG")
+    charts.add_argument('--output', default='.', help="Каталог картинок")
+    charts.add_argument('--style', choices=('light', 'dark'), default='light')
+    charts.add_argument('--scale', type=float, default=1.0, help="Масштаб (2 - для печати)")
+    charts.set_defaults(handler=command_charts)
+
+    bench = commands.add_parser('bench', help="Бенчмарки (аргументы передаются pytest)")
+    bench.set_defaults(handler=command_bench)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    # Неизвестные аргументы допустимы только у bench: их получает pytest
+    if extra and args.command != 'bench':
+        parser.error(f"неизвестные аргументы: {' '.join(extra)}")
+    args.extra = extra
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.WARNING),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
+
+    try:
+        return args.handler(args)
+    except Exception as e:
+        logger.debug("Ошибка команды", exc_info=True)
+        print(f"Ошибка: {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        if args.command != 'bench' and 'src.sync_database' in sys.modules:
+            sys.modules['src.sync_database'].SyncDatabaseManager.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
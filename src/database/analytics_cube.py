@@ -0,0 +1,480 @@
+"""
+Аналитический куб заказов: день x ресторан x статус x категория блюда
+
+Вкладка аналитики сочетает период (все время, месяц, неделя), вид анализа
+(заказы, клиенты, доставка) и разрез (рестораны, категории блюд, статусы).
+Данные один раз читаются из БД в ячейки куба в памяти, и ответ на любое
+сочетание фильтров - сложение ячеек, без запроса к БД.
+
+Ячейки двух видов:
+- (ресторан, статус) по дням - заказ учитывается один раз у ресторана
+  своих блюд (у каждого ресторана, если их несколько, как в OrderRollups);
+- (ресторан, статус, категория) по дням - заказ учитывается в каждой
+  категории своих блюд; нужны только для разреза по категориям.
+
+Кроме ячеек по дням хранятся итоги за все время по тем же ключам: "за все
+время" складывает итоги, а не все дни, "за месяц" - 30 дней.
+
+Обновление инкрементальное: пересчитываются только дни заказов, измененных
+после прошлого обновления (номер изменения заказов,
+src/database/change_tracking.py) или названных в событиях изменения данных
+(например, завершение доставки). Изменения справочников (блюда, рестораны,
+статусы) и пакетная запись без списка заказов перестраивают куб целиком.
+"""
+
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+from src.database.change_tracking import current_change_seq
+from src.database.events import DataEvent, event_bus
+from src.database.rollups import DAY, bucket_expression, changed_buckets
+
+logger = logging.getLogger(__name__)
+
+# Периоды: число последних дней (None - все время)
+ALL_TIME = 'all'
+LAST_MONTH = 'month'
+LAST_WEEK = 'week'
+PERIOD_DAYS = {ALL_TIME: None, LAST_MONTH: 30, LAST_WEEK: 7}
+
+# Виды анализа
+ORDERS = 'orders'
+CUSTOMERS = 'customers'
+DELIVERY = 'delivery'
+
+# Разрезы
+BY_RESTAURANT = 'restaurant'
+BY_CATEGORY = 'category'
+BY_STATUS = 'status'
+
+NO_CATEGORY = 'Без категории'
+
+# Виды ячеек: без категории и с категорией
+ORDER_CELLS = 'orders'
+CATEGORY_CELLS = 'categories'
+
+# Таблицы справочников: их изменение перестраивает куб
+DIMENSION_TABLES = ('Dishes', 'Restaurants', 'Statuses')
+FACT_TABLES = ('Orders', 'OrderItems', 'Deliveries', 'Reviews')
+
+COLUMNS = {
+    ORDERS: ('Заказов', 'Позиций', 'Порций', 'Порций на заказ', 'Доля заказов, %'),
+    CUSTOMERS: ('Клиентов', 'Заказов', 'Заказов на клиента', 'Повторных клиентов', 'Доля повторных, %'),
+    DELIVERY: ('Заказов', 'Доставлено', 'Доля доставленных, %', 'Среднее время доставки, мин',
+               'Отзывов', 'Средняя оценка'),
+}
+GROUP_COLUMNS = {BY_RESTAURANT: 'Ресторан', BY_CATEGORY: 'Категория', BY_STATUS: 'Статус'}
+
+# Минуты от заказа до доставки в синтаксисе СУБД
+_MINUTES_EXPRESSIONS = {
+    'sqlite': "(julianday(dl.delivery_time) - julianday(o.order_time)) * 1440",
+    'mysql': "TIMESTAMPDIFF(MINUTE, o.order_time, dl.delivery_time)",
+}
+
+# Строка на заказ, ресторан и категорию; доставки и отзывы сведены по заказу
+_FACTS_QUERY = """
+    SELECT {day} AS day, o.order_id, o.customer_id, COALESCE(o.status_id, 0) AS status_id,
+           COALESCE(d.restaurant_id, 0) AS restaurant_id, d.category,
+           COUNT(oi.dish_id) AS items, COALESCE(SUM(oi.quantity), 0) AS quantity,
+           MAX({minutes}) AS delivery_minutes, MAX(rv.reviews) AS reviews, MAX(rv.rating_sum) AS rating_sum
+    FROM Orders o
+    LEFT JOIN OrderItems oi ON oi.order_id = o.order_id
+    LEFT JOIN Dishes d ON d.dish_id = oi.dish_id
+    LEFT JOIN (
+        SELECT order_id, MAX(delivery_time) AS delivery_time FROM Deliveries {scope} GROUP BY order_id
+    ) dl ON dl.order_id = o.order_id
+    LEFT JOIN (
+        SELECT order_id, COUNT(*) AS reviews, SUM(rating) AS rating_sum FROM Reviews {scope} GROUP BY order_id
+    ) rv ON rv.order_id = o.order_id
+    WHERE o.order_time IS NOT NULL {where}
+    GROUP BY {day}, o.order_id, o.customer_id, COALESCE(o.status_id, 0),
+             COALESCE(d.restaurant_id, 0), d.category
+"""
+
+
+class CubeCell:
+    """Показатели ячейки; customers - число заказов каждого клиента"""
+
+    __slots__ = ('orders', 'items', 'quantity', 'delivered', 'delivery_minutes', 'reviews', 'rating_sum',
+                 'customers')
+
+    def __init__(self):
+        self.orders = 0
+        self.items = 0
+        self.quantity = 0
+        self.delivered = 0
+        self.delivery_minutes = 0.0
+        self.reviews = 0
+        self.rating_sum = 0
+        self.customers: Dict[int, int] = {}
+
+    def add_order(self, customer_id: Optional[int], items: int, quantity: int,
+                  delivery_minutes: Optional[float], reviews: Optional[int], rating_sum: Optional[int]):
+        self.orders += 1
+        self.items += items
+        self.quantity += quantity
+        if delivery_minutes is not None:
+            self.delivered += 1
+            self.delivery_minutes += delivery_minutes
+        self.reviews += reviews or 0
+        self.rating_sum += rating_sum or 0
+        if customer_id is not None:
+            self.customers[customer_id] = self.customers.get(customer_id, 0) + 1
+
+    def add(self, other: 'CubeCell', sign: int = 1, customers: bool = True):
+        """Прибавление (sign=-1 - вычитание) показателей другой ячейки"""
+        self.orders += sign * other.orders
+        self.items += sign * other.items
+        self.quantity += sign * other.quantity
+        self.delivered += sign * other.delivered
+        self.delivery_minutes += sign * other.delivery_minutes
+        self.reviews += sign * other.reviews
+        self.rating_sum += sign * other.rating_sum
+        if not customers:
+            return
+        for customer_id, count in other.customers.items():
+            total = self.customers.get(customer_id, 0) + sign * count
+            if total:
+                self.customers[customer_id] = total
+            else:
+                self.customers.pop(customer_id, None)
+
+
+def _percent(part: float, whole: float) -> float:
+    return round(100.0 * part / whole, 1) if whole else 0.0
+
+
+def _ratio(part: float, whole: float, digits: int = 2) -> float:
+    return round(part / whole, digits) if whole else 0.0
+
+
+def _measures(analysis: str, cell: CubeCell, total: CubeCell) -> List[Any]:
+    if analysis == CUSTOMERS:
+        customers = len(cell.customers)
+        repeat = sum(1 for count in cell.customers.values() if count > 1)
+        return [customers, cell.orders, _ratio(cell.orders, customers), repeat, _percent(repeat, customers)]
+    if analysis == DELIVERY:
+        return [cell.orders, cell.delivered, _percent(cell.delivered, cell.orders),
+                _ratio(cell.delivery_minutes, cell.delivered, 1), cell.reviews,
+                _ratio(cell.rating_sum, cell.reviews)]
+    return [cell.orders, cell.items, cell.quantity, _ratio(cell.quantity, cell.orders),
+            _percent(cell.orders, total.orders)]
+
+
+class AnalyticsCube:
+    """Куб в памяти с инкрементальным обновлением (потокобезопасный)"""
+
+    def __init__(self):
+        self.built = False
+        self.watermark = 0
+        self.version = 0
+        # Вид ячеек -> день -> ключ (ресторан, статус[, категория]) -> ячейка
+        self.days: Dict[str, Dict[date, Dict[tuple, CubeCell]]] = {ORDER_CELLS: {}, CATEGORY_CELLS: {}}
+        # Вид ячеек -> ключ -> итог за все время
+        self.totals: Dict[str, Dict[tuple, CubeCell]] = {ORDER_CELLS: {}, CATEGORY_CELLS: {}}
+        self.restaurant_names: Dict[int, str] = {}
+        self.status_names: Dict[int, str] = {}
+        self._stale = True
+        self._pending_orders: Set[int] = set()
+        # События учитываются с начала первого построения
+        self._tracking = False
+        self._answers: Dict[tuple, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        # Отдельная блокировка событий: запись не ждет построения куба
+        self._events_lock = threading.Lock()
+
+    @property
+    def is_dirty(self) -> bool:
+        """Были ли изменения данных после последнего обновления"""
+        return self._stale or bool(self._pending_orders)
+
+    # ------------------------------------------------------------------
+    # Построение и обновление
+    # ------------------------------------------------------------------
+
+    def build(self, connection) -> Dict[str, int]:
+        """Полное построение куба"""
+        with self._lock:
+            with self._events_lock:
+                self._tracking = True
+                self._pending_orders.clear()
+                self._stale = False
+            # Граница читается до данных: изменения после нее попадут в следующее обновление
+            upto = current_change_seq(connection)
+            self._load_names(connection)
+            self.days = {ORDER_CELLS: {}, CATEGORY_CELLS: {}}
+            self.totals = {ORDER_CELLS: {}, CATEGORY_CELLS: {}}
+            rows = self._load_days(connection, "", {})
+            self.watermark = upto
+            self.built = True
+            self._changed()
+            logger.info(f"Аналитический куб построен: {rows} строк фактов, "
+                        f"{len(self.days[ORDER_CELLS])} дней")
+            return {'days': len(self.days[ORDER_CELLS]), 'rows': rows, 'full': 1}
+
+    def refresh(self, connection, full: bool = False) -> Dict[str, int]:
+        """Пересчет дней с изменившимися заказами (или полное построение)"""
+        with self._lock:
+            if full or self._stale or not self.built:
+                return self.build(connection)
+
+            with self._events_lock:
+                pending, self._pending_orders = self._pending_orders, set()
+            upto = current_change_seq(connection)
+            days = {self._parse_day(day) for day in changed_buckets(connection, self.watermark, upto, DAY)}
+            days.update(self._order_days(connection, pending))
+
+            rows = 0
+            for start, end in self._merge_days(days):
+                for kind in (ORDER_CELLS, CATEGORY_CELLS):
+                    self._drop_days(kind, start, end)
+                rows += self._load_days(
+                    connection, "AND o.order_time >= :start AND o.order_time < :end",
+                    {"start": start.strftime('%Y-%m-%d 00:00:00'), "end": end.strftime('%Y-%m-%d 00:00:00')}
+                )
+            self.watermark = upto
+            if days:
+                self._changed()
+                logger.debug(f"Аналитический куб обновлен: дней {len(days)}, строк фактов {rows}")
+            return {'days': len(days), 'rows': rows, 'full': 0}
+
+    def _changed(self):
+        self.version += 1
+        self._answers.clear()
+
+    def _load_names(self, connection):
+        self.restaurant_names = {
+            row.restaurant_id: row.name
+            for row in connection.execute(text("SELECT restaurant_id, name FROM Restaurants"))
+        }
+        self.status_names = {
+            row.status_id: row.status_name
+            for row in connection.execute(text("SELECT status_id, status_name FROM Statuses"))
+        }
+
+    def _load_days(self, connection, where: str, params: Dict[str, Any]) -> int:
+        """Чтение фактов и добавление их в ячейки и итоги"""
+        dialect = connection.dialect.name
+        query = _FACTS_QUERY.format(
+            day=bucket_expression(dialect, 'o.order_time', DAY),
+            minutes=_MINUTES_EXPRESSIONS.get(dialect, _MINUTES_EXPRESSIONS['mysql']),
+            where=where,
+            # Доставки и отзывы - только загружаемых заказов
+            scope=f"WHERE order_id IN (SELECT o.order_id FROM Orders o WHERE 1 = 1 {where})" if where else "",
+        )
+        order_cells: Dict[date, Dict[tuple, CubeCell]] = {}
+        category_cells: Dict[date, Dict[tuple, CubeCell]] = {}
+        # Заказ в ячейках без категории учитывается один раз на ресторан
+        counted: Set[Tuple[int, int]] = set()
+        parsed_days: Dict[Any, date] = {}
+        rows = 0
+
+        result = connection.execute(text(query), params)
+        for (day_value, order_id, customer_id, status_id, restaurant_id, category,
+             items, quantity, minutes, reviews, rating_sum) in chain.from_iterable(result.partitions(5000)):
+            rows += 1
+            day = parsed_days.get(day_value)
+            if day is None:
+                day = parsed_days[day_value] = self._parse_day(day_value)
+            if minutes is not None:
+                minutes = float(minutes)
+
+            key = (restaurant_id, status_id)
+            category_key = (restaurant_id, status_id, category or NO_CATEGORY)
+            cells = category_cells.get(day)
+            if cells is None:
+                cells = category_cells[day] = {}
+            cell = cells.get(category_key)
+            if cell is None:
+                cell = cells[category_key] = CubeCell()
+            cell.add_order(customer_id, items, quantity, minutes, reviews, rating_sum)
+
+            cells = order_cells.get(day)
+            if cells is None:
+                cells = order_cells[day] = {}
+            cell = cells.get(key)
+            if cell is None:
+                cell = cells[key] = CubeCell()
+            if (order_id, restaurant_id) in counted:
+                # Еще одна категория уже учтенного заказа: только позиции
+                cell.items += items
+                cell.quantity += quantity
+            else:
+                counted.add((order_id, restaurant_id))
+                cell.add_order(customer_id, items, quantity, minutes, reviews, rating_sum)
+
+        for kind, loaded in ((ORDER_CELLS, order_cells), (CATEGORY_CELLS, category_cells)):
+            totals = self.totals[kind]
+            for day, cells in loaded.items():
+                self.days[kind][day] = cells
+                for key, cell in cells.items():
+                    total = totals.get(key)
+                    if total is None:
+                        total = totals[key] = CubeCell()
+                    total.add(cell)
+        return rows
+
+    def _drop_days(self, kind: str, start: date, end: date):
+        """Удаление дней [start, end) из ячеек и итогов"""
+        totals = self.totals[kind]
+        day = start
+        while day < end:
+            for key, cell in self.days[kind].pop(day, {}).items():
+                total = totals[key]
+                total.add(cell, -1)
+                if total.orders <= 0:
+                    del totals[key]
+            day += timedelta(days=1)
+
+    def _order_days(self, connection, order_ids: Iterable[int]) -> Set[date]:
+        """Дни заказов из событий (удаленные - по DeletedOrders)"""
+        order_ids = list(order_ids)
+        days = set()
+        day = bucket_expression(connection.dialect.name, 'order_time', DAY)
+        for start in range(0, len(order_ids), 500):
+            params = {f"id{i}": order_id for i, order_id in enumerate(order_ids[start:start + 500])}
+            placeholders = ', '.join(f":{name}" for name in params)
+            for table in ('Orders', 'DeletedOrders'):
+                days.update(self._parse_day(value) for value in connection.execute(text(
+                    f"SELECT DISTINCT {day} FROM {table} WHERE order_id IN ({placeholders}) AND order_time IS NOT NULL"
+                ), params).scalars())
+        return days
+
+    @staticmethod
+    def _parse_day(value) -> date:
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+    @staticmethod
+    def _merge_days(days: Iterable[date]) -> List[Tuple[date, date]]:
+        """Дни, объединенные в непрерывные интервалы [начало, конец)"""
+        ranges: List[List[date]] = []
+        for day in sorted(days):
+            if ranges and ranges[-1][1] == day:
+                ranges[-1][1] = day + timedelta(days=1)
+            else:
+                ranges.append([day, day + timedelta(days=1)])
+        return [(start, end) for start, end in ranges]
+
+    # ------------------------------------------------------------------
+    # События изменения данных
+    # ------------------------------------------------------------------
+
+    def on_data_changed(self, event: DataEvent):
+        """Учет записи: заказы из события пересчитываются при следующем обновлении"""
+        if not self._tracking:
+            return
+        with self._events_lock:
+            if event.touches(*DIMENSION_TABLES):
+                self._stale = True
+            elif event.touches(*FACT_TABLES):
+                if event.order_ids is None:
+                    self._stale = True
+                else:
+                    self._pending_orders.update(event.order_ids)
+
+    # ------------------------------------------------------------------
+    # Запросы
+    # ------------------------------------------------------------------
+
+    def query(self, period: str = ALL_TIME, analysis: str = ORDERS, by: str = BY_RESTAURANT,
+              today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Срез куба: {'columns', 'rows', 'total', 'period', 'analysis', 'by', 'version'}
+
+        rows - строки по ресторанам, категориям или статусам (по убыванию
+        первого показателя), total - итог по всем заказам периода.
+        """
+        if period not in PERIOD_DAYS or analysis not in COLUMNS or by not in GROUP_COLUMNS:
+            raise ValueError(f"Неизвестный срез аналитики: {period}, {analysis}, {by}")
+        today = today or date.today()
+        answer_key = (period, analysis, by, today)
+
+        with self._lock:
+            answer = self._answers.get(answer_key)
+            if answer is not None:
+                return answer
+
+            days = PERIOD_DAYS[period]
+            with_customers = analysis == CUSTOMERS
+            position = {BY_RESTAURANT: 0, BY_STATUS: 1, BY_CATEGORY: 2}[by]
+            groups: Dict[Any, CubeCell] = {}
+            total = CubeCell()
+
+            def add_to_group(key, cell):
+                group = groups.get(key[position])
+                if group is None:
+                    group = groups[key[position]] = CubeCell()
+                group.add(cell, customers=with_customers)
+
+            # Итог - всегда по ячейкам без категории: заказ учитывается один раз
+            for key, cell in self._period_cells(ORDER_CELLS, days, today):
+                total.add(cell, customers=with_customers)
+                if by != BY_CATEGORY:
+                    add_to_group(key, cell)
+            if by == BY_CATEGORY:
+                for key, cell in self._period_cells(CATEGORY_CELLS, days, today):
+                    add_to_group(key, cell)
+
+            rows = [[self._group_label(by, group)] + _measures(analysis, cell, total)
+                    for group, cell in groups.items()]
+            rows.sort(key=lambda row: (-row[1], row[0]))
+            answer = {
+                'period': period,
+                'analysis': analysis,
+                'by': by,
+                'version': self.version,
+                'columns': [GROUP_COLUMNS[by]] + list(COLUMNS[analysis]),
+                'rows': rows,
+                'total': ['Итого'] + _measures(analysis, total, total),
+            }
+            self._answers[answer_key] = answer
+            return answer
+
+    def _period_cells(self, kind: str, days: Optional[int], today: date) -> Iterable[Tuple[tuple, CubeCell]]:
+        """Пары (ключ, ячейка) периода: итоги за все время или ячейки последних days дней"""
+        if days is None:
+            return self.totals[kind].items()
+        by_day = self.days[kind]
+        return chain.from_iterable(
+            by_day.get(today - timedelta(days=offset), {}).items() for offset in range(days)
+        )
+
+    def _group_label(self, by: str, group) -> str:
+        if by == BY_RESTAURANT:
+            return self.restaurant_names.get(group, 'Без ресторана' if not group else f"Ресторан #{group}")
+        if by == BY_STATUS:
+            return self.status_names.get(group, 'Без статуса' if not group else f"Статус #{group}")
+        return group
+
+    def warm(self, today: Optional[date] = None):
+        """Расчет всех срезов вкладки аналитики заранее"""
+        for period in PERIOD_DAYS:
+            for analysis in COLUMNS:
+                for by in GROUP_COLUMNS:
+                    self.query(period, analysis, by, today)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'built': self.built,
+                'version': self.version,
+                'watermark': self.watermark,
+                'days': len(self.days[ORDER_CELLS]),
+                'cells': sum(len(cells) for kind in self.days.values() for cells in kind.values()),
+                'answers': len(self._answers),
+            }
+
+
+# Глобальный аналитический куб
+analytics_cube = AnalyticsCube()
+
+event_bus.subscribe(DataEvent, analytics_cube.on_data_changed)
@@ -0,0 +1,123 @@
+"""
+Параллельное выполнение пакетов независимых SQL-запросов (отчеты и аналитика)
+"""
+
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBatchExecutor:
+    """
+    Выполнение словаря запросов (например, statistical_queries) параллельно
+    на ограниченном наборе соединений из пула SQLAlchemy.
+
+    Каждый запрос получает собственное соединение из пула и собственный
+    таймаут, поэтому время выполнения пакета определяется самым медленным
+    запросом, а не суммой всех запросов.
+    """
+
+    def __init__(self, engine, max_workers: int = 4, default_timeout: float = 30.0):
+        self.engine = engine
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+
+    def run(self, queries: Dict[str, str], params: Optional[Dict[str, Dict[str, Any]]] = None,
+            timeouts: Optional[Dict[str, float]] = None) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """
+        Выполнение пакета запросов
+
+        Возвращает словарь {имя запроса: список строк}. Для запросов, завершившихся
+        ошибкой или превысивших таймаут, значение равно None.
+        """
+        params = params or {}
+        timeouts = timeouts or {}
+        results: Dict[str, Optional[List[Dict[str, Any]]]] = {name: None for name in queries}
+
+        if not queries:
+            return results
+
+        started = time.monotonic()
+        workers = max(1, min(self.max_workers, len(queries)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query-batch")
+
+        try:
+            futures = {}
+            for name, query in queries.items():
+                timeout = timeouts.get(name, self.default_timeout)
+                # Контекст (действие интерфейса) переносится в поток пула
+                future = executor.submit(
+                    contextvars.copy_context().run, self._execute, name, query, params.get(name), timeout
+                )
+                futures[future] = name
+
+            # Общий срок ожидания: максимальный таймаут плюс время ожидания в очереди пула
+            overall_timeout = max(timeouts.get(name, self.default_timeout) for name in queries)
+            overall_timeout *= -(-len(queries) // workers)
+            done, not_done = wait(futures, timeout=overall_timeout)
+
+            for future in done:
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logger.error(f"Ошибка выполнения запроса '{name}' в пакете: {str(e)}")
+
+            for future in not_done:
+                future.cancel()
+                logger.error(f"Запрос '{futures[future]}' не завершился за отведенное время")
+
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        logger.debug(f"Пакет из {len(queries)} запросов выполнен за {time.monotonic() - started:.3f} с")
+        return results
+
+    def _execute(self, name: str, query: str, query_params: Optional[Dict[str, Any]],
+                 timeout: float) -> List[Dict[str, Any]]:
+        """Выполнение одного запроса на отдельном соединении из пула"""
+        from sqlalchemy import text
+
+        started = time.monotonic()
+        with self.engine.connect() as connection:
+            self._apply_timeout(connection, timeout)
+            try:
+                result = connection.execute(text(query), query_params or {})
+                columns = list(result.keys())
+                rows = [dict(zip(columns, row)) for row in result.fetchall()]
+            finally:
+                self._reset_timeout(connection)
+
+        logger.debug(f"Запрос '{name}': {len(rows)} строк за {time.monotonic() - started:.3f} с")
+        return rows
+
+    def _apply_timeout(self, connection, timeout: float):
+        """Установка таймаута выполнения на стороне СУБД"""
+        dialect = self.engine.dialect.name
+
+        if dialect == 'mysql':
+            from sqlalchemy import text
+            connection.execute(text(f"SET SESSION MAX_EXECUTION_TIME = {int(timeout * 1000)}"))
+        elif dialect == 'sqlite':
+            deadline = time.monotonic() + timeout
+            driver_connection = connection.connection.driver_connection
+            # Ненулевой результат обработчика прерывает выполнение запроса
+            driver_connection.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+
+    def _reset_timeout(self, connection):
+        """Сброс таймаута перед возвратом соединения в пул"""
+        dialect = self.engine.dialect.name
+
+        try:
+            if dialect == 'mysql':
+                from sqlalchemy import text
+                connection.execute(text("SET SESSION MAX_EXECUTION_TIME = 0"))
+            elif dialect == 'sqlite':
+                connection.connection.driver_connection.set_progress_handler(None, 0)
+        except Exception as e:
+            logger.warning(f"Не удалось сбросить таймаут соединения: {str(e)}")
+
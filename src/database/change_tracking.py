@@ -0,0 +1,85 @@
+"""
+Отслеживание изменений заказов для инкрементального обновления списков
+
+Каждая транзакция, меняющая строку списка заказов (заказ, его позиции,
+имя клиента), получает следующий номер из счетчика ChangeSequence и
+записывает его в Orders.change_seq; удаленные заказы записываются в
+DeletedOrders с тем же номером. Счетчик увеличивается внутри транзакции
+записи, поэтому до ее фиксации следующая пишущая транзакция ждет: номера
+фиксируются по возрастанию, и читатель, запомнивший номер (watermark),
+получает следующими запросами все изменения после него без пропусков.
+"""
+
+from typing import Iterable, List
+
+from sqlalchemy import bindparam, text
+
+from src.database.dependencies import chunked
+
+# Счетчик изменений списка заказов
+ORDERS_SEQUENCE = 'orders'
+
+_IDS = bindparam('ids', expanding=True)
+
+
+def ensure_sequence(connection, name: str = ORDERS_SEQUENCE) -> bool:
+    """Создание строки счетчика, если ее нет (True - строка создана)"""
+    exists = connection.execute(
+        text("SELECT COUNT(*) FROM ChangeSequence WHERE name = :name"), {"name": name}
+    ).scalar()
+    if not exists:
+        connection.execute(text("INSERT INTO ChangeSequence (name, value) VALUES (:name, 0)"), {"name": name})
+    return not exists
+
+
+def next_change_seq(connection, name: str = ORDERS_SEQUENCE) -> int:
+    """Следующий номер изменения (вызывается внутри транзакции записи)"""
+    connection.execute(text("UPDATE ChangeSequence SET value = value + 1 WHERE name = :name"), {"name": name})
+    return connection.execute(text("SELECT value FROM ChangeSequence WHERE name = :name"), {"name": name}).scalar()
+
+
+def current_change_seq(connection, name: str = ORDERS_SEQUENCE) -> int:
+    """Номер последнего зафиксированного изменения"""
+    return connection.execute(
+        text("SELECT value FROM ChangeSequence WHERE name = :name"), {"name": name}
+    ).scalar() or 0
+
+
+def touch_orders(connection, order_ids: Iterable[int], change_seq: int):
+    """Отметка заказов измененными в изменении change_seq"""
+    statement = text("UPDATE Orders SET change_seq = :change_seq WHERE order_id IN :ids").bindparams(_IDS)
+    for chunk in chunked(order_ids):
+        connection.execute(statement, {"ids": chunk, "change_seq": change_seq})
+
+
+def touch_customer_orders(connection, customer_id: int, change_seq: int):
+    """Отметка заказов клиента (изменилось имя, показываемое в списке)"""
+    connection.execute(
+        text("UPDATE Orders SET change_seq = :change_seq WHERE customer_id = :customer_id"),
+        {"change_seq": change_seq, "customer_id": customer_id}
+    )
+
+
+def record_deleted_orders(connection, order_ids: List[int], change_seq: int):
+    """
+    Записи об удаленных заказах (id заказа может быть использован повторно)
+
+    Вызывается до удаления строк Orders: время заказа сохраняется, чтобы
+    пересчитать его интервал в сводках (src/database/rollups.py).
+    """
+    delete = text("DELETE FROM DeletedOrders WHERE order_id IN :ids").bindparams(_IDS)
+    insert = text("""
+        INSERT INTO DeletedOrders (order_id, change_seq, order_time)
+        SELECT order_id, :change_seq, order_time FROM Orders WHERE order_id IN :ids
+    """).bindparams(_IDS)
+    for chunk in chunked(order_ids):
+        connection.execute(delete, {"ids": chunk})
+        connection.execute(insert, {"ids": chunk, "change_seq": change_seq})
+
+
+def deleted_orders_since(connection, watermark: int, upto: int) -> List[int]:
+    """Заказы, удаленные в изменениях (watermark, upto]"""
+    return list(connection.execute(
+        text("SELECT order_id FROM DeletedOrders WHERE change_seq > :watermark AND change_seq <= :upto"),
+        {"watermark": watermark, "upto": upto}
+    ).scalars())
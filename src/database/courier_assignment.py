@@ -0,0 +1,107 @@
+"""
+Балансировка нагрузки при автоматическом назначении курьеров
+"""
+
+import heapq
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Открытые доставки: время доставки не проставлено, заказ не доставлен и не отменен
+ACTIVE_LOAD_QUERY = """
+    SELECT c.courier_id, COUNT(o.order_id) as active_deliveries
+    FROM Couriers c
+    LEFT JOIN Deliveries d ON d.courier_id = c.courier_id AND d.delivery_time IS NULL
+    LEFT JOIN Orders o ON o.order_id = d.order_id AND o.status_id NOT IN (5, 6)
+    GROUP BY c.courier_id
+"""
+
+
+class CourierAssignmentEngine:
+    """
+    Индекс открытых доставок по курьерам в памяти
+
+    Курьеры хранятся в min-куче по текущей нагрузке, поэтому выбор наименее
+    загруженного курьера выполняется за O(log n) без обращения к таблице Couriers.
+    Устаревшие элементы кучи не удаляются сразу, а пропускаются при извлечении.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._loads: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.is_built = False
+
+    def rebuild(self, loads: Iterable[Tuple[int, int]]):
+        """Перестроение индекса по парам (courier_id, число открытых доставок)"""
+        with self._lock:
+            self._loads = {int(courier_id): int(load or 0) for courier_id, load in loads}
+            self._heap = [(load, courier_id) for courier_id, load in self._loads.items()]
+            heapq.heapify(self._heap)
+            self.is_built = True
+
+        logger.info(f"Индекс назначения курьеров построен: {len(self._loads)} курьеров")
+
+    def assign(self) -> Optional[int]:
+        """Выбор наименее загруженного курьера с увеличением его нагрузки"""
+        with self._lock:
+            while self._heap:
+                load, courier_id = heapq.heappop(self._heap)
+                if self._loads.get(courier_id) != load:
+                    continue  # Устаревший элемент кучи
+
+                self._loads[courier_id] = load + 1
+                heapq.heappush(self._heap, (load + 1, courier_id))
+                return courier_id
+
+        return None
+
+    def record_assignment(self, courier_id: int):
+        """Учет доставки, назначенной конкретному курьеру вручную"""
+        self._adjust(courier_id, 1)
+
+    def complete(self, courier_id: int):
+        """Учет завершения (или отмены) доставки курьера"""
+        self._adjust(courier_id, -1)
+
+    def add_courier(self, courier_id: int, load: int = 0):
+        """Добавление нового курьера в индекс"""
+        with self._lock:
+            self._loads[courier_id] = load
+            heapq.heappush(self._heap, (load, courier_id))
+
+    def remove_courier(self, courier_id: int):
+        """Удаление курьера из индекса"""
+        with self._lock:
+            self._loads.pop(courier_id, None)
+            self._compact()
+
+    def get_loads(self) -> Dict[int, int]:
+        """Текущая нагрузка по курьерам"""
+        with self._lock:
+            return dict(self._loads)
+
+    def _adjust(self, courier_id: int, delta: int):
+        """Изменение нагрузки курьера на delta"""
+        with self._lock:
+            if courier_id not in self._loads:
+                if delta < 0:
+                    return
+                self._loads[courier_id] = 0
+
+            load = max(0, self._loads[courier_id] + delta)
+            self._loads[courier_id] = load
+            heapq.heappush(self._heap, (load, courier_id))
+            self._compact()
+
+    def _compact(self):
+        """Удаление устаревших элементов, когда их становится слишком много"""
+        if len(self._heap) > 2 * len(self._loads) + 16:
+            self._heap = [(load, courier_id) for courier_id, load in self._loads.items()]
+            heapq.heapify(self._heap)
+
+
+# Глобальный экземпляр индекса назначения курьеров
+courier_engine = CourierAssignmentEngine()
@@ -0,0 +1,352 @@
+"""
+Генератор синтетических данных для нагрузочного тестирования
+
+Данные детерминированы: при одинаковых seed и размерах генерируется одна и та
+же база. Распределения приближены к реальным: популярность клиентов, ресторанов
+и блюд - по закону Ципфа, заказы сгущаются в обед и ужин и в выходные, старые
+заказы в основном доставлены, свежие - в работе.
+
+Запуск:
+    python -m src.database.datagen --db bench.db --orders 1000000
+"""
+
+import argparse
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from src.database.change_tracking import next_change_seq
+from src.database.events import TablesChanged
+
+logger = logging.getLogger(__name__)
+
+FIRST_NAMES = [
+    'Александр', 'Алексей', 'Анна', 'Андрей', 'Виктория', 'Дмитрий', 'Екатерина',
+    'Елена', 'Иван', 'Ирина', 'Кирилл', 'Мария', 'Михаил', 'Наталья', 'Никита',
+    'Ольга', 'Павел', 'Полина', 'Сергей', 'София', 'Татьяна', 'Юлия', 'Георгий', 'Нино'
+]
+LAST_NAMES = [
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов',
+    'Михайлов', 'Новиков', 'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев',
+    'Семенов', 'Егоров', 'Павлов', 'Козлов', 'Степанов', 'Николаев', 'Беридзе', 'Гелашвили'
+]
+STREETS = [
+    'ул. Ленина', 'ул. Грузинская', 'пр. Мира', 'ул. Садовая', 'ул. Гагарина',
+    'Невский пр.', 'ул. Пушкина', 'ул. Руставели', 'ул. Тверская', 'наб. Фонтанки'
+]
+RESTAURANT_NAMES = [
+    'Тбилиси', 'Хинкальная', 'Сулугуни', 'Мимино', 'Кавказ', 'Батуми', 'Пиросмани',
+    'Арагви', 'Генацвале', 'Шоти', 'Мцхета', 'Кутаиси', 'Сакартвело', 'Чито-Грито'
+]
+DISH_NAMES = [
+    'Хачапури по-аджарски', 'Хачапури по-имеретински', 'Хинкали', 'Сациви', 'Лобио',
+    'Шашлык из свинины', 'Шашлык из баранины', 'Чашушули', 'Пхали', 'Чихохбили',
+    'Купаты', 'Эларджи', 'Оджахури', 'Аджапсандали', 'Чкмерули', 'Харчо', 'Чакапули',
+    'Мчади', 'Гоми', 'Бадриджани', 'Чурчхела', 'Пеламуши', 'Гозинаки', 'Мацони'
+]
+# Категория каждого блюда из DISH_NAMES (src/models.py DISH_CATEGORIES)
+DISH_NAME_CATEGORIES = {
+    'Хачапури по-аджарски': 'Выпечка', 'Хачапури по-имеретински': 'Выпечка', 'Мчади': 'Выпечка',
+    'Хинкали': 'Горячие блюда', 'Чашушули': 'Горячие блюда', 'Чихохбили': 'Горячие блюда',
+    'Оджахури': 'Горячие блюда', 'Чкмерули': 'Горячие блюда', 'Чакапули': 'Горячие блюда',
+    'Шашлык из свинины': 'Шашлык и гриль', 'Шашлык из баранины': 'Шашлык и гриль', 'Купаты': 'Шашлык и гриль',
+    'Сациви': 'Закуски', 'Лобио': 'Закуски', 'Пхали': 'Закуски', 'Аджапсандали': 'Закуски',
+    'Бадриджани': 'Закуски', 'Харчо': 'Супы', 'Эларджи': 'Гарниры', 'Гоми': 'Гарниры',
+    'Чурчхела': 'Десерты', 'Пеламуши': 'Десерты', 'Гозинаки': 'Десерты', 'Мацони': 'Десерты',
+}
+DISH_WORDS = ['с сыром', 'с орехами', 'с зеленью', 'острое', 'на мангале', 'домашнее', 'с томатами']
+
+# Статусы заказов (см. create_default_statuses)
+STATUS_ACCEPTED, STATUS_COOKING, STATUS_READY, STATUS_IN_DELIVERY, STATUS_DELIVERED, STATUS_CANCELLED = range(1, 7)
+
+# Вес часа суток в потоке заказов: пики в обед и вечером
+HOUR_WEIGHTS = [1, 1, 0.5, 0.3, 0.3, 0.5, 1, 2, 3, 3, 4, 7, 10, 9, 6, 4, 4, 6, 10, 12, 10, 7, 4, 2]
+
+# Число позиций в заказе и количество блюда в позиции
+ITEMS_PER_ORDER_WEIGHTS = [45, 30, 15, 7, 3]
+QUANTITY_WEIGHTS = [80, 15, 5]
+
+
+def zipf_cum_weights(count: int, exponent: float = 1.0) -> List[float]:
+    """Накопленные веса распределения Ципфа для random.choices"""
+    return list(accumulate(1.0 / (rank + 1) ** exponent for rank in range(count)))
+
+
+class DataGenerator:
+    """Заполнение базы синтетическими клиентами, ресторанами, заказами и доставками"""
+
+    def __init__(self, connection, seed: int = 42, orders: int = 100_000,
+                 customers: Optional[int] = None, restaurants: int = 200, couriers: int = 500,
+                 days: int = 365, batch_size: int = 20_000,
+                 now: Optional[datetime] = None,
+                 progress: Optional[Callable[[str, int, int], None]] = None):
+        self.connection = connection
+        self.seed = seed
+        self.orders = orders
+        self.customers = customers or max(100, orders // 10)
+        self.restaurants = restaurants
+        self.couriers = couriers
+        self.days = days
+        self.batch_size = batch_size
+        # Время заказов отсчитывается от now (по умолчанию - начало текущего часа);
+        # при явно заданном now данные воспроизводятся полностью
+        self.now = now or datetime.now().replace(minute=0, second=0, microsecond=0)
+        self.progress = progress
+        self.random = random.Random(seed)
+
+    def generate(self) -> Dict[str, int]:
+        """Генерация всех таблиц; возвращает число вставленных строк по таблицам"""
+        started = time.perf_counter()
+        counts = {}
+
+        customer_ids = self._generate_customers(counts)
+        dish_ids = self._generate_restaurants_and_dishes(counts)
+        courier_ids = self._generate_couriers(counts)
+        self._generate_orders(customer_ids, dish_ids, courier_ids, counts)
+
+        logger.info(f"Сгенерированы данные за {time.perf_counter() - started:.1f} с: {counts}")
+        return counts
+
+    # -------------------------------------------------------------------------
+    # Справочники
+    # -------------------------------------------------------------------------
+
+    def _generate_customers(self, counts: Dict[str, int]) -> List[int]:
+        first_id = self._next_id('Customers', 'customer_id')
+        rows = [{
+            'customer_id': first_id + i,
+            'phone_number': f'+79{self.seed % 100:02d}{i:07d}',
+            'first_name': self.random.choice(FIRST_NAMES),
+            'last_name': self.random.choice(LAST_NAMES),
+        } for i in range(self.customers)]
+
+        self._insert('Customers', rows)
+        counts['Customers'] = len(rows)
+        return [row['customer_id'] for row in rows]
+
+    def _generate_restaurants_and_dishes(self, counts: Dict[str, int]) -> List[List[int]]:
+        """Рестораны и их блюда; возвращает id блюд по ресторанам"""
+        first_restaurant_id = self._next_id('Restaurants', 'restaurant_id')
+        next_dish_id = self._next_id('Dishes', 'dish_id')
+        restaurants, dishes, dish_ids = [], [], []
+
+        for i in range(self.restaurants):
+            restaurant_id = first_restaurant_id + i
+            restaurants.append({
+                'restaurant_id': restaurant_id,
+                'name': f'{self.random.choice(RESTAURANT_NAMES)} #{i + 1}',
+                'location': f'{self.random.choice(STREETS)}, {self.random.randint(1, 150)}',
+                'rating': round(min(5.0, max(1.0, self.random.gauss(4.3, 0.4))), 2),
+            })
+
+            menu = []
+            for _ in range(self.random.randint(10, 60)):
+                name = self.random.choice(DISH_NAMES)
+                dishes.append({
+                    'dish_id': next_dish_id,
+                    'restaurant_id': restaurant_id,
+                    'name': f'{name} {self.random.choice(DISH_WORDS)}',
+                    'description': f'{name}: {", ".join(self.random.sample(DISH_WORDS, 2))}',
+                    'cooking_time': str(self.random.choice([10, 15, 20, 25, 30, 40, 50, 60])),
+                    'category': DISH_NAME_CATEGORIES.get(name),
+                })
+                menu.append(next_dish_id)
+                next_dish_id += 1
+            dish_ids.append(menu)
+
+        self._insert('Restaurants', restaurants)
+        self._insert('Dishes', dishes)
+        counts['Restaurants'] = len(restaurants)
+        counts['Dishes'] = len(dishes)
+        return dish_ids
+
+    def _generate_couriers(self, counts: Dict[str, int]) -> List[int]:
+        first_id = self._next_id('Couriers', 'courier_id')
+        letters = 'АВЕКМНОРСТУХ'
+        rows = [{
+            'courier_id': first_id + i,
+            'phone_number': f'+78{self.seed % 100:02d}{i:07d}',
+            'first_name': self.random.choice(FIRST_NAMES),
+            'last_name': self.random.choice(LAST_NAMES),
+            'car_number': f'{letters[i % 12]}{i:05d}{letters[i // 12 % 12]}{self.seed % 100:02d}',
+        } for i in range(self.couriers)]
+
+        self._insert('Couriers', rows)
+        counts['Couriers'] = len(rows)
+        return [row['courier_id'] for row in rows]
+
+    # -------------------------------------------------------------------------
+    # Заказы
+    # -------------------------------------------------------------------------
+
+    def _generate_orders(self, customer_ids: List[int], dish_ids: List[List[int]],
+                         courier_ids: List[int], counts: Dict[str, int]):
+        """Заказы с позициями, доставками и отзывами, по batch_size заказов за транзакцию"""
+        rnd = self.random
+        customer_weights = zipf_cum_weights(len(customer_ids), 0.8)
+        restaurant_weights = zipf_cum_weights(len(dish_ids), 1.0)
+        dish_weights = [zipf_cum_weights(len(menu), 1.1) for menu in dish_ids]
+        hour_weights = list(accumulate(HOUR_WEIGHTS))
+
+        next_order_id = self._next_id('Orders', 'order_id')
+        next_delivery_id = self._next_id('Deliveries', 'delivery_id')
+        start = self.now - timedelta(days=self.days)
+        for table in ('Orders', 'OrderItems', 'Deliveries', 'Reviews'):
+            counts[table] = 0
+
+        for batch_start in range(0, self.orders, self.batch_size):
+            batch_count = min(self.batch_size, self.orders - batch_start)
+
+            # Время заказов батча: равномерно по дням, выходные чаще, час - по профилю суток
+            day_offsets = sorted(rnd.random() for _ in range(batch_count))
+            customers = rnd.choices(customer_ids, cum_weights=customer_weights, k=batch_count)
+            restaurants = rnd.choices(range(len(dish_ids)), cum_weights=restaurant_weights, k=batch_count)
+
+            orders, items, deliveries, reviews = [], [], [], []
+            change_seq = next_change_seq(self.connection)
+            for i in range(batch_count):
+                day = int((batch_start + day_offsets[i] * batch_count) / self.orders * self.days)
+                order_date = start + timedelta(days=day)
+                if order_date.weekday() >= 5 and rnd.random() < 0.3:
+                    order_date += timedelta(days=rnd.choice([-1, 1]))
+                hour = rnd.choices(range(24), cum_weights=hour_weights)[0]
+                order_time = order_date.replace(hour=hour) + timedelta(minutes=rnd.randrange(60), seconds=rnd.randrange(60))
+                order_time = min(order_time, self.now)
+                age = self.now - order_time
+
+                status_id = self._pick_status(age)
+                order_id = next_order_id
+                next_order_id += 1
+                orders.append({'order_id': order_id, 'customer_id': customers[i],
+                               'status_id': status_id, 'order_time': order_time,
+                               'change_seq': change_seq})
+
+                restaurant = restaurants[i]
+                menu = dish_ids[restaurant]
+                item_count = min(len(menu), rnd.choices(range(1, 6), weights=ITEMS_PER_ORDER_WEIGHTS)[0])
+                chosen = set()
+                while len(chosen) < item_count:
+                    chosen.add(rnd.choices(menu, cum_weights=dish_weights[restaurant])[0])
+                for dish_id in chosen:
+                    items.append({'order_id': order_id, 'dish_id': dish_id,
+                                  'quantity': rnd.choices((1, 2, 3), weights=QUANTITY_WEIGHTS)[0]})
+
+                if status_id == STATUS_CANCELLED or (status_id < STATUS_IN_DELIVERY and rnd.random() < 0.5):
+                    continue
+
+                delivery_time = None
+                if status_id == STATUS_DELIVERED:
+                    delivery_time = order_time + timedelta(minutes=rnd.randint(20, 90))
+                deliveries.append({'delivery_id': next_delivery_id, 'order_id': order_id,
+                                   'courier_id': rnd.choice(courier_ids), 'delivery_time': delivery_time})
+                next_delivery_id += 1
+
+                if status_id == STATUS_DELIVERED and rnd.random() < 0.2:
+                    reviews.append({'order_id': order_id,
+                                    'rating': rnd.choices((1, 2, 3, 4, 5), weights=(3, 4, 10, 30, 53))[0],
+                                    'description': None})
+
+            self._insert('Orders', orders, commit=False)
+            self._insert('OrderItems', items, commit=False)
+            self._insert('Deliveries', deliveries, commit=False)
+            self._insert('Reviews', reviews, commit=False)
+            self.connection.commit()
+
+            counts['Orders'] += len(orders)
+            counts['OrderItems'] += len(items)
+            counts['Deliveries'] += len(deliveries)
+            counts['Reviews'] += len(reviews)
+
+            if self.progress:
+                self.progress('orders', batch_start + batch_count, self.orders)
+
+    def _pick_status(self, age: timedelta) -> int:
+        """Статус заказа в зависимости от его давности"""
+        roll = self.random.random()
+        if age > timedelta(hours=3):
+            return STATUS_CANCELLED if roll < 0.06 else STATUS_DELIVERED
+        if age > timedelta(hours=1):
+            return STATUS_IN_DELIVERY if roll < 0.6 else STATUS_DELIVERED
+        return self.random.choice((STATUS_ACCEPTED, STATUS_COOKING, STATUS_READY, STATUS_IN_DELIVERY))
+
+    # -------------------------------------------------------------------------
+    # Вставка
+    # -------------------------------------------------------------------------
+
+    def _next_id(self, table: str, column: str) -> int:
+        value = self.connection.execute(text(f"SELECT COALESCE(MAX({column}), 0) FROM {table}")).scalar()
+        return int(value) + 1
+
+    def _insert(self, table: str, rows: List[Dict], commit: bool = True):
+        """Вставка строк пакетами через executemany"""
+        if not rows:
+            return
+        columns = list(rows[0])
+        statement = text(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(':' + column for column in columns)})"
+        )
+        for start in range(0, len(rows), self.batch_size):
+            self.connection.execute(statement, rows[start:start + self.batch_size])
+        if commit:
+            self.connection.commit()
+
+
+def generate_sqlite_database(path: str, seed: int = 42, orders: int = 100_000, **options) -> Dict[str, int]:
+    """
+    Создание (или дополнение) базы SQLite со схемой приложения и синтетическими данными
+    """
+    from src.sync_database import SyncDatabaseManager
+
+    SyncDatabaseManager.init_db({'type': 'sqlite', 'database': path})
+    connection = SyncDatabaseManager._connection
+    connection.commit()
+
+    # Быстрая загрузка: журнал в памяти и без fsync, восстанавливаются после генерации
+    connection.exec_driver_sql("PRAGMA synchronous = OFF")
+    connection.exec_driver_sql("PRAGMA journal_mode = MEMORY")
+    try:
+        counts = DataGenerator(connection, seed=seed, orders=orders, **options).generate()
+    finally:
+        connection.exec_driver_sql("PRAGMA journal_mode = DELETE")
+        connection.exec_driver_sql("PRAGMA synchronous = FULL")
+        connection.commit()
+
+    connection.exec_driver_sql("ANALYZE")
+    connection.commit()
+    SyncDatabaseManager._publish(TablesChanged(tuple(counts)))
+    SyncDatabaseManager.rebuild_courier_index()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных службы доставки")
+    parser.add_argument('--db', default='bench.db', help="Файл базы SQLite")
+    parser.add_argument('--orders', type=int, default=100_000, help="Число заказов")
+    parser.add_argument('--customers', type=int, default=None, help="Число клиентов (по умолчанию заказы / 10)")
+    parser.add_argument('--restaurants', type=int, default=200)
+    parser.add_argument('--couriers', type=int, default=500)
+    parser.add_argument('--days', type=int, default=365, help="Глубина истории заказов в днях")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    def report_progress(entity, processed, total):
+        logger.info(f"{entity}: {processed}/{total}")
+
+    counts = generate_sqlite_database(
+        args.db, seed=args.seed, orders=args.orders, customers=args.customers,
+        restaurants=args.restaurants, couriers=args.couriers, days=args.days,
+        progress=report_progress
+    )
+    print(counts)
+
+
+if __name__ == '__main__':
+    main()
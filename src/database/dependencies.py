@@ -0,0 +1,83 @@
+"""
+Анализ зависимостей записей перед удалением
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+# Размер списка IN (...) в одном запросе
+ID_CHUNK_SIZE = 500
+
+# Зависимости таблиц: (ключ, подпись, источник строк, столбец с id проверяемой записи)
+DEPENDENCY_RULES: Dict[str, List[Tuple[str, str, str, str]]] = {
+    'Orders': [
+        ('order_items', 'Позиции заказа', 'OrderItems x', 'x.order_id'),
+        ('deliveries', 'Доставки', 'Deliveries x', 'x.order_id'),
+        ('reviews', 'Отзывы', 'Reviews x', 'x.order_id'),
+    ],
+    'Dishes': [
+        ('order_items', 'Используется в заказах', 'OrderItems x', 'x.dish_id'),
+    ],
+    'Restaurants': [
+        ('dishes', 'Блюд в ресторане', 'Dishes x', 'x.restaurant_id'),
+        ('order_items', 'Позиций заказов с блюдами ресторана',
+         'OrderItems x JOIN Dishes d ON d.dish_id = x.dish_id', 'd.restaurant_id'),
+    ],
+    'Customers': [
+        ('orders', 'Заказов у клиента', 'Orders x', 'x.customer_id'),
+    ],
+    'Couriers': [
+        ('deliveries', 'Доставок у курьера', 'Deliveries x', 'x.courier_id'),
+    ],
+}
+
+# Зависимости, которые запрещают удаление (остальные удаляются каскадно)
+BLOCKING_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+    'Orders': (),
+    'Dishes': ('order_items',),
+    'Restaurants': ('order_items',),
+    'Customers': ('orders',),
+    'Couriers': ('deliveries',),
+}
+
+
+def chunked(ids: Iterable[int], size: int = ID_CHUNK_SIZE) -> Iterable[List[int]]:
+    """Разбиение списка идентификаторов на части для IN (...)"""
+    ids = list(dict.fromkeys(ids))
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def build_dependency_query(table_name: str, count: int) -> str:
+    """
+    Запрос количества зависимых строк для набора записей одной таблицы
+
+    Каждая зависимость - подзапрос с GROUP BY по id записи; подзапросы
+    объединяются через UNION ALL, поэтому весь отчет - один запрос к БД.
+    Параметры запроса - именованные :id0, :id1, ... (см. dependency_params).
+    """
+    placeholders = ', '.join(f':id{index}' for index in range(count))
+    parts = [
+        f"SELECT '{key}' AS dependency, {column} AS record_id, COUNT(*) AS cnt "
+        f"FROM {source} WHERE {column} IN ({placeholders}) GROUP BY {column}"
+        for key, _, source, column in DEPENDENCY_RULES[table_name]
+    ]
+    return '\nUNION ALL\n'.join(parts)
+
+
+def dependency_params(ids: List[int]) -> Dict[str, int]:
+    """Параметры запроса build_dependency_query для списка id"""
+    return {f'id{index}': record_id for index, record_id in enumerate(ids)}
+
+
+def empty_report(table_name: str, ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+    """Отчет без зависимостей: нули по всем правилам таблицы"""
+    keys = [key for key, _, _, _ in DEPENDENCY_RULES[table_name]]
+    return {record_id: dict.fromkeys(keys, 0) for record_id in ids}
+
+
+def describe_dependencies(table_name: str, counts: Dict[str, int]) -> List[str]:
+    """Описание зависимостей одной записи для пользователя"""
+    return [
+        f"{label}: {counts.get(key, 0)}"
+        for key, label, _, _ in DEPENDENCY_RULES[table_name]
+    ]
@@ -0,0 +1,187 @@
+"""
+Общий движок базы данных
+
+Один движок SQLAlchemy и один пул соединений на процесс. Синхронный
+менеджер (SyncDatabaseManager) работает на соединении текущего потока,
+асинхронный (DatabaseManager) выполняет те же методы в потоках
+исполнителя, не блокируя цикл событий.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from src.utils.instrumentation import install_sqlalchemy
+
+logger = logging.getLogger(__name__)
+
+# Размер пула соединений (для SQLite пул управляется SQLAlchemy)
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', '10'))
+# Потоки исполнителя асинхронных вызовов
+ASYNC_THREADS = int(os.getenv('DB_ASYNC_THREADS', '4'))
+
+
+def _sql_concat(*values):
+    """CONCAT в семантике MySQL: NULL, если любой аргумент NULL"""
+    if any(value is None for value in values):
+        return None
+    return ''.join(str(value) for value in values)
+
+
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    """Функции MySQL, которые используют запросы приложения, для подключений SQLite"""
+    dbapi_connection.create_function('CONCAT', -1, _sql_concat, deterministic=True)
+
+
+def build_connection_url(db_config: Dict[str, Any]) -> str:
+    """Строка подключения SQLAlchemy по конфигурации БД"""
+    if db_config['type'] == 'mysql':
+        return (
+            f"mysql+pymysql://{db_config.get('username', 'root')}:{db_config.get('password', '0907')}"
+            f"@{db_config.get('host', 'localhost')}:{db_config.get('port', 3306)}/{db_config.get('database', '')}"
+        )
+    return f"sqlite:///{db_config.get('database', 'phpmyadmin.db')}"
+
+
+class DatabaseEngine:
+    """Движок, соединения потоков и исполнитель асинхронных вызовов"""
+
+    engine = None
+    url: Optional[str] = None
+    _local = threading.local()
+    _lock = threading.Lock()
+    _connections = []
+    _executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def init(cls, db_config: Dict[str, Any]) -> bool:
+        """
+        Создание движка по конфигурации
+
+        Возвращает False, если движок с той же строкой подключения уже создан:
+        повторная инициализация из другого менеджера не открывает второй пул.
+        """
+        from sqlalchemy import create_engine, event
+
+        url = build_connection_url(db_config)
+        if cls.engine is not None:
+            if url == cls.url:
+                return False
+            cls.close()
+
+        options = {}
+        if not url.startswith('sqlite'):
+            options.update(pool_size=POOL_SIZE, max_overflow=POOL_MAX_OVERFLOW,
+                           pool_pre_ping=True, pool_recycle=3600)
+
+        engine = create_engine(url, echo=db_config.get('echo', False), **options)
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', _register_sqlite_functions)
+        install_sqlalchemy(engine)
+
+        cls.engine = engine
+        cls.url = url
+        return True
+
+    @classmethod
+    def connection(cls):
+        """
+        Соединение текущего потока
+
+        Запросы выполняются из главного потока, из пула фоновых потоков
+        интерфейса и из исполнителя асинхронных вызовов, поэтому у каждого
+        потока свое соединение из общего пула движка.
+        """
+        connection = cls.current_connection()
+        if connection is None:
+            if cls.engine is None:
+                return None
+            connection = cls.engine.connect()
+            cls._local.connection = connection
+            with cls._lock:
+                cls._connections.append(connection)
+        return connection
+
+    @classmethod
+    def current_connection(cls):
+        """Соединение текущего потока, если оно уже открыто"""
+        connection = getattr(cls._local, 'connection', None)
+        return connection if connection is not None and not connection.closed else None
+
+    @classmethod
+    def release_connection(cls):
+        """
+        Завершение неявной транзакции и возврат соединения текущего потока в пул
+
+        Вызывается после каждой фоновой задачи: следующие чтения не работают
+        со старым снимком данных, а соединение не остается за потоком. Потоки
+        пулов (QThreadPool, исполнитель) завершаются при простое и заменяются
+        новыми, и без возврата каждый новый поток занимал бы еще одно
+        соединение, пока пул движка не исчерпается.
+        """
+        connection = getattr(cls._local, 'connection', None)
+        if connection is None:
+            return
+        cls._local.connection = None
+        with cls._lock:
+            if connection in cls._connections:
+                cls._connections.remove(connection)
+        try:
+            if not connection.closed and connection.in_transaction():
+                connection.commit()
+        finally:
+            connection.close()
+
+    @classmethod
+    async def run(cls, func: Callable, *args, **kwargs) -> Any:
+        """Асинхронный вызов синхронного метода в потоке исполнителя"""
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(max_workers=ASYNC_THREADS, thread_name_prefix='db-async')
+
+        loop = asyncio.get_running_loop()
+        # Контекст (действие интерфейса) переносится в поток исполнителя
+        call = functools.partial(contextvars.copy_context().run, cls._call, func, args, kwargs)
+        return await loop.run_in_executor(cls._executor, call)
+
+    @classmethod
+    def _call(cls, func: Callable, args, kwargs) -> Any:
+        try:
+            return func(*args, **kwargs)
+        finally:
+            cls.release_connection()
+
+    @classmethod
+    def close(cls):
+        """Остановка исполнителя, закрытие соединений потоков и пула"""
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=True)
+            cls._executor = None
+
+        with cls._lock:
+            connections, cls._connections = cls._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception as e:
+                logger.error(f"Ошибка при закрытии соединения: {str(e)}")
+        cls._local = threading.local()
+
+        if cls.engine is not None:
+            cls.engine.dispose()
+            cls.engine = None
+            cls.url = None
+
+
+class ThreadConnection:
+    """Атрибут класса-менеджера: соединение текущего потока общего движка"""
+
+    def __get__(self, instance, owner):
+        return DatabaseEngine.connection()
@@ -0,0 +1,134 @@
+"""
+Шина событий изменения данных
+
+SyncDatabaseManager публикует событие после фиксации каждой записи (методы
+DatabaseManager выполняются через него и публикуют те же события). Кэши
+подписываются на DataEvent и сбрасывают зависящие от таблиц записи, виджеты
+получают события в главном потоке через data_events (src/utils/data_access.py)
+и обновляют только затронутые данные вместо периодической перезагрузки.
+
+Обработчики вызываются синхронно в потоке, выполнившем запись, в порядке
+подписки; ошибка обработчика записывается в журнал и не мешает остальным.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+# Действия RecordChanged
+CREATED = 'created'
+UPDATED = 'updated'
+DELETED = 'deleted'
+
+
+class DataEvent:
+    """
+    Зафиксированное изменение данных
+
+    tables - таблицы, в которые выполнена запись; order_ids - затронутые
+    заказы (None - неизвестно какие, например при изменении справочника).
+    """
+    tables: Tuple[str, ...]
+    order_ids: Optional[Tuple[int, ...]]
+
+    def touches(self, *tables: str) -> bool:
+        """Затрагивает ли событие хотя бы одну из таблиц"""
+        return any(table in self.tables for table in tables)
+
+
+@dataclass(frozen=True)
+class TablesChanged(DataEvent):
+    """Пакетная запись в таблицы (импорт, генерация данных, каскадные удаления)"""
+    tables: Tuple[str, ...]
+    order_ids: Optional[Tuple[int, ...]] = None
+
+
+@dataclass(frozen=True)
+class OrdersCreated(DataEvent):
+    """Созданы заказы (одной транзакцией)"""
+    order_ids: Tuple[int, ...]
+    customer_ids: Tuple[int, ...]
+
+    tables = ('Orders', 'OrderItems', 'Deliveries')
+
+
+@dataclass(frozen=True)
+class OrderStatusChanged(DataEvent):
+    """Заказы переведены из статуса from_status в to_status"""
+    order_ids: Tuple[int, ...]
+    from_status: int
+    to_status: int
+
+    tables = ('Orders', 'Deliveries')
+
+
+@dataclass(frozen=True)
+class OrdersDeleted(DataEvent):
+    """Заказы удалены вместе с позициями, доставками и отзывами"""
+    order_ids: Tuple[int, ...]
+
+    tables = ('Reviews', 'Deliveries', 'OrderItems', 'Orders')
+
+
+@dataclass(frozen=True)
+class DeliveryCompleted(DataEvent):
+    """Доставка заказа завершена"""
+    order_id: int
+
+    tables = ('Deliveries',)
+
+    @property
+    def order_ids(self) -> Tuple[int, ...]:
+        return (self.order_id,)
+
+
+@dataclass(frozen=True)
+class RecordChanged(DataEvent):
+    """Создана, изменена или удалена запись таблицы (например, блюдо)"""
+    table: str
+    action: str
+    key: Dict[str, Any]
+    values: Dict[str, Any]
+    order_ids: Optional[Tuple[int, ...]] = None
+
+    @property
+    def tables(self) -> Tuple[str, ...]:
+        return (self.table,)
+
+
+class EventBus:
+    """Подписка на события по типу (обработчик получает и события подклассов)"""
+
+    def __init__(self):
+        self._handlers: Dict[type, List[Callable[[DataEvent], None]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_type: Type[DataEvent], handler: Callable[[DataEvent], None]) -> Callable[[], None]:
+        """Подписка; возвращает функцию отмены подписки"""
+        with self._lock:
+            self._handlers.setdefault(event_type, []).append(handler)
+        return lambda: self.unsubscribe(event_type, handler)
+
+    def unsubscribe(self, event_type: Type[DataEvent], handler: Callable[[DataEvent], None]):
+        with self._lock:
+            handlers = self._handlers.get(event_type, [])
+            if handler in handlers:
+                handlers.remove(handler)
+
+    def publish(self, event: DataEvent):
+        """Передача события обработчикам его типа и базовых типов"""
+        with self._lock:
+            handlers = [handler for event_type in type(event).__mro__
+                        for handler in self._handlers.get(event_type, ())]
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика события {type(event).__name__}: {str(e)}", exc_info=True)
+
+
+# Глобальная шина событий изменения данных
+event_bus = EventBus()
@@ -0,0 +1,519 @@
+"""
+Пакетный импорт клиентов, ресторанов, блюд и заказов из CSV/JSON
+"""
+
+import csv
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from src.database.change_tracking import next_change_seq
+from src.utils.search_index import normalize_phone
+
+logger = logging.getLogger(__name__)
+
+# Порядок импорта: справочники раньше ссылающихся на них таблиц
+IMPORT_ORDER = ('customers', 'restaurants', 'dishes', 'orders')
+
+# Таблицы, в которые пишет импорт каждой сущности
+ENTITY_TABLES = {
+    'customers': ('Customers',),
+    'restaurants': ('Restaurants',),
+    'dishes': ('Dishes',),
+    'orders': ('Orders', 'OrderItems'),
+}
+
+_DATETIME_FORMATS = ('%d.%m.%Y %H:%M:%S', '%d.%m.%Y %H:%M', '%d.%m.%Y')
+
+# Множества существующих id для проверки явно указанных ссылок: словарь, из которого они берутся
+_ID_MAPS = {
+    'customer_ids': 'customers',
+    'restaurant_ids': 'restaurants',
+    'dish_ids': 'dishes',
+    'status_ids': 'statuses',
+}
+
+
+class RowError(ValueError):
+    """Ошибка проверки строки импорта"""
+
+
+@dataclass
+class ImportReport:
+    """Итоги импорта одной сущности"""
+    entity: str
+    total: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        """Краткое описание итогов для пользователя"""
+        return (f"{self.entity}: добавлено {self.inserted}, пропущено {self.skipped}, "
+                f"ошибок {len(self.errors)} ({self.rows_per_second:.0f} строк/с)")
+
+
+def read_rows(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Чтение файла импорта
+
+    CSV содержит одну сущность, которая определяется по имени файла
+    (customers.csv, dishes.csv, ...). JSON - либо список объектов (сущность
+    по имени файла), либо объект {"customers": [...], "dishes": [...]}.
+    """
+    name = os.path.splitext(os.path.basename(path))[0].lower()
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            return {name: list(csv.DictReader(f))}
+
+    if extension == '.json':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            return {name: data}
+        if isinstance(data, dict):
+            return {key.lower(): value for key, value in data.items()}
+        raise ValueError("JSON должен содержать список объектов или объект с сущностями")
+
+    raise ValueError(f"Неподдерживаемый формат файла: {extension}")
+
+
+def _text(row: Dict[str, Any], key: str, required: bool = False, max_length: int = 255) -> Optional[str]:
+    """Строковое поле строки импорта"""
+    value = row.get(key)
+    value = str(value).strip() if value is not None else ''
+    if not value:
+        if required:
+            raise RowError(f"не заполнено поле {key}")
+        return None
+    if len(value) > max_length:
+        raise RowError(f"поле {key} длиннее {max_length} символов")
+    return value
+
+
+def _int(row: Dict[str, Any], key: str, default: Optional[int] = None) -> Optional[int]:
+    """Целочисленное поле строки импорта"""
+    value = row.get(key)
+    if value is None or str(value).strip() == '':
+        return default
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        raise RowError(f"поле {key} должно быть целым числом")
+
+
+def _datetime(row: Dict[str, Any], key: str) -> datetime:
+    """Дата и время (ISO 8601 или ДД.ММ.ГГГГ ЧЧ:ММ); по умолчанию - текущее время"""
+    value = _text(row, key)
+    if value is None:
+        return datetime.now()
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    for fmt in _DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise RowError(f"неверный формат даты в поле {key}: {value}")
+
+
+def _db_error(error: Exception) -> str:
+    """Текст ошибки драйвера БД без запроса и параметров (для отчета по строке)"""
+    return str(getattr(error, 'orig', None) or error)
+
+
+class BulkImporter:
+    """
+    Импорт больших наборов данных пакетами
+
+    Строки проверяются и преобразуются в памяти, внешние ключи (клиент по
+    телефону, ресторан по названию, блюдо по ресторану и названию) разрешаются
+    через словари, загруженные одним запросом. Вставка выполняется через
+    executemany, каждый пакет - отдельная транзакция.
+    """
+
+    def __init__(self, connection, batch_size: int = 5000,
+                 progress: Optional[Callable[[str, int, int], None]] = None):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.progress = progress
+        self._maps: Dict[str, Dict[Any, int]] = {}
+
+    def import_file(self, path: str, entity: Optional[str] = None) -> List[ImportReport]:
+        """Импорт файла CSV/JSON (одна или несколько сущностей)"""
+        data = read_rows(path)
+        if entity:
+            if len(data) != 1:
+                raise ValueError("Для файла с несколькими сущностями сущность не указывается")
+            data = {entity: next(iter(data.values()))}
+        return self.import_data(data)
+
+    def import_data(self, data: Dict[str, List[Dict[str, Any]]]) -> List[ImportReport]:
+        """Импорт нескольких сущностей в порядке зависимостей"""
+        unknown = set(data) - set(IMPORT_ORDER)
+        if unknown:
+            raise ValueError(f"Неизвестные сущности: {', '.join(sorted(unknown))}")
+        return [self.import_rows(entity, data[entity]) for entity in IMPORT_ORDER if entity in data]
+
+    def import_rows(self, entity: str, rows: Iterable[Dict[str, Any]]) -> ImportReport:
+        """Импорт строк одной сущности"""
+        handler = getattr(self, f'_import_{entity}', None)
+        if handler is None:
+            raise ValueError(f"Неизвестная сущность: {entity}")
+
+        rows = list(rows)
+        report = ImportReport(entity=entity, total=len(rows))
+        started = time.perf_counter()
+
+        handler(rows, report)
+
+        report.elapsed = time.perf_counter() - started
+        logger.info(f"Импорт {report.summary()}")
+        return report
+
+    # -------------------------------------------------------------------------
+    # Сущности
+    # -------------------------------------------------------------------------
+
+    def _import_customers(self, rows: List[Dict[str, Any]], report: ImportReport):
+        """Клиенты: телефон уникален, существующие номера пропускаются"""
+        phones = self._map('customers')
+
+        def convert(row):
+            phone = _text(row, 'phone_number', required=True, max_length=20)
+            key = normalize_phone(phone)
+            if not key:
+                raise RowError("телефон не содержит цифр")
+            if key in phones:
+                return None
+            phones[key] = 0  # Дубликаты внутри файла тоже пропускаются
+            return {
+                'phone_number': phone,
+                'first_name': _text(row, 'first_name', max_length=100),
+                'last_name': _text(row, 'last_name', max_length=100),
+            }
+
+        self._insert_batches(
+            rows, report, convert,
+            "INSERT INTO Customers (phone_number, first_name, last_name) "
+            "VALUES (:phone_number, :first_name, :last_name)"
+        )
+        self._forget_maps('customers')
+
+    def _import_restaurants(self, rows: List[Dict[str, Any]], report: ImportReport):
+        """Рестораны: пара (название, адрес) уникальна"""
+        restaurants = self._map('restaurants')
+
+        def convert(row):
+            name = _text(row, 'name', required=True)
+            location = _text(row, 'location', max_length=500)
+            key = (name.lower(), (location or '').lower())
+            if key in restaurants:
+                return None
+            restaurants[key] = 0
+
+            rating = row.get('rating')
+            if rating is not None and str(rating).strip() != '':
+                try:
+                    rating = Decimal(str(rating).strip().replace(',', '.'))
+                except InvalidOperation:
+                    raise RowError("рейтинг должен быть числом")
+                if not 0 <= rating <= 5:
+                    raise RowError("рейтинг должен быть от 0 до 5")
+                rating = float(rating)
+            else:
+                rating = None
+
+            return {'name': name, 'location': location, 'rating': rating}
+
+        self._insert_batches(
+            rows, report, convert,
+            "INSERT INTO Restaurants (name, location, rating) VALUES (:name, :location, :rating)"
+        )
+        self._forget_maps('restaurants', 'restaurant_names')
+
+    def _import_dishes(self, rows: List[Dict[str, Any]], report: ImportReport):
+        """Блюда: ресторан по restaurant_id или restaurant_name (+ restaurant_location)"""
+        dishes = self._map('dishes')
+
+        def convert(row):
+            restaurant_id = self._resolve_restaurant(row)
+            name = _text(row, 'name', required=True)
+            key = (restaurant_id, name.lower())
+            if key in dishes:
+                return None
+            dishes[key] = 0
+            return {
+                'restaurant_id': restaurant_id,
+                'name': name,
+                'description': _text(row, 'description', max_length=65535),
+                'cooking_time': _text(row, 'cooking_time', max_length=20),
+                'category': _text(row, 'category', max_length=100),
+            }
+
+        self._insert_batches(
+            rows, report, convert,
+            "INSERT INTO Dishes (restaurant_id, name, description, cooking_time, category) "
+            "VALUES (:restaurant_id, :name, :description, :cooking_time, :category)"
+        )
+        self._forget_maps('dishes')
+
+    def _import_orders(self, rows: List[Dict[str, Any]], report: ImportReport):
+        """
+        Заказы: строки с одинаковым order_ref - позиции одного заказа
+
+        Клиент - customer_id или phone_number, статус - status_id или status
+        (название), блюдо - dish_id или dish_name с рестораном. Идентификаторы
+        заказов назначает БД, как и при создании заказов в приложении.
+        """
+        statuses = self._map('statuses')
+        groups: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+        for number, row in enumerate(rows, start=1):
+            ref = _text(row, 'order_ref') or f'#{number}'
+            groups.setdefault(ref, []).append((number, row))
+
+        processed = 0
+        batch: List[Tuple[int, str, Dict[str, Any], Dict[int, int]]] = []
+        batch_rows = 0
+
+        for ref, group in groups.items():
+            first_number, first = group[0]
+            try:
+                customer_id = self._resolve_customer(first)
+                status_id = _int(first, 'status_id')
+                if status_id is not None:
+                    if status_id not in self._map('status_ids'):
+                        raise RowError(f"статус с id {status_id} не найден")
+                else:
+                    status_name = _text(first, 'status')
+                    status_id = statuses.get(status_name.lower()) if status_name else 1
+                    if status_id is None:
+                        raise RowError(f"неизвестный статус: {status_name}")
+
+                quantities: Dict[int, int] = {}
+                for number, row in group:
+                    dish_id = self._resolve_dish(row)
+                    quantity = _int(row, 'quantity', default=1)
+                    if quantity <= 0:
+                        raise RowError("количество должно быть больше нуля")
+                    quantities[dish_id] = quantities.get(dish_id, 0) + quantity
+
+                order = {
+                    'customer_id': customer_id,
+                    'status_id': status_id,
+                    'order_time': _datetime(first, 'order_time'),
+                }
+            except RowError as e:
+                report.errors.append((first_number, f"заказ {ref}: {e}"))
+                processed += len(group)
+                continue
+
+            batch.append((first_number, ref, order, quantities))
+            batch_rows += 1 + len(quantities)
+            processed += len(group)
+
+            if batch_rows >= self.batch_size:
+                self._flush_orders(batch, report)
+                batch, batch_rows = [], 0
+                self._report_progress(report.entity, processed, report.total)
+
+        if batch:
+            self._flush_orders(batch, report)
+        self._report_progress(report.entity, processed, report.total)
+
+    def _flush_orders(self, batch: List[Tuple[int, str, Dict[str, Any], Dict[int, int]]], report: ImportReport):
+        """
+        Вставка пакета заказов и их позиций в одной транзакции
+
+        Если пакет не вставлен, заказы вставляются по одному, и ошибки
+        относятся к строкам своих заказов.
+        """
+        try:
+            self._insert_orders(batch)
+            self.connection.commit()
+            report.inserted += len(batch)
+            return
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"Ошибка вставки пакета заказов: {str(e)}")
+
+        for entry in batch:
+            number, ref = entry[:2]
+            try:
+                self._insert_orders([entry])
+                self.connection.commit()
+                report.inserted += 1
+            except Exception as e:
+                self.connection.rollback()
+                report.errors.append((number, f"заказ {ref} не вставлен: {_db_error(e)}"))
+
+    def _insert_orders(self, batch: List[Tuple[int, str, Dict[str, Any], Dict[int, int]]]):
+        """Вставка заказов по одному (id назначает БД) и их позиций одним executemany"""
+        change_seq = next_change_seq(self.connection)
+        insert_order = text(
+            "INSERT INTO Orders (customer_id, status_id, order_time, change_seq) "
+            "VALUES (:customer_id, :status_id, :order_time, :change_seq)"
+        )
+        items = []
+        for _, _, order, quantities in batch:
+            order_id = self.connection.execute(insert_order, {**order, 'change_seq': change_seq}).lastrowid
+            items.extend({'order_id': order_id, 'dish_id': dish_id, 'quantity': quantity}
+                         for dish_id, quantity in quantities.items())
+        self.connection.execute(
+            text("INSERT INTO OrderItems (order_id, dish_id, quantity) VALUES (:order_id, :dish_id, :quantity)"),
+            items
+        )
+
+    # -------------------------------------------------------------------------
+    # Общие шаги
+    # -------------------------------------------------------------------------
+
+    def _insert_batches(self, rows: List[Dict[str, Any]], report: ImportReport,
+                        convert: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]], statement: str):
+        """Проверка строк и вставка пакетами по batch_size строк"""
+        statement = text(statement)
+        batch: List[Tuple[int, Dict[str, Any]]] = []
+
+        for number, row in enumerate(rows, start=1):
+            try:
+                params = convert(row)
+            except RowError as e:
+                report.errors.append((number, str(e)))
+                continue
+
+            if params is None:
+                report.skipped += 1
+            else:
+                batch.append((number, params))
+
+            if len(batch) >= self.batch_size:
+                self._flush(statement, batch, report)
+                batch = []
+                self._report_progress(report.entity, number, report.total)
+
+        if batch:
+            self._flush(statement, batch, report)
+        self._report_progress(report.entity, report.total, report.total)
+
+    def _flush(self, statement, batch: List[Tuple[int, Dict[str, Any]]], report: ImportReport):
+        """
+        Вставка одного пакета в отдельной транзакции; если пакет не вставлен,
+        строки вставляются по одной, и ошибки относятся к своим строкам
+        """
+        try:
+            self.connection.execute(statement, [params for _, params in batch])
+            self.connection.commit()
+            report.inserted += len(batch)
+            return
+        except Exception as e:
+            self.connection.rollback()
+            logger.error(f"Ошибка вставки пакета {report.entity}: {str(e)}")
+
+        for number, params in batch:
+            try:
+                self.connection.execute(statement, params)
+                self.connection.commit()
+                report.inserted += 1
+            except Exception as e:
+                self.connection.rollback()
+                report.errors.append((number, f"строка не вставлена: {_db_error(e)}"))
+
+    def _report_progress(self, entity: str, processed: int, total: int):
+        if self.progress:
+            self.progress(entity, processed, total)
+
+    def _forget_maps(self, *names: str):
+        """Сброс словарей (и множеств id из них) после записи в таблицу"""
+        for name in names:
+            self._maps.pop(name, None)
+            for ids_name, source in _ID_MAPS.items():
+                if source == name:
+                    self._maps.pop(ids_name, None)
+
+    def _map(self, name: str) -> Dict[Any, int]:
+        """Словарь для разрешения ссылок, загружаемый одним запросом"""
+        if name not in self._maps:
+            if name in _ID_MAPS:
+                # Значения словаря - id записей (0 - строка текущего импорта без id)
+                ids = {record_id for record_id in self._map(_ID_MAPS[name]).values() if record_id}
+                self._maps[name] = dict.fromkeys(ids, 0)
+                return self._maps[name]
+            if name == 'customers':
+                rows = self.connection.execute(text("SELECT phone_number, customer_id FROM Customers"))
+                mapping = {normalize_phone(phone): customer_id for phone, customer_id in rows}
+            elif name == 'restaurants':
+                rows = self.connection.execute(text("SELECT name, location, restaurant_id FROM Restaurants"))
+                mapping = {((n or '').lower(), (loc or '').lower()): rid for n, loc, rid in rows}
+            elif name == 'restaurant_names':
+                # Название без адреса однозначно, только если ресторан с таким названием один
+                mapping = {}
+                for (restaurant_name, _), restaurant_id in self._map('restaurants').items():
+                    mapping[restaurant_name] = None if restaurant_name in mapping else restaurant_id
+            elif name == 'dishes':
+                rows = self.connection.execute(text("SELECT restaurant_id, name, dish_id FROM Dishes"))
+                mapping = {(rid, (n or '').lower()): dish_id for rid, n, dish_id in rows}
+            elif name == 'statuses':
+                rows = self.connection.execute(text("SELECT status_name, status_id FROM Statuses"))
+                mapping = {(n or '').lower(): status_id for n, status_id in rows}
+            else:
+                raise KeyError(name)
+            # Чтение справочника не должно держать открытую транзакцию
+            self.connection.commit()
+            self._maps[name] = mapping
+        return self._maps[name]
+
+    def _resolve_customer(self, row: Dict[str, Any]) -> int:
+        customer_id = _int(row, 'customer_id')
+        if customer_id is not None:
+            if customer_id not in self._map('customer_ids'):
+                raise RowError(f"клиент с id {customer_id} не найден")
+            return customer_id
+        phone = _text(row, 'phone_number', required=True, max_length=20)
+        customer_id = self._map('customers').get(normalize_phone(phone))
+        if not customer_id:
+            raise RowError(f"клиент с телефоном {phone} не найден")
+        return customer_id
+
+    def _resolve_restaurant(self, row: Dict[str, Any]) -> int:
+        restaurant_id = _int(row, 'restaurant_id')
+        if restaurant_id is not None:
+            if restaurant_id not in self._map('restaurant_ids'):
+                raise RowError(f"ресторан с id {restaurant_id} не найден")
+            return restaurant_id
+        name = _text(row, 'restaurant_name', required=True)
+        location = _text(row, 'restaurant_location', max_length=500)
+        if location is not None:
+            restaurant_id = self._map('restaurants').get((name.lower(), location.lower()))
+        else:
+            restaurant_id = self._map('restaurant_names').get(name.lower())
+        if not restaurant_id:
+            raise RowError(f"ресторан '{name}' не найден или не определен однозначно")
+        return restaurant_id
+
+    def _resolve_dish(self, row: Dict[str, Any]) -> int:
+        dish_id = _int(row, 'dish_id')
+        if dish_id is not None:
+            if dish_id not in self._map('dish_ids'):
+                raise RowError(f"блюдо с id {dish_id} не найдено")
+            return dish_id
+        name = _text(row, 'dish_name', required=True)
+        dish_id = self._map('dishes').get((self._resolve_restaurant(row), name.lower()))
+        if not dish_id:
+            raise RowError(f"блюдо '{name}' не найдено")
+        return dish_id
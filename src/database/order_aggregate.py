@@ -0,0 +1,61 @@
+"""
+Сборка агрегата заказа из строк одного JOIN-запроса
+"""
+
+from typing import Any, Dict, List, Optional
+
+# Таблицы, из которых собирается агрегат заказа (теги записей кэша деталей заказов)
+ORDER_AGGREGATE_TABLES = frozenset({
+    'orders', 'customers', 'statuses', 'deliveries', 'couriers',
+    'orderitems', 'dishes', 'restaurants'
+})
+
+
+def _full_name(first_name: Optional[str], last_name: Optional[str]) -> Optional[str]:
+    """Имя и фамилия через пробел (None, если обе части пустые)"""
+    parts = [part for part in (first_name, last_name) if part]
+    return ' '.join(parts) if parts else None
+
+
+def build_order_aggregate(rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Сборка заказа из строк запроса "заказ x доставка x позиции"
+
+    Все строки содержат одинаковые данные заказа, клиента и доставки; позиции
+    заказа повторяются, если у заказа несколько доставок, поэтому учитываются
+    по dish_id один раз.
+    """
+    if not rows:
+        return None
+
+    first = rows[0]
+    items = []
+    seen_dishes = set()
+
+    for row in rows:
+        dish_id = row.get('dish_id')
+        if dish_id is None or dish_id in seen_dishes:
+            continue
+        seen_dishes.add(dish_id)
+
+        items.append({
+            'dish_id': dish_id,
+            'dish_name': row.get('dish_name'),
+            'description': row.get('description'),
+            'cooking_time': row.get('cooking_time'),
+            'quantity': row.get('quantity'),
+            'restaurant_name': row.get('restaurant_name'),
+        })
+
+    return {
+        'order_id': first['order_id'],
+        'customer_name': _full_name(first.get('first_name'), first.get('last_name')),
+        'phone_number': first.get('phone_number'),
+        'status_name': first.get('status_name'),
+        'order_time': first.get('order_time'),
+        'courier_name': _full_name(first.get('courier_first_name'), first.get('courier_last_name')),
+        'car_number': first.get('car_number'),
+        'delivery_time': first.get('delivery_time'),
+        'items': items,
+        'total_items': sum(item['quantity'] or 0 for item in items),
+    }
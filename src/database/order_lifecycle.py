@@ -0,0 +1,78 @@
+"""
+Жизненный цикл заказа: статусы и допустимые переходы
+
+Принят -> Готовится -> Готов -> В доставке -> Доставлен; отменить можно
+любой незавершенный заказ. Переходы выполняются пакетно
+(SyncDatabaseManager.transition_orders) одним UPDATE с условием на текущий
+статус. Столбец Orders.version увеличивается при каждом изменении заказа:
+по нему диспетчер обнаруживает, что заказ уже изменил кто-то другой.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List
+
+ACCEPTED = 1
+COOKING = 2
+READY = 3
+DELIVERING = 4
+DELIVERED = 5
+CANCELLED = 6
+
+STATUS_NAMES: Dict[int, str] = {
+    ACCEPTED: 'Принят',
+    COOKING: 'Готовится',
+    READY: 'Готов',
+    DELIVERING: 'В доставке',
+    DELIVERED: 'Доставлен',
+    CANCELLED: 'Отменен',
+}
+
+# Завершенные заказы: статус больше не меняется
+FINAL_STATUSES: FrozenSet[int] = frozenset({DELIVERED, CANCELLED})
+
+TRANSITIONS: Dict[int, FrozenSet[int]] = {
+    ACCEPTED: frozenset({COOKING, CANCELLED}),
+    COOKING: frozenset({READY, CANCELLED}),
+    READY: frozenset({DELIVERING, CANCELLED}),
+    DELIVERING: frozenset({DELIVERED, CANCELLED}),
+    DELIVERED: frozenset(),
+    CANCELLED: frozenset(),
+}
+
+
+class InvalidTransitionError(ValueError):
+    """Недопустимый переход статуса заказа"""
+
+
+def status_name(status_id: int) -> str:
+    return STATUS_NAMES.get(status_id, str(status_id))
+
+
+def check_transition(from_status: int, to_status: int):
+    """Проверка перехода; InvalidTransitionError, если он не разрешен"""
+    if to_status not in TRANSITIONS.get(from_status, ()):
+        raise InvalidTransitionError(
+            f"Переход '{status_name(from_status)}' -> '{status_name(to_status)}' недопустим"
+        )
+
+
+@dataclass
+class TransitionResult:
+    """Итоги пакетного перехода статуса"""
+    from_status: int
+    to_status: int
+    moved: List[int] = field(default_factory=list)
+    # Заказы, которые к моменту перехода были в другом статусе или другой версии
+    conflicts: List[int] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.conflicts
+
+    def summary(self) -> str:
+        """Краткое описание итогов для пользователя"""
+        text = (f"'{status_name(self.from_status)}' -> '{status_name(self.to_status)}': "
+                f"переведено {len(self.moved)}")
+        if self.conflicts:
+            text += f", изменены другим пользователем: {len(self.conflicts)}"
+        return text
@@ -0,0 +1,240 @@
+"""
+Кэш результатов запросов отчетов и аналитики с инвалидацией по таблицам
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from src.database.events import DataEvent, event_bus
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Таблицы, из которых читает запрос: всё, что стоит после FROM или JOIN
+_TABLE_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+`?([A-Za-z_][A-Za-z0-9_]*)`?', re.IGNORECASE)
+
+
+def extract_tables(query: str) -> frozenset:
+    """Получение множества таблиц, из которых читает SQL-запрос"""
+    return frozenset(name.lower() for name in _TABLE_PATTERN.findall(query))
+
+
+def estimate_size(value: Any) -> int:
+    """Приблизительная оценка занимаемой памяти (байт) для результатов запросов"""
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        # Ключи строк результата общие для всех строк, поэтому учитываем только значения
+        size += sum(sys.getsizeof(item) for item in value.values())
+    elif isinstance(value, (list, tuple)):
+        size += sum(estimate_size(item) for item in value)
+
+    return size
+
+
+class LRUCache:
+    """Потокобезопасный LRU-кэш с ограничением по памяти, тегами и метриками"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Any, Tuple[Any, int, frozenset]]" = OrderedDict()
+        self._tag_index: Dict[str, set] = {}
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        """Получение значения из кэша с обновлением позиции LRU"""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, tags: Iterable[str] = (), size: Optional[int] = None):
+        """Сохранение значения в кэше"""
+        size = estimate_size(value) if size is None else size
+        tags = frozenset(tag.lower() for tag in tags)
+
+        with self._lock:
+            if size > self.max_bytes:
+                logger.debug(f"Значение для ключа {key!r} больше лимита кэша и не сохраняется")
+                return
+
+            self._remove(key)
+            self._entries[key] = (value, size, tags)
+            self._bytes += size
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+
+            self._evict()
+
+    def invalidate(self, key) -> bool:
+        """Удаление одной записи из кэша"""
+        with self._lock:
+            removed = self._remove(key)
+            if removed:
+                self.invalidations += 1
+            return removed
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Удаление всех записей, помеченных любым из указанных тегов"""
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tag_index.get(tag.lower(), ()))
+
+            for key in keys:
+                self._remove(key)
+
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        """Полная очистка кэша"""
+        with self._lock:
+            self._entries.clear()
+            self._tag_index.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики работы кэша"""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / requests * 100) if requests > 0 else 0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _remove(self, key) -> bool:
+        """Удаление записи без учета метрик (вызывается под блокировкой)"""
+        entry = self._entries.pop(key, _MISSING)
+        if entry is _MISSING:
+            return False
+
+        self._bytes -= entry[1]
+        for tag in entry[2]:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+        return True
+
+    def _evict(self):
+        """Вытеснение давно не использованных записей сверх лимитов"""
+        while self._entries and (
+            self._bytes > self.max_bytes
+            or (self.max_entries is not None and len(self._entries) > self.max_entries)
+        ):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+
+class QueryResultCache(LRUCache):
+    """
+    Кэш результатов именованных запросов (statistical_queries, dashboard_queries и т.д.)
+
+    Ключ записи - имя запроса, параметры и временное окно. Каждая запись помечается
+    таблицами, из которых читает запрос, и удаляется при записи в эти таблицы.
+    """
+
+    @staticmethod
+    def make_key(name: str, params: Optional[Dict[str, Any]] = None,
+                 window_seconds: Optional[float] = None):
+        """Формирование ключа кэша"""
+        frozen_params = tuple(sorted((params or {}).items()))
+        # Запросы с NOW()/CURDATE() зависят от времени: результат действителен в пределах окна
+        window = int(time.time() // window_seconds) if window_seconds else None
+        return (name, frozen_params, window)
+
+    def get_or_execute(self, name: str, query: str, execute: Callable[[], Any],
+                       params: Optional[Dict[str, Any]] = None,
+                       window_seconds: Optional[float] = None):
+        """Получение результата из кэша или выполнение запроса с сохранением результата"""
+        key = self.make_key(name, params, window_seconds)
+        result = self.get(key, _MISSING)
+        if result is not _MISSING:
+            return result
+
+        result = execute()
+        if result is not None:
+            self.set(key, result, tags=extract_tables(query))
+        return result
+
+    def invalidate_tables(self, tables: Iterable[str]) -> int:
+        """Инвалидация всех результатов, читающих из указанных таблиц"""
+        tables = list(tables)
+        count = self.invalidate_tags(tables)
+        if count:
+            logger.debug(f"Инвалидировано {count} результатов запросов по таблицам {tables}")
+        return count
+
+
+# Глобальный экземпляр кэша результатов запросов
+query_cache = QueryResultCache(max_bytes=int(os.getenv('QUERY_CACHE_MB', '64')) * 1024 * 1024)
+
+
+# Таблицы, строки которых относятся к конкретному заказу
+ORDER_SCOPED_TABLES = frozenset({'orders', 'orderitems', 'deliveries', 'reviews'})
+
+# Кэш агрегатов "заказ + клиент + курьер + доставка + позиции" по order_id
+order_details_cache = LRUCache(
+    max_bytes=int(os.getenv('ORDER_CACHE_MB', '16')) * 1024 * 1024,
+    max_entries=int(os.getenv('ORDER_CACHE_SIZE', '1000'))
+)
+
+
+def invalidate_order_details(tables: Iterable[str], order_ids: Optional[Iterable[int]] = None):
+    """
+    Инвалидация кэша деталей заказов после записи в таблицы
+
+    Если известны измененные заказы, удаляются только их записи; изменения
+    справочников (клиенты, курьеры, блюда) сбрасывают все зависящие от них записи.
+    """
+    tables = [table.lower() for table in tables]
+
+    if order_ids is None:
+        order_details_cache.invalidate_tags(tables)
+        return
+
+    for order_id in order_ids:
+        order_details_cache.invalidate(order_id)
+    order_details_cache.invalidate_tags(table for table in tables if table not in ORDER_SCOPED_TABLES)
+
+
+def _on_data_changed(event: DataEvent):
+    """Сброс результатов, зависящих от таблиц зафиксированной записи"""
+    query_cache.invalidate_tables(event.tables)
+    invalidate_order_details(event.tables, event.order_ids)
+
+
+event_bus.subscribe(DataEvent, _on_data_changed)
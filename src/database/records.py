@@ -0,0 +1,171 @@
+"""
+Записи таблиц и компактные результаты запросов
+
+ResultSet хранит имена столбцов один раз, а строки - кортежами значений;
+словарь строки (Row) создается только при обращении к ней. Для аналитики
+числовые столбцы можно получить массивами (array).
+"""
+
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+# Первичные ключи таблиц схемы
+PRIMARY_KEYS: Dict[str, Tuple[str, ...]] = {
+    'Statuses': ('status_id',),
+    'Customers': ('customer_id',),
+    'Restaurants': ('restaurant_id',),
+    'Dishes': ('dish_id',),
+    'Couriers': ('courier_id',),
+    'Orders': ('order_id',),
+    'OrderItems': ('order_id', 'dish_id'),
+    'Deliveries': ('delivery_id',),
+    'Reviews': ('review_id',),
+}
+
+
+class Row(Mapping):
+    """Строка результата: доступ по имени столбца без копирования значений"""
+
+    __slots__ = ('_index', '_values')
+
+    def __init__(self, index: Dict[str, int], values: tuple):
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, column: str) -> Any:
+        return self._values[self._index[column]]
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._values[self._index[name]]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class ResultSet(Sequence):
+    """
+    Результат запроса: имена столбцов и строки-кортежи
+
+    Ведет себя как список словарей (индексация, len, итерация по строкам,
+    row['column'], row.get), но не хранит словарь на каждую строку.
+    """
+
+    __slots__ = ('columns', 'index', 'rows')
+
+    def __init__(self, columns: Iterable[str], rows: List[tuple]):
+        self.columns = tuple(columns)
+        self.index = {column: position for position, column in enumerate(self.columns)}
+        self.rows = rows
+
+    @classmethod
+    def from_result(cls, result) -> 'ResultSet':
+        """Результат SQLAlchemy (CursorResult) целиком"""
+        return cls(result.keys(), [tuple(row) for row in result])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, item: Union[int, slice]):
+        if isinstance(item, slice):
+            return ResultSet(self.columns, self.rows[item])
+        return Row(self.index, self.rows[item])
+
+    def __iter__(self):
+        index = self.index
+        for values in self.rows:
+            yield Row(index, values)
+
+    def __repr__(self) -> str:
+        return f"<ResultSet {len(self.rows)} x {self.columns}>"
+
+    def column(self, name: str) -> List[Any]:
+        """Значения одного столбца"""
+        position = self.index[name]
+        return [values[position] for values in self.rows]
+
+    def to_columns(self) -> Dict[str, Union[array, List[Any]]]:
+        """
+        Столбцовое представление: целые столбцы - array('q'), дробные -
+        array('d'), остальные (и столбцы с NULL) - списки
+        """
+        return {name: compact_column(self.column(name)) for name in self.columns}
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        columns = self.columns
+        return [dict(zip(columns, values)) for values in self.rows]
+
+    def records(self, model) -> List['ModelRecord']:
+        """Строки как записи модели"""
+        return [ModelRecord(model, row) for row in self]
+
+
+def compact_column(values: List[Any]) -> Union[array, List[Any]]:
+    """Числовой столбец без NULL - в массив (8 байт на значение), иначе список"""
+    if values and all(type(value) is int for value in values):
+        try:
+            return array('q', values)
+        except OverflowError:
+            return values
+    if values and all(type(value) in (int, float) for value in values):
+        return array('d', values)
+    return values
+
+
+class ModelRecord:
+    """
+    Строка таблицы с доступом к полям как к атрибутам
+
+    Заменяет экземпляры моделей Tortoise: модель служит только описанием
+    таблицы, значения столбцов - строка результата (Row) или словарь.
+    Строка копируется в словарь только при изменении записи.
+    """
+
+    __slots__ = ('model', 'values')
+
+    def __init__(self, model, values: Mapping):
+        object.__setattr__(self, 'model', model)
+        object.__setattr__(self, 'values', values if isinstance(values, Row) else dict(values))
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self.values[name]
+        except KeyError:
+            raise AttributeError(f"{self.table} не содержит поля {name}") from None
+
+    def __setattr__(self, name: str, value: Any):
+        if not isinstance(self.values, dict):
+            object.__setattr__(self, 'values', dict(self.values))
+        self.values[name] = value
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ModelRecord) and self.model is other.model and dict(self.values) == dict(other.values)
+
+    def __repr__(self) -> str:
+        return f"<{self.table} {self.key}>"
+
+    @property
+    def table(self) -> str:
+        return self.model._meta.db_table
+
+    @property
+    def key(self) -> Dict[str, Any]:
+        """Значения первичного ключа"""
+        return {column: self.values.get(column) for column in PRIMARY_KEYS[self.table]}
+
+    @property
+    def pk(self) -> Any:
+        columns = PRIMARY_KEYS[self.table]
+        return self.values.get(columns[0]) if len(columns) == 1 else tuple(self.key.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.values)
@@ -0,0 +1,183 @@
+"""
+Почасовые сводки заказов для отчетов и графиков
+
+OrderRollups хранит по часу, ресторану и статусу число заказов, позиций и
+порций. Заказ с блюдами нескольких ресторанов учитывается у каждого из них,
+заказ без позиций - у ресторана 0.
+
+Обновление инкрементальное: номер последнего учтенного изменения заказов
+(src/database/change_tracking.py) хранится в ChangeSequence под именем
+ROLLUPS_WATERMARK, и пересчитываются только часы, в которых есть заказы,
+измененные или удаленные после него. Перенос заказа на другое время
+(правка order_time) старый час не пересчитывает - для этого есть полный
+пересчет (full=True).
+
+order_series читает из сводок ряд заказов по часам, дням или месяцам:
+длинный период - крупными интервалами, приближенный - подробно.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from src.database.change_tracking import current_change_seq, ensure_sequence
+
+# Учтенное в сводках изменение заказов
+ROLLUPS_WATERMARK = 'order_rollups'
+
+BUCKET = timedelta(hours=1)
+BUCKET_FORMAT = '%Y-%m-%d %H:00:00'
+
+# Интервалы рядов: формат начала интервала, от мелких к крупным
+HOUR = 'hour'
+DAY = 'day'
+MONTH = 'month'
+GRAIN_FORMATS = {
+    HOUR: BUCKET_FORMAT,
+    DAY: '%Y-%m-%d 00:00:00',
+    MONTH: '%Y-%m-01 00:00:00',
+}
+
+# Час заказа в синтаксисе СУБД
+_BUCKET_EXPRESSIONS = {
+    'sqlite': "strftime('%Y-%m-%d %H:00:00', {column})",
+    'mysql': "DATE_FORMAT({column}, '%Y-%m-%d %H:00:00')",
+}
+
+_AGGREGATE_QUERY = """
+    INSERT INTO OrderRollups (bucket, restaurant_id, status_id, orders, items, quantity)
+    SELECT {bucket}, COALESCE(d.restaurant_id, 0), COALESCE(o.status_id, 0),
+           COUNT(DISTINCT o.order_id), COUNT(oi.dish_id), COALESCE(SUM(oi.quantity), 0)
+    FROM Orders o
+    LEFT JOIN OrderItems oi ON oi.order_id = o.order_id
+    LEFT JOIN Dishes d ON d.dish_id = oi.dish_id
+    WHERE o.order_time IS NOT NULL {where}
+    GROUP BY {bucket}, COALESCE(d.restaurant_id, 0), COALESCE(o.status_id, 0)
+"""
+
+
+def bucket_expression(dialect: str, column: str, grain: str = HOUR) -> str:
+    expression = _BUCKET_EXPRESSIONS.get(dialect, _BUCKET_EXPRESSIONS['mysql'])
+    return expression.replace(BUCKET_FORMAT, GRAIN_FORMATS[grain]).format(column=column)
+
+
+def _parse_bucket(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(str(value)[:19], '%Y-%m-%d %H:%M:%S')
+
+
+def grain_start(moment: datetime, grain: str) -> datetime:
+    """Начало интервала, в который попадает moment"""
+    return datetime.strptime(moment.strftime(GRAIN_FORMATS[grain]), '%Y-%m-%d %H:%M:%S')
+
+
+def next_grain(moment: datetime, grain: str) -> datetime:
+    """Начало следующего интервала (moment - начало интервала)"""
+    if grain == MONTH:
+        return moment.replace(year=moment.year + moment.month // 12, month=moment.month % 12 + 1)
+    return moment + (BUCKET if grain == HOUR else timedelta(days=1))
+
+
+def choose_grain(start: datetime, end: datetime, max_points: int) -> str:
+    """Самый мелкий интервал, при котором в [start, end) не больше max_points точек"""
+    span = end - start
+    if span <= BUCKET * max_points:
+        return HOUR
+    if span <= timedelta(days=max_points):
+        return DAY
+    return MONTH
+
+
+def rollup_extent(connection) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Начало первого и конец последнего часа в сводках (None, None - сводки пусты)"""
+    first, last = connection.execute(text("SELECT MIN(bucket), MAX(bucket) FROM OrderRollups")).one()
+    if first is None:
+        return None, None
+    return _parse_bucket(first), _parse_bucket(last) + BUCKET
+
+
+def order_series(connection, start: datetime, end: datetime, grain: str) -> List[Tuple[datetime, int]]:
+    """
+    Число заказов по интервалам grain в [start, end)
+
+    Интервалы без заказов входят в ряд с нулем. Заказ с блюдами нескольких
+    ресторанов, как и в самих сводках, учитывается у каждого из них.
+    """
+    bucket = bucket_expression(connection.dialect.name, 'bucket', grain)
+    start = grain_start(start, grain)
+    rows = connection.execute(text(f"""
+        SELECT {bucket} AS period, SUM(orders) AS orders
+        FROM OrderRollups
+        WHERE bucket >= :start AND bucket < :end
+        GROUP BY {bucket}
+    """), {"start": start.strftime(BUCKET_FORMAT), "end": end.strftime(BUCKET_FORMAT)})
+    counts = {_parse_bucket(period): int(orders or 0) for period, orders in rows}
+
+    series = []
+    moment = start
+    while moment < end:
+        series.append((moment, counts.get(moment, 0)))
+        moment = next_grain(moment, grain)
+    return series
+
+
+def merge_buckets(buckets: Iterable[str]) -> List[Tuple[str, str]]:
+    """Часы, объединенные в непрерывные интервалы [начало, конец)"""
+    ranges: List[List[datetime]] = []
+    for bucket in sorted({_parse_bucket(bucket) for bucket in buckets}):
+        if ranges and ranges[-1][1] == bucket:
+            ranges[-1][1] = bucket + BUCKET
+        else:
+            ranges.append([bucket, bucket + BUCKET])
+    return [(start.strftime(BUCKET_FORMAT), end.strftime(BUCKET_FORMAT)) for start, end in ranges]
+
+
+def changed_buckets(connection, watermark: int, upto: int, grain: str = HOUR) -> List[str]:
+    """Интервалы (по умолчанию часы) заказов, измененных или удаленных в изменениях (watermark, upto]"""
+    bucket = bucket_expression(connection.dialect.name, 'order_time', grain)
+    params = {"watermark": watermark, "upto": upto}
+    buckets = set()
+    for table in ('Orders', 'DeletedOrders'):
+        buckets.update(connection.execute(text(f"""
+            SELECT DISTINCT {bucket} FROM {table}
+            WHERE change_seq > :watermark AND change_seq <= :upto AND order_time IS NOT NULL
+        """), params).scalars())
+    return sorted(buckets)
+
+
+def refresh_order_rollups(connection, full: bool = False) -> Dict[str, int]:
+    """
+    Обновление сводок в текущей транзакции
+
+    Возвращает номер учтенного изменения, число пересчитанных интервалов
+    и число записанных строк сводки.
+    """
+    created = ensure_sequence(connection, ROLLUPS_WATERMARK)
+    watermark = current_change_seq(connection, ROLLUPS_WATERMARK)
+    # Граница читается до пересчета: изменения после нее попадут в следующий
+    upto = current_change_seq(connection)
+    bucket = bucket_expression(connection.dialect.name, 'o.order_time')
+
+    if full or created:
+        connection.execute(text("DELETE FROM OrderRollups"))
+        rows = connection.execute(text(_AGGREGATE_QUERY.format(bucket=bucket, where=""))).rowcount
+        ranges = 1
+    else:
+        rows = 0
+        intervals = merge_buckets(changed_buckets(connection, watermark, upto))
+        insert = text(_AGGREGATE_QUERY.format(
+            bucket=bucket, where="AND o.order_time >= :start AND o.order_time < :end"
+        ))
+        for start, end in intervals:
+            params = {"start": start, "end": end}
+            connection.execute(text("DELETE FROM OrderRollups WHERE bucket >= :start AND bucket < :end"), params)
+            rows += connection.execute(insert, params).rowcount
+        ranges = len(intervals)
+
+    connection.execute(
+        text("UPDATE ChangeSequence SET value = :upto WHERE name = :name"),
+        {"upto": upto, "name": ROLLUPS_WATERMARK}
+    )
+    return {'watermark': upto, 'ranges': ranges, 'rows': rows}
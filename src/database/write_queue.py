@@ -0,0 +1,147 @@
+"""
+Очередь групповой фиксации заказов
+
+В часы пик заказы оформляются почти одновременно, и каждая транзакция
+заканчивается собственной фиксацией (fsync). Очередь собирает заказы,
+пришедшие в течение нескольких миллисекунд, и создает их одной транзакцией
+(SyncDatabaseManager.create_orders). Вызывающий получает id своего заказа
+через Future только после фиксации пакета, поэтому заказ, о создании которого
+сообщено, уже сохранен в БД.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Признак остановки потока очереди
+_STOP = object()
+
+
+class OrderWriteQueue:
+    """Очередь создания заказов с групповой фиксацией"""
+
+    def __init__(self, window_ms: float = 5.0, max_batch: int = 200, enabled: bool = True):
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self.enabled = enabled
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {'orders': 0, 'failed': 0, 'commits': 0, 'max_batch': 0}
+
+    def submit(self, customer_id: int, dish_quantities: List[Tuple[int, int]],
+               courier_id: Optional[int] = None) -> Future:
+        """Постановка заказа в очередь; результат Future - id созданного заказа"""
+        future: Future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='order-write-queue', daemon=True)
+                self._thread.start()
+            self._queue.put((customer_id, list(dish_quantities), courier_id, future))
+        return future
+
+    def create_order(self, customer_id: int, dish_quantities: List[Tuple[int, int]],
+                     courier_id: Optional[int] = None) -> int:
+        """
+        Создание заказа с ожиданием фиксации
+
+        Замена SyncDatabaseManager.create_order для фоновых потоков: при
+        выключенной очереди заказ создается отдельной транзакцией.
+        """
+        if not self.enabled:
+            from src.sync_database import SyncDatabaseManager
+            return SyncDatabaseManager.create_order(customer_id, dish_quantities, courier_id)
+        return self.submit(customer_id, dish_quantities, courier_id).result()
+
+    def stop(self, timeout: float = 5.0):
+        """Остановка потока после обработки уже поставленных заказов"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Число заказов, фиксаций и средний размер пакета"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_batch'] = stats['orders'] / stats['commits'] if stats['commits'] else 0.0
+        return stats
+
+    def _run(self):
+        from src.sync_database import SyncDatabaseManager
+
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            # Окно сбора пакета открывается первым заказом
+            batch = [item]
+            deadline = time.monotonic() + self.window_ms / 1000
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                self._flush(batch)
+            finally:
+                SyncDatabaseManager.release_connection()
+
+    def _flush(self, batch):
+        from src.sync_database import SyncDatabaseManager
+
+        # Отмененные до записи заказы не создаются
+        batch = [entry for entry in batch if entry[3].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            results = SyncDatabaseManager.create_orders(
+                [(customer_id, dish_quantities, courier_id) for customer_id, dish_quantities, courier_id, _ in batch]
+            )
+        except Exception as e:
+            logger.error(f"Ошибка групповой фиксации {len(batch)} заказов: {str(e)}")
+            with self._lock:
+                self._stats['failed'] += len(batch)
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        with self._lock:
+            self._stats['orders'] += len(batch) - failed
+            self._stats['failed'] += failed
+            self._stats['commits'] += 1
+            self._stats['max_batch'] = max(self._stats['max_batch'], len(batch))
+
+        for (*_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+# Глобальная очередь создания заказов (по умолчанию выключена)
+order_write_queue = OrderWriteQueue(
+    window_ms=float(os.getenv('ORDER_GROUP_COMMIT_MS', '5')),
+    max_batch=int(os.getenv('ORDER_GROUP_COMMIT_MAX', '200')),
+    enabled=os.getenv('ORDER_GROUP_COMMIT', 'false').lower() == 'true',
+)
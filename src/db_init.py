@@ -4,7 +4,6 @@
 
 import logging
 import asyncio
-from tortoise import Tortoise
 from .database_manager import DatabaseManager
 
 logger = logging.getLogger(__name__)
@@ -26,7 +25,7 @@ class DatabaseInitializer:
             try:
                 logger.info("Начало инициализации базы данных")
                 
-                # Инициализируем Tortoise
+                # Инициализируем общий движок
                 await DatabaseManager.init_db()
                 
                 cls._initialized = True
@@ -42,8 +41,8 @@ class DatabaseInitializer:
         if not cls._initialized:
             await cls.initialize()
         
-        from tortoise import connections
-        return connections.get('default')
+        from .database.engine import DatabaseEngine
+        return DatabaseEngine.connection()
     
     @classmethod
     def run_sync_initialization(cls):
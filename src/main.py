@@ -38,11 +38,15 @@ def main():
         logger = setup_logging()
         logger.info("Запуск приложения управления доставкой еды")
         
-        from PyQt6.QtWidgets import QApplication, QMessageBox
+        from PyQt6.QtWidgets import QMessageBox
+        from src.ui.diagnostics import ActionTrackingApplication, start_stall_watchdog
         from PyQt6.QtGui import QPalette, QColor
         from PyQt6.QtCore import Qt
         
-        app = QApplication(sys.argv)
+        # Приложение связывает запросы к БД с действием пользователя (диагностика SQL)
+        app = ActionTrackingApplication(sys.argv)
+        # Сторож зависаний: стеки блокирующих вызовов в главном потоке
+        start_stall_watchdog(app)
         app.setStyle('Fusion')
         
         # Настройка темной темы
@@ -133,6 +137,11 @@ def main():
         
         # Очистка при закрытии
         def cleanup():
+            # Фоновые запросы должны завершиться до закрытия соединений
+            from src.utils.data_access import data_access
+            from src.database.write_queue import order_write_queue
+            data_access.shutdown()
+            order_write_queue.stop()
             SyncDatabaseManager.close()
         
         app.aboutToQuit.connect(cleanup)
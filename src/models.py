@@ -44,11 +44,16 @@ class Dishes(Model):
     name = fields.CharField(max_length=255)
     description = fields.TextField(null=True)
     cooking_time = fields.CharField(max_length=20)
+    category = fields.CharField(max_length=100, null=True)
 
     class Meta:
         table = "Dishes"
 
 
+# Категории блюд, предлагаемые при редактировании (справочника категорий нет)
+DISH_CATEGORIES = ('Выпечка', 'Горячие блюда', 'Шашлык и гриль', 'Закуски', 'Супы', 'Гарниры', 'Десерты')
+
+
 class Couriers(Model):
     """Модель курьеров"""
     courier_id = fields.IntField(pk=True)
@@ -67,6 +72,8 @@ class Orders(Model):
     customer_id = fields.IntField()
     status_id = fields.IntField()
     order_time = fields.DatetimeField()
+    version = fields.IntField(default=0)
+    change_seq = fields.BigIntField(default=0)
 
     class Meta:
         table = "Orders"
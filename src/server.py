@@ -0,0 +1,77 @@
+"""
+Точка входа сервера данных (без графического интерфейса)
+
+Запуск:
+    python -m src.server --port 8765
+    python -m src.server --unix /tmp/food_delivery.sock
+    python -m src.server --sqlite bench.db
+
+Настройки БД берутся из .env или переменных окружения, как у приложения.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import sys
+
+# Корень проекта в sys.path, чтобы можно было импортировать модули из src
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from src.utils.config import setup_logging, get_db_config
+
+
+async def serve(server):
+    """Работа сервера до SIGINT/SIGTERM"""
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except NotImplementedError:
+            pass  # Windows: остановка по KeyboardInterrupt
+
+    await server.start()
+    print(f"Сервер данных слушает {server.address}")
+    try:
+        await stop.wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер данных службы доставки (JSON по локальному сокету)")
+    parser.add_argument('--host', default=os.getenv('API_HOST', '127.0.0.1'), help="Адрес TCP")
+    parser.add_argument('--port', type=int, default=int(os.getenv('API_PORT', '8765')), help="Порт TCP")
+    parser.add_argument('--unix', default=os.getenv('API_SOCKET'), help="Unix-сокет вместо TCP")
+    parser.add_argument('--sqlite', help="Файл базы SQLite вместо настроек из окружения")
+    parser.add_argument('--no-group-commit', action='store_true',
+                        help="Создавать каждый заказ отдельной транзакцией")
+    args = parser.parse_args()
+
+    logger = setup_logging()
+
+    from src.api.server import ApiServer
+    from src.database.write_queue import order_write_queue
+    from src.sync_database import SyncDatabaseManager
+
+    db_config = {'type': 'sqlite', 'database': args.sqlite} if args.sqlite else get_db_config()
+    SyncDatabaseManager.init_db(db_config)
+    # Заказы разных клиентов фиксируются пакетами
+    order_write_queue.enabled = not args.no_group_commit
+
+    server = ApiServer(host=args.host, port=args.port, path=args.unix)
+    try:
+        asyncio.run(serve(server))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        order_write_queue.stop()
+        SyncDatabaseManager.close()
+        logger.info("Сервер данных завершил работу")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,10 @@
 """
 
 import logging
+import re
 import traceback
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Mapping, Optional, Sequence, Tuple, Callable
 import sys
 import os
 
@@ -14,42 +15,84 @@ src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
+from src.database.engine import DatabaseEngine, ThreadConnection
+from src.database.events import (
+    event_bus, CREATED, UPDATED, DELETED, DeliveryCompleted, OrdersCreated, OrdersDeleted,
+    OrderStatusChanged, RecordChanged, TablesChanged,
+)
+from src.database.order_aggregate import build_order_aggregate, ORDER_AGGREGATE_TABLES
+from src.database.records import PRIMARY_KEYS, ResultSet
+
 logger = logging.getLogger(__name__)
 
+# Строки списка заказов (get_orders_with_details, get_orders_changed_since)
+ORDER_DETAILS_QUERY = """
+    SELECT o.order_id, 
+        CONCAT(c.first_name, ' ', c.last_name) as customer_name,
+        s.status_name,
+        o.order_time,
+        COUNT(oi.order_id) as items_count,
+        COALESCE(SUM(oi.quantity), 0) as total_quantity,
+        o.status_id,
+        o.version
+    FROM Orders o
+    LEFT JOIN Customers c ON o.customer_id = c.customer_id
+    LEFT JOIN Statuses s ON o.status_id = s.status_id
+    LEFT JOIN OrderItems oi ON o.order_id = oi.order_id
+    {where}
+    GROUP BY o.order_id, c.first_name, c.last_name, s.status_name, o.order_time, o.status_id, o.version
+    ORDER BY o.order_time DESC
+"""
+
+# Имя столбца в проекции get_all
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
 
 class SyncDatabaseManager:
     """Синхронный класс для управления операциями с базой данных"""
     
-    _connection = None
+    _connection = ThreadConnection()
     _engine = None
+    _initialized = False
+    _fulltext_available = False
     
     @classmethod
     def init_db(cls, db_config: Dict[str, Any]):
-        """Инициализация базы данных"""
+        """
+        Инициализация базы данных
+
+        Движок общий для синхронного и асинхронного менеджеров: схема и
+        начальные данные создаются один раз на процесс.
+        """
         try:
-            from sqlalchemy import create_engine, text
-            
-            if db_config['type'] == 'mysql':
-                # Формируем строку подключения для MySQL
-                connection_string = f"mysql+pymysql://{db_config.get('username', 'root')}:{db_config.get('password', '0907')}@{db_config.get('host', 'localhost')}:{db_config.get('port', 3306)}/{db_config.get('database', '')}"
-            else:
-                # SQLite
-                connection_string = f"sqlite:///{db_config.get('database', 'phpmyadmin.db')}"
-            
-            cls._engine = create_engine(connection_string, echo=db_config.get('echo', False))
-            cls._connection = cls._engine.connect()
+            if not DatabaseEngine.init(db_config) and cls._initialized:
+                return True
+            cls._engine = DatabaseEngine.engine
             
             logger.info(f"Успешное подключение к БД: {db_config.get('host', 'localhost')}/{db_config.get('database', '')}")
             
             # Создаем таблицы, если их нет
             cls.create_tables()
             
+            # Добавляем столбцы, которых нет в базах, созданных раньше
+            cls.create_missing_columns()
+            
+            # Создаем индексы для частых запросов
+            cls.create_indexes()
+            
+            # Создаем полнотекстовый индекс блюд
+            cls.create_fulltext_indexes()
+            
             # Создаем стандартные статусы
             cls.create_default_statuses()
             
             # Создаем тестовые данные
             cls.create_sample_data()
             
+            # Строим индекс нагрузки курьеров для автоматического назначения
+            cls.rebuild_courier_index()
+            
+            cls._initialized = True
             return True
             
         except Exception as e:
@@ -63,6 +106,12 @@ class SyncDatabaseManager:
         try:
             from sqlalchemy import text
             
+            # Автоинкрементный первичный ключ в синтаксисе текущей СУБД
+            if cls._engine.dialect.name == 'sqlite':
+                pk = "INTEGER PRIMARY KEY AUTOINCREMENT"
+            else:
+                pk = "INT AUTO_INCREMENT PRIMARY KEY"
+            
             # Проверяем существование таблицы Statuses
             check_table_sql = """
                 CREATE TABLE IF NOT EXISTS Statuses (
@@ -74,9 +123,9 @@ class SyncDatabaseManager:
             cls._connection.execute(text(check_table_sql))
             
             # Таблица Customers
-            cls._connection.execute(text("""
+            cls._connection.execute(text(f"""
                 CREATE TABLE IF NOT EXISTS Customers (
-                    customer_id INT AUTO_INCREMENT PRIMARY KEY,
+                    customer_id {pk},
                     phone_number VARCHAR(20) UNIQUE,
                     first_name VARCHAR(100),
                     last_name VARCHAR(100)
@@ -84,9 +133,9 @@ class SyncDatabaseManager:
             """))
             
             # Таблица Restaurants
-            cls._connection.execute(text("""
+            cls._connection.execute(text(f"""
                 CREATE TABLE IF NOT EXISTS Restaurants (
-                    restaurant_id INT AUTO_INCREMENT PRIMARY KEY,
+                    restaurant_id {pk},
                     name VARCHAR(255),
                     location VARCHAR(500),
                     rating DECIMAL(3,2)
@@ -94,21 +143,22 @@ class SyncDatabaseManager:
             """))
             
             # Таблица Dishes
-            cls._connection.execute(text("""
+            cls._connection.execute(text(f"""
                 CREATE TABLE IF NOT EXISTS Dishes (
-                    dish_id INT AUTO_INCREMENT PRIMARY KEY,
+                    dish_id {pk},
                     restaurant_id INT,
                     name VARCHAR(255),
                     description TEXT,
                     cooking_time VARCHAR(20),
+                    category VARCHAR(100),
                     FOREIGN KEY (restaurant_id) REFERENCES Restaurants(restaurant_id)
                 )
             """))
             
             # Таблица Couriers
-            cls._connection.execute(text("""
+            cls._connection.execute(text(f"""
                 CREATE TABLE IF NOT EXISTS Couriers (
-                    courier_id INT AUTO_INCREMENT PRIMARY KEY,
+                    courier_id {pk},
                     phone_number VARCHAR(20) UNIQUE,
                     first_name VARCHAR(100),
                     last_name VARCHAR(100),
@@ -117,19 +167,21 @@ class SyncDatabaseManager:
             """))
             
             # Таблица Orders
-            cls._connection.execute(text("""
+            cls._connection.execute(text(f"""
                 CREATE TABLE IF NOT EXISTS Orders (
-                    order_id INT AUTO_INCREMENT PRIMARY KEY,
+                    order_id {pk},
                     customer_id INT,
                     status_id INT,
                     order_time DATETIME,
+                    version INT NOT NULL DEFAULT 0,
+                    change_seq BIGINT NOT NULL DEFAULT 0,
                     FOREIGN KEY (customer_id) REFERENCES Customers(customer_id),
                     FOREIGN KEY (status_id) REFERENCES Statuses(status_id)
                 )
             """))
             
             # Таблица OrderItems
-            cls._connection.execute(text("""
+            cls._connection.execute(text(f"""
                 CREATE TABLE IF NOT EXISTS OrderItems (
                     order_id INT,
                     dish_id INT,
@@ -141,9 +193,9 @@ class SyncDatabaseManager:
             """))
             
             # Таблица Deliveries
-            cls._connection.execute(text("""
+            cls._connection.execute(text(f"""
                 CREATE TABLE IF NOT EXISTS Deliveries (
-                    delivery_id INT AUTO_INCREMENT PRIMARY KEY,
+                    delivery_id {pk},
                     order_id INT,
                     courier_id INT,
                     delivery_time DATETIME,
@@ -153,9 +205,9 @@ class SyncDatabaseManager:
             """))
             
             # Таблица Reviews
-            cls._connection.execute(text("""
+            cls._connection.execute(text(f"""
                 CREATE TABLE IF NOT EXISTS Reviews (
-                    review_id INT AUTO_INCREMENT PRIMARY KEY,
+                    review_id {pk},
                     order_id INT,
                     rating INT,
                     description TEXT,
@@ -163,12 +215,175 @@ class SyncDatabaseManager:
                 )
             """))
             
+            # Отслеживание изменений списка заказов (src/database/change_tracking.py)
+            cls._connection.execute(text("""
+                CREATE TABLE IF NOT EXISTS ChangeSequence (
+                    name VARCHAR(50) PRIMARY KEY,
+                    value BIGINT NOT NULL DEFAULT 0
+                )
+            """))
+            cls._connection.execute(text("""
+                CREATE TABLE IF NOT EXISTS DeletedOrders (
+                    order_id INT PRIMARY KEY,
+                    change_seq BIGINT NOT NULL,
+                    order_time DATETIME
+                )
+            """))
+            
+            # Почасовые сводки заказов (src/database/rollups.py)
+            cls._connection.execute(text("""
+                CREATE TABLE IF NOT EXISTS OrderRollups (
+                    bucket DATETIME NOT NULL,
+                    restaurant_id INT NOT NULL,
+                    status_id INT NOT NULL,
+                    orders INT NOT NULL,
+                    items INT NOT NULL,
+                    quantity INT NOT NULL,
+                    PRIMARY KEY (bucket, restaurant_id, status_id)
+                )
+            """))
+            
             logger.info("Таблицы созданы или уже существуют")
             
         except Exception as e:
             logger.error(f"Ошибка создания таблиц: {str(e)}")
             raise
     
+    @classmethod
+    def create_missing_columns(cls):
+        """Добавление столбцов, появившихся в схеме после создания таблиц"""
+        try:
+            from src.database.change_tracking import ensure_sequence
+            
+            # Версия заказа для оптимистичной блокировки
+            cls._ensure_column("Orders", "version", "INT NOT NULL DEFAULT 0")
+            # Номер последнего изменения заказа для инкрементального обновления
+            cls._ensure_column("Orders", "change_seq", "BIGINT NOT NULL DEFAULT 0")
+            cls._ensure_column("DeletedOrders", "order_time", "DATETIME")
+            # Категория блюда для разреза аналитики (src/database/analytics_cube.py)
+            cls._ensure_column("Dishes", "category", "VARCHAR(100)")
+            ensure_sequence(cls._connection)
+            
+            cls._connection.commit()
+            
+        except Exception as e:
+            cls._connection.rollback()
+            logger.error(f"Ошибка добавления столбцов: {str(e)}")
+            raise
+    
+    @classmethod
+    def _ensure_column(cls, table_name: str, column_name: str, definition: str):
+        """Добавление столбца, если его еще нет"""
+        from sqlalchemy import inspect, text
+        
+        columns = {column['name'].lower() for column in inspect(cls._connection).get_columns(table_name)}
+        if column_name.lower() not in columns:
+            cls._connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}"))
+            logger.info(f"Добавлен столбец {table_name}.{column_name}")
+    
+    @classmethod
+    def create_indexes(cls):
+        """Создание вспомогательных индексов, если их нет"""
+        try:
+            # История заказов клиента: покрывающий индекс для постраничной выборки
+            cls._ensure_index("Orders", "idx_orders_customer_time", "customer_id, order_time, status_id")
+            # Выборка изменений списка заказов после номера изменения
+            cls._ensure_index("Orders", "idx_orders_change_seq", "change_seq")
+            cls._ensure_index("DeletedOrders", "idx_deleted_orders_change_seq", "change_seq")
+            # Пересчет сводок за интервал времени
+            cls._ensure_index("Orders", "idx_orders_time", "order_time")
+            
+            cls._connection.commit()
+            logger.info("Индексы созданы или уже существуют")
+            
+        except Exception as e:
+            cls._connection.rollback()
+            logger.error(f"Ошибка создания индексов: {str(e)}")
+    
+    @classmethod
+    def _ensure_index(cls, table_name: str, index_name: str, columns: str):
+        """Создание индекса, если он еще не существует"""
+        from sqlalchemy import text
+        
+        if cls._engine.dialect.name == 'sqlite':
+            cls._connection.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})"))
+            return
+        
+        exists = cls._connection.execute(text("""
+            SELECT COUNT(*) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name AND INDEX_NAME = :index_name
+        """), {"table_name": table_name, "index_name": index_name}).scalar()
+        
+        if not exists:
+            cls._connection.execute(text(f"CREATE INDEX {index_name} ON {table_name} ({columns})"))
+            logger.info(f"Создан индекс {index_name} на {table_name} ({columns})")
+    
+    @classmethod
+    def create_fulltext_indexes(cls):
+        """Создание полнотекстового индекса по названию и описанию блюд"""
+        try:
+            from sqlalchemy import text
+            
+            if cls._engine.dialect.name == 'sqlite':
+                exists = cls._connection.execute(
+                    text("SELECT COUNT(*) FROM sqlite_master WHERE name = 'DishesSearch'")
+                ).scalar()
+                
+                # Индекс FTS5 с внешним содержимым: текст хранится только в Dishes
+                cls._connection.execute(text("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS DishesSearch USING fts5(
+                        name, description,
+                        content='Dishes', content_rowid='dish_id',
+                        tokenize='unicode61 remove_diacritics 2'
+                    )
+                """))
+                
+                # Триггеры поддерживают индекс в актуальном состоянии при любой записи в Dishes
+                cls._connection.execute(text("""
+                    CREATE TRIGGER IF NOT EXISTS dishes_search_ai AFTER INSERT ON Dishes BEGIN
+                        INSERT INTO DishesSearch(rowid, name, description)
+                        VALUES (new.dish_id, new.name, new.description);
+                    END
+                """))
+                cls._connection.execute(text("""
+                    CREATE TRIGGER IF NOT EXISTS dishes_search_ad AFTER DELETE ON Dishes BEGIN
+                        INSERT INTO DishesSearch(DishesSearch, rowid, name, description)
+                        VALUES ('delete', old.dish_id, old.name, old.description);
+                    END
+                """))
+                cls._connection.execute(text("""
+                    CREATE TRIGGER IF NOT EXISTS dishes_search_au AFTER UPDATE ON Dishes BEGIN
+                        INSERT INTO DishesSearch(DishesSearch, rowid, name, description)
+                        VALUES ('delete', old.dish_id, old.name, old.description);
+                        INSERT INTO DishesSearch(rowid, name, description)
+                        VALUES (new.dish_id, new.name, new.description);
+                    END
+                """))
+                
+                if not exists:
+                    # Индексируем блюда, созданные до появления индекса
+                    cls._connection.execute(text("INSERT INTO DishesSearch(DishesSearch) VALUES ('rebuild')"))
+            else:
+                exists = cls._connection.execute(text("""
+                    SELECT COUNT(*) FROM information_schema.STATISTICS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Dishes'
+                        AND INDEX_NAME = 'ft_dishes_name_description'
+                """)).scalar()
+                
+                if not exists:
+                    cls._connection.execute(text(
+                        "ALTER TABLE Dishes ADD FULLTEXT INDEX ft_dishes_name_description (name, description)"
+                    ))
+            
+            cls._connection.commit()
+            cls._fulltext_available = True
+            logger.info("Полнотекстовый индекс блюд создан или уже существует")
+            
+        except Exception as e:
+            cls._connection.rollback()
+            cls._fulltext_available = False
+            logger.warning(f"Полнотекстовый индекс блюд недоступен, используется поиск LIKE: {str(e)}")
+    
     @classmethod
     def create_default_statuses(cls):
         """Создание стандартных статусов заказов"""
@@ -216,8 +431,8 @@ class SyncDatabaseManager:
                     INSERT INTO Restaurants (name, location, rating) 
                     VALUES ('Тбилиси', 'ул. Грузинская, 15', 4.7)
                 """
-                cls._connection.execute(text(insert_restaurant_sql))
-                restaurant_id = cls._connection.execute(text("SELECT LAST_INSERT_ID()")).scalar()
+                result = cls._connection.execute(text(insert_restaurant_sql))
+                restaurant_id = result.lastrowid
                 logger.info(f"Создан ресторан 'Тбилиси' (ID: {restaurant_id})")
             else:
                 restaurant_id = restaurant[0]
@@ -232,28 +447,29 @@ class SyncDatabaseManager:
             
             if dishes_count == 0:
                 dishes_data = [
-                    ('Хачапури по-аджарски', 'Традиционное грузинское блюдо с сыром сулугуни и яйцом', '25'),
-                    ('Хинкали', 'Грузинские пельмени с сочной мясной начинкой', '30'),
-                    ('Сациви', 'Курица в ореховом соусе с травами', '40'),
-                    ('Лобио', 'Грузинское блюдо из красной фасоли с грецкими орехами', '35'),
-                    ('Шашлык из свинины', 'Нежное мясо на мангале с луком и гранатом', '20'),
-                    ('Чашушули', 'Острое мясное рагу с томатами и перцем', '45'),
-                    ('Пхали', 'Закуска из шпината с орехами и специями', '15'),
-                    ('Чихохбили', 'Грузинское тушеное мясо с томатами', '50'),
-                    ('Купаты', 'Грузинские колбаски на гриле', '25'),
-                    ('Эларджи', 'Каша из кукурузной муки с сыром сулугуни', '30')
+                    ('Хачапури по-аджарски', 'Традиционное грузинское блюдо с сыром сулугуни и яйцом', '25', 'Выпечка'),
+                    ('Хинкали', 'Грузинские пельмени с сочной мясной начинкой', '30', 'Горячие блюда'),
+                    ('Сациви', 'Курица в ореховом соусе с травами', '40', 'Закуски'),
+                    ('Лобио', 'Грузинское блюдо из красной фасоли с грецкими орехами', '35', 'Закуски'),
+                    ('Шашлык из свинины', 'Нежное мясо на мангале с луком и гранатом', '20', 'Шашлык и гриль'),
+                    ('Чашушули', 'Острое мясное рагу с томатами и перцем', '45', 'Горячие блюда'),
+                    ('Пхали', 'Закуска из шпината с орехами и специями', '15', 'Закуски'),
+                    ('Чихохбили', 'Грузинское тушеное мясо с томатами', '50', 'Горячие блюда'),
+                    ('Купаты', 'Грузинские колбаски на гриле', '25', 'Шашлык и гриль'),
+                    ('Эларджи', 'Каша из кукурузной муки с сыром сулугуни', '30', 'Гарниры')
                 ]
                 
-                for dish_name, description, cooking_time in dishes_data:
+                for dish_name, description, cooking_time, category in dishes_data:
                     insert_dish_sql = """
-                        INSERT INTO Dishes (restaurant_id, name, description, cooking_time)
-                        VALUES (:restaurant_id, :name, :description, :cooking_time)
+                        INSERT INTO Dishes (restaurant_id, name, description, cooking_time, category)
+                        VALUES (:restaurant_id, :name, :description, :cooking_time, :category)
                     """
                     cls._connection.execute(text(insert_dish_sql), {
                         "restaurant_id": restaurant_id,
                         "name": dish_name,
                         "description": description,
-                        "cooking_time": cooking_time
+                        "cooking_time": cooking_time,
+                        "category": category
                     })
                 
                 logger.info(f"Созданы 10 блюд для ресторана 'Тбилиси'")
@@ -316,17 +532,24 @@ class SyncDatabaseManager:
             raise
     
     @classmethod
-    def get_all(cls, table_name: str) -> List[Dict[str, Any]]:
-        """Получение всех записей из таблицы"""
+    def get_all(cls, table_name: str, columns: Optional[Sequence[str]] = None) -> ResultSet:
+        """
+        Получение всех записей из таблицы
+
+        columns - выбираемые столбцы (по умолчанию все). Результат - ResultSet:
+        строки-кортежи с общим списком столбцов вместо словаря на строку.
+        """
         try:
             from sqlalchemy import text
             
-            query = f"SELECT * FROM {table_name}"
-            result = cls._connection.execute(text(query))
-            
-            # Преобразуем результат в список словарей
-            columns = result.keys()
-            rows = [dict(zip(columns, row)) for row in result.fetchall()]
+            if columns:
+                invalid = [column for column in columns if not _IDENTIFIER.match(column)]
+                if invalid:
+                    raise ValueError(f"Недопустимые имена столбцов: {invalid}")
+                query = f"SELECT {', '.join(columns)} FROM {table_name}"
+            else:
+                query = f"SELECT * FROM {table_name}"
+            rows = ResultSet.from_result(cls._connection.execute(text(query)))
             
             logger.debug(f"Получено {len(rows)} записей из {table_name}")
             return rows
@@ -336,60 +559,174 @@ class SyncDatabaseManager:
             raise
     
     @classmethod
-    def get_customers(cls) -> List[Dict[str, Any]]:
+    def get_customers(cls) -> ResultSet:
         """Получение всех клиентов"""
         return cls.get_all("Customers")
     
     @classmethod
-    def get_restaurants(cls) -> List[Dict[str, Any]]:
+    def get_restaurants(cls) -> ResultSet:
         """Получение всех ресторанов"""
         return cls.get_all("Restaurants")
     
     @classmethod
-    def get_dishes(cls) -> List[Dict[str, Any]]:
+    def get_dishes(cls) -> ResultSet:
         """Получение всех блюд"""
         return cls.get_all("Dishes")
     
     @classmethod
-    def get_couriers(cls) -> List[Dict[str, Any]]:
+    def get_couriers(cls) -> ResultSet:
         """Получение всех курьеров"""
         return cls.get_all("Couriers")
     
     @classmethod
-    def get_orders(cls) -> List[Dict[str, Any]]:
+    def get_orders(cls) -> ResultSet:
         """Получение всех заказов"""
         return cls.get_all("Orders")
     
     @classmethod
-    def get_orders_with_details(cls) -> List[Dict[str, Any]]:
+    def get_orders_with_details(cls) -> Sequence[Mapping[str, Any]]:
         """Получение заказов с деталями"""
         try:
             from sqlalchemy import text
             
-            query = """
-                SELECT o.order_id, 
-                    CONCAT(c.first_name, ' ', c.last_name) as customer_name,
+            query = ORDER_DETAILS_QUERY.format(where="")
+            return ResultSet.from_result(cls._connection.execute(text(query)))
+            
+        except Exception as e:
+            logger.error(f"Ошибка получения деталей заказов: {str(e)}")
+            return []
+    
+    @classmethod
+    def get_orders_changed_since(cls, watermark: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Изменения списка заказов после номера изменения watermark
+
+        Возвращает {'watermark': номер, до которого включены изменения,
+        'rows': новые и измененные строки (как в get_orders_with_details),
+        'deleted': id удаленных заказов}. Без watermark возвращается весь
+        список. Следующий запрос передает полученный watermark.
+        """
+        from sqlalchemy import text
+        from src.database.change_tracking import current_change_seq, deleted_orders_since
+        
+        # Номер читается до строк: изменения после него попадут в следующий запрос
+        upto = current_change_seq(cls._connection)
+        
+        if watermark is None:
+            rows = ResultSet.from_result(cls._connection.execute(text(ORDER_DETAILS_QUERY.format(where=""))))
+            deleted = []
+        else:
+            query = ORDER_DETAILS_QUERY.format(where="WHERE o.change_seq > :watermark AND o.change_seq <= :upto")
+            rows = ResultSet.from_result(
+                cls._connection.execute(text(query), {"watermark": watermark, "upto": upto})
+            )
+            deleted = deleted_orders_since(cls._connection, watermark, upto)
+        
+        return {'watermark': upto, 'rows': rows, 'deleted': deleted}
+    
+    @classmethod
+    def get_customer_orders_page(cls, customer_id: int, before_time: Optional[Any] = None,
+                                 limit: int = 50, before_order_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Получение страницы истории заказов клиента (от новых к старым)
+
+        Следующая страница запрашивается по order_time (и order_id) последней
+        строки предыдущей страницы. Выборка идет по индексу
+        (customer_id, order_time), поэтому заказы других клиентов не читаются.
+        """
+        try:
+            from sqlalchemy import text
+            
+            params = {"customer_id": customer_id, "limit": limit}
+            cursor_filter = ""
+            if before_time is not None:
+                params["before_time"] = before_time
+                if before_order_id is not None:
+                    params["before_order_id"] = before_order_id
+                    cursor_filter = """AND (order_time < :before_time
+                        OR (order_time = :before_time AND order_id < :before_order_id))"""
+                else:
+                    cursor_filter = "AND order_time < :before_time"
+            
+            query = f"""
+                SELECT 
+                    p.order_id,
+                    p.order_time,
                     s.status_name,
-                    o.order_time,
                     COUNT(oi.order_id) as items_count,
                     COALESCE(SUM(oi.quantity), 0) as total_quantity
+                FROM (
+                    SELECT order_id, order_time, status_id
+                    FROM Orders
+                    WHERE customer_id = :customer_id {cursor_filter}
+                    ORDER BY order_time DESC, order_id DESC
+                    LIMIT :limit
+                ) p
+                LEFT JOIN Statuses s ON p.status_id = s.status_id
+                LEFT JOIN OrderItems oi ON p.order_id = oi.order_id
+                GROUP BY p.order_id, p.order_time, s.status_name
+                ORDER BY p.order_time DESC, p.order_id DESC
+            """
+            
+            result = cls._connection.execute(text(query), params)
+            columns = result.keys()
+            return [dict(zip(columns, row)) for row in result.fetchall()]
+            
+        except Exception as e:
+            logger.error(f"Ошибка получения истории заказов клиента {customer_id}: {str(e)}")
+            return []
+    
+    @classmethod
+    def get_order_full(cls, order_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Получение заказа целиком одним запросом: клиент, статус, курьер,
+        доставка и позиции. Результат кэшируется до изменения заказа.
+        """
+        try:
+            from sqlalchemy import text
+            from src.database.query_cache import order_details_cache
+            
+            cached = order_details_cache.get(order_id)
+            if cached is not None:
+                return cached
+            
+            query = """
+                SELECT 
+                    o.order_id,
+                    c.first_name, c.last_name, c.phone_number,
+                    s.status_name,
+                    o.order_time,
+                    cr.first_name as courier_first_name, cr.last_name as courier_last_name,
+                    cr.car_number,
+                    dl.delivery_time,
+                    oi.dish_id,
+                    d.name as dish_name,
+                    d.description,
+                    d.cooking_time,
+                    oi.quantity,
+                    r.name as restaurant_name
                 FROM Orders o
                 LEFT JOIN Customers c ON o.customer_id = c.customer_id
                 LEFT JOIN Statuses s ON o.status_id = s.status_id
+                LEFT JOIN Deliveries dl ON o.order_id = dl.order_id
+                LEFT JOIN Couriers cr ON dl.courier_id = cr.courier_id
                 LEFT JOIN OrderItems oi ON o.order_id = oi.order_id
-                GROUP BY o.order_id, c.first_name, c.last_name, s.status_name, o.order_time
-                ORDER BY o.order_time DESC
+                LEFT JOIN Dishes d ON oi.dish_id = d.dish_id
+                LEFT JOIN Restaurants r ON d.restaurant_id = r.restaurant_id
+                WHERE o.order_id = :order_id
             """
             
-            result = cls._connection.execute(text(query))
-            columns = result.keys()
-            rows = [dict(zip(columns, row)) for row in result.fetchall()]
+            result = cls._connection.execute(text(query), {"order_id": order_id})
+            columns = list(result.keys())
+            order = build_order_aggregate([dict(zip(columns, row)) for row in result.fetchall()])
             
-            return rows
+            if order is not None:
+                order_details_cache.set(order_id, order, tags=ORDER_AGGREGATE_TABLES)
+            return order
             
         except Exception as e:
-            logger.error(f"Ошибка получения деталей заказов: {str(e)}")
-            return []
+            logger.error(f"Ошибка получения заказа {order_id}: {str(e)}")
+            return None
     
     @classmethod
     def get_dishes_by_restaurant(cls, restaurant_id: int) -> List[Dict[str, Any]]:
@@ -408,88 +745,1240 @@ class SyncDatabaseManager:
         except Exception as e:
             logger.error(f"Ошибка получения блюд ресторана: {str(e)}")
             return []
+
+    @classmethod
+    def search_dishes(cls, query: str, limit: int = 50,
+                      restaurant_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Полнотекстовый поиск блюд по названию и описанию во всех ресторанах
+
+        Результаты упорядочены по релевантности; совпадения в названии
+        весят больше, чем в описании.
+        """
+        try:
+            from sqlalchemy import text
+            from src.utils.search_index import normalize_text
+            
+            words = re.findall(r'\w+', normalize_text(query))
+            if not words:
+                return []
+            
+            params = {"limit": limit, "restaurant_id": restaurant_id}
+            restaurant_filter = "AND d.restaurant_id = :restaurant_id" if restaurant_id else ""
+            
+            if cls._fulltext_available and cls._engine.dialect.name == 'sqlite':
+                # Каждое слово ищется как префикс, все слова обязательны
+                params["query"] = " ".join(f'"{word}"*' for word in words)
+                search_sql = f"""
+                    SELECT d.dish_id, d.restaurant_id, d.name, d.description, d.cooking_time,
+                        r.name as restaurant_name,
+                        -bm25(DishesSearch, 10.0, 1.0) as relevance
+                    FROM DishesSearch
+                    JOIN Dishes d ON d.dish_id = DishesSearch.rowid
+                    LEFT JOIN Restaurants r ON d.restaurant_id = r.restaurant_id
+                    WHERE DishesSearch MATCH :query {restaurant_filter}
+                    ORDER BY relevance DESC
+                    LIMIT :limit
+                """
+            elif cls._fulltext_available:
+                params["query"] = " ".join(f"+{word}*" for word in words)
+                search_sql = f"""
+                    SELECT d.dish_id, d.restaurant_id, d.name, d.description, d.cooking_time,
+                        r.name as restaurant_name,
+                        MATCH(d.name, d.description) AGAINST (:query IN BOOLEAN MODE) as relevance
+                    FROM Dishes d
+                    LEFT JOIN Restaurants r ON d.restaurant_id = r.restaurant_id
+                    WHERE MATCH(d.name, d.description) AGAINST (:query IN BOOLEAN MODE) {restaurant_filter}
+                    ORDER BY relevance DESC
+                    LIMIT :limit
+                """
+            else:
+                params["query"] = f"%{query.strip()}%"
+                search_sql = f"""
+                    SELECT d.dish_id, d.restaurant_id, d.name, d.description, d.cooking_time,
+                        r.name as restaurant_name,
+                        0 as relevance
+                    FROM Dishes d
+                    LEFT JOIN Restaurants r ON d.restaurant_id = r.restaurant_id
+                    WHERE (d.name LIKE :query OR d.description LIKE :query) {restaurant_filter}
+                    LIMIT :limit
+                """
+            
+            result = cls._connection.execute(text(search_sql), params)
+            columns = result.keys()
+            return [dict(zip(columns, row)) for row in result.fetchall()]
+            
+        except Exception as e:
+            logger.error(f"Ошибка полнотекстового поиска блюд: {str(e)}")
+            return []
     
+    @classmethod
+    def search_customers(cls, query: str, limit: int = 20) -> List[Tuple[int, str]]:
+        """
+        Поиск клиентов по имени, фамилии или номеру телефона
+
+        Поиск выполняется по индексу в памяти; если в нем ничего не найдено
+        (например, клиент добавлен с другого рабочего места) или просмотрены
+        не все кандидаты (слишком общий запрос), выполняется запрос к БД.
+        """
+        try:
+            from src.utils.search_index import search_indexes
+
+            index = search_indexes.get("Customers", cls._build_customers_index, cls._update_customers_index)
+            results, complete = index.lookup(query, limit)
+            if (results and complete) or not query.strip():
+                return results
+
+            from sqlalchemy import text
+            from src.utils.search_index import parse_query
+
+            # Каждое слово запроса - начало имени или фамилии
+            digits, words = parse_query(query, normalize=False)
+            if digits:
+                condition = "phone_number LIKE :phone"
+                params = {"phone": f"%{digits}%"}
+            else:
+                if not words:
+                    return results
+                condition = " AND ".join(
+                    f"(first_name LIKE :word{number} OR last_name LIKE :word{number})" for number in range(len(words))
+                )
+                params = {f"word{number}": f"{word}%" for number, word in enumerate(words)}
+            params["limit"] = limit
+
+            rows = cls._connection.execute(text(f"""
+                SELECT customer_id, first_name, last_name, phone_number
+                FROM Customers
+                WHERE {condition}
+                LIMIT :limit
+            """), params).fetchall()
+
+            found = {customer_id for customer_id, _ in results}
+            for customer_id, first_name, last_name, phone_number in rows:
+                if customer_id in found or len(results) >= limit:
+                    continue
+                document = cls._customer_document(customer_id, first_name, last_name, phone_number)
+                index.add(*document)
+                results.append(document[:2])
+
+            return results
+
+        except Exception as e:
+            logger.error(f"Ошибка поиска клиентов: {str(e)}")
+            return []
+
+    @classmethod
+    def search_restaurants(cls, query: str, limit: int = 20) -> List[Tuple[int, str]]:
+        """Поиск ресторанов по названию или адресу"""
+        try:
+            from src.utils.search_index import search_indexes
+
+            index = search_indexes.get("Restaurants", cls._build_restaurants_index, cls._update_restaurants_index)
+            return index.search(query, limit)
+
+        except Exception as e:
+            logger.error(f"Ошибка поиска ресторанов: {str(e)}")
+            return []
+
+    @classmethod
+    def _build_customers_index(cls, index):
+        """Построение поискового индекса клиентов"""
+        from sqlalchemy import text
+
+        result = cls._connection.execute(
+            text("SELECT customer_id, first_name, last_name, phone_number FROM Customers")
+        )
+        index.build(cls._customer_document(*row) for row in result)
+
+    @classmethod
+    def _build_restaurants_index(cls, index):
+        """Построение поискового индекса ресторанов"""
+        from sqlalchemy import text
+
+        result = cls._connection.execute(text("SELECT restaurant_id, name, location FROM Restaurants"))
+        index.build(cls._restaurant_document(*row) for row in result)
+
+    @staticmethod
+    def _customer_document(customer_id, first_name, last_name, phone_number):
+        """Документ поискового индекса клиента: (id, подпись, слова, телефон)"""
+        return customer_id, f"{first_name} {last_name} ({phone_number})", (first_name, last_name), phone_number
+
+    @staticmethod
+    def _restaurant_document(restaurant_id, name, location):
+        """Документ поискового индекса ресторана"""
+        return restaurant_id, f"{name} - {location}", (name, location), None
+
+    @classmethod
+    def _update_customers_index(cls, index, event) -> Optional[bool]:
+        """Применение изменения клиента к индексу (поля, которых нет в событии, берутся из индекса)"""
+        customer_id = event.key.get('customer_id')
+        if event.action == DELETED:
+            index.remove(customer_id)
+            return
+
+        source = index.source(customer_id)
+        if source is not None:
+            (first_name, last_name), phone_number = source
+        elif event.action == UPDATED:
+            return  # Клиента нет в индексе: найдется запросом к БД
+        else:
+            first_name = last_name = phone_number = None
+
+        values = event.values
+        index.update(*cls._customer_document(
+            customer_id, values.get('first_name', first_name), values.get('last_name', last_name),
+            values.get('phone_number', phone_number)
+        ))
+
+    @classmethod
+    def _update_restaurants_index(cls, index, event) -> Optional[bool]:
+        """Применение изменения ресторана к индексу"""
+        restaurant_id = event.key.get('restaurant_id')
+        if event.action == DELETED:
+            index.remove(restaurant_id)
+            return
+
+        source = index.source(restaurant_id)
+        if source is not None:
+            (name, location), _ = source
+        elif event.action == UPDATED:
+            # Поиск ресторанов идет только по индексу: строим его заново
+            return False
+        else:
+            name = location = None
+
+        values = event.values
+        index.update(*cls._restaurant_document(
+            restaurant_id, values.get('name', name), values.get('location', location)
+        ))
+
+    @classmethod
+    def run_query_batch(cls, queries: Dict[str, str], params: Optional[Dict[str, Dict[str, Any]]] = None,
+                        timeouts: Optional[Dict[str, float]] = None,
+                        max_workers: int = 4, use_cache: bool = False,
+                        window_seconds: Optional[float] = None) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """
+        Параллельное выполнение пакета независимых запросов
+        (например, statistical_queries из src/database/queries.py)
+
+        При use_cache=True результаты берутся из кэша запросов, а выполняются
+        только отсутствующие в нем запросы.
+        """
+        from src.database.batch_executor import QueryBatchExecutor
+        from src.database.query_cache import query_cache, extract_tables
+
+        params = params or {}
+        results = {}
+        pending = queries
+
+        if use_cache:
+            pending = {}
+            for name, query in queries.items():
+                key = query_cache.make_key(name, params.get(name), window_seconds)
+                cached = query_cache.get(key)
+                if cached is not None:
+                    results[name] = cached
+                else:
+                    pending[name] = query
+
+        if pending:
+            executor = QueryBatchExecutor(cls._engine, max_workers=max_workers)
+            fresh = executor.run(pending, params=params, timeouts=timeouts)
+
+            if use_cache:
+                for name, rows in fresh.items():
+                    if rows is not None:
+                        key = query_cache.make_key(name, params.get(name), window_seconds)
+                        query_cache.set(key, rows, tags=extract_tables(pending[name]))
+
+            results.update(fresh)
+
+        return {name: results.get(name) for name in queries}
+
+    @staticmethod
+    def _publish(event):
+        """
+        Публикация события о зафиксированной записи (src/database/events.py):
+        подписанные кэши сбрасываются до возврата из метода записи
+        """
+        event_bus.publish(event)
+
+    @classmethod
+    def _begin(cls, savepoints: bool = False):
+        """
+        Явная транзакция на соединении потока (неявно начатая чтением завершается)
+
+        savepoints=True - транзакция с точками сохранения: драйвер sqlite3 не
+        начинает транзакцию перед SAVEPOINT, и каждый RELEASE фиксировался бы
+        отдельно, поэтому для SQLite BEGIN выполняется явно.
+        """
+        connection = cls._connection
+        if connection.in_transaction():
+            connection.commit()
+        trans = connection.begin()
+        if savepoints and connection.dialect.name == 'sqlite':
+            connection.exec_driver_sql("BEGIN")
+        return trans
+
+    @classmethod
+    def release_connection(cls):
+        """
+        Завершение неявной транзакции и возврат соединения текущего потока в пул
+
+        Вызывается после каждой фоновой задачи: следующие чтения в этом потоке
+        не работают со старым снимком данных, а поток, завершенный пулом
+        потоков при простое, не уносит с собой соединение.
+        """
+        DatabaseEngine.release_connection()
+
+    @classmethod
+    def _insert_order(cls, customer_id: int, dish_quantities: List[Tuple[int, int]],
+                      courier_id: Optional[int], order_time: str, change_seq: int) -> Tuple[int, Optional[int]]:
+        """
+        Вставка заказа, позиций и доставки в текущей транзакции
+
+        Возвращает (id заказа, id назначенного курьера). Курьер без явного
+        выбора назначается из индекса нагрузки; при откате транзакции
+        вызывающий код должен вернуть его (courier_engine.complete).
+        """
+        from sqlalchemy import text
+        from src.database.courier_assignment import courier_engine
+        
+        # Создаем заказ
+        insert_order_sql = """
+            INSERT INTO Orders (customer_id, status_id, order_time, change_seq)
+            VALUES (:customer_id, 1, :order_time, :change_seq)
+        """
+        
+        result = cls._connection.execute(
+            text(insert_order_sql), 
+            {"customer_id": customer_id, "order_time": order_time, "change_seq": change_seq}
+        )
+        
+        # Получаем ID созданного заказа
+        order_id = result.lastrowid
+        
+        # Добавляем позиции заказа
+        if dish_quantities:
+            insert_item_sql = """
+                INSERT INTO OrderItems (order_id, dish_id, quantity)
+                VALUES (:order_id, :dish_id, :quantity)
+            """
+            cls._connection.execute(
+                text(insert_item_sql),
+                [{"order_id": order_id, "dish_id": dish_id, "quantity": quantity}
+                 for dish_id, quantity in dish_quantities]
+            )
+        
+        # Создаем доставку: без явного выбора назначаем наименее загруженного курьера
+        assigned_courier_id = courier_id or courier_engine.assign()
+        if assigned_courier_id:
+            insert_delivery_sql = """
+                INSERT INTO Deliveries (order_id, courier_id, delivery_time)
+                VALUES (:order_id, :courier_id, NULL)
+            """
+            try:
+                cls._connection.execute(
+                    text(insert_delivery_sql), 
+                    {"order_id": order_id, "courier_id": assigned_courier_id}
+                )
+            except Exception:
+                if not courier_id:
+                    courier_engine.complete(assigned_courier_id)
+                raise
+        
+        return order_id, assigned_courier_id
+
     @classmethod
     def create_order(cls, customer_id: int, dish_quantities: List[Tuple[int, int]], courier_id: Optional[int] = None) -> int:
         """Создание нового заказа"""
         try:
-            from sqlalchemy import text
+            from src.database.change_tracking import next_change_seq
+            from src.database.courier_assignment import courier_engine
+            
+            if not courier_engine.is_built:
+                cls.rebuild_courier_index()
             
             # Начинаем транзакцию
-            trans = cls._connection.begin()
+            trans = cls._begin()
+            assigned_courier_id = None
             
             try:
-                # Создаем заказ
-                insert_order_sql = """
-                    INSERT INTO Orders (customer_id, status_id, order_time)
-                    VALUES (:customer_id, 1, :order_time)
-                """
-                
                 current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                cls._connection.execute(
-                    text(insert_order_sql), 
-                    {"customer_id": customer_id, "order_time": current_time}
+                order_id, assigned_courier_id = cls._insert_order(
+                    customer_id, dish_quantities, courier_id, current_time,
+                    next_change_seq(cls._connection)
                 )
                 
-                # Получаем ID созданного заказа
-                order_id = cls._connection.execute(text("SELECT LAST_INSERT_ID()")).scalar()
+                # Фиксируем транзакцию
+                trans.commit()
                 
-                # Добавляем позиции заказа
-                for dish_id, quantity in dish_quantities:
-                    insert_item_sql = """
-                        INSERT INTO OrderItems (order_id, dish_id, quantity)
-                        VALUES (:order_id, :dish_id, :quantity)
-                    """
-                    cls._connection.execute(
-                        text(insert_item_sql), 
-                        {"order_id": order_id, "dish_id": dish_id, "quantity": quantity}
-                    )
+            except Exception:
+                trans.rollback()
+                if not courier_id and assigned_courier_id:
+                    courier_engine.complete(assigned_courier_id)
+                raise
+            
+            cls._publish(OrdersCreated((order_id,), (customer_id,)))
+            if courier_id:
+                courier_engine.record_assignment(courier_id)
+            
+            logger.info(f"Создан заказ #{order_id} с {len(dish_quantities)} позициями")
+            return order_id
                 
-                # Создаем доставку
-                if courier_id:
-                    insert_delivery_sql = """
-                        INSERT INTO Deliveries (order_id, courier_id, delivery_time)
-                        VALUES (:order_id, :courier_id, NULL)
-                    """
-                    cls._connection.execute(
-                        text(insert_delivery_sql), 
-                        {"order_id": order_id, "courier_id": courier_id}
+        except Exception as e:
+            logger.error(f"Ошибка создания заказа: {str(e)}")
+            raise
+
+    @classmethod
+    def create_orders(cls, orders: List[Tuple[int, List[Tuple[int, int]], Optional[int]]]) -> List[Any]:
+        """
+        Создание пакета заказов в одной транзакции (групповая фиксация)
+
+        orders - список (customer_id, dish_quantities, courier_id). Каждый заказ
+        вставляется в своей точке сохранения: ошибка одного заказа откатывает
+        только его. Возвращает для каждого заказа его id или исключение.
+        Если не удалась сама фиксация, исключение пробрасывается для всего пакета.
+        """
+        from src.database.change_tracking import next_change_seq
+        from src.database.courier_assignment import courier_engine
+        
+        if not courier_engine.is_built:
+            cls.rebuild_courier_index()
+        
+        results: List[Any] = []
+        auto_assigned = []
+        trans = cls._begin(savepoints=True)
+        
+        try:
+            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            change_seq = next_change_seq(cls._connection)
+            for customer_id, dish_quantities, courier_id in orders:
+                savepoint = cls._connection.begin_nested()
+                assigned_courier_id = None
+                try:
+                    order_id, assigned_courier_id = cls._insert_order(
+                        customer_id, dish_quantities, courier_id, current_time, change_seq
                     )
+                    savepoint.commit()
+                except Exception as e:
+                    savepoint.rollback()
+                    if not courier_id and assigned_courier_id:
+                        courier_engine.complete(assigned_courier_id)
+                    logger.error(f"Ошибка создания заказа в пакете: {str(e)}")
+                    results.append(e)
+                    continue
+                
+                results.append(order_id)
+                if not courier_id and assigned_courier_id:
+                    auto_assigned.append(assigned_courier_id)
+            
+            trans.commit()
+            
+        except Exception as e:
+            trans.rollback()
+            for courier_id in auto_assigned:
+                courier_engine.complete(courier_id)
+            logger.error(f"Ошибка фиксации пакета заказов: {str(e)}")
+            raise
+        
+        created = [(result, order[0]) for order, result in zip(orders, results) if not isinstance(result, Exception)]
+        if created:
+            order_ids, customer_ids = zip(*created)
+            cls._publish(OrdersCreated(order_ids, customer_ids))
+        for (_, _, courier_id), result in zip(orders, results):
+            if courier_id and not isinstance(result, Exception):
+                courier_engine.record_assignment(courier_id)
+        
+        logger.info(f"Создан пакет заказов: {len(created)} из {len(orders)}")
+        return results
+    
+    @classmethod
+    def import_file(cls, path: str, entity: Optional[str] = None, batch_size: int = 5000,
+                    progress: Optional[Callable[[str, int, int], None]] = None) -> List[Any]:
+        """
+        Пакетный импорт клиентов, ресторанов, блюд и заказов из CSV/JSON
+
+        Возвращает список ImportReport по импортированным сущностям.
+        """
+        from src.database.importer import BulkImporter, ENTITY_TABLES
+        
+        # Импорт идет пакетами со своими транзакциями: завершаем начатую неявно
+        cls._connection.commit()
+        
+        importer = BulkImporter(cls._connection, batch_size=batch_size, progress=progress)
+        reports = importer.import_file(path, entity)
+        
+        tables = [table for report in reports for table in ENTITY_TABLES[report.entity]]
+        if tables:
+            cls._publish(TablesChanged(tuple(dict.fromkeys(tables))))
+        return reports
+
+    @classmethod
+    def refresh_order_rollups(cls, full: bool = False) -> Dict[str, int]:
+        """
+        Обновление почасовых сводок заказов (src/database/rollups.py)
+
+        Пересчитываются часы с заказами, измененными после прошлого
+        обновления; full=True - полный пересчет.
+        """
+        from src.database.rollups import refresh_order_rollups
+
+        trans = cls._begin()
+        try:
+            result = refresh_order_rollups(cls._connection, full=full)
+            trans.commit()
+        except Exception:
+            trans.rollback()
+            raise
+
+        if result['rows'] or full:
+            cls._publish(TablesChanged(('OrderRollups',)))
+        logger.info(f"Сводки заказов обновлены: интервалов {result['ranges']}, строк {result['rows']}")
+        return result
+
+    @classmethod
+    def refresh_analytics_cube(cls, full: bool = False) -> Dict[str, int]:
+        """
+        Обновление аналитического куба (src/database/analytics_cube.py)
+
+        Пересчитываются дни с изменившимися заказами (full=True - построение
+        заново), затем заранее считаются все срезы вкладки аналитики.
+        """
+        from src.database.analytics_cube import analytics_cube
+
+        result = analytics_cube.refresh(cls._connection, full=full)
+        analytics_cube.warm()
+        return result
+
+    @classmethod
+    def get_analytics(cls, period: str = 'all', analysis: str = 'orders', by: str = 'restaurant',
+                      refresh: bool = False) -> Dict[str, Any]:
+        """
+        Срез аналитического куба: период (all, month, week), вид анализа
+        (orders, customers, delivery) и разрез (restaurant, category, status)
+
+        Ответ берется из памяти; куб строится при первом обращении и
+        досчитывается, если после обновления были события изменения данных.
+        refresh=True - проверить и изменения других процессов (по номеру
+        изменения заказов). Возвращает {'columns', 'rows', 'total', ...}.
+        """
+        from src.database.analytics_cube import analytics_cube
+
+        try:
+            if refresh or not analytics_cube.built or analytics_cube.is_dirty:
+                cls.refresh_analytics_cube()
+            return analytics_cube.query(period, analysis, by)
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка получения аналитики: {str(e)}")
+            return {'period': period, 'analysis': analysis, 'by': by, 'columns': [], 'rows': [], 'total': []}
+
+    @classmethod
+    def get_order_timeseries(cls, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                             max_points: int = 2000, refresh: bool = True) -> Dict[str, Any]:
+        """
+        Число заказов по времени из почасовых сводок
+
+        Интервал ряда (час, день, месяц) выбирается самым мелким, при котором
+        в [start, end) не больше max_points точек: длинный период читается
+        крупными интервалами, приближенный - по часам. Без start и end берется
+        весь период сводок. refresh=True - сначала досчитать сводки.
+
+        Возвращает {'grain', 'start', 'end', 'extent': (начало, конец) сводок,
+        'points': [(начало интервала, заказов)]}.
+        """
+        from src.database.rollups import choose_grain, order_series, rollup_extent
+
+        empty = {'grain': None, 'start': start, 'end': end, 'extent': (None, None), 'points': []}
+        try:
+            if refresh:
+                cls.refresh_order_rollups()
+            extent = rollup_extent(cls._connection)
+            if extent[0] is None:
+                return dict(empty)
+            start = max(start or extent[0], extent[0])
+            end = min(end or extent[1], extent[1])
+            if start >= end:
+                return dict(empty, extent=extent)
+
+            grain = choose_grain(start, end, max_points)
+            points = order_series(cls._connection, start, end, grain)
+            logger.debug(f"Ряд заказов {start} - {end}: {len(points)} точек ({grain})")
+            return {'grain': grain, 'start': start, 'end': end, 'extent': extent, 'points': points}
+        except Exception as e:
+            logger.error(f"Ошибка получения ряда заказов: {str(e)}")
+            return dict(empty)
+
+    @classmethod
+    def rebuild_courier_index(cls):
+        """Перестроение индекса открытых доставок по курьерам"""
+        try:
+            from sqlalchemy import text
+            from src.database.courier_assignment import courier_engine, ACTIVE_LOAD_QUERY
+            
+            result = cls._connection.execute(text(ACTIVE_LOAD_QUERY))
+            courier_engine.rebuild(result.fetchall())
+            
+        except Exception as e:
+            logger.error(f"Ошибка построения индекса курьеров: {str(e)}")
+    
+    @classmethod
+    def complete_delivery(cls, order_id: int) -> bool:
+        """Отметка доставки заказа как выполненной"""
+        try:
+            from sqlalchemy import text
+            from src.database.courier_assignment import courier_engine
+            
+            # Доставленные (5) и отмененные (6) заказы уже не входят в нагрузку курьера
+            # (как в ACTIVE_LOAD_QUERY): курьер освобожден при смене статуса
+            courier_id = cls._connection.execute(
+                text("""
+                    SELECT d.courier_id FROM Deliveries d
+                    JOIN Orders o ON o.order_id = d.order_id
+                    WHERE d.order_id = :order_id AND d.delivery_time IS NULL AND o.status_id NOT IN (5, 6)
+                """),
+                {"order_id": order_id}
+            ).scalar()
+            
+            if courier_id is None:
+                cls._connection.commit()
+                return False
+            
+            updated = cls._connection.execute(
+                text("UPDATE Deliveries SET delivery_time = :delivery_time WHERE order_id = :order_id AND delivery_time IS NULL"),
+                {"order_id": order_id, "delivery_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+            ).rowcount
+            cls._connection.commit()
+            if not updated:
+                # Доставку уже завершил другой поток
+                return False
+            cls._publish(DeliveryCompleted(order_id))
+            
+            courier_engine.complete(courier_id)
+            logger.info(f"Доставка заказа #{order_id} завершена")
+            return True
+            
+        except Exception as e:
+            cls._connection.rollback()
+            logger.error(f"Ошибка завершения доставки заказа {order_id}: {str(e)}")
+            raise
+    
+    @classmethod
+    def transition_orders(cls, order_ids: List[int], from_status: int, to_status: int,
+                          versions: Optional[Dict[int, int]] = None) -> Any:
+        """
+        Пакетный перевод заказов из статуса from_status в to_status
+
+        На каждую часть списка (до ID_CHUNK_SIZE заказов) выполняется один
+        UPDATE ... WHERE status_id = :from_status с проверкой версии каждого
+        заказа. versions - {order_id: версия}, прочитанные диспетчером; без них
+        проверяется версия, прочитанная в этой же транзакции. Заказы, которые
+        уже в другом статусе или другой версии (или без версии в versions),
+        не меняются и возвращаются в conflicts. При переходе в "Доставлен" проставляется время доставки,
+        при завершении заказа курьер освобождается.
+
+        Возвращает TransitionResult; InvalidTransitionError при недопустимом переходе.
+        """
+        from src.database.change_tracking import next_change_seq
+        from src.database.courier_assignment import courier_engine
+        from src.database.dependencies import chunked
+        from src.database.order_lifecycle import (
+            DELIVERED, FINAL_STATUSES, TransitionResult, check_transition
+        )
+        
+        check_transition(from_status, to_status)
+        result = TransitionResult(from_status, to_status)
+        released_couriers = []
+        
+        trans = cls._begin()
+        try:
+            change_seq = next_change_seq(cls._connection)
+            for chunk in chunked(order_ids):
+                if versions is not None:
+                    # Заказ без ожидаемой версии не меняется: это конфликт версий
+                    expected = {order_id: versions[order_id] for order_id in chunk if order_id in versions}
                 else:
-                    # Назначаем первого курьера, если не указан
-                    couriers = cls.get_couriers()
-                    if couriers:
-                        insert_delivery_sql = """
-                            INSERT INTO Deliveries (order_id, courier_id, delivery_time)
-                            VALUES (:order_id, :courier_id, NULL)
-                        """
-                        cls._connection.execute(
-                            text(insert_delivery_sql), 
-                            {"order_id": order_id, "courier_id": couriers[0]['courier_id']}
-                        )
+                    expected = dict(cls._connection.execute(cls._in_ids(
+                        "SELECT order_id, version FROM Orders WHERE order_id IN :ids AND status_id = :from_status", 'ids'
+                    ), {"ids": chunk, "from_status": from_status}).fetchall())
                 
-                # Фиксируем транзакцию
-                trans.commit()
+                moved = cls._update_order_status(expected, from_status, to_status, change_seq)
+                result.moved.extend(moved)
+                if not moved:
+                    continue
+                
+                if to_status in FINAL_STATUSES:
+                    # Открытые доставки завершенных заказов больше не нагружают курьеров
+                    released_couriers.extend(cls._connection.execute(cls._in_ids(
+                        "SELECT courier_id FROM Deliveries WHERE order_id IN :ids AND delivery_time IS NULL", 'ids'
+                    ), {"ids": moved}).scalars())
+                if to_status == DELIVERED:
+                    cls._connection.execute(cls._in_ids(
+                        "UPDATE Deliveries SET delivery_time = :delivery_time "
+                        "WHERE order_id IN :ids AND delivery_time IS NULL", 'ids'
+                    ), {"ids": moved, "delivery_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S')})
+            
+            trans.commit()
+        except Exception as e:
+            trans.rollback()
+            logger.error(f"Ошибка перевода заказов в статус {to_status}: {str(e)}")
+            raise
+        
+        moved_ids = set(result.moved)
+        result.conflicts = [order_id for order_id in dict.fromkeys(order_ids) if order_id not in moved_ids]
+        
+        if result.moved:
+            cls._publish(OrderStatusChanged(tuple(result.moved), from_status, to_status))
+        for courier_id in released_couriers:
+            courier_engine.complete(courier_id)
+        
+        logger.info(f"Смена статуса заказов {result.summary()}")
+        return result
+
+    @classmethod
+    def _update_order_status(cls, expected: Dict[int, int], from_status: int, to_status: int,
+                             change_seq: int) -> List[int]:
+        """
+        Один UPDATE для набора заказов с ожидаемыми версиями; возвращает
+        id заказов, которые он изменил
+        """
+        from sqlalchemy import text
+        
+        if not expected:
+            return []
+        
+        params = {"from_status": from_status, "to_status": to_status, "change_seq": change_seq}
+        cases = []
+        for index, (order_id, version) in enumerate(expected.items()):
+            params[f"id{index}"] = order_id
+            params[f"v{index}"] = version
+            cases.append(f"WHEN :id{index} THEN :v{index}")
+        ids = ', '.join(f":id{index}" for index in range(len(expected)))
+        
+        updated = cls._connection.execute(text(f"""
+            UPDATE Orders SET status_id = :to_status, version = version + 1, change_seq = :change_seq
+            WHERE order_id IN ({ids}) AND status_id = :from_status
+                AND version = CASE order_id {' '.join(cases)} END
+        """), params).rowcount
+        
+        if updated == len(expected):
+            return list(expected)
+        
+        # Часть заказов изменена другим пользователем: определяем, какие перевели мы
+        rows = cls._connection.execute(cls._in_ids(
+            "SELECT order_id, status_id, version FROM Orders WHERE order_id IN :ids", 'ids'
+        ), {"ids": list(expected)})
+        return [
+            order_id for order_id, status_id, version in rows
+            if status_id == to_status and version == expected[order_id] + 1
+        ]
+    
+    # =========================================================================
+    # ЗАПИСИ ТАБЛИЦ
+    # =========================================================================
+    @classmethod
+    def _key_condition(cls, table_name: str, key: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Условие WHERE по первичному ключу и его параметры"""
+        if table_name not in PRIMARY_KEYS:
+            raise ValueError(f"Неизвестная таблица: {table_name}")
+        columns = PRIMARY_KEYS[table_name]
+        condition = ' AND '.join(f"{column} = :key_{column}" for column in columns)
+        return condition, {f"key_{column}": key[column] for column in columns}
+
+    @staticmethod
+    def _order_ids_of(table_name: str, values: Dict[str, Any]) -> Optional[Tuple[int, ...]]:
+        """Заказ, к которому относится запись (для точечной инвалидации кэша)"""
+        from src.database.query_cache import ORDER_SCOPED_TABLES
+
+        if table_name.lower() not in ORDER_SCOPED_TABLES:
+            return None
+        order_id = values.get('order_id')
+        return (order_id,) if order_id is not None else None
+
+    @classmethod
+    def _track_order_changes(cls, table_name: str, values: Dict[str, Any]):
+        """
+        Отметка строк списка заказов, затронутых изменением записи, новым
+        номером изменения (вызывается внутри транзакции записи)
+        """
+        from sqlalchemy import text
+        from src.database.change_tracking import next_change_seq, touch_customer_orders, touch_orders
+        
+        if table_name in ('Orders', 'OrderItems') and values.get('order_id') is not None:
+            touch_orders(cls._connection, [values['order_id']], next_change_seq(cls._connection))
+        elif table_name == 'Customers' and values.get('customer_id') is not None:
+            touch_customer_orders(cls._connection, values['customer_id'], next_change_seq(cls._connection))
+        elif table_name == 'Statuses' and values.get('status_id') is not None:
+            cls._connection.execute(
+                text("UPDATE Orders SET change_seq = :change_seq WHERE status_id = :status_id"),
+                {"change_seq": next_change_seq(cls._connection), "status_id": values['status_id']}
+            )
+
+    @classmethod
+    def get_record(cls, table_name: str, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Получение записи по первичному ключу"""
+        from sqlalchemy import text
+
+        condition, params = cls._key_condition(table_name, key)
+        result = cls._connection.execute(text(f"SELECT * FROM {table_name} WHERE {condition}"), params)
+        row = result.mappings().first()
+        return dict(row) if row is not None else None
+
+    @classmethod
+    def create_record(cls, table_name: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Создание записи; возвращает значения записи вместе с первичным ключом"""
+        try:
+            from sqlalchemy import text
+            from src.database.courier_assignment import courier_engine
+            
+            if table_name not in PRIMARY_KEYS:
+                raise ValueError(f"Неизвестная таблица: {table_name}")
+            
+            columns = list(values)
+            query = (f"INSERT INTO {table_name} ({', '.join(columns)}) "
+                     f"VALUES ({', '.join(':' + column for column in columns)})")
+            
+            trans = cls._begin()
+            try:
+                result = cls._connection.execute(text(query), values)
                 
-                logger.info(f"Создан заказ #{order_id} с {len(dish_quantities)} позициями")
-                return order_id
+                record = dict(values)
+                pk_columns = PRIMARY_KEYS[table_name]
+                if len(pk_columns) == 1 and record.get(pk_columns[0]) is None:
+                    record[pk_columns[0]] = result.lastrowid
                 
-            except Exception as e:
+                cls._track_order_changes(table_name, record)
+                trans.commit()
+            except Exception:
                 trans.rollback()
                 raise
-                
+            
+            cls._publish(RecordChanged(table_name, CREATED, {column: record.get(column) for column in PRIMARY_KEYS[table_name]},
+                                       record, cls._order_ids_of(table_name, record)))
+            if table_name == 'Couriers':
+                courier_engine.add_courier(record['courier_id'])
+            logger.info(f"Создана запись в {table_name}: {values}")
+            return record
+            
         except Exception as e:
-            logger.error(f"Ошибка создания заказа: {str(e)}")
+            logger.error(f"Ошибка создания записи в {table_name}: {str(e)}")
+            raise
+
+    @classmethod
+    def update_record(cls, table_name: str, key: Dict[str, Any], values: Dict[str, Any]) -> int:
+        """Обновление записи по первичному ключу; возвращает число измененных строк"""
+        try:
+            from sqlalchemy import text
+            
+            if not values:
+                return 0
+            
+            condition, params = cls._key_condition(table_name, key)
+            assignments = ', '.join(f"{column} = :{column}" for column in values)
+            if table_name == 'Orders' and 'version' not in values:
+                # Любое изменение заказа меняет его версию (см. transition_orders)
+                assignments += ', version = version + 1'
+            params.update(values)
+            
+            trans = cls._begin()
+            try:
+                result = cls._connection.execute(
+                    text(f"UPDATE {table_name} SET {assignments} WHERE {condition}"), params
+                )
+                if result.rowcount:
+                    cls._track_order_changes(table_name, {**key, **values})
+                trans.commit()
+            except Exception:
+                trans.rollback()
+                raise
+            
+            cls._publish(RecordChanged(table_name, UPDATED, dict(key), dict(values),
+                                       cls._order_ids_of(table_name, {**key, **values})))
+            logger.info(f"Обновлена запись {table_name} {key}: {values}")
+            return result.rowcount
+            
+        except Exception as e:
+            logger.error(f"Ошибка обновления записи {table_name}: {str(e)}")
             raise
+
+    @classmethod
+    def delete_record(cls, table_name: str, key: Dict[str, Any]) -> Tuple[bool, str]:
+        """Удаление записи с обработкой зависимостей"""
+        from sqlalchemy import text
+        from sqlalchemy.exc import IntegrityError
+        from src.database.courier_assignment import courier_engine
+        
+        try:
+            condition, params = cls._key_condition(table_name, key)
+            record_id = next(iter(key.values()))
+            logger.info(f"Попытка удаления {table_name} {key}")
+            
+            # Обрабатываем разные типы записей
+            if table_name == "Orders":
+                return cls.delete_order_cascade(record_id)
+            elif table_name == "Dishes":
+                return cls.delete_dish_cascade(record_id)
+            elif table_name == "Restaurants":
+                return cls.delete_restaurant_cascade(record_id)
+            elif table_name == "Customers":
+                # Проверяем, есть ли заказы у клиента
+                orders_count = cls.get_dependency_report("Customers", [record_id])[record_id]['orders']
+                if orders_count > 0:
+                    return False, f"Невозможно удалить клиента: у него {orders_count} заказов"
+                message = "Клиент успешно удален"
+            elif table_name == "Couriers":
+                # Проверяем, есть ли доставки у курьера
+                deliveries_count = cls.get_dependency_report("Couriers", [record_id])[record_id]['deliveries']
+                if deliveries_count > 0:
+                    return False, f"Невозможно удалить курьера: у него {deliveries_count} доставок"
+                message = "Курьер успешно удален"
+            else:
+                message = "Запись успешно удалена"
+            
+            trans = cls._begin()
+            try:
+                cls._connection.execute(text(f"DELETE FROM {table_name} WHERE {condition}"), params)
+                if table_name == "OrderItems":
+                    # Изменилось число позиций заказа
+                    cls._track_order_changes(table_name, key)
+                trans.commit()
+            except Exception:
+                trans.rollback()
+                raise
+            
+            cls._publish(RecordChanged(table_name, DELETED, dict(key), {}, cls._order_ids_of(table_name, key)))
+            if table_name == "Couriers":
+                courier_engine.remove_courier(record_id)
+            return True, message
+            
+        except IntegrityError as e:
+            logger.warning(f"Ошибка целостности при удалении записи: {str(e)}")
+            return False, "Невозможно удалить запись, так как на нее ссылаются другие данные"
+        except Exception as e:
+            logger.error(f"Ошибка удаления записи: {str(e)}")
+            logger.error(traceback.format_exc())
+            return False, f"Ошибка при удалении: {str(e)}"
+
+    # =========================================================================
+    # ЗАВИСИМОСТИ И КАСКАДНОЕ УДАЛЕНИЕ
+    # =========================================================================
+    @classmethod
+    def get_dependency_report(cls, table_name: str, record_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        """
+        Отчет о зависимостях набора записей одной таблицы
+
+        Возвращает {id записи: {зависимость: количество строк}}. Для каждой
+        части списка id (до ID_CHUNK_SIZE) выполняется один запрос.
+        """
+        from sqlalchemy import text
+        from src.database.dependencies import (
+            DEPENDENCY_RULES, build_dependency_query, chunked, dependency_params, empty_report
+        )
+        
+        if table_name not in DEPENDENCY_RULES:
+            return {}
+        
+        record_ids = list(record_ids)
+        report = empty_report(table_name, record_ids)
+        
+        for chunk in chunked(record_ids):
+            query = build_dependency_query(table_name, len(chunk))
+            for row in cls._connection.execute(text(query), dependency_params(chunk)).mappings():
+                report[int(row['record_id'])][row['dependency']] = int(row['cnt'])
+        
+        return report
+
+    @classmethod
+    def check_dependencies(cls, table_name: str, record_id: int) -> List[str]:
+        """Проверка зависимостей перед удалением"""
+        try:
+            from src.database.dependencies import describe_dependencies
+            
+            report = cls.get_dependency_report(table_name, [record_id])
+            if record_id not in report:
+                return []
+            
+            return describe_dependencies(table_name, report[record_id])
+        except Exception as e:
+            logger.error(f"Ошибка проверки зависимостей: {str(e)}")
+            return [f"Ошибка при проверке зависимостей: {str(e)}"]
+
+    @staticmethod
+    def _in_ids(query: str, *names: str):
+        """Запрос со списками id в IN (...), раскрываемыми при выполнении"""
+        from sqlalchemy import bindparam, text
+        return text(query).bindparams(*(bindparam(name, expanding=True) for name in names))
+
+    @classmethod
+    def delete_order_cascade(cls, order_id: int) -> Tuple[bool, str]:
+        """Каскадное удаление заказа и связанных данных"""
+        success, message = cls.delete_orders_cascade([order_id])
+        if success:
+            return True, "Заказ и все связанные данные успешно удалены"
+        return False, message
+
+    @classmethod
+    def delete_orders_cascade(cls, order_ids: List[int]) -> Tuple[bool, str]:
+        """Каскадное удаление набора заказов в одной транзакции"""
+        try:
+            from src.database.change_tracking import next_change_seq, record_deleted_orders
+            from src.database.courier_assignment import courier_engine
+            from src.database.dependencies import chunked
+            
+            order_ids = list(dict.fromkeys(order_ids))
+            released_couriers = []
+            
+            trans = cls._begin()
+            try:
+                record_deleted_orders(cls._connection, order_ids, next_change_seq(cls._connection))
+                for chunk in chunked(order_ids):
+                    # Открытые доставки незавершенных заказов освобождают курьеров после удаления
+                    released_couriers.extend(cls._connection.execute(cls._in_ids("""
+                        SELECT dl.courier_id FROM Deliveries dl
+                        JOIN Orders o ON o.order_id = dl.order_id
+                        WHERE dl.order_id IN :ids AND dl.delivery_time IS NULL
+                            AND o.status_id NOT IN (5, 6)
+                    """, 'ids'), {"ids": chunk}).scalars())
+                    
+                    # Удаляем связанные записи в правильном порядке
+                    for table in ("Reviews", "Deliveries", "OrderItems", "Orders"):
+                        cls._connection.execute(
+                            cls._in_ids(f"DELETE FROM {table} WHERE order_id IN :ids", 'ids'), {"ids": chunk}
+                        )
+                trans.commit()
+            except Exception:
+                trans.rollback()
+                raise
+            
+            cls._publish(OrdersDeleted(tuple(order_ids)))
+            for courier_id in released_couriers:
+                courier_engine.complete(courier_id)
+            
+            logger.info(f"Удалено заказов: {len(order_ids)} (со всеми связанными данными)")
+            return True, f"Удалено заказов: {len(order_ids)}"
+        except Exception as e:
+            logger.error(f"Ошибка каскадного удаления заказов {order_ids}: {str(e)}")
+            return False, f"Ошибка при удалении заказов: {str(e)}"
+
+    @classmethod
+    def delete_dish_cascade(cls, dish_id: int) -> Tuple[bool, str]:
+        """Каскадное удаление блюда и связанных данных"""
+        success, message = cls.delete_dishes_cascade([dish_id])
+        if success:
+            return True, "Блюдо успешно удалено"
+        return False, message
+
+    @classmethod
+    def delete_dishes_cascade(cls, dish_ids: List[int]) -> Tuple[bool, str]:
+        """Удаление набора блюд, не используемых в заказах, в одной транзакции"""
+        try:
+            from src.database.dependencies import chunked
+            
+            dish_ids = list(dict.fromkeys(dish_ids))
+            
+            # Проверяем, используются ли блюда в заказах
+            report = cls.get_dependency_report("Dishes", dish_ids)
+            used_count = sum(counts['order_items'] for counts in report.values())
+            if used_count > 0:
+                return False, f"Невозможно удалить блюдо: оно используется в {used_count} заказах"
+            
+            trans = cls._begin()
+            try:
+                for chunk in chunked(dish_ids):
+                    cls._connection.execute(cls._in_ids("DELETE FROM Dishes WHERE dish_id IN :ids", 'ids'), {"ids": chunk})
+                trans.commit()
+            except Exception:
+                trans.rollback()
+                raise
+            
+            cls._publish(TablesChanged(("Dishes",)))
+            logger.info(f"Удалено блюд: {len(dish_ids)}")
+            return True, f"Удалено блюд: {len(dish_ids)}"
+        except Exception as e:
+            logger.error(f"Ошибка удаления блюд {dish_ids}: {str(e)}")
+            return False, f"Ошибка при удалении блюда: {str(e)}"
+
+    @classmethod
+    def delete_restaurant_cascade(cls, restaurant_id: int) -> Tuple[bool, str]:
+        """Каскадное удаление ресторана и связанных данных"""
+        success, message = cls.delete_restaurants_cascade([restaurant_id])
+        if success:
+            return True, "Ресторан и все его блюда успешно удалены"
+        return False, message
+
+    @classmethod
+    def delete_restaurants_cascade(cls, restaurant_ids: List[int]) -> Tuple[bool, str]:
+        """Каскадное удаление набора ресторанов и их блюд в одной транзакции"""
+        try:
+            from src.database.dependencies import chunked
+            
+            restaurant_ids = list(dict.fromkeys(restaurant_ids))
+            
+            # Рестораны, блюда которых есть в заказах, не удаляются
+            report = cls.get_dependency_report("Restaurants", restaurant_ids)
+            used_count = sum(counts['order_items'] for counts in report.values())
+            if used_count > 0:
+                return False, f"Невозможно удалить ресторан: блюда ресторана используются в {used_count} позициях заказов"
+            
+            trans = cls._begin()
+            try:
+                for chunk in chunked(restaurant_ids):
+                    cls._connection.execute(
+                        cls._in_ids("DELETE FROM Dishes WHERE restaurant_id IN :ids", 'ids'), {"ids": chunk}
+                    )
+                    cls._connection.execute(
+                        cls._in_ids("DELETE FROM Restaurants WHERE restaurant_id IN :ids", 'ids'), {"ids": chunk}
+                    )
+                trans.commit()
+            except Exception:
+                trans.rollback()
+                raise
+            
+            cls._publish(TablesChanged(("Dishes", "Restaurants")))
+            dishes_count = sum(counts['dishes'] for counts in report.values())
+            logger.info(f"Удалено ресторанов: {len(restaurant_ids)}, блюд: {dishes_count}")
+            return True, f"Удалено ресторанов: {len(restaurant_ids)}, блюд: {dishes_count}"
+        except Exception as e:
+            logger.error(f"Ошибка удаления ресторанов {restaurant_ids}: {str(e)}")
+            return False, f"Ошибка при удалении ресторана: {str(e)}"
+
+    # =========================================================================
+    # СТАТИСТИКА ДЛЯ ДАШБОРДА
+    # =========================================================================
+    @classmethod
+    def get_orders_statistics(cls) -> Dict[str, Any]:
+        """Получение статистики по заказам"""
+        try:
+            from sqlalchemy import text
+            
+            total_orders = cls._connection.execute(text("SELECT COUNT(*) FROM Orders")).scalar() or 0
+            
+            result = cls._connection.execute(text("""
+                SELECT s.status_name, COUNT(o.order_id) as count
+                FROM Orders o
+                JOIN Statuses s ON o.status_id = s.status_id
+                GROUP BY s.status_name
+            """))
+            status_counts = {row.status_name: row.count for row in result}
+            
+            delivered_count = cls._connection.execute(
+                text("SELECT COUNT(*) FROM Deliveries WHERE delivery_time IS NOT NULL")
+            ).scalar() or 0
+            
+            stats = {
+                'total_orders': total_orders,
+                'status_counts': status_counts,
+                'delivered_count': delivered_count,
+                'delivery_rate': (delivered_count / total_orders * 100) if total_orders > 0 else 0
+            }
+            
+            logger.debug(f"Статистика заказов получена: {stats}")
+            return stats
+        except Exception as e:
+            logger.error(f"Ошибка получения статистики заказов: {str(e)}")
+            return {
+                'total_orders': 0,
+                'status_counts': {},
+                'delivered_count': 0,
+                'delivery_rate': 0
+            }
+
+    @classmethod
+    def get_popular_dishes(cls, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Получение популярных блюд: [{'dish': блюдо, 'restaurant': ресторан,
+        'order_count': количество}], блюда и рестораны - словари столбцов
+        """
+        try:
+            from sqlalchemy import text
+            
+            query = """
+                SELECT d.dish_id, d.restaurant_id, d.name, d.description, d.cooking_time,
+                    r.name as restaurant_name, r.location, r.rating,
+                    COALESCE(top.total_quantity, 0) as total_quantity
+                FROM (
+                    SELECT d.dish_id, COALESCE(SUM(oi.quantity), 0) as total_quantity
+                    FROM Dishes d
+                    LEFT JOIN OrderItems oi ON d.dish_id = oi.dish_id
+                    GROUP BY d.dish_id
+                    ORDER BY total_quantity DESC
+                    LIMIT :limit
+                ) top
+                JOIN Dishes d ON d.dish_id = top.dish_id
+                LEFT JOIN Restaurants r ON r.restaurant_id = d.restaurant_id
+                ORDER BY total_quantity DESC
+            """
+            
+            popular_dishes = []
+            for row in cls._connection.execute(text(query), {"limit": limit}).mappings():
+                popular_dishes.append({
+                    'dish': {
+                        'dish_id': row['dish_id'], 'restaurant_id': row['restaurant_id'], 'name': row['name'],
+                        'description': row['description'], 'cooking_time': row['cooking_time'],
+                    },
+                    'restaurant': {
+                        'restaurant_id': row['restaurant_id'], 'name': row['restaurant_name'],
+                        'location': row['location'], 'rating': row['rating'],
+                    } if row['restaurant_name'] is not None else None,
+                    'order_count': int(row['total_quantity'])
+                })
+            
+            return popular_dishes
+        except Exception as e:
+            logger.error(f"Ошибка получения популярных блюд: {str(e)}")
+            return []
+
+    @classmethod
+    def get_customer_orders(cls, customer_id: int) -> List[Dict[str, Any]]:
+        """Получение всех заказов конкретного клиента"""
+        try:
+            from sqlalchemy import text
+            
+            query = """
+                SELECT 
+                    o.order_id,
+                    o.order_time,
+                    s.status_name,
+                    COUNT(oi.order_id) as items_count,
+                    SUM(oi.quantity) as total_quantity
+                FROM Orders o
+                LEFT JOIN Statuses s ON o.status_id = s.status_id
+                LEFT JOIN OrderItems oi ON o.order_id = oi.order_id
+                WHERE o.customer_id = :customer_id
+                GROUP BY o.order_id, o.order_time, s.status_name
+                ORDER BY o.order_time DESC
+            """
+            
+            result = cls._connection.execute(text(query), {"customer_id": customer_id})
+            return [dict(row) for row in result.mappings()]
+        except Exception as e:
+            logger.error(f"Ошибка получения заказов клиента {customer_id}: {str(e)}")
+            return []
+
+    @classmethod
+    def check_database_structure(cls) -> Dict[str, bool]:
+        """Проверка структуры базы данных: наличие таблиц схемы"""
+        try:
+            from sqlalchemy import inspect
+            
+            existing = {name.lower() for name in inspect(cls._connection).get_table_names()}
+            structure = {table: table.lower() in existing for table in PRIMARY_KEYS}
+            for table, found in structure.items():
+                logger.info(f"Таблица {table}: {'найдена' if found else 'не найдена'}")
+            return structure
+        except Exception as e:
+            logger.error(f"Ошибка проверки структуры БД: {str(e)}")
+            return {}
     
     @classmethod
     def close(cls):
         """Закрытие соединения с базой данных"""
         try:
-            if cls._connection:
-                cls._connection.close()
-            if cls._engine:
-                cls._engine.dispose()
+            DatabaseEngine.close()
+            cls._engine = None
+            cls._initialized = False
             logger.info("Соединение с БД закрыто")
         except Exception as e:
             logger.error(f"Ошибка при закрытии соединения: {str(e)}")
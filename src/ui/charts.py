@@ -0,0 +1,711 @@
+"""
+Виджеты графиков дашборда
+
+Оба виджета показывают описание графика (src/charts/specs.py):
+
+- NativeChartView рисует круговую и столбчатые диаграммы средствами Qt
+  (QPainter) прямо в paintEvent: без matplotlib, перерисовка - доли
+  миллисекунды;
+- ChartView показывает картинку, отрисованную matplotlib в фоновом потоке
+  общим отрисовщиком с кэшем (src/charts/renderer.py), - как в отчетах.
+
+Способ отрисовки дашборда выбирается переменной DASHBOARD_CHARTS
+(native по умолчанию или agg), см. create_chart_view.
+
+TimeSeriesView - линейный график длинного ряда на QPainter: ряд
+прореживается до ширины графика (src/charts/timeseries.py), а при
+приближении владелец подгружает более подробный ряд.
+"""
+
+import bisect
+import logging
+import math
+import os
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from PyQt6.QtCore import QPointF, QRectF, QSize, Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QFontMetricsF, QPainter, QPen, QPixmap, QPolygonF
+from PyQt6.QtWidgets import QLabel, QSizePolicy, QWidget
+
+from src.charts.specs import BARH, DARK_STYLE, PALETTE, PIE, ChartSpec, ChartStyle
+from src.charts.timeseries import LTTB, downsample
+from src.utils.data_access import data_access
+
+logger = logging.getLogger(__name__)
+
+# Способ отрисовки графиков дашборда: native (QPainter) или agg (matplotlib)
+DASHBOARD_CHARTS = os.getenv('DASHBOARD_CHARTS', 'native').lower()
+
+# Задержка отрисовки после изменения размера, мс
+RESIZE_DELAY_MS = 150
+
+BORDER_COLOR = '#555555'
+
+
+def create_chart_view(parent=None) -> QWidget:
+    """Виджет графика дашборда выбранного способа отрисовки"""
+    if DASHBOARD_CHARTS == 'agg':
+        return ChartView(parent)
+    return NativeChartView(parent)
+
+
+def nice_ticks(maximum: float, count: int = 5) -> List[float]:
+    """Деления оси от 0 до круглого значения не меньше maximum"""
+    if maximum <= 0:
+        return [0.0, 1.0]
+    raw_step = maximum / count
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(factor * magnitude for factor in (1, 2, 2.5, 5, 10) if factor * magnitude >= raw_step)
+    return [step * i for i in range(int(math.ceil(maximum / step - 1e-9)) + 1)]
+
+
+def _fill_color(color: str, alpha: float = 0.8) -> QColor:
+    result = QColor(color)
+    result.setAlphaF(alpha)
+    return result
+
+
+class NativeChartView(QWidget):
+    """
+    Диаграмма, нарисованная QPainter: круговая (PIE), столбчатая (BAR) и
+    горизонтальная столбчатая (BARH) в оформлении графиков matplotlib
+    """
+
+    PADDING = 10
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.spec: Optional[ChartSpec] = None
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setMinimumSize(200, 150)
+
+    def sizeHint(self) -> QSize:
+        return QSize(400, 300)
+
+    def set_spec(self, spec: ChartSpec):
+        """Новые данные графика"""
+        if spec == self.spec:
+            return
+        self.spec = spec
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        try:
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            spec = self.spec
+            background = QColor(spec.style.background if spec else '#2b2b2b')
+            painter.setPen(QPen(QColor(BORDER_COLOR), 1))
+            painter.setBrush(background)
+            painter.drawRoundedRect(QRectF(self.rect()).adjusted(0.5, 0.5, -0.5, -0.5), 5, 5)
+            if spec is None:
+                return
+
+            area = QRectF(self.rect()).adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+            if spec.title:
+                font = self._font(14, bold=True)
+                painter.setFont(font)
+                painter.setPen(QColor(spec.style.foreground))
+                height = QFontMetricsF(font).height()
+                painter.drawText(QRectF(area.left(), area.top(), area.width(), height),
+                                 Qt.AlignmentFlag.AlignCenter, spec.title)
+                area.setTop(area.top() + height * 1.6)
+
+            if spec.is_empty:
+                painter.setFont(self._font(12))
+                painter.setPen(QColor(spec.style.foreground))
+                painter.drawText(area, Qt.AlignmentFlag.AlignCenter, spec.empty_text)
+            elif spec.kind == PIE:
+                self._paint_pie(painter, area, spec)
+            elif spec.kind == BARH:
+                self._paint_barh(painter, area, spec)
+            else:
+                self._paint_bar(painter, area, spec)
+        finally:
+            painter.end()
+
+    def _font(self, points: float, bold: bool = False) -> QFont:
+        font = QFont(self.font())
+        font.setPointSizeF(points)
+        font.setBold(bold)
+        return font
+
+    def _paint_legend(self, painter: QPainter, anchor: QRectF, entries, title: str, spec: ChartSpec,
+                      align_right: bool = False):
+        """Легенда у правого края anchor: по центру по вертикали или внизу справа"""
+        font = self._font(10)
+        title_font = self._font(10, bold=True)
+        metrics = QFontMetricsF(font)
+        line = metrics.height() * 1.3
+        box = metrics.height() * 0.8
+        width = max([metrics.horizontalAdvance(label) for _, label in entries]
+                    + [QFontMetricsF(title_font).horizontalAdvance(title) - box * 1.4]) + box * 1.4 + 22
+        height = line * (len(entries) + (1 if title else 0)) + 8
+        if align_right:
+            frame = QRectF(anchor.right() - width - 6, anchor.bottom() - height - 6, width, height)
+        else:
+            frame = QRectF(anchor.right() - width, anchor.center().y() - height / 2, width, height)
+
+        painter.setPen(QPen(QColor(spec.style.grid), 1))
+        painter.setBrush(_fill_color(spec.style.background, 0.9))
+        painter.drawRoundedRect(frame, 3, 3)
+        y = frame.top() + 4
+        painter.setPen(QColor(spec.style.foreground))
+        if title:
+            painter.setFont(title_font)
+            painter.drawText(QRectF(frame.left(), y, frame.width(), line), Qt.AlignmentFlag.AlignCenter, title)
+            y += line
+        painter.setFont(font)
+        for color, label in entries:
+            painter.fillRect(QRectF(frame.left() + 6, y + (line - box) / 2, box * 1.4, box), _fill_color(color))
+            painter.setPen(QColor(spec.style.foreground))
+            painter.drawText(QRectF(frame.left() + box * 1.4 + 12, y, width, line),
+                             Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, label)
+            y += line
+
+    def _paint_pie(self, painter: QPainter, area: QRectF, spec: ChartSpec):
+        entries = [(spec.color(i), label) for i, label in enumerate(spec.labels)]
+        # Легенда справа, диаграмма - в оставшейся части
+        plot = QRectF(area.left(), area.top(), area.width() * 0.68, area.height())
+        label_font = self._font(11)
+        label_height = QFontMetricsF(label_font).height()
+        diameter = max(min(plot.width(), plot.height() - 2 * label_height) * 0.8, 10)
+        center = plot.center()
+        circle = QRectF(center.x() - diameter / 2, center.y() - diameter / 2, diameter, diameter)
+        radius = diameter / 2
+
+        total = float(sum(spec.values))
+        # Как у matplotlib: с 90 градусов против часовой стрелки
+        angle = 90.0
+        painter.setPen(Qt.PenStyle.NoPen)
+        slices = []
+        for i, value in enumerate(spec.values):
+            span = 360.0 * value / total
+            painter.setBrush(QColor(spec.color(i)))
+            painter.drawPie(circle, round(angle * 16), round(span * 16))
+            slices.append((angle + span / 2, value))
+            angle += span
+
+        for (middle, value), label in zip(slices, spec.labels):
+            if value / total < 0.01:
+                # Узкие секторы подписаны только в легенде: подписи легли бы друг на друга
+                continue
+            radians = math.radians(middle)
+            direction = QPointF(math.cos(radians), -math.sin(radians))
+            # Доля - внутри сектора, подпись - снаружи
+            if value / total >= 0.03:
+                painter.setFont(self._font(10, bold=True))
+                painter.setPen(QColor('white'))
+                inner = center + direction * radius * 0.6
+                painter.drawText(QRectF(inner.x() - 40, inner.y() - 10, 80, 20), Qt.AlignmentFlag.AlignCenter,
+                                 spec.value_format.format(100.0 * value / total))
+            painter.setFont(label_font)
+            painter.setPen(QColor(spec.style.foreground))
+            outer = center + direction * radius * 1.12
+            align = Qt.AlignmentFlag.AlignLeft if direction.x() >= 0 else Qt.AlignmentFlag.AlignRight
+            text_rect = QRectF(outer.x() if direction.x() >= 0 else outer.x() - 200,
+                               outer.y() - label_height / 2, 200, label_height)
+            painter.drawText(text_rect, align | Qt.AlignmentFlag.AlignVCenter, label)
+
+        self._paint_legend(painter, area, entries, spec.legend_title, spec)
+
+    def _axis_label(self, painter: QPainter, rect: QRectF, text: str, spec: ChartSpec, vertical: bool = False):
+        painter.setFont(self._font(12, bold=True))
+        painter.setPen(QColor(spec.style.foreground))
+        if not vertical:
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, text)
+            return
+        painter.save()
+        painter.translate(rect.center())
+        painter.rotate(-90)
+        painter.drawText(QRectF(-rect.height() / 2, -rect.width() / 2, rect.height(), rect.width()),
+                         Qt.AlignmentFlag.AlignCenter, text)
+        painter.restore()
+
+    def _value_ticks(self, spec: ChartSpec) -> List[float]:
+        if spec.value_range:
+            low, high = spec.value_range
+            return nice_ticks(high - low) if low == 0 else [low, high]
+        return nice_ticks(max(spec.values))
+
+    def _paint_grid_line(self, painter: QPainter, start: QPointF, end: QPointF, spec: ChartSpec):
+        painter.setPen(QPen(_fill_color(spec.style.grid, 0.3), 1))
+        painter.drawLine(start, end)
+
+    def _paint_bar(self, painter: QPainter, area: QRectF, spec: ChartSpec):
+        tick_font = self._font(10)
+        metrics = QFontMetricsF(tick_font)
+        ticks = self._value_ticks(spec)
+        tick_labels = [f"{tick:g}" for tick in ticks]
+        axis_font_height = QFontMetricsF(self._font(12, bold=True)).height()
+
+        # Подписи категорий повернуты на 45 градусов: место снизу по самой длинной
+        longest = max(metrics.horizontalAdvance(label) for label in spec.labels)
+        bottom = min(longest * 0.72 + metrics.height(), area.height() * 0.4)
+        left = max(metrics.horizontalAdvance(label) for label in tick_labels) + 8
+        if spec.ylabel:
+            left += axis_font_height + 4
+        if spec.xlabel:
+            bottom += axis_font_height + 4
+        plot = QRectF(area.left() + left, area.top() + metrics.height(),
+                      area.width() - left - 4, area.height() - bottom - metrics.height())
+        if plot.width() <= 0 or plot.height() <= 0:
+            return
+        top_value = ticks[-1] or 1.0
+
+        painter.setFont(tick_font)
+        for tick, label in zip(ticks, tick_labels):
+            y = plot.bottom() - plot.height() * tick / top_value
+            self._paint_grid_line(painter, QPointF(plot.left(), y), QPointF(plot.right(), y), spec)
+            painter.setPen(QColor(spec.style.foreground))
+            painter.drawText(QRectF(plot.left() - left, y - metrics.height() / 2, left - 6, metrics.height()),
+                             Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, label)
+
+        slot = plot.width() / len(spec.values)
+        for i, (value, label) in enumerate(zip(spec.values, spec.labels)):
+            height = plot.height() * value / top_value
+            bar = QRectF(plot.left() + slot * (i + 0.1), plot.bottom() - height, slot * 0.8, height)
+            painter.setPen(QPen(QColor('white'), 1))
+            painter.setBrush(_fill_color(spec.color(i)))
+            painter.drawRect(bar)
+
+            painter.setFont(self._font(11, bold=True))
+            painter.setPen(QColor(spec.style.foreground))
+            painter.drawText(QRectF(bar.left() - 20, bar.top() - metrics.height() - 2, bar.width() + 40,
+                                    metrics.height()), Qt.AlignmentFlag.AlignCenter, spec.value_format.format(value))
+
+            # Подпись категории, повернутая на 45 градусов, заканчивается под столбцом
+            painter.setFont(tick_font)
+            painter.save()
+            painter.translate(bar.center().x(), plot.bottom() + 4)
+            painter.rotate(-45)
+            width = metrics.horizontalAdvance(label)
+            painter.drawText(QRectF(-width, 0, width, metrics.height()),
+                             Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignTop, label)
+            painter.restore()
+
+        painter.setPen(QPen(QColor(spec.style.grid), 1))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawRect(plot)
+        if spec.ylabel:
+            self._axis_label(painter, QRectF(area.left(), plot.top(), axis_font_height, plot.height()),
+                             spec.ylabel, spec, vertical=True)
+        if spec.xlabel:
+            self._axis_label(painter, QRectF(plot.left(), area.bottom() - axis_font_height, plot.width(),
+                                             axis_font_height), spec.xlabel, spec)
+
+    def _paint_barh(self, painter: QPainter, area: QRectF, spec: ChartSpec):
+        tick_font = self._font(10)
+        label_font = self._font(11)
+        value_font = self._font(11, bold=True)
+        metrics = QFontMetricsF(tick_font)
+        ticks = self._value_ticks(spec)
+        low = spec.value_range[0] if spec.value_range else 0.0
+        high = spec.value_range[1] if spec.value_range else ticks[-1]
+        axis_font_height = QFontMetricsF(self._font(12, bold=True)).height()
+
+        left = max(QFontMetricsF(label_font).horizontalAdvance(label) for label in spec.labels) + 10
+        right = max(QFontMetricsF(value_font).horizontalAdvance(spec.value_format.format(value))
+                    for value in spec.values) + 12
+        bottom = metrics.height() + 6 + (axis_font_height + 4 if spec.xlabel else 0)
+        plot = QRectF(area.left() + left, area.top(), area.width() - left - right, area.height() - bottom)
+        if plot.width() <= 0 or plot.height() <= 0 or high <= low:
+            return
+
+        def x_of(value):
+            return plot.left() + plot.width() * (value - low) / (high - low)
+
+        painter.setFont(tick_font)
+        for tick in ticks:
+            x = x_of(tick)
+            self._paint_grid_line(painter, QPointF(x, plot.top()), QPointF(x, plot.bottom()), spec)
+            painter.setPen(QColor(spec.style.foreground))
+            painter.drawText(QRectF(x - 30, plot.bottom() + 4, 60, metrics.height()),
+                             Qt.AlignmentFlag.AlignCenter, f"{tick:g}")
+
+        # Первое значение - сверху
+        slot = plot.height() / len(spec.values)
+        for i, (value, label) in enumerate(zip(spec.values, spec.labels)):
+            bar = QRectF(x_of(low), plot.top() + slot * (i + 0.15), x_of(value) - x_of(low), slot * 0.7)
+            painter.setPen(QPen(QColor('white'), 1))
+            painter.setBrush(_fill_color(spec.color(i)))
+            painter.drawRect(bar)
+
+            painter.setPen(QColor(spec.style.foreground))
+            painter.setFont(label_font)
+            painter.drawText(QRectF(area.left(), bar.top(), left - 8, bar.height()),
+                             Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, label)
+            painter.setFont(value_font)
+            painter.drawText(QRectF(bar.right() + 6, bar.top(), right + plot.right() - bar.right(), bar.height()),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                             spec.value_format.format(value))
+
+        painter.setPen(QPen(QColor(spec.style.grid), 1))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawRect(plot)
+        if spec.xlabel:
+            self._axis_label(painter, QRectF(plot.left(), area.bottom() - axis_font_height, plot.width(),
+                                             axis_font_height), spec.xlabel, spec)
+        if spec.legend:
+            self._paint_legend(painter, plot, spec.legend, spec.legend_title, spec, align_right=True)
+
+
+class ChartView(QLabel):
+    """График, отрисованный matplotlib в фоне под текущий размер виджета"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.spec: Optional[ChartSpec] = None
+        self.shown_key: Optional[str] = None
+        self.source: Optional[QPixmap] = None
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        # Размер задает компоновка, а не картинка (см. sizeHint)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setMinimumSize(200, 150)
+        self.setStyleSheet("background-color: #2b2b2b; border: 1px solid #555; border-radius: 5px;")
+
+        # Картинки для скрытой вкладки не нужны только до ее показа: запросы не отменяются
+        self.scope = data_access.scope(self, cancel_on_hide=False)
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(RESIZE_DELAY_MS)
+        self.resize_timer.timeout.connect(self.request_render)
+
+    def sizeHint(self) -> QSize:
+        return QSize(400, 300)
+
+    def minimumSizeHint(self) -> QSize:
+        return self.minimumSize()
+
+    def set_spec(self, spec: ChartSpec):
+        """Новые данные графика"""
+        self.spec = spec
+        self.request_render()
+
+    def sized_spec(self) -> Optional[ChartSpec]:
+        """Описание графика под текущий размер и плотность пикселей экрана"""
+        area = self.contentsRect()
+        if self.spec is None or area.width() <= 1 or area.height() <= 1:
+            return None
+        ratio = self.devicePixelRatioF()
+        return self.spec.with_size(area.width() * ratio, area.height() * ratio, dpi=round(100 * ratio))
+
+    def request_render(self):
+        spec = self.sized_spec()
+        if spec is None or spec.key == self.shown_key:
+            return
+        from src.charts.renderer import chart_renderer
+
+        png = chart_renderer.cached(spec)
+        if png is not None:
+            self.show_png(spec, png)
+            return
+        self.scope.call(chart_renderer.render, spec,
+                        on_result=lambda png: self.show_png(spec, png),
+                        on_error=lambda error: logger.error(f"Ошибка отрисовки графика: {error}"),
+                        key='render')
+
+    def show_png(self, spec: ChartSpec, png: bytes):
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(png, 'PNG'):
+            logger.error(f"Не удалось загрузить картинку графика '{spec.title}'")
+            return
+        pixmap.setDevicePixelRatio(spec.dpi / 100)
+        self.source = pixmap
+        self.shown_key = spec.key
+        self.setPixmap(pixmap)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.source is not None:
+            # До новой отрисовки показывается растянутая прежняя картинка
+            ratio = self.source.devicePixelRatio()
+            area = self.contentsRect()
+            scaled = self.source.scaled(int(area.width() * ratio), int(area.height() * ratio),
+                                        Qt.AspectRatioMode.IgnoreAspectRatio,
+                                        Qt.TransformationMode.FastTransformation)
+            scaled.setDevicePixelRatio(ratio)
+            self.setPixmap(scaled)
+        self.resize_timer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.request_render()
+
+
+# Подписи интервалов ряда (src/database/rollups.py)
+GRAIN_NAMES = {'hour': 'по часам', 'day': 'по дням', 'month': 'по месяцам'}
+
+# Задержка запроса подробного ряда после масштабирования или сдвига, мс
+DETAIL_DELAY_MS = 250
+
+# Самый короткий период, до которого можно приблизить график, секунд
+MIN_SPAN_SECONDS = 6 * 3600
+
+
+class TimeSeriesView(QWidget):
+    """
+    Линейный график ряда (время, значение), прореженного до ширины графика
+
+    Колесо мыши приближает и отдаляет, перетаскивание сдвигает период,
+    двойной щелчок возвращает весь ряд. Ряд весь период (обзор) и
+    подробный ряд приближенного периода хранятся отдельно: после
+    изменения периода виджет сообщает его сигналом range_requested, и
+    пока владелец загружает подробный ряд, рисуется обзорный.
+    """
+
+    range_requested = pyqtSignal(object, object)
+
+    PADDING = 10
+
+    def __init__(self, title: str = '', parent=None, method: str = LTTB, style: ChartStyle = DARK_STYLE):
+        super().__init__(parent)
+        self.title = title
+        self.method = method
+        self.style = style
+        self.empty_text = 'Нет данных'
+        self.overview: List[Tuple[float, float]] = []
+        self.overview_grain: Optional[str] = None
+        self.detail: List[Tuple[float, float]] = []
+        self.detail_grain: Optional[str] = None
+        self.detail_range: Optional[Tuple[float, float]] = None
+        self.extent: Optional[Tuple[float, float]] = None
+        self.view: Optional[Tuple[float, float]] = None
+        self._sampled_key = None
+        self._sampled: List[Tuple[float, float]] = []
+        self._drag = None
+
+        self.detail_timer = QTimer(self)
+        self.detail_timer.setSingleShot(True)
+        self.detail_timer.setInterval(DETAIL_DELAY_MS)
+        self.detail_timer.timeout.connect(self._request_detail)
+
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setMinimumSize(300, 200)
+        self.setToolTip("Колесо мыши - масштаб, перетаскивание - сдвиг, двойной щелчок - весь период")
+
+    def sizeHint(self) -> QSize:
+        return QSize(800, 300)
+
+    def set_series(self, points, grain: Optional[str], start: Optional[datetime], end: Optional[datetime],
+                   extent: Optional[Tuple[datetime, datetime]] = None):
+        """
+        Ряд [(время, значение)] периода [start, end) с интервалом grain
+
+        Ряд всего периода extent становится обзорным (период графика
+        сбрасывается, если вышел за extent), ряд части периода - подробным.
+        """
+        series = [(moment.timestamp(), float(value)) for moment, value in points]
+        previous = self.extent
+        if extent is not None and extent[0] is not None:
+            self.extent = (extent[0].timestamp(), extent[1].timestamp())
+        elif extent is not None:
+            self.extent = None
+
+        if self.extent is None or start is None:
+            self.overview, self.overview_grain = [], None
+            self.detail, self.detail_range = [], None
+            self.view = None
+        elif not self.overview or (start.timestamp(), end.timestamp()) == self.extent:
+            self.overview, self.overview_grain = series, grain
+            self.detail, self.detail_range = [], None
+            # Показывался весь период - показывается и дальше, с новыми данными
+            if (self.view is None or self.view == previous
+                    or self.view[0] < self.extent[0] or self.view[1] > self.extent[1]):
+                self.view = self.extent
+            elif self.view != self.extent:
+                # Подробный ряд приближенного периода тоже устарел
+                self.detail_timer.start()
+        else:
+            self.detail, self.detail_grain = series, grain
+            self.detail_range = (start.timestamp(), end.timestamp())
+        self._sampled_key = None
+        self.update()
+
+    def visible_range(self) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """Показываемый период"""
+        if self.view is None:
+            return None, None
+        # До целых секунд наружу: подробный ряд должен покрыть период целиком
+        return datetime.fromtimestamp(math.floor(self.view[0])), datetime.fromtimestamp(math.ceil(self.view[1]))
+
+    def plot_width(self) -> int:
+        return max(int(self._plot_rect().width()), 1)
+
+    def reset_view(self):
+        """Весь период"""
+        if self.extent is not None:
+            self._set_view(self.extent)
+
+    def _set_view(self, view: Tuple[float, float]):
+        start, end = view
+        low, high = self.extent
+        span = min(max(end - start, MIN_SPAN_SECONDS), high - low)
+        start = min(max(start, low), high - span)
+        view = (start, start + span)
+        if view != self.view:
+            self.view = view
+            self.update()
+            self.detail_timer.start()
+
+    def _request_detail(self):
+        if self.view is None:
+            return
+        if self.view == self.extent:
+            # Весь период нарисован обзорным рядом
+            self.detail, self.detail_range = [], None
+            self.update()
+            return
+        self.range_requested.emit(*self.visible_range())
+
+    def _series(self):
+        """Подробный ряд, если он покрывает показываемый период, иначе обзорный"""
+        if self.detail_range and self.detail_range[0] <= self.view[0] and self.view[1] <= self.detail_range[1]:
+            return self.detail, self.detail_grain
+        return self.overview, self.overview_grain
+
+    def _visible_points(self, width: int) -> List[Tuple[float, float]]:
+        series, _ = self._series()
+        key = (id(series), self.view, width, self.method)
+        if key != self._sampled_key:
+            # Видимые точки и по соседней с каждой стороны, чтобы линия доходила до краев
+            start = max(bisect.bisect_left(series, (self.view[0],)) - 1, 0)
+            end = bisect.bisect_right(series, (self.view[1], float('inf'))) + 1
+            self._sampled = downsample(series[start:end], width, self.method)
+            self._sampled_key = key
+        return self._sampled
+
+    def _plot_rect(self) -> QRectF:
+        metrics = QFontMetricsF(self._font(10))
+        top = self.PADDING + (QFontMetricsF(self._font(14, bold=True)).height() * 1.6 if self.title else 0)
+        left = self.PADDING + metrics.horizontalAdvance('00000') + 8
+        bottom = self.PADDING + metrics.height() * 2 + 6
+        # Справа - место под половину подписи последнего деления
+        right = self.PADDING + metrics.horizontalAdvance('00.0000') / 2
+        return QRectF(left, top, self.width() - left - right, self.height() - top - bottom)
+
+    def _font(self, points: float, bold: bool = False) -> QFont:
+        font = QFont(self.font())
+        font.setPointSizeF(points)
+        font.setBold(bold)
+        return font
+
+    def _time_format(self) -> str:
+        span = self.view[1] - self.view[0]
+        if span > 90 * 86400:
+            return '%m.%Y'
+        if span > 3 * 86400:
+            return '%d.%m'
+        return '%d.%m %H:%M'
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        try:
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            style = self.style
+            painter.setPen(QPen(QColor(BORDER_COLOR), 1))
+            painter.setBrush(QColor(style.background))
+            painter.drawRoundedRect(QRectF(self.rect()).adjusted(0.5, 0.5, -0.5, -0.5), 5, 5)
+
+            if self.title:
+                painter.setFont(self._font(14, bold=True))
+                painter.setPen(QColor(style.foreground))
+                painter.drawText(QRectF(0, self.PADDING, self.width(), QFontMetricsF(painter.font()).height()),
+                                 Qt.AlignmentFlag.AlignCenter, self.title)
+
+            plot = self._plot_rect()
+            if self.view is None or not self.overview or plot.width() <= 0 or plot.height() <= 0:
+                painter.setFont(self._font(12))
+                painter.setPen(QColor(style.foreground))
+                painter.drawText(QRectF(self.rect()), Qt.AlignmentFlag.AlignCenter, self.empty_text)
+                return
+            self._paint_series(painter, plot)
+        finally:
+            painter.end()
+
+    def _paint_series(self, painter: QPainter, plot: QRectF):
+        style = self.style
+        points = self._visible_points(int(plot.width()))
+        _, grain = self._series()
+        ticks = nice_ticks(max((value for _, value in points), default=0))
+        top_value = ticks[-1] or 1.0
+        start, end = self.view
+        tick_font = self._font(10)
+        metrics = QFontMetricsF(tick_font)
+
+        def x_of(moment):
+            return plot.left() + plot.width() * (moment - start) / (end - start)
+
+        def y_of(value):
+            return plot.bottom() - plot.height() * value / top_value
+
+        painter.setFont(tick_font)
+        for tick in ticks:
+            y = y_of(tick)
+            painter.setPen(QPen(_fill_color(style.grid, 0.3), 1))
+            painter.drawLine(QPointF(plot.left(), y), QPointF(plot.right(), y))
+            painter.setPen(QColor(style.foreground))
+            painter.drawText(QRectF(self.PADDING, y - metrics.height() / 2, plot.left() - self.PADDING - 6,
+                                    metrics.height()), Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+                             f"{tick:g}")
+
+        time_format = self._time_format()
+        label_width = metrics.horizontalAdvance(datetime(2000, 12, 28, 23, 59).strftime(time_format)) + 16
+        count = max(min(int(plot.width() // label_width), 8), 2)
+        for i in range(count + 1):
+            x = plot.left() + plot.width() * i / count
+            painter.setPen(QPen(_fill_color(style.grid, 0.3), 1))
+            painter.drawLine(QPointF(x, plot.top()), QPointF(x, plot.bottom()))
+            painter.setPen(QColor(style.foreground))
+            label = datetime.fromtimestamp(start + (end - start) * i / count).strftime(time_format)
+            painter.drawText(QRectF(x - label_width / 2, plot.bottom() + 4, label_width, metrics.height()),
+                             Qt.AlignmentFlag.AlignCenter, label)
+
+        painter.save()
+        painter.setClipRect(plot)
+        # Линия в один пиксель: толстое сглаженное перо и заливка под ломаной
+        # из тысяч точек рисуются в десятки раз дольше
+        painter.setPen(QPen(QColor(PALETTE[1]), 1))
+        painter.drawPolyline(QPolygonF([QPointF(x_of(moment), y_of(value)) for moment, value in points]))
+        painter.restore()
+
+        painter.setPen(QPen(QColor(style.grid), 1))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawRect(plot)
+        painter.setPen(QColor(style.foreground))
+        painter.drawText(QRectF(plot.left(), plot.bottom() + metrics.height() + 6, plot.width(), metrics.height()),
+                         Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+                         f"Интервал: {GRAIN_NAMES.get(grain, grain or '-')}, точек на графике: {len(points)}")
+
+    def wheelEvent(self, event):
+        if self.view is None:
+            return
+        plot = self._plot_rect()
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        start, end = self.view
+        # Масштаб относительно времени под курсором
+        ratio = min(max((event.position().x() - plot.left()) / plot.width(), 0.0), 1.0)
+        anchor = start + (end - start) * ratio
+        span = (end - start) * factor
+        self._set_view((anchor - span * ratio, anchor - span * ratio + span))
+        event.accept()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton and self.view is not None:
+            self._drag = (event.position().x(), self.view)
+            self.setCursor(Qt.CursorShape.ClosedHandCursor)
+
+    def mouseMoveEvent(self, event):
+        if self._drag is None:
+            return
+        origin, (start, end) = self._drag
+        shift = (origin - event.position().x()) * (end - start) / self._plot_rect().width()
+        self._set_view((start + shift, end + shift))
+
+    def mouseReleaseEvent(self, event):
+        self._drag = None
+        self.unsetCursor()
+
+    def mouseDoubleClickEvent(self, event):
+        self.reset_view()
@@ -0,0 +1,226 @@
+"""
+Диагностика: атрибуция запросов действиям интерфейса, сторож зависаний
+и панель статистики SQL
+"""
+
+import logging
+import os
+from datetime import datetime
+
+from PyQt6.QtWidgets import (
+    QApplication, QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
+    QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QTabWidget, QAbstractButton
+)
+from PyQt6.QtCore import Qt, QEvent, QTimer
+
+from src.utils.instrumentation import current_action, query_monitor
+from src.utils.watchdog import stall_watchdog
+
+logger = logging.getLogger(__name__)
+
+# События, которые начинают действие пользователя (или продолжают отложенное)
+_ACTION_EVENTS = frozenset({
+    QEvent.Type.MouseButtonRelease,
+    QEvent.Type.MouseButtonDblClick,
+    QEvent.Type.KeyPress,
+    QEvent.Type.Shortcut,
+    QEvent.Type.Timer,
+    QEvent.Type.MetaCall,
+})
+
+
+def describe_receiver(receiver) -> str:
+    """Имя действия: ближайший виджет приложения и элемент, получивший событие"""
+    owner = None
+    widget = receiver
+    while widget is not None:
+        if not type(widget).__module__.startswith('PyQt6'):
+            owner = type(widget).__name__
+            break
+        widget = widget.parent()
+
+    control = receiver.objectName() or type(receiver).__name__
+    # Текст берем только у кнопок: содержимое полей ввода не должно попадать в журналы
+    if isinstance(receiver, QAbstractButton) and receiver.text():
+        control = f"{control} '{receiver.text()}'"
+
+    return f"{owner}: {control}" if owner and owner != type(receiver).__name__ else control
+
+
+class ActionTrackingApplication(QApplication):
+    """
+    Приложение, связывающее запросы к БД с действием пользователя
+
+    На время обработки щелчка, нажатия клавиши или срабатывания таймера
+    устанавливается текущее действие, и все запросы, выполненные в обработчике,
+    учитываются монитором запросов под этим именем.
+    """
+
+    def notify(self, receiver, event):
+        if event.type() not in _ACTION_EVENTS or current_action.get() is not None:
+            return super().notify(receiver, event)
+
+        token = current_action.set(describe_receiver(receiver))
+        try:
+            return super().notify(receiver, event)
+        finally:
+            current_action.reset(token)
+
+
+def start_stall_watchdog(app):
+    """
+    Запуск сторожа зависаний: пульс главного потока от таймера цикла событий,
+    отчет сессии сохраняется в каталог журналов при выходе
+    """
+    if os.getenv('STALL_WATCHDOG', 'true').lower() != 'true':
+        return None
+
+    timer = QTimer(app)
+    timer.setTimerType(Qt.TimerType.PreciseTimer)
+    timer.timeout.connect(stall_watchdog.heartbeat)
+    timer.start(stall_watchdog.heartbeat_ms)
+    stall_watchdog.start()
+
+    def save_report():
+        stall_watchdog.stop()
+        try:
+            log_dir = os.getenv('LOG_DIR', 'logs')
+            stall_watchdog.save_report(
+                os.path.join(log_dir, f"stalls_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            )
+        except Exception as e:
+            logger.error(f"Ошибка сохранения отчета о зависаниях: {str(e)}")
+
+    app.aboutToQuit.connect(save_report)
+    app.stall_timer = timer
+    return stall_watchdog
+
+
+class SqlDiagnosticsDialog(QDialog):
+    """Панель диагностики: самые затратные запросы, медленные запросы и действия"""
+
+    SORT_OPTIONS = [
+        ("Суммарное время", 'total_ms'),
+        ("Число вызовов", 'count'),
+        ("p95", 'p95_ms'),
+        ("Максимум", 'max_ms'),
+    ]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Диагностика")
+        self.resize(1100, 600)
+        self.init_ui()
+        self.refresh()
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(2000)
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Сортировка:"))
+        self.sort_combo = QComboBox()
+        for label, key in self.SORT_OPTIONS:
+            self.sort_combo.addItem(label, key)
+        self.sort_combo.currentIndexChanged.connect(self.refresh)
+        controls.addWidget(self.sort_combo)
+        controls.addStretch()
+
+        self.threshold_label = QLabel()
+        controls.addWidget(self.threshold_label)
+
+        reset_btn = QPushButton("Сбросить статистику")
+        reset_btn.clicked.connect(self.reset_stats)
+        controls.addWidget(reset_btn)
+        layout.addLayout(controls)
+
+        tabs = QTabWidget()
+
+        self.top_table = self._create_table(
+            ["Запрос", "Вызовов", "Ошибок", "Среднее, мс", "p95, мс", "Макс., мс", "Всего, мс", "Строк", "Основное действие"]
+        )
+        tabs.addTab(self.top_table, "Топ запросов")
+
+        self.slow_table = self._create_table(["Время", "Длительность, мс", "Действие", "Строк", "Запрос"])
+        tabs.addTab(self.slow_table, "Медленные запросы")
+
+        self.actions_table = self._create_table(["Действие", "Запросов", "Всего, мс"])
+        tabs.addTab(self.actions_table, "По действиям")
+
+        self.stalls_table = self._create_table(
+            ["Место блокировки", "Зависаний", "Всего, мс", "Макс., мс", "Выборок", "Стек"]
+        )
+        tabs.addTab(self.stalls_table, "Зависания интерфейса")
+
+        layout.addWidget(tabs)
+
+        self.latency_label = QLabel()
+        layout.addWidget(self.latency_label)
+
+    def _create_table(self, headers):
+        table = QTableWidget()
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def refresh(self):
+        """Обновление таблиц из монитора запросов"""
+        try:
+            self.threshold_label.setText(f"Порог медленного запроса: {query_monitor.slow_query_ms:.0f} мс")
+
+            rows = query_monitor.top(limit=100, order_by=self.sort_combo.currentData())
+            self.top_table.setRowCount(len(rows))
+            for row, stats in enumerate(rows):
+                values = [
+                    stats['shape'], stats['count'], stats['errors'], f"{stats['avg_ms']:.2f}",
+                    f"{stats['p95_ms']:.1f}", f"{stats['max_ms']:.1f}", f"{stats['total_ms']:.0f}",
+                    stats['rows'], stats['top_action'],
+                ]
+                for column, value in enumerate(values):
+                    self.top_table.setItem(row, column, QTableWidgetItem(str(value)))
+
+            slow = query_monitor.slow_queries()
+            self.slow_table.setRowCount(len(slow))
+            for row, entry in enumerate(slow):
+                values = [
+                    datetime.fromtimestamp(entry['time']).strftime('%H:%M:%S'),
+                    f"{entry['duration_ms']:.1f}", entry['action'],
+                    entry['rows'] if entry['rows'] is not None else '', entry['shape'],
+                ]
+                for column, value in enumerate(values):
+                    self.slow_table.setItem(row, column, QTableWidgetItem(str(value)))
+
+            actions = sorted(query_monitor.by_action().items(), key=lambda item: item[1]['total_ms'], reverse=True)
+            self.actions_table.setRowCount(len(actions))
+            for row, (action, stats) in enumerate(actions):
+                self.actions_table.setItem(row, 0, QTableWidgetItem(action))
+                self.actions_table.setItem(row, 1, QTableWidgetItem(str(stats['count'])))
+                self.actions_table.setItem(row, 2, QTableWidgetItem(f"{stats['total_ms']:.0f}"))
+
+            stalls = stall_watchdog.top(limit=100)
+            self.stalls_table.setRowCount(len(stalls))
+            for row, stats in enumerate(stalls):
+                values = [
+                    stats['location'], stats['stalls'], f"{stats['blocked_ms']:.0f}",
+                    f"{stats['max_stall_ms']:.0f}", stats['samples'], stats['stack'],
+                ]
+                for column, value in enumerate(values):
+                    self.stalls_table.setItem(row, column, QTableWidgetItem(str(value)))
+
+            latency = stall_watchdog.latency_summary()
+            self.latency_label.setText(
+                f"Задержка цикла событий: p50 {latency['p50_ms']:.1f} мс, p95 {latency['p95_ms']:.1f} мс, "
+                f"p99 {latency['p99_ms']:.1f} мс, макс. {latency['max_ms']:.0f} мс"
+            )
+        except Exception as e:
+            logger.error(f"Ошибка обновления диагностики: {str(e)}")
+
+    def reset_stats(self):
+        query_monitor.reset()
+        self.refresh()
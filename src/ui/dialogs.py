@@ -13,9 +13,9 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QDate
 from PyQt6.QtGui import QFont
 
-from ..models import Customers, Restaurants, Dishes, Couriers, Orders, Statuses
-from ..database_manager import DatabaseManager
-from ..utils.async_helper import async_helper
+from ..models import DISH_CATEGORIES
+from ..sync_database import SyncDatabaseManager
+from ..utils.data_access import data_access
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +27,7 @@ class EditForm(QDialog):
         super().__init__(parent)
         self.model_class = model_class
         self.record = record
+        self.data = data_access.scope(self)
         self.setWindowTitle(f"Редактирование {model_class.__name__}")
         self.setModal(True)
         self.resize(500, 400)
@@ -61,6 +62,11 @@ class EditForm(QDialog):
             button_box.rejected.connect(self.reject)
             layout.addWidget(button_box)
             
+            # Пока загружаются справочники, сохранить форму нельзя
+            ok_button = button_box.button(QDialogButtonBox.StandardButton.Ok)
+            ok_button.setEnabled(not self.data.is_loading)
+            self.data.loading_changed.connect(lambda loading: ok_button.setEnabled(not loading))
+            
         except Exception as e:
             logger.error(f"Ошибка инициализации формы редактирования: {str(e)}")
             QMessageBox.critical(self, "Ошибка", "Не удалось загрузить форму редактирования")
@@ -110,23 +116,20 @@ class EditForm(QDialog):
         self.fields['cooking_time'].setRange(1, 300)  # от 1 до 300 минут
         self.fields['cooking_time'].setSuffix(" минут")
         
+        # Категория: из списка или своя
+        self.fields['category'] = QComboBox()
+        self.fields['category'].setEditable(True)
+        self.fields['category'].addItems(('',) + DISH_CATEGORIES)
+        
         self.fields['restaurant_id'] = QComboBox()
         
         # Загрузка ресторанов в комбобокс
-        def load_restaurants():
-            try:
-                restaurants = async_helper.run_async(DatabaseManager.get_all(Restaurants))
-                self.fields['restaurant_id'].clear()
-                for restaurant in restaurants:
-                    self.fields['restaurant_id'].addItem(f"{restaurant.name}", restaurant.restaurant_id)
-            except Exception as e:
-                logger.error(f"Ошибка загрузки ресторанов: {str(e)}")
-        
-        load_restaurants()
+        self.load_choices('restaurant_id', 'Restaurants', lambda restaurant: restaurant['name'])
         
         if self.record:
             self.fields['name'].setText(self.record.name)
             self.fields['description'].setText(self.record.description or "")
+            self.fields['category'].setCurrentText(getattr(self.record, 'category', None) or "")
             
             # Исправление: преобразование cooking_time в число
             try:
@@ -141,14 +144,11 @@ class EditForm(QDialog):
                     self.fields['cooking_time'].setValue(int(cooking_time))
             except (ValueError, AttributeError):
                 self.fields['cooking_time'].setValue(30)  # значение по умолчанию
-                
-            index = self.fields['restaurant_id'].findData(self.record.restaurant_id)
-            if index >= 0:
-                self.fields['restaurant_id'].setCurrentIndex(index)
         
         form_layout.addRow("Название:", self.fields['name'])
         form_layout.addRow("Описание:", self.fields['description'])
         form_layout.addRow("Время готовки (мин):", self.fields['cooking_time'])
+        form_layout.addRow("Категория:", self.fields['category'])
         form_layout.addRow("Ресторан:", self.fields['restaurant_id'])
 
     def setup_courier_fields(self, form_layout):
@@ -177,36 +177,12 @@ class EditForm(QDialog):
         self.fields['order_time'].setCalendarPopup(True)
         self.fields['order_time'].setDate(QDate.currentDate())
         
-        # Загрузка клиентов
-        def load_customers():
-            try:
-                customers = async_helper.run_async(DatabaseManager.get_all(Customers))
-                self.fields['customer_id'].clear()
-                for customer in customers:
-                    self.fields['customer_id'].addItem(f"{customer.first_name} {customer.last_name}", customer.customer_id)
-            except Exception as e:
-                logger.error(f"Ошибка загрузки клиентов: {str(e)}")
-        
-        # Загрузка статусов
-        def load_statuses():
-            try:
-                statuses = async_helper.run_async(DatabaseManager.get_all(Statuses))
-                self.fields['status_id'].clear()
-                for status in statuses:
-                    self.fields['status_id'].addItem(status.status_name, status.status_id)
-            except Exception as e:
-                logger.error(f"Ошибка загрузки статусов: {str(e)}")
-        
-        load_customers()
-        load_statuses()
+        # Загрузка клиентов и статусов
+        self.load_choices('customer_id', 'Customers',
+                          lambda customer: f"{customer['first_name']} {customer['last_name']}")
+        self.load_choices('status_id', 'Statuses', lambda status: status['status_name'])
         
         if self.record:
-            index = self.fields['customer_id'].findData(self.record.customer_id)
-            if index >= 0: 
-                self.fields['customer_id'].setCurrentIndex(index)
-            index = self.fields['status_id'].findData(self.record.status_id)
-            if index >= 0: 
-                self.fields['status_id'].setCurrentIndex(index)
             if self.record.order_time:
                 try:
                     order_date = QDate.fromString(str(self.record.order_time)[:10], "yyyy-MM-dd")
@@ -220,6 +196,27 @@ class EditForm(QDialog):
         form_layout.addRow("Статус:", self.fields['status_id'])
         form_layout.addRow("Дата заказа:", self.fields['order_time'])
 
+    def load_choices(self, field_name, table_name, label):
+        """
+        Фоновая загрузка справочника в комбобокс; значение редактируемой
+        записи выбирается после загрузки
+        """
+        def fill(rows):
+            combo = self.fields[field_name]
+            combo.clear()
+            for row in rows:
+                combo.addItem(label(row), row[field_name])
+            if self.record:
+                index = combo.findData(getattr(self.record, field_name))
+                if index >= 0:
+                    combo.setCurrentIndex(index)
+        
+        def failed(error):
+            logger.error(f"Ошибка загрузки справочника {table_name}: {error}")
+            QMessageBox.warning(self, "Ошибка", "Не удалось загрузить данные для формы")
+        
+        self.data.call(SyncDatabaseManager.get_all, table_name, key=field_name, on_result=fill, on_error=failed)
+
     def get_data(self):
         """Получение данных из формы"""
         data = {}
@@ -247,6 +244,7 @@ class EditForm(QDialog):
             if not all([data['name'], data['cooking_time'], data['restaurant_id']]):
                 raise ValueError("Все обязательные поля должны быть заполнены")
             data['description'] = self.fields['description'].toPlainText().strip() or None
+            data['category'] = self.fields['category'].currentText().strip() or None
         elif model_name == "Couriers":
             data['phone_number'] = self.fields['phone_number'].text().strip()
             data['first_name'] = self.fields['first_name'].text().strip()
@@ -3,11 +3,13 @@
 """
 import sys
 import os
+import csv
 import logging
 from PyQt6.QtWidgets import QMessageBox
 from PyQt6.QtCore import pyqtSlot
 import logging
 from datetime import datetime
+from functools import partial
 
 # Добавляем путь к src для абсолютных импортов
 src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -17,38 +19,80 @@ if src_dir not in sys.path:
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QComboBox, QPushButton, QTableWidget,
-    QHeaderView, QFrame, QMessageBox,
-    QMenuBar, QMenu, QTabWidget, QGroupBox, QSplitter
+    QHeaderView, QFrame, QMessageBox, QTableWidgetItem,
+    QMenuBar, QMenu, QTabWidget, QGroupBox, QSplitter,
+    QFileDialog, QProgressDialog
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont, QAction, QPalette, QColor
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
+from src.database.analytics_cube import (
+    ALL_TIME, BY_CATEGORY, BY_RESTAURANT, BY_STATUS, CUSTOMERS, DELIVERY, DIMENSION_TABLES, FACT_TABLES,
+    LAST_MONTH, LAST_WEEK, ORDERS
+)
+from src.charts.dashboard import orders_by_status_chart, popular_dishes_chart, restaurant_ratings_chart
 from src.database_manager import DatabaseManager
+from src.database.events import OrdersCreated, OrderStatusChanged
+from src.database.order_lifecycle import ACCEPTED, status_name
 from src.utils.async_helper import async_helper
+from src.utils.data_access import data_access, data_events
 from src.models import Restaurants
+from src.sync_database import SyncDatabaseManager
 from reports.excel_report import ExcelReportGenerator
+from .charts import TimeSeriesView, create_chart_view
 from .widgets import DataViewWidget, OrderCreationTab, CustomerOrdersTab
 
 logger = logging.getLogger(__name__)
 
+# Таблицы, от которых зависят графики дашборда
+ORDERS_CHART_TABLES = ('Orders', 'Statuses')
+DISHES_CHART_TABLES = ('OrderItems', 'Dishes', 'Restaurants')
+RATINGS_CHART_TABLES = ('Restaurants',)
+ORDERS_SERIES_TABLES = ('Orders', 'OrderItems')
+ANALYTICS_TABLES = FACT_TABLES + DIMENSION_TABLES
+
+# Точек ряда заказов на пиксель графика: остальное прореживается при отрисовке
+SERIES_POINTS_PER_PIXEL = 4
+
 
 class MainWindow(QMainWindow):
     """Главное окно приложения"""
     
+    # Ход импорта (сущность, обработано, всего): испускается в потоке импорта
+    import_progress = pyqtSignal(str, int, int)
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Система управления доставкой еды")
         self.setGeometry(100, 100, 1400, 900)
         self.current_data_view = None  # Добавляем атрибут для хранения текущего виджета данных
         self.data_management_layout = None  # Добавляем атрибут для layout
+        self.orders_stats = None  # Последняя статистика заказов (меняется событиями)
+        self.import_dialog = None  # Диалог хода выполняющегося импорта
         self.init_ui()
         
-        # Таймер для обновления данных
+        # Импорт выполняется в фоновом потоке, ход доставляется в главный поток очередью
+        self.import_scope = data_access.scope(self, cancel_on_hide=False)
+        self.import_progress.connect(self.on_import_progress, Qt.ConnectionType.QueuedConnection)
+        
+        # Графики обновляются событиями изменения данных (с задержкой, чтобы
+        # серия записей перерисовала график один раз)
+        self.chart_timers = {}
+        for name, update in (('orders', self.redraw_orders_chart), ('orders_stats', self.update_orders_chart),
+                             ('dishes', self.update_dishes_chart), ('ratings', self.update_restaurants_ratings_chart),
+                             ('series', self.update_orders_series), ('analytics', self.apply_analysis_filters)):
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.setInterval(500)
+            timer.timeout.connect(update)
+            self.chart_timers[name] = timer
+        data_events.subscribe(self, self.on_data_changed)
+        
+        # Таймер для обновления данных, измененных другими экземплярами приложения
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_dashboard)
-        self.timer.start(30000)  # Обновление каждые 30 секунд
+        self.timer.start(300000)  # Обновление каждые 5 минут
+        QTimer.singleShot(0, self.update_dashboard)
 
     def init_ui(self):
         """Инициализация пользовательского интерфейса"""
@@ -155,6 +199,14 @@ class MainWindow(QMainWindow):
         refresh_action.setShortcut("F5")
         refresh_action.triggered.connect(self.refresh_all_data)
         data_menu.addAction(refresh_action)
+        
+        self.import_action = QAction("Импорт данных...", self)
+        self.import_action.triggered.connect(self.import_data)
+        data_menu.addAction(self.import_action)
+        
+        diagnostics_action = QAction("Диагностика", self)
+        diagnostics_action.triggered.connect(self.show_sql_diagnostics)
+        data_menu.addAction(diagnostics_action)
 
         # Меню Отчеты
         reports_menu = menubar.addMenu("Отчеты")
@@ -260,29 +312,20 @@ class MainWindow(QMainWindow):
         
         # График распределения заказов
         orders_chart_widget = self.create_chart_widget("📊 Распределение заказов по статусам")
-        self.orders_fig, self.orders_ax = plt.subplots(figsize=(8, 6))
-        self.setup_chart_style(self.orders_fig, self.orders_ax)
-        self.orders_canvas = FigureCanvas(self.orders_fig)
-        self.setup_canvas_style(self.orders_canvas)
-        orders_chart_widget.layout().addWidget(self.orders_canvas)
+        self.orders_chart = create_chart_view()
+        orders_chart_widget.layout().addWidget(self.orders_chart)
         first_row_splitter.addWidget(orders_chart_widget)
         
         # График популярных блюд
         dishes_chart_widget = self.create_chart_widget("🍽️ Популярные блюда")
-        self.dishes_fig, self.dishes_ax = plt.subplots(figsize=(8, 6))
-        self.setup_chart_style(self.dishes_fig, self.dishes_ax)
-        self.dishes_canvas = FigureCanvas(self.dishes_fig)
-        self.setup_canvas_style(self.dishes_canvas)
-        dishes_chart_widget.layout().addWidget(self.dishes_canvas)
+        self.dishes_chart = create_chart_view()
+        dishes_chart_widget.layout().addWidget(self.dishes_chart)
         first_row_splitter.addWidget(dishes_chart_widget)
         
         # Вторая строка графиков - рейтинги ресторанов
         ratings_chart_widget = self.create_chart_widget("⭐ Рейтинги ресторанов")
-        self.ratings_fig, self.ratings_ax = plt.subplots(figsize=(16, 6))
-        self.setup_chart_style(self.ratings_fig, self.ratings_ax)
-        self.ratings_canvas = FigureCanvas(self.ratings_fig)
-        self.setup_canvas_style(self.ratings_canvas)
-        ratings_chart_widget.layout().addWidget(self.ratings_canvas)
+        self.ratings_chart = create_chart_view()
+        ratings_chart_widget.layout().addWidget(self.ratings_chart)
         
         # Добавляем строки в основной splitter
         charts_splitter.addWidget(first_row_splitter)
@@ -306,15 +349,6 @@ class MainWindow(QMainWindow):
         layout.addWidget(title_label)
         return widget
     
-    def setup_chart_style(self, fig, ax):
-        """Настройка стиля графика"""
-        fig.patch.set_facecolor('#2b2b2b')
-        ax.set_facecolor('#2b2b2b')
-    
-    def setup_canvas_style(self, canvas):
-        """Настройка стиля canvas"""
-        canvas.setStyleSheet("background-color: #2b2b2b; border: 1px solid #555; border-radius: 5px;")
-    
     def create_order_creation_tab(self):
         """Создание вкладки оформления заказа"""
         order_tab = OrderCreationTab()
@@ -397,14 +431,29 @@ class MainWindow(QMainWindow):
         
         filters_layout.addWidget(QLabel("Период:"))
         self.period_combo = QComboBox()
-        self.period_combo.addItems(["За все время", "За последний месяц", "За последнюю неделю"])
+        for text, period in (("За все время", ALL_TIME), ("За последний месяц", LAST_MONTH),
+                             ("За последнюю неделю", LAST_WEEK)):
+            self.period_combo.addItem(text, period)
         filters_layout.addWidget(self.period_combo)
         
         filters_layout.addWidget(QLabel("Тип анализа:"))
         self.analysis_type_combo = QComboBox()
-        self.analysis_type_combo.addItems(["Статистика заказов", "Активность клиентов", "Эффективность доставки"])
+        for text, analysis in (("Статистика заказов", ORDERS), ("Активность клиентов", CUSTOMERS),
+                               ("Эффективность доставки", DELIVERY)):
+            self.analysis_type_combo.addItem(text, analysis)
         filters_layout.addWidget(self.analysis_type_combo)
         
+        filters_layout.addWidget(QLabel("Разрез:"))
+        self.analysis_group_combo = QComboBox()
+        for text, by in (("По ресторанам", BY_RESTAURANT), ("По категориям блюд", BY_CATEGORY),
+                         ("По статусам", BY_STATUS)):
+            self.analysis_group_combo.addItem(text, by)
+        filters_layout.addWidget(self.analysis_group_combo)
+        
+        # Срезы считаются из куба в памяти, поэтому применяются сразу при выборе
+        for combo in (self.period_combo, self.analysis_type_combo, self.analysis_group_combo):
+            combo.currentIndexChanged.connect(self.apply_analysis_filters)
+        
         apply_btn = QPushButton("Применить")
         apply_btn.clicked.connect(self.apply_analysis_filters)
         filters_layout.addWidget(apply_btn)
@@ -416,17 +465,32 @@ class MainWindow(QMainWindow):
         filters_layout.addStretch()
         layout.addWidget(filters_group)
         
+        analytics_splitter = QSplitter(Qt.Orientation.Vertical)
+        
+        # Ряд заказов по времени: весь период из сводок, при приближении - подробнее
+        self.orders_series_chart = TimeSeriesView("Заказы по времени")
+        self.orders_series_chart.empty_text = "Нет данных о заказах"
+        self.orders_series_chart.range_requested.connect(self.load_orders_series_detail)
+        self.series_scope = data_access.scope(self.orders_series_chart, cancel_on_hide=False)
+        analytics_splitter.addWidget(self.orders_series_chart)
+        
         # Таблица с детальной аналитикой
         self.analytics_table = QTableWidget()
         self.analytics_table.setAlternatingRowColors(True)
-        layout.addWidget(self.analytics_table)
+        self.analytics_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.analytics_table.verticalHeader().setVisible(False)
+        self.analytics_scope = data_access.scope(self.analytics_table, cancel_on_hide=False)
+        self.analysis_result = None
+        analytics_splitter.addWidget(self.analytics_table)
+        layout.addWidget(analytics_splitter)
         
         self.tab_widget.addTab(analytics_widget, "📈 Аналитика")
     
     def update_orders_chart(self):
         """Обновление графика заказов"""
         try:
-            self.orders_ax.clear()
+            # Пока загружается статистика, события запрашивают ее повторно
+            self.orders_stats = None
             
             # Получаем статистику заказов асинхронно
             async_helper.run_async(
@@ -438,60 +502,58 @@ class MainWindow(QMainWindow):
         except Exception as e:
             logger.error(f"Ошибка обновления графика заказов: {str(e)}")
     
+    def on_data_changed(self, event):
+        """
+        Событие изменения данных: созданные заказы и смена статусов меняют
+        счетчики статусов без запроса, остальные изменения перезагружают
+        зависящие от таблиц графики
+        """
+        if isinstance(event, OrdersCreated) and self.orders_stats is not None:
+            self.move_status_counts(None, ACCEPTED, len(event.order_ids))
+        elif isinstance(event, OrderStatusChanged) and self.orders_stats is not None:
+            self.move_status_counts(event.from_status, event.to_status, len(event.order_ids))
+        elif event.touches(*ORDERS_CHART_TABLES):
+            self.chart_timers['orders_stats'].start()
+        
+        if event.touches(*DISHES_CHART_TABLES):
+            self.chart_timers['dishes'].start()
+        if event.touches(*RATINGS_CHART_TABLES):
+            self.chart_timers['ratings'].start()
+        if event.touches(*ORDERS_SERIES_TABLES):
+            self.chart_timers['series'].start()
+        if event.touches(*ANALYTICS_TABLES):
+            self.chart_timers['analytics'].start()
+    
+    def move_status_counts(self, from_status, to_status, count):
+        """Перенос count заказов между статусами (from_status=None - новые заказы)"""
+        status_counts = self.orders_stats['status_counts']
+        if from_status is not None:
+            name = status_name(from_status)
+            status_counts[name] = status_counts.get(name, 0) - count
+            if status_counts[name] <= 0:
+                del status_counts[name]
+        else:
+            self.orders_stats['total_orders'] += count
+        name = status_name(to_status)
+        status_counts[name] = status_counts.get(name, 0) + count
+        self.chart_timers['orders'].start()
+    
+    def redraw_orders_chart(self):
+        """Перерисовка графика заказов по текущим счетчикам"""
+        if self.orders_stats is not None:
+            self.on_orders_statistics_loaded(self.orders_stats)
+    
     def on_orders_statistics_loaded(self, stats):
         """Обработчик загрузки статистики заказов"""
         try:
-            self.orders_ax.clear()
-            
-            status_counts = stats.get('status_counts', {})
-            if status_counts:
-                labels = list(status_counts.keys())
-                sizes = list(status_counts.values())
-                
-                colors = ['#4CAF50', '#2196F3', '#FF9800', '#F44336', '#9C27B0', '#00BCD4', '#E91E63']
-                
-                wedges, texts, autotexts = self.orders_ax.pie(
-                    sizes, 
-                    labels=labels, 
-                    colors=colors[:len(labels)], 
-                    autopct='%1.1f%%', 
-                    startangle=90,
-                    textprops={'color': 'white', 'fontsize': 10}
-                )
-                
-                for autotext in autotexts:
-                    autotext.set_color('white')
-                    autotext.set_fontweight('bold')
-                
-                for text in texts:
-                    text.set_color('white')
-                    text.set_fontsize(11)
-                
-                self.orders_ax.axis('equal')
-                self.orders_ax.set_title('Распределение заказов по статусам', 
-                                       color='white', fontsize=14, fontweight='bold', pad=20)
-                
-                legend = self.orders_ax.legend(wedges, labels, title="Статусы", loc="center left", 
-                                            bbox_to_anchor=(1, 0, 0.5, 1), fontsize=10)
-                legend.get_title().set_color('white')
-                legend.get_title().set_fontweight('bold')
-                for text in legend.get_texts():
-                    text.set_color('white')
-            else:
-                self.orders_ax.text(0.5, 0.5, 'Нет данных о заказах', 
-                                  ha='center', va='center', color='white', fontsize=12,
-                                  transform=self.orders_ax.transAxes)
-            
-            self.orders_canvas.draw()
-            
+            self.orders_stats = stats
+            self.orders_chart.set_spec(orders_by_status_chart(stats.get('status_counts', {})))
         except Exception as e:
             logger.error(f"Ошибка построения графика заказов: {str(e)}")
         
     def update_dishes_chart(self):
         """Обновление графика популярных блюд"""
         try:
-            self.dishes_ax.clear()
-            
             # Получаем популярные блюда асинхронно
             async_helper.run_async(
                 DatabaseManager.get_popular_dishes,
@@ -505,60 +567,18 @@ class MainWindow(QMainWindow):
     def on_popular_dishes_loaded(self, popular_dishes):
         """Обработчик загрузки популярных блюд"""
         try:
-            self.dishes_ax.clear()
-            
-            if popular_dishes and len(popular_dishes) > 0:
-                dish_names = []
-                order_counts = []
-                for item in popular_dishes:
-                    name = item['dish'].name
-                    if len(name) > 20:
-                        name = name[:20] + '...'
-                    dish_names.append(name)
-                    order_counts.append(item.get('order_count', 0))
-                
-                if any(count > 0 for count in order_counts):
-                    colors = ['#4CAF50', '#2196F3', '#FF9800', '#F44336', '#9C27B0']
-                    
-                    bars = self.dishes_ax.bar(dish_names, order_counts, color=colors, alpha=0.8, edgecolor='white', linewidth=1)
-                    
-                    self.dishes_ax.set_ylabel('Количество заказов', color='white', fontsize=12, fontweight='bold')
-                    self.dishes_ax.set_xlabel('Блюда', color='white', fontsize=12, fontweight='bold')
-                    self.dishes_ax.tick_params(axis='x', rotation=45, colors='white', labelsize=10)
-                    self.dishes_ax.tick_params(axis='y', colors='white', labelsize=10)
-                    
-                    for bar, count in zip(bars, order_counts):
-                        height = bar.get_height()
-                        self.dishes_ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                                          f'{count}', ha='center', va='bottom', 
-                                          color='white', fontweight='bold', fontsize=11)
-                    
-                    self.dishes_ax.set_title('Топ-5 популярных блюд', color='white', fontsize=14, fontweight='bold', pad=20)
-                    self.dishes_ax.grid(True, alpha=0.3, color='gray')
-                    self.dishes_ax.set_facecolor('#2b2b2b')
-                else:
-                    self.dishes_ax.text(0.5, 0.5, 'Нет данных о заказах блюд', 
-                                      ha='center', va='center', color='white', fontsize=12,
-                                      transform=self.dishes_ax.transAxes)
-            else:
-                self.dishes_ax.text(0.5, 0.5, 'Нет данных о популярных блюдах', 
-                                  ha='center', va='center', color='white', fontsize=12,
-                                  transform=self.dishes_ax.transAxes)
-            
-            self.dishes_canvas.draw()
-            
+            self.dishes_chart.set_spec(popular_dishes_chart(
+                (item['dish'].name, item.get('order_count', 0)) for item in popular_dishes or []
+            ))
         except Exception as e:
             logger.error(f"Ошибка построения графика блюд: {str(e)}")
 
     def update_restaurants_ratings_chart(self):
         """Обновление графика рейтингов ресторанов"""
         try:
-            self.ratings_ax.clear()
-            
-            # Получаем рестораны асинхронно
+            # Получаем рестораны асинхронно (только поля, нужные графику)
             async_helper.run_async(
-                DatabaseManager.get_all,
-                Restaurants,
+                partial(DatabaseManager.get_all, Restaurants, fields=('name', 'rating')),
                 on_complete=self.on_restaurants_loaded,
                 on_error=lambda e: logger.error(f"Ошибка получения ресторанов: {e}")
             )
@@ -569,76 +589,37 @@ class MainWindow(QMainWindow):
     def on_restaurants_loaded(self, restaurants):
         """Обработчик загрузки ресторанов"""
         try:
-            self.ratings_ax.clear()
-            
-            # Фильтруем рестораны с рейтингами и сортируем
-            rated_restaurants = [r for r in restaurants if r.rating is not None]
-            rated_restaurants.sort(key=lambda x: x.rating, reverse=True)
-            top_restaurants = rated_restaurants[:5]  # Берем топ-5
-            
-            if top_restaurants:
-                names = []
-                ratings = []
-                for restaurant in top_restaurants:
-                    name = restaurant.name
-                    if len(name) > 25:
-                        name = name[:25] + '...'
-                    names.append(name)
-                    ratings.append(float(restaurant.rating))
-                
-                colors = []
-                for rating in ratings:
-                    if rating >= 4.5:
-                        colors.append('#4CAF50')
-                    elif rating >= 4.0:
-                        colors.append('#2196F3')
-                    elif rating >= 3.5:
-                        colors.append('#FF9800')
-                    else:
-                        colors.append('#F44336')
-                
-                y_pos = range(len(names))
-                bars = self.ratings_ax.barh(y_pos, ratings, color=colors, alpha=0.8, 
-                                          edgecolor='white', linewidth=1, height=0.7)
-                
-                self.ratings_ax.set_yticks(y_pos)
-                self.ratings_ax.set_yticklabels(names, color='white', fontsize=11)
-                self.ratings_ax.set_xlabel('Рейтинг', color='white', fontsize=12, fontweight='bold')
-                self.ratings_ax.set_xlim(0, 5)
-                self.ratings_ax.tick_params(axis='x', colors='white', labelsize=10)
-                
-                for i, (bar, rating) in enumerate(zip(bars, ratings)):
-                    width = bar.get_width()
-                    self.ratings_ax.text(width + 0.1, bar.get_y() + bar.get_height()/2.,
-                                       f'{rating:.2f}', ha='left', va='center', 
-                                       color='white', fontweight='bold', fontsize=11)
-                
-                self.ratings_ax.set_title('Рейтинги ресторанов', color='white', 
-                                        fontsize=14, fontweight='bold', pad=20)
-                self.ratings_ax.grid(True, alpha=0.3, color='gray', axis='x')
-                
-                from matplotlib.patches import Patch
-                legend_elements = [
-                    Patch(facecolor='#4CAF50', alpha=0.8, label='Отлично (4.5+)'),
-                    Patch(facecolor='#2196F3', alpha=0.8, label='Хорошо (4.0-4.5)'),
-                    Patch(facecolor='#FF9800', alpha=0.8, label='Удовлетворительно (3.5-4.0)'),
-                    Patch(facecolor='#F44336', alpha=0.8, label='Плохо (<3.5)')
-                ]
-                self.ratings_ax.legend(handles=legend_elements, loc='lower right',
-                                     fontsize=10, framealpha=0.9,
-                                     labelcolor='white')
-                
-            else:
-                self.ratings_ax.text(0.5, 0.5, 'Нет данных о рейтингах ресторанов', 
-                                   ha='center', va='center', color='white', fontsize=12,
-                                   transform=self.ratings_ax.transAxes)
-            
-            self.ratings_canvas.draw()
-            self.ratings_fig.tight_layout()
-            
+            self.ratings_chart.set_spec(restaurant_ratings_chart(
+                (restaurant.name, restaurant.rating) for restaurant in restaurants
+            ))
         except Exception as e:
             logger.error(f"Ошибка построения графика рейтингов ресторанов: {str(e)}")
     
+    def series_points(self):
+        """Сколько точек ряда заказов запрашивать под текущую ширину графика"""
+        return max(self.orders_series_chart.plot_width(), 800) * SERIES_POINTS_PER_PIXEL
+
+    def update_orders_series(self):
+        """Обновление ряда заказов за весь период (со сводками)"""
+        self.series_scope.call(
+            SyncDatabaseManager.get_order_timeseries, max_points=self.series_points(),
+            key='overview', on_result=self.on_orders_series_loaded,
+            on_error=lambda e: logger.error(f"Ошибка получения ряда заказов: {e}")
+        )
+
+    def load_orders_series_detail(self, start, end):
+        """Подробный ряд заказов приближенного периода"""
+        self.series_scope.call(
+            SyncDatabaseManager.get_order_timeseries, start, end, max_points=self.series_points(), refresh=False,
+            key='detail', on_result=self.on_orders_series_loaded,
+            on_error=lambda e: logger.error(f"Ошибка получения ряда заказов: {e}")
+        )
+
+    def on_orders_series_loaded(self, result):
+        """Обработчик загрузки ряда заказов"""
+        self.orders_series_chart.set_series(result['points'], result['grain'], result['start'], result['end'],
+                                            result['extent'])
+
     def update_dashboard(self):
         """Обновление данных на дашборде"""
         try:
@@ -646,6 +627,8 @@ class MainWindow(QMainWindow):
             self.update_orders_chart()
             self.update_dishes_chart()
             self.update_restaurants_ratings_chart()
+            self.update_orders_series()
+            self.apply_analysis_filters(refresh=True)
             self.statusBar().showMessage(f"Данные обновлены: {datetime.now().strftime('%H:%M:%S')}")
         except Exception as e:
             logger.error(f"Ошибка обновления дашборда: {str(e)}")
@@ -663,16 +646,133 @@ class MainWindow(QMainWindow):
             logger.error(f"Ошибка обновления данных: {str(e)}")
             QMessageBox.warning(self, "Ошибка", "Не удалось обновить данные")
     
-    def apply_analysis_filters(self):
-        """Применение фильтров анализа"""
-        period = self.period_combo.currentText()
-        analysis_type = self.analysis_type_combo.currentText()
-        QMessageBox.information(self, "Фильтры", 
-                              f"Применены фильтры: {analysis_type}, период: {period}")
+    def import_data(self):
+        """Пакетный импорт клиентов, ресторанов, блюд и заказов из CSV/JSON"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Импорт данных", "", "Данные (*.csv *.json)"
+        )
+        if not file_path:
+            return
+        
+        # Второй импорт не запускается, пока идет первый
+        self.import_action.setEnabled(False)
+        self.import_dialog = QProgressDialog("Импорт данных...", None, 0, 100, self)
+        self.import_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        self.import_dialog.setMinimumDuration(0)
+        self.import_dialog.setValue(0)
+        
+        self.import_scope.call(
+            SyncDatabaseManager.import_file, file_path, progress=self.import_progress.emit,
+            key='import', on_result=self.on_import_finished, on_error=self.on_import_failed
+        )
+    
+    def on_import_progress(self, entity, processed, total):
+        """Ход импорта в диалоге (в главном потоке)"""
+        if self.import_dialog is None:
+            return
+        self.import_dialog.setLabelText(f"Импорт: {entity} ({processed} из {total})")
+        self.import_dialog.setValue(int(processed / total * 100) if total else 100)
+    
+    def close_import_dialog(self):
+        self.import_action.setEnabled(True)
+        if self.import_dialog is not None:
+            self.import_dialog.close()
+            self.import_dialog.deleteLater()
+            self.import_dialog = None
+    
+    def on_import_finished(self, reports):
+        """Обработчик завершения импорта: итоги и первые ошибки"""
+        self.close_import_dialog()
+        lines = [report.summary() for report in reports]
+        errors = [f"строка {number}: {message}" for report in reports for number, message in report.errors[:10]]
+        if errors:
+            lines.append("")
+            lines.append("Первые ошибки:")
+            lines.extend(errors)
+        QMessageBox.information(self, "Импорт завершен", "\n".join(lines) or "Нет данных для импорта")
+    
+    def on_import_failed(self, error):
+        """Обработчик ошибки импорта"""
+        self.close_import_dialog()
+        logger.error(f"Ошибка импорта данных: {error}")
+        QMessageBox.warning(self, "Ошибка", f"Не удалось импортировать данные: {error}")
+    
+    def show_sql_diagnostics(self):
+        """Панель статистики SQL-запросов и зависаний интерфейса"""
+        from .diagnostics import SqlDiagnosticsDialog
+        
+        if getattr(self, 'diagnostics_dialog', None) is None:
+            self.diagnostics_dialog = SqlDiagnosticsDialog(self)
+        self.diagnostics_dialog.show()
+        self.diagnostics_dialog.raise_()
+    
+    def apply_analysis_filters(self, *args, refresh=False):
+        """
+        Применение фильтров анализа: срез аналитического куба
+        (refresh=True - с проверкой изменений других экземпляров приложения)
+        """
+        self.analytics_scope.call(
+            SyncDatabaseManager.get_analytics, self.period_combo.currentData(),
+            self.analysis_type_combo.currentData(), self.analysis_group_combo.currentData(), refresh=refresh,
+            key='analytics', on_result=self.on_analytics_loaded,
+            on_error=lambda e: logger.error(f"Ошибка получения аналитики: {e}")
+        )
+    
+    def on_analytics_loaded(self, result):
+        """Обработчик загрузки среза аналитики: строки групп и итог"""
+        try:
+            self.analysis_result = result
+            columns = result['columns']
+            rows = result['rows'] + ([result['total']] if result['total'] else [])
+            
+            table = self.analytics_table
+            table.setUpdatesEnabled(False)
+            table.clear()
+            table.setColumnCount(len(columns))
+            table.setHorizontalHeaderLabels(columns)
+            table.setRowCount(len(rows))
+            bold = QFont()
+            bold.setBold(True)
+            for row_index, row in enumerate(rows):
+                is_total = row is result['total']
+                for column_index, value in enumerate(row):
+                    item = QTableWidgetItem(str(value))
+                    if column_index:
+                        item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                    if is_total:
+                        item.setFont(bold)
+                    table.setItem(row_index, column_index, item)
+            table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+            table.setUpdatesEnabled(True)
+        except Exception as e:
+            logger.error(f"Ошибка отображения аналитики: {str(e)}")
     
     def export_analysis(self):
-        """Экспорт аналитики"""
-        QMessageBox.information(self, "Экспорт", "Данные экспортированы в CSV")
+        """Экспорт текущего среза аналитики в CSV"""
+        result = self.analysis_result
+        if not result or not result['columns']:
+            QMessageBox.information(self, "Экспорт", "Нет данных для экспорта")
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Экспорт аналитики", f"analytics_{result['analysis']}_{result['by']}_{result['period']}.csv",
+            "CSV (*.csv)"
+        )
+        if not file_path:
+            return
+        
+        try:
+            # utf-8-sig: Excel распознает кодировку кириллицы
+            with open(file_path, 'w', newline='', encoding='utf-8-sig') as file:
+                writer = csv.writer(file, delimiter=';')
+                writer.writerow(result['columns'])
+                writer.writerows(result['rows'])
+                if result['total']:
+                    writer.writerow(result['total'])
+            QMessageBox.information(self, "Экспорт", f"Данные экспортированы в CSV:\n{file_path}")
+        except Exception as e:
+            logger.error(f"Ошибка экспорта аналитики: {str(e)}")
+            QMessageBox.warning(self, "Ошибка", f"Не удалось экспортировать данные: {str(e)}")
     
     def show_about(self):
         """Показ информации о программе"""
@@ -3,6 +3,7 @@
 """
 
 import logging
+import os
 from datetime import datetime
 
 from PyQt6.QtWidgets import (
@@ -12,16 +13,123 @@ from PyQt6.QtWidgets import (
     QSplitter, QFrame, QTextEdit, QFormLayout, QLineEdit,
     QDateEdit, QDoubleSpinBox, QCheckBox, QMessageBox,
     QHeaderView, QStackedWidget, QTabWidget, QMenuBar,
-    QMenu, QDialog, QDialogButtonBox, QGridLayout
+    QMenu, QDialog, QDialogButtonBox, QGridLayout, QCompleter
 )
-from PyQt6.QtCore import Qt, QTimer, QDate
+from PyQt6.QtCore import Qt, QTimer, QDate, QStringListModel, pyqtSignal
 from PyQt6.QtGui import QFont, QAction, QPalette, QColor
 
 from src.sync_database import SyncDatabaseManager  # Изменено на синхронный менеджер
+from src.utils.data_access import data_access, data_events
+from src.database.events import OrdersCreated, OrdersDeleted, OrderStatusChanged, RecordChanged, TablesChanged
+from src.database.write_queue import order_write_queue
+from src.database.order_lifecycle import STATUS_NAMES, ACCEPTED, InvalidTransitionError, check_transition, status_name
 from .dialogs import EditForm
 
 logger = logging.getLogger(__name__)
 
+# Период опроса изменений списка заказов, мс (0 - выключен). Изменения этого
+# процесса приходят событиями сразу, опрос находит записи других экземпляров
+ORDERS_LIVE_REFRESH_MS = int(os.getenv('ORDERS_LIVE_REFRESH_MS', '10000'))
+
+# Таблицы, изменения которых меняют строки списка заказов
+ORDER_LIST_TABLES = ('Orders', 'OrderItems', 'Customers', 'Statuses')
+
+
+class SearchComboBox(QComboBox):
+    """Выпадающий список с поиском по мере ввода
+
+    Показывает только лучшие совпадения, которые возвращает функция поиска
+    search_func(query, limit) -> [(id, подпись), ...]. Поиск выполняется
+    в фоновом потоке; ошибки передаются сигналом error области data.
+    """
+    
+    # Список обновлен вызовом refresh() (выбранная запись могла не измениться)
+    refreshed = pyqtSignal()
+    
+    def __init__(self, search_func, limit=20, parent=None):
+        super().__init__(parent)
+        self.search_func = search_func
+        self.limit = limit
+        self.data = data_access.scope(self)
+        
+        self.setEditable(True)
+        self.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+        self.lineEdit().setPlaceholderText("Начните вводить для поиска...")
+        
+        self._completion_model = QStringListModel(self)
+        self._completer = QCompleter(self._completion_model, self)
+        self._completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self._completer.activated.connect(self._on_completion_activated)
+        self.setCompleter(self._completer)
+        
+        # Поиск запускается после паузы в наборе, а не на каждый символ
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(150)
+        self._search_timer.timeout.connect(self._search_typed_text)
+        self.lineEdit().textEdited.connect(lambda _: self._search_timer.start())
+    
+    def refresh(self):
+        """Повторный поиск по текущему тексту с сохранением выбранной записи"""
+        selected_id = self.currentData()
+        query = "" if selected_id is not None else self.lineEdit().text().strip()
+        self.data.call(
+            self.search_func, query, self.limit, key='search',
+            on_result=lambda results: self._apply_refresh(results, selected_id, query)
+        )
+    
+    def _apply_refresh(self, results, selected_id, query):
+        self._set_results(results)
+        
+        index = self.findData(selected_id) if selected_id is not None else -1
+        if index < 0 and not query and self.count() > 0:
+            index = 0
+        self.setCurrentIndex(index)
+        self.refreshed.emit()
+    
+    def _search_typed_text(self):
+        """Поиск по введенному тексту"""
+        text = self.lineEdit().text()
+        self.data.call(
+            self.search_func, text.strip(), self.limit, key='search',
+            on_result=lambda results: self._apply_search(results, text)
+        )
+    
+    def _apply_search(self, results, text):
+        # Пока шел поиск, пользователь мог продолжить ввод: ответ устарел
+        if self.lineEdit().text() != text:
+            return
+        
+        self.blockSignals(True)
+        self._set_results(results)
+        self.setCurrentIndex(-1)
+        self.blockSignals(False)
+        self.lineEdit().setText(text)
+        
+        if results:
+            self._completer.complete()
+    
+    def _set_results(self, results):
+        """Заполнение списка найденными записями"""
+        self.blockSignals(True)
+        self.clear()
+        for record_id, label in results:
+            self.addItem(label, record_id)
+        self.blockSignals(False)
+        self._completion_model.setStringList([label for _, label in results])
+    
+    def _on_completion_activated(self, label):
+        """Выбор записи из списка подсказок"""
+        index = self.findText(label)
+        if index >= 0:
+            self.setCurrentIndex(index)
+    
+    def showEvent(self, event):
+        """Повтор поиска, прерванного скрытием списка"""
+        if self.data.take_interrupted():
+            self.refresh()
+        super().showEvent(event)
+
 
 class DataViewWidget(QWidget):
     """Виджет для отображения и управления данными таблиц"""
@@ -30,6 +138,24 @@ class DataViewWidget(QWidget):
         super().__init__(parent)
         self.table_name = table_name
         self.records = []
+        self.data = data_access.scope(self)
+        # Изменения данных не отменяются при уходе с вкладки
+        self.writes = data_access.scope(self, cancel_on_hide=False)
+        self.data.loading_changed.connect(self.set_loading)
+        # Данные изменились, пока виджет был скрыт
+        self.stale = False
+        if table_name == "Orders":
+            # Список заказов обновляется изменениями после номера watermark
+            self.watermark = None
+            self.row_of = {}
+            self.refresh_pending = False
+            self.live = data_access.scope(self)
+            self.live_timer = QTimer(self)
+            self.live_timer.setInterval(ORDERS_LIVE_REFRESH_MS)
+            self.live_timer.timeout.connect(self.refresh_orders)
+            data_events.subscribe(self, self.on_data_changed, tables=ORDER_LIST_TABLES)
+        else:
+            data_events.subscribe(self, self.on_data_changed, tables=(table_name,))
         self.init_ui()
         self.load_data()
 
@@ -53,7 +179,22 @@ class DataViewWidget(QWidget):
         toolbar_layout.addWidget(self.edit_btn)
         toolbar_layout.addWidget(self.delete_btn)
         toolbar_layout.addWidget(self.refresh_btn)
+        
+        if self.table_name == "Orders":
+            # Пакетная смена статуса выбранных заказов
+            self.target_status_combo = QComboBox()
+            for status_id, name in STATUS_NAMES.items():
+                if status_id != ACCEPTED:
+                    self.target_status_combo.addItem(name, status_id)
+            self.transition_btn = QPushButton("Сменить статус")
+            self.transition_btn.clicked.connect(self.transition_selected_orders)
+            toolbar_layout.addWidget(self.target_status_combo)
+            toolbar_layout.addWidget(self.transition_btn)
+        
         toolbar_layout.addStretch()
+        
+        self.status_label = QLabel()
+        toolbar_layout.addWidget(self.status_label)
 
         layout.addLayout(toolbar_layout)
 
@@ -64,21 +205,128 @@ class DataViewWidget(QWidget):
         layout.addWidget(self.table)
 
     def load_data(self):
-        """Загрузка данных в таблицу"""
-        try:
-            logger.info(f"Загрузка данных для {self.table_name}")
-            
-            # Получаем данные синхронно
+        """Загрузка данных в таблицу (в фоновом потоке)"""
+        logger.info(f"Загрузка данных для {self.table_name}")
+        
+        if self.table_name == "Orders":
+            self.data.call(SyncDatabaseManager.get_orders_changed_since, self.watermark, key='load',
+                           on_result=self.on_orders_changed, on_error=self.on_load_error)
+        else:
+            self.data.call(SyncDatabaseManager.get_all, self.table_name, key='load',
+                           on_result=self.on_data_loaded, on_error=self.on_load_error)
+    
+    def on_data_loaded(self, records):
+        """Обработчик загруженных записей"""
+        self.records = records
+        self.update_table()
+    
+    def on_data_changed(self, event):
+        """Событие записи в таблицу виджета: скрытый виджет обновится при показе"""
+        if not self.isVisible():
+            self.stale = True
+        elif self.table_name == "Orders":
+            self.refresh_orders()
+        else:
+            self.load_data()
+    
+    def refresh_orders(self):
+        """Запрос изменений списка заказов (без индикации загрузки)"""
+        if self.data.is_loading or self.live.is_loading:
+            # Изменения будут запрошены после текущего ответа
+            self.refresh_pending = True
+            return
+        self.refresh_pending = False
+        self.live.call(SyncDatabaseManager.get_orders_changed_since, self.watermark, key='poll',
+                       on_result=self.on_orders_changed)
+    
+    def on_orders_changed(self, changes):
+        """Обработчик изменений списка заказов: первый ответ - весь список"""
+        if self.refresh_pending:
+            QTimer.singleShot(0, self.refresh_orders)
+        if changes['watermark'] == self.watermark:
+            return
+        if self.watermark is None:
+            self.records = list(changes['rows'])
+            self.row_of = {record['order_id']: row for row, record in enumerate(self.records)}
+            self.update_table()
+        else:
+            self.apply_order_changes(changes['rows'], changes['deleted'])
+        self.watermark = changes['watermark']
+        self.status_label.setText(f"Записей: {len(self.records)}")
+    
+    def apply_order_changes(self, rows, deleted):
+        """
+        Применение изменений к таблице: удаленные заказы убираются, измененные
+        строки перезаписываются на месте, новые вставляются в начало списка
+        """
+        if not self.records:
+            self.records = list(rows)
+            self.row_of = {record['order_id']: row for row, record in enumerate(self.records)}
+            self.update_table()
+            return
+        
+        columns = list(self.records[0].keys())
+        removed = sorted((self.row_of[order_id] for order_id in deleted if order_id in self.row_of), reverse=True)
+        for row in removed:
+            self.table.removeRow(row)
+            del self.records[row]
+        if removed:
+            self.row_of = {record['order_id']: row for row, record in enumerate(self.records)}
+        
+        inserted = []
+        for record in rows:
+            row = self.row_of.get(record['order_id'])
+            if row is None:
+                inserted.append(record)
+                continue
+            previous, self.records[row] = self.records[row], record
+            for col, column_name in enumerate(columns):
+                if previous[column_name] != record[column_name]:
+                    self.set_cell(row, col, record[column_name])
+        
+        if inserted:
+            # Строки приходят по убыванию времени заказа, как и список
+            self.records[:0] = inserted
+            for row, record in enumerate(inserted):
+                self.table.insertRow(row)
+                for col, column_name in enumerate(columns):
+                    self.set_cell(row, col, record[column_name])
+            self.row_of = {record['order_id']: row for row, record in enumerate(self.records)}
+        
+        logger.debug(f"Список заказов: добавлено {len(inserted)}, изменено {len(rows) - len(inserted)}, "
+                     f"удалено {len(removed)}")
+    
+    def set_cell(self, row, col, value):
+        self.table.setItem(row, col, QTableWidgetItem("" if value is None else str(value)))
+    
+    def on_load_error(self, error):
+        logger.error(f"Ошибка загрузки данных для {self.table_name}: {error}")
+        QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить данные: {error}")
+    
+    def set_loading(self, loading):
+        """Состояние загрузки: кнопка обновления недоступна, пока идет запрос"""
+        self.refresh_btn.setEnabled(not loading)
+        self.status_label.setText("Загрузка..." if loading else f"Записей: {len(self.records)}")
+    
+    def showEvent(self, event):
+        """Повторная загрузка, если предыдущая была прервана скрытием виджета"""
+        if self.data.take_interrupted():
+            self.stale = False
+            self.load_data()
+        elif self.stale:
+            self.stale = False
             if self.table_name == "Orders":
-                self.records = SyncDatabaseManager.get_orders_with_details()
+                self.refresh_orders()
             else:
-                self.records = SyncDatabaseManager.get_all(self.table_name)
-            
-            self.update_table()
-            
-        except Exception as e:
-            logger.error(f"Ошибка загрузки данных для {self.table_name}: {str(e)}")
-            QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить данные: {str(e)}")
+                self.load_data()
+        if self.table_name == "Orders" and ORDERS_LIVE_REFRESH_MS > 0:
+            self.live_timer.start()
+        super().showEvent(event)
+    
+    def hideEvent(self, event):
+        if self.table_name == "Orders":
+            self.live_timer.stop()
+        super().hideEvent(event)
 
     def update_table(self):
         """Обновление таблицы данными"""
@@ -115,6 +363,50 @@ class DataViewWidget(QWidget):
             return self.records[current_row]
         return None
 
+    def transition_selected_orders(self):
+        """
+        Перевод выбранных заказов в выбранный статус
+
+        Заказы группируются по текущему статусу, каждая группа переводится
+        одним запросом с версиями, загруженными в таблицу: заказы, измененные
+        другим пользователем после загрузки, не меняются.
+        """
+        to_status = self.target_status_combo.currentData()
+        groups = {}
+        skipped = 0
+        for index in self.table.selectionModel().selectedRows():
+            record = self.records[index.row()]
+            try:
+                check_transition(record['status_id'], to_status)
+            except InvalidTransitionError:
+                skipped += 1
+                continue
+            groups.setdefault(record['status_id'], {})[record['order_id']] = record['version']
+        
+        if not groups:
+            QMessageBox.warning(self, "Ошибка", "Нет выбранных заказов, которые можно перевести в этот статус")
+            return
+        
+        def transition():
+            return [
+                SyncDatabaseManager.transition_orders(list(versions), from_status, to_status, versions)
+                for from_status, versions in groups.items()
+            ]
+        
+        def done(results):
+            lines = [result.summary() for result in results]
+            if skipped:
+                lines.append(f"Пропущено (недопустимый переход): {skipped}")
+            QMessageBox.information(self, "Смена статуса", "\n".join(lines))
+        
+        def failed(error):
+            logger.error(f"Ошибка смены статуса заказов: {error}")
+            QMessageBox.critical(self, "Ошибка", f"Не удалось сменить статус: {error}")
+        
+        self.transition_btn.setEnabled(False)
+        request = self.writes.call(transition, on_result=done, on_error=failed)
+        request.finished.connect(lambda: self.transition_btn.setEnabled(True))
+
     def add_record(self):
         """Добавление новой записи"""
         QMessageBox.information(self, "Информация", "Функция добавления записи будет реализована в следующей версии")
@@ -131,11 +423,23 @@ class DataViewWidget(QWidget):
 class OrderCreationTab(QWidget):
     """Вкладка для создания новых заказов"""
     
+    # Справочники формы заказа
+    LIST_TABLES = ('Customers', 'Couriers', 'Restaurants', 'Dishes')
+    
     def __init__(self):
         super().__init__()
         self.selected_dishes = {}  # dish_id: quantity
+        self.dish_names = {}  # dish_id: название блюда из загруженных списков
         self.dishes_list = None
+        # Чтения отменяются при уходе с вкладки, оформление заказа - нет
+        self.data = data_access.scope(self)
+        self.writes = data_access.scope(self, cancel_on_hide=False)
+        # Справочники, измененные, пока вкладка была скрыта
+        self.stale_tables = set()
         self.init_ui()
+        self.data.loading_changed.connect(self.set_loading)
+        data_events.subscribe(self, self.on_data_changed, event_types=(RecordChanged, TablesChanged),
+                              tables=self.LIST_TABLES)
 
     def init_ui(self):
         """Инициализация пользовательского интерфейса"""
@@ -149,7 +453,10 @@ class OrderCreationTab(QWidget):
         # Выбор клиента
         customer_group = QGroupBox("Выбор клиента")
         customer_layout = QVBoxLayout(customer_group)
-        self.customer_combo = QComboBox()
+        self.customer_combo = SearchComboBox(SyncDatabaseManager.search_customers)
+        self.customer_combo.data.error.connect(
+            lambda error: self.show_load_error("Не удалось загрузить список клиентов", error)
+        )
         self.load_customers()
         customer_layout.addWidget(self.customer_combo)
         layout.addWidget(customer_group)
@@ -166,18 +473,42 @@ class OrderCreationTab(QWidget):
         dishes_group = QGroupBox("Выбор блюд")
         dishes_layout = QVBoxLayout(dishes_group)
         
-        # Выбор ресторана
+        # Выбор ресторана (блюда загружаются при смене выбранного ресторана)
         restaurant_layout = QHBoxLayout()
         restaurant_layout.addWidget(QLabel("Ресторан:"))
-        self.restaurant_combo = QComboBox()
-        self.restaurant_combo.currentTextChanged.connect(self.load_restaurant_dishes)
+        self.restaurant_combo = SearchComboBox(SyncDatabaseManager.search_restaurants)
+        self.restaurant_combo.currentIndexChanged.connect(self.load_restaurant_dishes)
+        self.restaurant_combo.refreshed.connect(self.load_restaurant_dishes)
+        self.restaurant_combo.data.error.connect(
+            lambda error: self.show_load_error("Не удалось загрузить список ресторанов", error)
+        )
         self.load_restaurants()
         restaurant_layout.addWidget(self.restaurant_combo)
         restaurant_layout.addStretch()
         dishes_layout.addLayout(restaurant_layout)
         
+        # Полнотекстовый поиск блюд по всем ресторанам
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(QLabel("Поиск:"))
+        self.dish_search_edit = QLineEdit()
+        self.dish_search_edit.setPlaceholderText("Название или описание блюда во всех ресторанах")
+        self.dish_search_edit.setClearButtonEnabled(True)
+        search_layout.addWidget(self.dish_search_edit)
+        dishes_layout.addLayout(search_layout)
+        
+        self.dish_search_timer = QTimer(self)
+        self.dish_search_timer.setSingleShot(True)
+        self.dish_search_timer.setInterval(250)
+        self.dish_search_timer.timeout.connect(self.search_dishes)
+        self.dish_search_edit.textChanged.connect(lambda _: self.dish_search_timer.start())
+        
         # Список блюд
-        dishes_layout.addWidget(QLabel("Доступные блюда:"))
+        dishes_header_layout = QHBoxLayout()
+        dishes_header_layout.addWidget(QLabel("Доступные блюда:"))
+        dishes_header_layout.addStretch()
+        self.loading_label = QLabel()
+        dishes_header_layout.addWidget(self.loading_label)
+        dishes_layout.addLayout(dishes_header_layout)
         self.dishes_list = QListWidget()
         dishes_layout.addWidget(self.dishes_list)
         
@@ -212,74 +543,85 @@ class OrderCreationTab(QWidget):
         self.create_order_btn.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold; padding: 10px;")
         self.create_order_btn.clicked.connect(self.create_order)
         layout.addWidget(self.create_order_btn)
-        
-        # Загрузка начальных данных
-        if self.restaurant_combo.count() > 0:
-            self.load_restaurant_dishes()
+
+    def show_load_error(self, message, error):
+        """Ошибка фоновой загрузки данных"""
+        logger.error(f"{message}: {error}")
+        QMessageBox.warning(self, "Ошибка", message)
+
+    def set_loading(self, loading):
+        """Индикатор загрузки списков"""
+        self.loading_label.setText("Загрузка..." if loading else "")
 
     def load_customers(self):
         """Загрузка списка клиентов"""
-        try:
-            self.customer_combo.clear()
-            customers = SyncDatabaseManager.get_customers()
-            for customer in customers:
-                self.customer_combo.addItem(
-                    f"{customer['first_name']} {customer['last_name']} ({customer['phone_number']})", 
-                    customer['customer_id']
-                )
-        except Exception as e:
-            logger.error(f"Ошибка загрузки клиентов: {str(e)}")
-            QMessageBox.warning(self, "Ошибка", "Не удалось загрузить список клиентов")
+        self.customer_combo.refresh()
 
     def load_couriers(self):
         """Загрузка списка курьеров"""
-        try:
-            self.courier_combo.clear()
-            couriers = SyncDatabaseManager.get_couriers()
-            for courier in couriers:
-                self.courier_combo.addItem(
-                    f"{courier['first_name']} {courier['last_name']} ({courier['car_number']})", 
-                    courier['courier_id']
-                )
-        except Exception as e:
-            logger.error(f"Ошибка загрузки курьеров: {str(e)}")
-            QMessageBox.warning(self, "Ошибка", "Не удалось загрузить список курьеров")
+        self.data.call(
+            SyncDatabaseManager.get_couriers, key='couriers',
+            on_result=self.on_couriers_loaded,
+            on_error=lambda error: self.show_load_error("Не удалось загрузить список курьеров", error)
+        )
+
+    def on_couriers_loaded(self, couriers):
+        """Заполнение списка курьеров с сохранением выбора"""
+        selected_id = self.courier_combo.currentData()
+        self.courier_combo.clear()
+        for courier in couriers:
+            self.courier_combo.addItem(
+                f"{courier['first_name']} {courier['last_name']} ({courier['car_number']})", 
+                courier['courier_id']
+            )
+        index = self.courier_combo.findData(selected_id) if selected_id is not None else -1
+        if index >= 0:
+            self.courier_combo.setCurrentIndex(index)
 
     def load_restaurants(self):
         """Загрузка списка ресторанов"""
-        try:
-            self.restaurant_combo.clear()
-            restaurants = SyncDatabaseManager.get_restaurants()
-            for restaurant in restaurants:
-                self.restaurant_combo.addItem(
-                    f"{restaurant['name']} - {restaurant['location']}", 
-                    restaurant['restaurant_id']
-                )
-        except Exception as e:
-            logger.error(f"Ошибка загрузки ресторанов: {str(e)}")
-            QMessageBox.warning(self, "Ошибка", "Не удалось загрузить список ресторанов")
+        self.restaurant_combo.refresh()
 
     def load_restaurant_dishes(self):
         """Загрузка блюд выбранного ресторана"""
-        try:
-            if self.dishes_list is None:
-                return
-                
+        if self.dishes_list is None:
+            return
+        
+        restaurant_id = self.restaurant_combo.currentData()
+        if not restaurant_id:
             self.dishes_list.clear()
-            restaurant_id = self.restaurant_combo.currentData()
-            if not restaurant_id:
-                return
-            
-            dishes = SyncDatabaseManager.get_dishes_by_restaurant(restaurant_id)
-            for dish in dishes:
-                item_text = f"{dish['name']} - {dish['description'] or 'Нет описания'} - {dish['cooking_time']} мин"
-                item = QListWidgetItem(item_text)
-                item.setData(Qt.ItemDataRole.UserRole, dish['dish_id'])
-                self.dishes_list.addItem(item)
-            
-        except Exception as e:
-            logger.error(f"Ошибка загрузки блюд: {str(e)}")
-            QMessageBox.warning(self, "Ошибка", "Не удалось загрузить блюда ресторана")
+            return
+        
+        # Общий ключ с поиском: в списке остается ответ на последний запрос
+        self.data.call(
+            SyncDatabaseManager.get_dishes_by_restaurant, restaurant_id, key='dishes',
+            on_result=lambda dishes: self.show_dishes(dishes, with_restaurant=False),
+            on_error=lambda error: self.show_load_error("Не удалось загрузить блюда ресторана", error)
+        )
+
+    def search_dishes(self):
+        """Поиск блюд по всем ресторанам"""
+        query = self.dish_search_edit.text().strip()
+        if not query:
+            self.load_restaurant_dishes()
+            return
+        
+        self.data.call(
+            SyncDatabaseManager.search_dishes, query, key='dishes',
+            on_result=lambda dishes: self.show_dishes(dishes, with_restaurant=True),
+            on_error=lambda error: self.show_load_error("Не удалось выполнить поиск блюд", error)
+        )
+
+    def show_dishes(self, dishes, with_restaurant):
+        """Заполнение списка блюд"""
+        self.dishes_list.clear()
+        for dish in dishes:
+            name = f"{dish['name']} ({dish['restaurant_name']})" if with_restaurant else dish['name']
+            item_text = f"{name} - {dish['description'] or 'Нет описания'} - {dish['cooking_time']} мин"
+            item = QListWidgetItem(item_text)
+            item.setData(Qt.ItemDataRole.UserRole, dish['dish_id'])
+            self.dishes_list.addItem(item)
+            self.dish_names[dish['dish_id']] = dish['name']
 
     def add_dish_to_order(self):
         """Добавление блюда в заказ"""
@@ -294,48 +636,23 @@ class OrderCreationTab(QWidget):
         dish_id = current_item.data(Qt.ItemDataRole.UserRole)
         quantity = self.quantity_spin.value()
         
-        # Получаем информацию о блюде
-        try:
-            dishes = SyncDatabaseManager.get_dishes()
-            dish = next((d for d in dishes if d['dish_id'] == dish_id), None)
-            if dish:
-                self.selected_dishes[dish_id] = quantity
-                self.update_selected_dishes_table(dishes)
-                QMessageBox.information(self, "Успех", f"Блюдо '{dish['name']}' добавлено в заказ")
-        
-        except Exception as e:
-            logger.error(f"Ошибка при получении блюд: {str(e)}")
-            QMessageBox.warning(self, "Ошибка", "Не удалось получить информацию о блюде")
+        # Название блюда известно из загруженного списка: запрос к БД не нужен
+        self.selected_dishes[dish_id] = quantity
+        self.update_selected_dishes_table()
+        QMessageBox.information(self, "Успех", f"Блюдо '{self.dish_names.get(dish_id, dish_id)}' добавлено в заказ")
 
-    def update_selected_dishes_table(self, dishes=None):
+    def update_selected_dishes_table(self):
         """Обновление таблицы выбранных блюд"""
-        if dishes is None:
-            # Если блюда не переданы, загружаем их
-            try:
-                dishes_list = SyncDatabaseManager.get_dishes()
-                dish_dict = {d['dish_id']: d for d in dishes_list}
-                self._update_table_with_dishes(dish_dict)
-            except Exception as e:
-                logger.error(f"Ошибка загрузки блюд: {str(e)}")
-        else:
-            # Если блюда уже переданы, используем их
-            dish_dict = {d['dish_id']: d for d in dishes}
-            self._update_table_with_dishes(dish_dict)
-    
-    def _update_table_with_dishes(self, dish_dict):
-        """Внутренний метод для обновления таблицы с блюдами"""
         self.selected_dishes_table.setRowCount(len(self.selected_dishes))
         
         for row, (dish_id, quantity) in enumerate(self.selected_dishes.items()):
-            dish = dish_dict.get(dish_id)
-            if dish:
-                self.selected_dishes_table.setItem(row, 0, QTableWidgetItem(dish['name']))
-                self.selected_dishes_table.setItem(row, 1, QTableWidgetItem(str(quantity)))
-                
-                # Кнопка удаления
-                remove_btn = QPushButton("Удалить")
-                remove_btn.clicked.connect(lambda checked, d_id=dish_id: self.remove_dish_from_order(d_id))
-                self.selected_dishes_table.setCellWidget(row, 2, remove_btn)
+            self.selected_dishes_table.setItem(row, 0, QTableWidgetItem(self.dish_names.get(dish_id, str(dish_id))))
+            self.selected_dishes_table.setItem(row, 1, QTableWidgetItem(str(quantity)))
+            
+            # Кнопка удаления
+            remove_btn = QPushButton("Удалить")
+            remove_btn.clicked.connect(lambda checked, d_id=dish_id: self.remove_dish_from_order(d_id))
+            self.selected_dishes_table.setCellWidget(row, 2, remove_btn)
 
     def remove_dish_from_order(self, dish_id):
         """Удаление блюда из заказа"""
@@ -358,48 +675,82 @@ class OrderCreationTab(QWidget):
         if not courier_id:
             QMessageBox.warning(self, "Ошибка", "Выберите курьера")
             return
-            
-        try:
-            # Преобразуем словарь в список кортежей
-            dish_quantities = [(dish_id, quantity) for dish_id, quantity in self.selected_dishes.items()]
-            
-            # Создаем заказ
-            order_id = SyncDatabaseManager.create_order(customer_id, dish_quantities, courier_id)
-            
-            QMessageBox.information(self, "Успех", f"Заказ #{order_id} успешно создан!")
-            
-            # Очищаем форму
-            self.selected_dishes.clear()
-            self.selected_dishes_table.setRowCount(0)
-            self.quantity_spin.setValue(1)
-            
-        except Exception as e:
-            logger.error(f"Ошибка создания заказа: {str(e)}")
-            QMessageBox.critical(self, "Ошибка", f"Не удалось создать заказ: {str(e)}")
+        
+        # Преобразуем словарь в список кортежей
+        dish_quantities = [(dish_id, quantity) for dish_id, quantity in self.selected_dishes.items()]
+        
+        # Повторное нажатие во время оформления создало бы второй заказ
+        self.create_order_btn.setEnabled(False)
+        request = self.writes.call(
+            order_write_queue.create_order, customer_id, dish_quantities, courier_id,
+            on_result=self.on_order_created, on_error=self.on_order_failed
+        )
+        request.finished.connect(lambda: self.create_order_btn.setEnabled(True))
+
+    def on_order_created(self, order_id):
+        """Обработчик успешного создания заказа"""
+        QMessageBox.information(self, "Успех", f"Заказ #{order_id} успешно создан!")
+        
+        # Очищаем форму
+        self.selected_dishes.clear()
+        self.selected_dishes_table.setRowCount(0)
+        self.quantity_spin.setValue(1)
+
+    def on_order_failed(self, error):
+        logger.error(f"Ошибка создания заказа: {error}")
+        QMessageBox.critical(self, "Ошибка", f"Не удалось создать заказ: {error}")
+
+    def on_data_changed(self, event):
+        """Изменение справочника формы: скрытая вкладка обновит его при показе"""
+        tables = [table for table in event.tables if table in self.LIST_TABLES]
+        if self.isVisible():
+            self.refresh_tables(tables)
+        else:
+            self.stale_tables.update(tables)
 
     def showEvent(self, event):
-        """Обновление данных при показе вкладки"""
-        self.refresh_data()
+        """Обновление справочников, измененных или недозагруженных за время скрытия"""
+        if self.data.take_interrupted():
+            self.stale_tables.update(self.LIST_TABLES)
+        self.refresh_tables(self.stale_tables)
+        self.stale_tables.clear()
         super().showEvent(event)
 
+    def refresh_tables(self, tables):
+        """Перезагрузка списков указанных таблиц"""
+        loaders = {
+            'Customers': self.load_customers,
+            'Couriers': self.load_couriers,
+            'Restaurants': self.load_restaurants,
+            'Dishes': self.load_restaurant_dishes,
+        }
+        for table in self.LIST_TABLES:
+            if table in tables:
+                loaders[table]()
+
     def refresh_data(self):
-        """Обновление всех данных в форме"""
-        try:
-            self.load_customers()
-            self.load_couriers()
-            self.load_restaurants()
-            if self.restaurant_combo.count() > 0:
-                self.load_restaurant_dishes()
-        except Exception as e:
-            logger.error(f"Ошибка обновления данных: {str(e)}")
+        """Обновление всех данных в форме (блюда загрузятся после выбора ресторана)"""
+        self.refresh_tables(self.LIST_TABLES)
 
 
 class CustomerOrdersTab(QWidget):
     """Вкладка для просмотра заказов клиента"""
     
+    ORDERS_PAGE_SIZE = 50
+    
     def __init__(self):
         super().__init__()
+        self.orders_has_more = False
+        self.orders_cursor = None  # (order_time, order_id) последней загруженной строки
+        self.orders_loading = False
+        # Заказы клиента изменились, пока вкладка была скрыта
+        self.stale = False
+        self.data = data_access.scope(self)
         self.init_ui()
+        self.data.loading_changed.connect(self.set_loading)
+        data_events.subscribe(self, self.on_data_changed,
+                              event_types=(OrdersCreated, OrderStatusChanged, OrdersDeleted, RecordChanged),
+                              tables=('Orders', 'OrderItems'))
 
     def init_ui(self):
         """Инициализация пользовательского интерфейса"""
@@ -414,9 +765,12 @@ class CustomerOrdersTab(QWidget):
         customer_layout = QHBoxLayout()
         customer_layout.addWidget(QLabel("Выберите клиента:"))
         
-        self.customer_combo = QComboBox()
+        self.customer_combo = SearchComboBox(SyncDatabaseManager.search_customers)
+        self.customer_combo.data.error.connect(
+            lambda error: self.show_load_error("Не удалось загрузить список клиентов", error)
+        )
         self.load_customers()
-        self.customer_combo.currentTextChanged.connect(self.load_customer_orders)
+        self.customer_combo.currentIndexChanged.connect(self.load_customer_orders)
         customer_layout.addWidget(self.customer_combo)
         
         refresh_btn = QPushButton("Обновить")
@@ -424,6 +778,9 @@ class CustomerOrdersTab(QWidget):
         customer_layout.addWidget(refresh_btn)
         
         customer_layout.addStretch()
+        
+        self.loading_label = QLabel()
+        customer_layout.addWidget(self.loading_label)
         layout.addLayout(customer_layout)
         
         # Таблица заказов
@@ -432,6 +789,7 @@ class CustomerOrdersTab(QWidget):
         self.orders_table.setHorizontalHeaderLabels(["ID заказа", "Время заказа", "Статус", "Кол-во позиций", "Общее количество"])
         self.orders_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.orders_table.doubleClicked.connect(self.show_order_details)
+        self.orders_table.verticalScrollBar().valueChanged.connect(self.on_orders_scrolled)
         layout.addWidget(self.orders_table)
         
         # Детали заказа
@@ -452,158 +810,160 @@ class CustomerOrdersTab(QWidget):
         
         layout.addWidget(details_group)
 
+    def show_load_error(self, message, error):
+        """Ошибка фоновой загрузки данных"""
+        logger.error(f"{message}: {error}")
+        QMessageBox.warning(self, "Ошибка", message)
+
+    def set_loading(self, loading):
+        """Индикатор загрузки"""
+        self.loading_label.setText("Загрузка..." if loading else "")
+
     def load_customers(self):
         """Загрузка списка клиентов"""
-        try:
-            self.customer_combo.clear()
-            customers = SyncDatabaseManager.get_customers()
-            for customer in customers:
-                self.customer_combo.addItem(
-                    f"{customer['first_name']} {customer['last_name']} ({customer['phone_number']})", 
-                    customer['customer_id']
-                )
-        except Exception as e:
-            logger.error(f"Ошибка загрузки клиентов: {str(e)}")
-            QMessageBox.warning(self, "Ошибка", "Не удалось загрузить список клиентов")
+        self.customer_combo.refresh()
 
     def load_customer_orders(self):
-        """Загрузка заказов выбранного клиента"""
-        try:
-            customer_id = self.customer_combo.currentData()
-            if not customer_id:
-                return
-            
-            # Получаем все заказы с деталями
-            orders_with_details = SyncDatabaseManager.get_orders_with_details()
-            
-            # Фильтруем заказы по клиенту
-            customer_orders = []
-            for order in orders_with_details:
-                # Нам нужно определить customer_id из заказа
-                # Для этого нужно получить customer_id из заказа
-                # Поскольку в orders_with_details нет customer_id, используем другой подход
-                
-                # Альтернативный подход: получить заказы напрямую из базы
-                import sqlalchemy as sa
-                from sqlalchemy import text
-                from src.sync_database import SyncDatabaseManager
-                
-                query = """
-                    SELECT 
-                        o.order_id,
-                        o.order_time,
-                        s.status_name,
-                        COUNT(oi.order_id) as items_count,
-                        COALESCE(SUM(oi.quantity), 0) as total_quantity
-                    FROM Orders o
-                    LEFT JOIN Statuses s ON o.status_id = s.status_id
-                    LEFT JOIN OrderItems oi ON o.order_id = oi.order_id
-                    WHERE o.customer_id = :customer_id
-                    GROUP BY o.order_id, o.order_time, s.status_name
-                    ORDER BY o.order_time DESC
-                """
-                
-                connection = SyncDatabaseManager._connection
-                result = connection.execute(text(query), {"customer_id": customer_id})
-                
-                orders = []
-                for row in result:
-                    orders.append({
-                        'order_id': row[0],
-                        'order_time': row[1],
-                        'status_name': row[2],
-                        'items_count': row[3],
-                        'total_quantity': row[4]
-                    })
-                
-                self.orders_table.setRowCount(len(orders))
-                
-                for row, order in enumerate(orders):
-                    self.orders_table.setItem(row, 0, QTableWidgetItem(str(order['order_id'])))
-                    self.orders_table.setItem(row, 1, QTableWidgetItem(str(order['order_time'])))
-                    self.orders_table.setItem(row, 2, QTableWidgetItem(str(order['status_name'])))
-                    self.orders_table.setItem(row, 3, QTableWidgetItem(str(order['items_count'])))
-                    self.orders_table.setItem(row, 4, QTableWidgetItem(str(order['total_quantity'])))
-                
-                return
-            
-        except Exception as e:
-            logger.error(f"Ошибка загрузки заказов клиента: {str(e)}")
-            QMessageBox.warning(self, "Ошибка", "Не удалось загрузить заказы клиента")
+        """Загрузка заказов выбранного клиента (первая страница)"""
+        self.orders_table.setRowCount(0)
+        self.orders_has_more = False
+        self.orders_cursor = None
+        self.orders_loading = False
+        
+        customer_id = self.customer_combo.currentData()
+        if not customer_id:
+            return
+        
+        self.load_next_orders_page()
+
+    def load_next_orders_page(self):
+        """Догрузка следующей страницы истории заказов"""
+        if self.orders_loading:
+            return
+        
+        customer_id = self.customer_combo.currentData()
+        if not customer_id:
+            return
+        
+        self.orders_loading = True
+        before_time, before_order_id = self.orders_cursor or (None, None)
+        # Новый запрос страницы отменяет предыдущий (например, при смене клиента)
+        request = self.data.call(
+            SyncDatabaseManager.get_customer_orders_page,
+            customer_id,
+            before_time=before_time,
+            limit=self.ORDERS_PAGE_SIZE,
+            before_order_id=before_order_id,
+            key='orders',
+            on_result=self.on_orders_page_loaded,
+            on_error=lambda error: self.show_load_error("Не удалось загрузить заказы клиента", error)
+        )
+        request.finished.connect(lambda: self._on_orders_request_finished(request))
+
+    def _on_orders_request_finished(self, request):
+        if not request.cancelled:
+            self.orders_loading = False
+
+    def on_orders_page_loaded(self, orders):
+        """Добавление загруженной страницы в таблицу"""
+        first_row = self.orders_table.rowCount()
+        self.orders_table.setRowCount(first_row + len(orders))
+        
+        for offset, order in enumerate(orders):
+            row = first_row + offset
+            self.orders_table.setItem(row, 0, QTableWidgetItem(str(order['order_id'])))
+            self.orders_table.setItem(row, 1, QTableWidgetItem(str(order['order_time'])))
+            self.orders_table.setItem(row, 2, QTableWidgetItem(str(order['status_name'])))
+            self.orders_table.setItem(row, 3, QTableWidgetItem(str(order['items_count'])))
+            self.orders_table.setItem(row, 4, QTableWidgetItem(str(order['total_quantity'])))
+        
+        self.orders_has_more = len(orders) == self.ORDERS_PAGE_SIZE
+        if orders:
+            self.orders_cursor = (orders[-1]['order_time'], orders[-1]['order_id'])
+
+    def on_orders_scrolled(self, value):
+        """Догрузка истории при прокрутке к концу таблицы"""
+        scroll_bar = self.orders_table.verticalScrollBar()
+        if self.orders_has_more and value >= scroll_bar.maximum() - 5:
+            self.load_next_orders_page()
 
     def show_order_details(self, index):
         """Показ деталей выбранного заказа"""
-        try:
-            row = index.row()
-            order_id = int(self.orders_table.item(row, 0).text())
-            
-            # Загружаем детали заказа
-            from src.sync_database import SyncDatabaseManager
-            from sqlalchemy import text
-            
-            connection = SyncDatabaseManager._connection
-            
-            # Детали заказа
-            query = """
-                SELECT 
-                    o.order_id,
-                    CONCAT(c.first_name, ' ', c.last_name) as customer_name,
-                    c.phone_number,
-                    s.status_name,
-                    o.order_time,
-                    CONCAT(cr.first_name, ' ', cr.last_name) as courier_name,
-                    cr.car_number,
-                    d.delivery_time
-                FROM Orders o
-                LEFT JOIN Customers c ON o.customer_id = c.customer_id
-                LEFT JOIN Statuses s ON o.status_id = s.status_id
-                LEFT JOIN Deliveries d ON o.order_id = d.order_id
-                LEFT JOIN Couriers cr ON d.courier_id = cr.courier_id
-                WHERE o.order_id = :order_id
-            """
-            
-            result = connection.execute(text(query), {"order_id": order_id})
-            order_details = result.fetchone()
-            
-            if order_details:
-                # Формируем информацию о заказе
-                courier_info = f"{order_details[5] or 'Не назначен'} {order_details[6] or ''}"
-                delivery_time = order_details[7] or 'Еще не доставлен'
-                
-                info_text = f"""
-                <b>Заказ #{order_details[0]}</b><br>
-                <b>Клиент:</b> {order_details[1]} ({order_details[2]})<br>
-                <b>Статус:</b> {order_details[3]}<br>
-                <b>Время заказа:</b> {order_details[4]}<br>
-                <b>Курьер:</b> {courier_info}<br>
-                <b>Время доставки:</b> {delivery_time}
-                """
-                self.order_info_label.setText(info_text)
-            else:
-                self.order_info_label.setText("Не удалось загрузить детали заказа")
+        row = index.row()
+        order_id = int(self.orders_table.item(row, 0).text())
+        
+        # Заказ, доставка и позиции загружаются одним запросом (с кэшем)
+        self.order_info_label.setText(f"Загрузка заказа #{order_id}...")
+        self.data.call(
+            SyncDatabaseManager.get_order_full, order_id, key='details',
+            on_result=self.on_order_details_loaded,
+            on_error=lambda error: self.show_load_error("Не удалось загрузить детали заказа", error)
+        )
+
+    def on_order_details_loaded(self, order):
+        """Заполнение деталей заказа"""
+        if order:
+            # Формируем информацию о заказе
+            courier_info = f"{order['courier_name'] or 'Не назначен'} {order['car_number'] or ''}"
+            delivery_time = order['delivery_time'] or 'Еще не доставлен'
             
-            # Позиции заказа
-            query = """
-                SELECT 
-                    d.name as dish_name,
-                    d.description,
-                    d.cooking_time,
-                    oi.quantity
-                FROM OrderItems oi
-                LEFT JOIN Dishes d ON oi.dish_id = d.dish_id
-                WHERE oi.order_id = :order_id
+            info_text = f"""
+            <b>Заказ #{order['order_id']}</b><br>
+            <b>Клиент:</b> {order['customer_name']} ({order['phone_number']})<br>
+            <b>Статус:</b> {order['status_name']}<br>
+            <b>Время заказа:</b> {order['order_time']}<br>
+            <b>Курьер:</b> {courier_info}<br>
+            <b>Время доставки:</b> {delivery_time}
             """
-            
-            result = connection.execute(text(query), {"order_id": order_id})
-            order_items = result.fetchall()
-            
-            self.order_items_table.setRowCount(len(order_items))
-            for row, item in enumerate(order_items):
-                self.order_items_table.setItem(row, 0, QTableWidgetItem(str(item[0])))
-                self.order_items_table.setItem(row, 1, QTableWidgetItem(str(item[1] or 'Нет описания')))
-                self.order_items_table.setItem(row, 2, QTableWidgetItem(str(item[2])))
-                self.order_items_table.setItem(row, 3, QTableWidgetItem(str(item[3])))
-            
-        except Exception as e:
-            logger.error(f"Ошибка загрузки деталей заказа: {str(e)}")
-            QMessageBox.warning(self, "Ошибка", "Не удалось загрузить детали заказа")
+            self.order_info_label.setText(info_text)
+        else:
+            self.order_info_label.setText("Не удалось загрузить детали заказа")
+        
+        # Позиции заказа
+        order_items = order['items'] if order else []
+        
+        self.order_items_table.setRowCount(len(order_items))
+        for row, item in enumerate(order_items):
+            self.order_items_table.setItem(row, 0, QTableWidgetItem(str(item['dish_name'])))
+            self.order_items_table.setItem(row, 1, QTableWidgetItem(str(item['description'] or 'Нет описания')))
+            self.order_items_table.setItem(row, 2, QTableWidgetItem(str(item['cooking_time'])))
+            self.order_items_table.setItem(row, 3, QTableWidgetItem(str(item['quantity'])))
+
+    def loaded_order_rows(self):
+        """Строки загруженных заказов: {id заказа: строка таблицы}"""
+        return {int(self.orders_table.item(row, 0).text()): row for row in range(self.orders_table.rowCount())}
+
+    def on_data_changed(self, event):
+        """
+        Изменение заказов: статусы загруженных заказов меняются в таблице,
+        новые или удаленные заказы клиента перезагружают первую страницу
+        """
+        customer_id = self.customer_combo.currentData()
+        if not customer_id:
+            return
+        
+        if isinstance(event, OrdersCreated):
+            affected = customer_id in event.customer_ids
+        else:
+            loaded = self.loaded_order_rows()
+            affected_rows = [loaded[order_id] for order_id in event.order_ids or () if order_id in loaded]
+            if isinstance(event, OrderStatusChanged):
+                for row in affected_rows:
+                    self.orders_table.setItem(row, 2, QTableWidgetItem(status_name(event.to_status)))
+                return
+            affected = bool(affected_rows)
+        
+        if not affected:
+            return
+        if self.isVisible():
+            self.load_customer_orders()
+        else:
+            self.stale = True
+
+    def showEvent(self, event):
+        """Повторная загрузка истории, если она была прервана уходом с вкладки или изменилась"""
+        if self.data.take_interrupted() or self.stale:
+            self.stale = False
+            self.order_info_label.setText("Выберите заказ для просмотра деталей")
+            self.load_customer_orders()
+        super().showEvent(event)
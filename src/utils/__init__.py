@@ -1,13 +1,32 @@
 """
 Вспомогательные утилиты приложения
-"""
 
-from .async_helper import async_helper
-from .config import setup_logging, get_db_config, print_db_config
+Модули импортируются при первом обращении: async_helper тянет PyQt6, а
+серверу данных и командной строке (src/cli.py) Qt не нужен.
+"""
 
 __all__ = [
     'async_helper',
     'setup_logging',
-    'get_db_config', 
+    'get_db_config',
     'print_db_config',
 ]
+
+_LAZY_ATTRIBUTES = {
+    'async_helper': '.async_helper',
+    'setup_logging': '.config',
+    'get_db_config': '.config',
+    'print_db_config': '.config',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(module_name, __name__), name)
+    # Имя async_helper совпадает с подмодулем: импорт подмодуля записывает
+    # в пакет сам модуль, поэтому значение сохраняется поверх него
+    globals()[name] = value
+    return value
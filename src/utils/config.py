@@ -34,6 +34,10 @@ def setup_logging():
         ]
     )
     
+    # Медленные запросы дополнительно пишутся в отдельный файл
+    from .instrumentation import configure_slow_query_log
+    configure_slow_query_log(os.path.join(log_dir, 'slow_queries.log'))
+    
     logger = logging.getLogger(__name__)
     logger.info(f"Логирование настроено. Уровень: {log_level}")
     return logger
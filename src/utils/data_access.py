@@ -0,0 +1,308 @@
+"""
+Неблокирующий доступ к данным для виджетов
+
+Все обращения к БД из интерфейса выполняются в пуле фоновых потоков,
+результат возвращается в главный поток сигналом. Запросы виджета собираются
+в область (DataScope): она сообщает о состоянии загрузки, отменяет
+незавершенные запросы при скрытии виджета и передает ошибки обработчику.
+События изменения данных (src/database/events.py) доставляются виджетам в
+главный поток через data_events.
+"""
+
+import asyncio
+import contextvars
+import inspect
+import logging
+import os
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QEvent, pyqtSignal
+
+from src.database.events import DataEvent, event_bus
+
+logger = logging.getLogger(__name__)
+
+
+class DataRequest(QObject):
+    """Запрос к данным, выполняемый в фоновом потоке"""
+
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    def __init__(self, description: str, parent=None):
+        super().__init__(parent)
+        self.description = description
+        self.cancelled = False
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._task: Optional['_DataTask'] = None
+
+    def cancel(self):
+        """
+        Отмена запроса: еще не начатая задача снимается с очереди пула,
+        результат уже выполняющейся задачи будет отброшен
+        """
+        if self.done or self.cancelled:
+            return
+        self.cancelled = True
+        if self._task is not None:
+            try:
+                data_access.pool.tryTake(self._task)
+            except RuntimeError:
+                pass  # задача уже выполнена и удалена пулом
+        self._finish()
+
+    def _on_result(self, result):
+        if self.cancelled:
+            return
+        self.succeeded.emit(result)
+        self._finish()
+
+    def _on_error(self, error: BaseException):
+        if self.cancelled:
+            return
+        self.error = error
+        self.failed.emit(str(error))
+        self._finish()
+
+    def _finish(self):
+        if self.done:
+            return
+        self.done = True
+        self._task = None
+        self.finished.emit()
+
+
+class _TaskSignals(QObject):
+    """Сигналы задачи: создаются в главном потоке, поэтому доставляются в него"""
+
+    result = pyqtSignal(object)
+    error = pyqtSignal(object)
+
+
+class _DataTask(QRunnable):
+    """Выполнение функции доступа к данным в потоке пула"""
+
+    def __init__(self, func: Callable, args, kwargs, signals: _TaskSignals, context: contextvars.Context):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = signals
+        self.context = context
+
+    def run(self):
+        try:
+            result = self.context.run(self._call)
+        except Exception as e:
+            logger.error(f"Ошибка фонового запроса к данным: {str(e)}", exc_info=True)
+            self.signals.error.emit(e)
+        else:
+            self.signals.result.emit(result)
+        finally:
+            # Соединение возвращается в пул: QThreadPool завершает простаивающие потоки
+            data_access.release_thread_resources()
+
+    def _call(self):
+        result = self.func(*self.args, **self.kwargs)
+        if inspect.isawaitable(result):
+            # Корутины асинхронного менеджера выполняются в собственном цикле событий
+            loop = asyncio.new_event_loop()
+            try:
+                result = loop.run_until_complete(result)
+            finally:
+                loop.close()
+        return result
+
+
+class DataAccess(QObject):
+    """Фасад фонового доступа к данным"""
+
+    def __init__(self, max_threads: int = 4):
+        super().__init__()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._releasers = []
+        self._pending: Dict[DataRequest, _TaskSignals] = {}
+
+    def add_thread_releaser(self, releaser: Callable[[], None]):
+        """Функция, освобождающая ресурсы потока после каждой задачи (например, транзакцию)"""
+        self._releasers.append(releaser)
+
+    def release_thread_resources(self):
+        for releaser in self._releasers:
+            try:
+                releaser()
+            except Exception as e:
+                logger.error(f"Ошибка освобождения ресурсов потока: {str(e)}")
+
+    def submit(self, func: Callable, *args, parent: Optional[QObject] = None, **kwargs) -> DataRequest:
+        """Запуск функции доступа к данным в пуле; результат приходит сигналами запроса"""
+        request = DataRequest(getattr(func, '__qualname__', repr(func)), parent)
+        signals = _TaskSignals()
+        signals.result.connect(request._on_result)
+        signals.error.connect(request._on_error)
+        # Сигналы живут до завершения запроса
+        self._pending[request] = signals
+        request.finished.connect(lambda: self._pending.pop(request, None))
+
+        # Действие пользователя переносится в фоновый поток для атрибуции запросов
+        task = _DataTask(func, args, kwargs, signals, contextvars.copy_context())
+        request._task = task
+        self.pool.start(task)
+        return request
+
+    def scope(self, widget, cancel_on_hide: bool = True) -> 'DataScope':
+        return DataScope(widget, cancel_on_hide)
+
+    def shutdown(self, msecs: int = 5000) -> bool:
+        """Снятие задач с очереди и ожидание выполняющихся (при выходе из приложения)"""
+        self.pool.clear()
+        return self.pool.waitForDone(msecs)
+
+
+class DataScope(QObject):
+    """
+    Фоновые запросы одного виджета
+
+    Сообщает о начале и окончании загрузки, отменяет незавершенные запросы
+    при скрытии виджета и запоминает это, чтобы виджет мог перезагрузить
+    данные при следующем показе. Запрос с ключом отменяет предыдущий запрос
+    с тем же ключом: для поиска по мере ввода важен только последний ответ.
+    """
+
+    loading_changed = pyqtSignal(bool)
+    error = pyqtSignal(str)
+
+    def __init__(self, widget, cancel_on_hide: bool = True):
+        super().__init__(widget)
+        self.widget = widget
+        self.interrupted = False
+        self._requests: Dict[Any, DataRequest] = {}
+        self._anonymous = 0
+        if cancel_on_hide:
+            widget.installEventFilter(self)
+
+    @property
+    def is_loading(self) -> bool:
+        return bool(self._requests)
+
+    def call(self, func: Callable, *args, on_result: Optional[Callable[[Any], None]] = None,
+             on_error: Optional[Callable[[str], None]] = None, key: Any = None, **kwargs) -> DataRequest:
+        """
+        Фоновый вызов func(*args, **kwargs)
+
+        on_result вызывается в главном потоке с результатом, on_error - с текстом
+        ошибки; без on_error ошибка передается сигналом error области.
+        """
+        if key is None:
+            self._anonymous += 1
+            key = ('request', self._anonymous)
+
+        was_loading = self.is_loading
+        previous = self._requests.get(key)
+        request = data_access.submit(func, *args, parent=self, **kwargs)
+        self._requests[key] = request
+
+        if on_result is not None:
+            request.succeeded.connect(lambda result: self._deliver(on_result, result))
+        request.failed.connect(on_error if on_error is not None else self.error.emit)
+        request.finished.connect(lambda: self._forget(key, request))
+
+        if previous is not None:
+            previous.cancel()
+        if not was_loading:
+            self.loading_changed.emit(True)
+        return request
+
+    def cancel_all(self):
+        """Отмена всех незавершенных запросов виджета"""
+        for request in list(self._requests.values()):
+            request.cancel()
+
+    def take_interrupted(self) -> bool:
+        """Были ли запросы отменены при последнем скрытии (флаг сбрасывается)"""
+        interrupted, self.interrupted = self.interrupted, False
+        return interrupted
+
+    def _deliver(self, on_result: Callable[[Any], None], result: Any):
+        # Исключение в слоте PyQt завершает приложение, поэтому ошибки обработчика перехватываются
+        try:
+            on_result(result)
+        except Exception as e:
+            logger.error(f"Ошибка обработки результата в {type(self.widget).__name__}: {str(e)}", exc_info=True)
+            self.error.emit(str(e))
+
+    def _forget(self, key, request: DataRequest):
+        if self._requests.get(key) is request:
+            del self._requests[key]
+            if not self._requests:
+                self.loading_changed.emit(False)
+        request.deleteLater()
+
+    def eventFilter(self, obj, event):
+        if obj is self.widget and event.type() == QEvent.Type.Hide and self._requests:
+            logger.debug(f"{type(self.widget).__name__} скрыт: отмена {len(self._requests)} запросов")
+            self.interrupted = True
+            self.cancel_all()
+        return False
+
+
+class DataEvents(QObject):
+    """
+    События изменения данных в главном потоке
+
+    Сигнал changed испускается в потоке, выполнившем запись, и доставляется
+    подписанным виджетам очередью событий главного потока.
+    """
+
+    changed = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        event_bus.subscribe(DataEvent, self.changed.emit)
+
+    def subscribe(self, widget: QObject, handler: Callable[[DataEvent], None],
+                  event_types: Tuple[Type[DataEvent], ...] = (DataEvent,),
+                  tables: Tuple[str, ...] = ()) -> '_EventSubscription':
+        """
+        Подписка виджета на события указанных типов (и таблиц, если заданы);
+        подписка удаляется вместе с виджетом
+        """
+        subscription = _EventSubscription(widget, handler, event_types, tables)
+        self.changed.connect(subscription.deliver)
+        return subscription
+
+
+class _EventSubscription(QObject):
+    """Подписка виджета: дочерний объект, отключается при удалении виджета"""
+
+    def __init__(self, widget: QObject, handler: Callable[[DataEvent], None],
+                 event_types: Tuple[Type[DataEvent], ...], tables: Tuple[str, ...]):
+        super().__init__(widget)
+        self.handler = handler
+        self.event_types = event_types
+        self.tables = tables
+
+    def deliver(self, event: DataEvent):
+        if not isinstance(event, self.event_types) or (self.tables and not event.touches(*self.tables)):
+            return
+        # Исключение в слоте PyQt завершает приложение
+        try:
+            self.handler(event)
+        except Exception as e:
+            logger.error(f"Ошибка обработки события {type(event).__name__}: {str(e)}", exc_info=True)
+
+
+def _release_sync_connection():
+    from src.sync_database import SyncDatabaseManager
+    SyncDatabaseManager.release_connection()
+
+
+# Глобальный фасад фонового доступа к данным
+data_access = DataAccess(max_threads=int(os.getenv('DATA_THREADS', '4')))
+data_access.add_thread_releaser(_release_sync_connection)
+
+# События изменения данных для виджетов
+data_events = DataEvents()
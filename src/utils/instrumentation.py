@@ -0,0 +1,289 @@
+"""
+Инструментирование SQL-запросов: форма запроса, длительность, число строк,
+действие интерфейса, скользящие гистограммы задержек и журнал медленных запросов
+"""
+
+import bisect
+import contextvars
+import functools
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('sql.slow')
+
+# Действие интерфейса, в рамках которого выполняются запросы
+current_action: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('current_action', default=None)
+
+# Границы корзин гистограммы задержек, мс (логарифмическая шкала)
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PARAMETER = re.compile(r'%s|%\(\w+\)s|:\w+|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_statement(statement: str) -> str:
+    """
+    Форма запроса: литералы и параметры заменены на ?, списки IN (...) свернуты,
+    пробелы схлопнуты. Запросы одной формы агрегируются вместе.
+    """
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _PARAMETER.sub('?', shape)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _IN_LIST.sub('IN (...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+@contextmanager
+def ui_action(name: str):
+    """Контекст действия интерфейса: запросы внутри него атрибутируются этому действию"""
+    token = current_action.set(name)
+    try:
+        yield
+    finally:
+        current_action.reset(token)
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с фиксированными корзинами"""
+
+    __slots__ = ('counts', 'count', 'total_ms', 'max_ms')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, duration_ms: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+
+    def merge(self, other: 'LatencyHistogram'):
+        for index, value in enumerate(other.counts):
+            self.counts[index] += value
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Оценка перцентиля по верхней границе корзины"""
+        if self.count == 0:
+            return 0.0
+        threshold = fraction * self.count
+        seen = 0
+        for index, value in enumerate(self.counts):
+            seen += value
+            if seen >= threshold:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+
+class RollingHistogram:
+    """Гистограмма за последние window_seconds, собранная из поминутных срезов"""
+
+    def __init__(self, window_seconds: int = 900, slice_seconds: int = 60):
+        self.slice_seconds = slice_seconds
+        self.slices = deque(maxlen=max(1, window_seconds // slice_seconds))
+
+    def add(self, duration_ms: float, now: Optional[float] = None):
+        slot = int((now or time.time()) // self.slice_seconds)
+        if not self.slices or self.slices[-1][0] != slot:
+            self.slices.append((slot, LatencyHistogram()))
+        self.slices[-1][1].add(duration_ms)
+
+    def snapshot(self, now: Optional[float] = None) -> LatencyHistogram:
+        oldest = int((now or time.time()) // self.slice_seconds) - self.slices.maxlen + 1
+        merged = LatencyHistogram()
+        for slot, histogram in self.slices:
+            if slot >= oldest:
+                merged.merge(histogram)
+        return merged
+
+
+class StatementStats:
+    """Накопленная статистика одной формы запроса"""
+
+    __slots__ = ('shape', 'source', 'count', 'errors', 'total_ms', 'max_ms', 'rows',
+                 'actions', 'rolling', 'last_seen')
+
+    def __init__(self, shape: str, source: str):
+        self.shape = shape
+        self.source = source
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.actions: Counter = Counter()
+        self.rolling = RollingHistogram()
+        self.last_seen = 0.0
+
+
+class QueryMonitor:
+    """
+    Сбор метрик всех SQL-запросов приложения
+
+    Запросы группируются по форме; для каждой формы хранятся счетчики, действия
+    интерфейса и скользящая гистограмма задержек. Запросы дольше порога
+    SLOW_QUERY_MS пишутся в журнал медленных запросов.
+    """
+
+    def __init__(self, slow_query_ms: float = 200.0, max_shapes: int = 2000, recent_slow: int = 200):
+        self.slow_query_ms = slow_query_ms
+        self.max_shapes = max_shapes
+        self.enabled = True
+        self._stats: Dict[str, StatementStats] = {}
+        self._slow: deque = deque(maxlen=recent_slow)
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration_ms: float, rows: Optional[int] = None,
+               source: str = 'sqlalchemy', error: Optional[str] = None):
+        """Учет одного выполненного запроса"""
+        if not self.enabled:
+            return
+
+        shape = normalize_statement(statement)
+        action = current_action.get() or 'вне действия'
+        now = time.time()
+
+        with self._lock:
+            stats = self._stats.get(shape)
+            if stats is None:
+                if len(self._stats) >= self.max_shapes:
+                    # Вытесняем давно не встречавшуюся форму
+                    oldest = min(self._stats.values(), key=lambda item: item.last_seen)
+                    del self._stats[oldest.shape]
+                stats = self._stats[shape] = StatementStats(shape, source)
+
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.rows += rows if rows and rows > 0 else 0
+            stats.actions[action] += 1
+            stats.rolling.add(duration_ms, now)
+            stats.last_seen = now
+            if error:
+                stats.errors += 1
+
+            is_slow = duration_ms >= self.slow_query_ms
+            if is_slow:
+                self._slow.append({
+                    'time': now, 'duration_ms': duration_ms, 'action': action,
+                    'shape': shape, 'rows': rows, 'source': source, 'error': error,
+                })
+
+        if is_slow:
+            slow_query_logger.warning(
+                f"{duration_ms:.1f} мс [{action}] ({source}, строк: {rows if rows is not None else '?'}) "
+                f"{_WHITESPACE.sub(' ', statement).strip()[:2000]}"
+            )
+
+    def top(self, limit: int = 20, order_by: str = 'total_ms') -> List[Dict[str, Any]]:
+        """Самые затратные формы запросов (total_ms, count, max_ms, p95_ms)"""
+        with self._lock:
+            rows = []
+            for stats in self._stats.values():
+                window = stats.rolling.snapshot()
+                rows.append({
+                    'shape': stats.shape,
+                    'source': stats.source,
+                    'count': stats.count,
+                    'errors': stats.errors,
+                    'total_ms': stats.total_ms,
+                    'avg_ms': stats.total_ms / stats.count if stats.count else 0.0,
+                    'max_ms': stats.max_ms,
+                    'p50_ms': window.percentile(0.5),
+                    'p95_ms': window.percentile(0.95),
+                    'p99_ms': window.percentile(0.99),
+                    'rows': stats.rows,
+                    'top_action': stats.actions.most_common(1)[0][0] if stats.actions else '',
+                    'actions': dict(stats.actions),
+                })
+
+        rows.sort(key=lambda row: row[order_by], reverse=True)
+        return rows[:limit]
+
+    def by_action(self) -> Dict[str, Dict[str, float]]:
+        """Число запросов и суммарное время по действиям интерфейса"""
+        result: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for stats in self._stats.values():
+                average = stats.total_ms / stats.count if stats.count else 0.0
+                for action, count in stats.actions.items():
+                    entry = result.setdefault(action, {'count': 0, 'total_ms': 0.0})
+                    entry['count'] += count
+                    entry['total_ms'] += average * count
+        return result
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        """Последние медленные запросы (новые первыми)"""
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+
+
+def configure_slow_query_log(path: Optional[str] = None, max_bytes: int = 5 * 1024 * 1024, backups: int = 3):
+    """Запись журнала медленных запросов в отдельный файл с ротацией"""
+    path = path or os.getenv('SLOW_QUERY_LOG', os.path.join('logs', 'slow_queries.log'))
+    if any(isinstance(handler, RotatingFileHandler) for handler in slow_query_logger.handlers):
+        return
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    slow_query_logger.addHandler(handler)
+
+
+def install_sqlalchemy(engine):
+    """Подключение к событиям выполнения запросов SQLAlchemy"""
+    from sqlalchemy import event
+
+    if getattr(engine, '_query_monitor_installed', False):
+        return
+    engine._query_monitor_installed = True
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_start_time'].pop()
+        rowcount = getattr(cursor, 'rowcount', -1)
+        query_monitor.record(statement, (time.perf_counter() - started) * 1000,
+                             rows=rowcount if rowcount >= 0 else None)
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        starts = context.connection.info.get('query_start_time') if context.connection is not None else None
+        if not starts:
+            return
+        started = starts.pop()
+        query_monitor.record(context.statement or '', (time.perf_counter() - started) * 1000,
+                             error=str(context.original_exception))
+
+
+# Глобальный монитор запросов
+query_monitor = QueryMonitor(slow_query_ms=float(os.getenv('SLOW_QUERY_MS', '200')))
+query_monitor.enabled = os.getenv('SQL_INSTRUMENTATION', 'true').lower() == 'true'
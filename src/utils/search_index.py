@@ -0,0 +1,334 @@
+"""
+Индекс для поиска по мере ввода (клиенты, рестораны)
+"""
+
+import bisect
+import logging
+import re
+import threading
+from array import array
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.database.events import DataEvent, RecordChanged, event_bus
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+_PHONE_QUERY_PATTERN = re.compile(r'^[\d\s+\-()]+$')
+
+# Маркер токенов с перевернутыми цифрами телефона (поиск по окончанию номера)
+_SUFFIX_MARKER = '~'
+
+# Символ больше любого символа токена: граница диапазона токенов с префиксом
+_MAX_CHAR = chr(0x10FFFF)
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Нормализация строки для поиска: нижний регистр, ё -> е"""
+    return (value or '').lower().replace('ё', 'е')
+
+
+def normalize_phone(value: Optional[str]) -> str:
+    """Нормализация телефона: только цифры"""
+    return re.sub(r'\D', '', value or '')
+
+
+def parse_query(query: str, normalize: bool = True) -> Tuple[str, List[str]]:
+    """
+    Разбор запроса: цифры телефона (если запрос - номер) или слова
+    (normalize=False - слова в написании запроса, например для LIKE в БД)
+    """
+    if _PHONE_QUERY_PATTERN.match(query) and normalize_phone(query):
+        return normalize_phone(query), []
+    return '', _WORD_PATTERN.findall(normalize_text(query) if normalize else query)
+
+
+class SearchIndex:
+    """
+    Префиксный индекс по словам названия и цифрам телефона
+
+    Токены хранятся в отсортированном списке, поэтому поиск по префиксу - это
+    бинарный поиск и просмотр соседних элементов. Для поиска по окончанию номера
+    телефона в индекс добавляются перевернутые цифры номера.
+
+    Кандидаты выбираются по самому редкому слову запроса, но не больше
+    max_candidates: если их больше, ответ помечается неполным (lookup), и
+    вызывающий код может дополнить его запросом к БД.
+    """
+
+    def __init__(self, max_candidates: int = 5000):
+        self.max_candidates = max_candidates
+        self._tokens: List[str] = []
+        self._ids = array('q')
+        self._labels: Dict[int, str] = {}
+        # Слова и телефон документа: по ним находятся его токены при удалении
+        self._sources: Dict[int, Tuple[Tuple[str, ...], Optional[str]]] = {}
+        self._lock = threading.RLock()
+
+    def build(self, documents: Iterable[Tuple[int, str, Iterable[str], Optional[str]]]):
+        """
+        Построение индекса по документам (id, подпись, слова, телефон)
+        """
+        interned: Dict[str, str] = {}
+        pairs = []
+        labels = {}
+        sources = {}
+
+        for doc_id, label, words, phone in documents:
+            labels[doc_id] = label
+            sources[doc_id] = (tuple(words), phone)
+            for token in self._document_tokens(words, phone):
+                # Имена сильно повторяются: храним одну копию каждой строки
+                token = interned.setdefault(token, token)
+                pairs.append((token, doc_id))
+
+        pairs.sort()
+
+        with self._lock:
+            self._tokens = [token for token, _ in pairs]
+            self._ids = array('q', (doc_id for _, doc_id in pairs))
+            self._labels = labels
+            self._sources = sources
+
+        logger.debug(f"Поисковый индекс построен: {len(labels)} записей, {len(pairs)} токенов")
+
+    def add(self, doc_id: int, label: str, words: Iterable[str], phone: Optional[str] = None):
+        """Добавление одного документа в построенный индекс"""
+        with self._lock:
+            if doc_id in self._labels:
+                return
+
+            words = tuple(words)
+            self._labels[doc_id] = label
+            self._sources[doc_id] = (words, phone)
+            for token in self._document_tokens(words, phone):
+                position = bisect.bisect_left(self._tokens, token)
+                self._tokens.insert(position, token)
+                self._ids.insert(position, doc_id)
+
+    def remove(self, doc_id: int):
+        """Удаление документа из индекса"""
+        with self._lock:
+            source = self._sources.pop(doc_id, None)
+            self._labels.pop(doc_id, None)
+            if source is None:
+                return
+
+            for token in self._document_tokens(*source):
+                position = bisect.bisect_left(self._tokens, token)
+                while position < len(self._tokens) and self._tokens[position] == token:
+                    if self._ids[position] == doc_id:
+                        del self._tokens[position]
+                        del self._ids[position]
+                        break
+                    position += 1
+
+    def update(self, doc_id: int, label: str, words: Iterable[str], phone: Optional[str] = None):
+        """Замена документа (или добавление, если его нет)"""
+        with self._lock:
+            self.remove(doc_id)
+            self.add(doc_id, label, words, phone)
+
+    def source(self, doc_id: int) -> Optional[Tuple[Tuple[str, ...], Optional[str]]]:
+        """Слова и телефон документа (None - документа нет в индексе)"""
+        with self._lock:
+            return self._sources.get(doc_id)
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[int, str]]:
+        """Поиск документов по началу слов или фрагменту телефона"""
+        return self.lookup(query, limit)[0]
+
+    def lookup(self, query: str, limit: int = 20) -> Tuple[List[Tuple[int, str]], bool]:
+        """
+        Поиск с признаком полноты: False, если найдено меньше limit, а
+        кандидатов было больше max_candidates (просмотрены не все)
+        """
+        with self._lock:
+            if not query.strip():
+                return list(islice(self._labels.items(), limit)), True
+
+            digits, terms = parse_query(query)
+            if digits:
+                ranges = [self._prefix_range(digits), self._prefix_range(_SUFFIX_MARKER + digits[::-1])]
+                other_terms = []
+            else:
+                if not terms:
+                    return [], True
+
+                # Кандидаты выбираются по слову с наименьшим числом токенов
+                term_ranges = {term: self._prefix_range(term) for term in terms}
+                rarest = min(terms, key=lambda term: term_ranges[term][1] - term_ranges[term][0])
+                ranges = [term_ranges[rarest]]
+                other_terms = list(terms)
+                other_terms.remove(rarest)
+
+            truncated = any(end - start > self.max_candidates for start, end in ranges)
+            candidates = chain.from_iterable(self._iter_range_ids(start, end) for start, end in ranges)
+            results = self._collect(candidates, other_terms, limit)
+            return results, len(results) >= limit or not truncated
+
+    def __len__(self):
+        return len(self._labels)
+
+    def _document_tokens(self, words: Iterable[str], phone: Optional[str]) -> List[str]:
+        """Токены документа: слова и варианты номера телефона"""
+        tokens = []
+        for word in words:
+            tokens.extend(_WORD_PATTERN.findall(normalize_text(word)))
+
+        digits = normalize_phone(phone)
+        if digits:
+            tokens.append(digits)
+            # Номер без кода страны: поиск по "916..." для "+7916..."
+            if len(digits) == 11 and digits[0] in '78':
+                tokens.append(digits[1:])
+            tokens.append(_SUFFIX_MARKER + digits[::-1])
+
+        return tokens
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Позиции токенов, начинающихся с префикса: [start, end)"""
+        start = bisect.bisect_left(self._tokens, prefix)
+        return start, bisect.bisect_left(self._tokens, prefix + _MAX_CHAR, start)
+
+    def _iter_range_ids(self, start: int, end: int) -> Iterator[int]:
+        """Идентификаторы документов диапазона токенов (не больше max_candidates)"""
+        for position in range(start, min(end, start + self.max_candidates)):
+            yield self._ids[position]
+
+    def _collect(self, candidates: Iterable[int], other_terms: List[str], limit: int) -> List[Tuple[int, str]]:
+        """Отбор кандидатов, содержащих остальные слова запроса"""
+        results = []
+        seen = set()
+
+        for doc_id in candidates:
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+
+            label = self._labels.get(doc_id)
+            if label is None:
+                continue
+
+            if other_terms:
+                words = _WORD_PATTERN.findall(normalize_text(label))
+                if not all(any(word.startswith(term) for word in words) for term in other_terms):
+                    continue
+
+            results.append((doc_id, label))
+            if len(results) >= limit:
+                break
+
+        return results
+
+
+class SearchIndexRegistry:
+    """
+    Реестр поисковых индексов по таблицам с ленивым построением
+
+    Изменение одной записи (RecordChanged) применяется к индексу функцией
+    обновления таблицы, без перестроения; пакетная запись (импорт,
+    генерация данных) сбрасывает индекс. Индекс таблицы строится под своей
+    блокировкой: поиск по другим таблицам его не ждет, а записи, изменившиеся
+    во время построения, применяются к индексу после него.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[str, SearchIndex] = {}
+        self._updaters: Dict[str, Callable[[SearchIndex, RecordChanged], None]] = {}
+        # События таблиц, индекс которых строится (None - индекс сброшен во время построения)
+        self._building: Dict[str, Optional[List[RecordChanged]]] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, table_name: str, builder: Callable[[SearchIndex], None],
+            updater: Optional[Callable[[SearchIndex, RecordChanged], None]] = None) -> SearchIndex:
+        """
+        Получение индекса таблицы, при необходимости построенного заново
+
+        updater(index, event) применяет к индексу изменение одной записи
+        (False - индекс нужно построить заново); без него любое изменение
+        таблицы сбрасывает индекс.
+        """
+        name = table_name.lower()
+        with self._lock:
+            index = self._indexes.get(name)
+            if index is not None:
+                return index
+            build_lock = self._build_locks.setdefault(name, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                index = self._indexes.get(name)
+                if index is not None:
+                    return index
+                if updater is not None:
+                    self._updaters[name] = updater
+                self._building[name] = []
+
+            index = SearchIndex()
+            try:
+                builder(index)
+            except Exception:
+                with self._lock:
+                    self._building.pop(name, None)
+                raise
+
+            with self._lock:
+                pending = self._building.pop(name)
+                if pending is None:
+                    # Пакетная запись во время построения: индекс мог ее не увидеть
+                    return index
+                for event in pending:
+                    self._apply(name, index, event)
+                self._indexes[name] = index
+            return index
+
+    def invalidate_tables(self, tables: Iterable[str]):
+        """Сброс индексов измененных таблиц (перестраиваются при следующем поиске)"""
+        with self._lock:
+            for table_name in tables:
+                name = table_name.lower()
+                self._indexes.pop(name, None)
+                if name in self._building:
+                    self._building[name] = None
+
+    def on_data_changed(self, event: DataEvent):
+        """Применение изменения одной записи к индексу или сброс индексов таблиц"""
+        if not isinstance(event, RecordChanged):
+            self.invalidate_tables(event.tables)
+            return
+
+        name = event.table.lower()
+        with self._lock:
+            if name not in self._updaters:
+                self._indexes.pop(name, None)
+                if name in self._building:
+                    self._building[name] = None
+                return
+            pending = self._building.get(name)
+            if pending is not None:
+                pending.append(event)
+            index = self._indexes.get(name)
+            if index is not None and not self._apply(name, index, event):
+                del self._indexes[name]
+
+    def _apply(self, name: str, index: SearchIndex, event: RecordChanged) -> bool:
+        try:
+            return self._updaters[name](index, event) is not False
+        except Exception as e:
+            logger.error(f"Ошибка обновления поискового индекса {event.table}: {str(e)}")
+            return False
+
+
+# Глобальный реестр поисковых индексов
+search_indexes = SearchIndexRegistry()
+
+
+def _on_data_changed(event: DataEvent):
+    """Обновление индексов по зафиксированной записи"""
+    search_indexes.on_data_changed(event)
+
+
+event_bus.subscribe(DataEvent, _on_data_changed)
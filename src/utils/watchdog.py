@@ -0,0 +1,218 @@
+"""
+Сторожевой поток зависаний главного потока интерфейса
+
+Главный поток периодически отмечает "пульс" (QTimer), вспомогательный поток
+проверяет, как давно пульс был в последний раз. Если главный поток не отвечает
+дольше порога, вспомогательный поток снимает его стек через
+sys._current_frames() и накапливает выборки до конца зависания. Стеки
+агрегируются, чтобы блокирующие вызовы можно было упорядочить по суммарному
+времени зависаний.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from .instrumentation import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Каталог исходного кода приложения: кадры из него считаются кадрами приложения
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+StackSignature = Tuple[Tuple[str, str, int], ...]
+
+
+def stack_signature(frame, app_frames: int = 6) -> StackSignature:
+    """
+    Сигнатура стека: кадры приложения (от внешнего к внутреннему) и самый
+    внутренний кадр, то есть место фактической блокировки
+    """
+    summary = traceback.extract_stack(frame)
+    app = [
+        (os.path.relpath(entry.filename, os.path.dirname(_APP_DIR)), entry.name, entry.lineno)
+        for entry in summary if entry.filename.startswith(_APP_DIR)
+    ][-app_frames:]
+
+    innermost = summary[-1]
+    blocking = (os.path.basename(innermost.filename), innermost.name, innermost.lineno)
+    if not app or app[-1] != blocking:
+        app.append(blocking)
+    return tuple(app)
+
+
+def format_signature(signature: StackSignature) -> str:
+    return ' -> '.join(f"{name} ({filename}:{lineno})" for filename, name, lineno in signature)
+
+
+class StallStats:
+    """Накопленная статистика одного блокирующего стека"""
+
+    __slots__ = ('signature', 'stalls', 'samples', 'blocked_ms', 'max_stall_ms', 'last_seen')
+
+    def __init__(self, signature: StackSignature):
+        self.signature = signature
+        self.stalls = 0
+        self.samples = 0
+        self.blocked_ms = 0.0
+        self.max_stall_ms = 0.0
+        self.last_seen = 0.0
+
+
+class StallWatchdog:
+    """Обнаружение и агрегация зависаний главного потока"""
+
+    def __init__(self, threshold_ms: float = 200.0, heartbeat_ms: int = 50, sample_ms: int = 50):
+        self.threshold_ms = threshold_ms
+        self.heartbeat_ms = heartbeat_ms
+        self.sample_ms = sample_ms
+        self.latency = LatencyHistogram()
+        self._main_thread_id = threading.main_thread().ident
+        self._last_beat = time.monotonic()
+        self._stacks: Dict[StackSignature, StallStats] = {}
+        self._recent: deque = deque(maxlen=100)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -------------------------------------------------------------------------
+    # Главный поток
+    # -------------------------------------------------------------------------
+
+    def heartbeat(self):
+        """Пульс главного потока (вызывается таймером цикла событий)"""
+        now = time.monotonic()
+        delay_ms = (now - self._last_beat) * 1000 - self.heartbeat_ms
+        self._last_beat = now
+        with self._lock:
+            self.latency.add(max(0.0, delay_ms))
+
+    # -------------------------------------------------------------------------
+    # Сторожевой поток
+    # -------------------------------------------------------------------------
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._main_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stall-watchdog', daemon=True)
+        self._thread.start()
+        logger.info(f"Сторож зависаний интерфейса запущен (порог {self.threshold_ms:.0f} мс)")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _run(self):
+        stall_beat = None
+        samples: Counter = Counter()
+
+        while not self._stop.wait(self.sample_ms / 1000):
+            last_beat = self._last_beat
+
+            if stall_beat is not None and last_beat != stall_beat:
+                # Пульс возобновился: зависание закончилось
+                self._finish_stall((last_beat - stall_beat) * 1000, samples)
+                stall_beat = None
+                samples = Counter()
+
+            blocked_ms = (time.monotonic() - last_beat) * 1000 - self.heartbeat_ms
+            if blocked_ms < self.threshold_ms:
+                continue
+
+            frame = sys._current_frames().get(self._main_thread_id)
+            if frame is None:
+                continue
+            try:
+                samples[stack_signature(frame)] += 1
+            finally:
+                del frame
+            stall_beat = last_beat
+
+    def _finish_stall(self, duration_ms: float, samples: Counter):
+        if not samples:
+            return
+
+        total_samples = sum(samples.values())
+        dominant, _ = samples.most_common(1)[0]
+        now = time.time()
+
+        with self._lock:
+            for signature, count in samples.items():
+                stats = self._stacks.get(signature)
+                if stats is None:
+                    stats = self._stacks[signature] = StallStats(signature)
+                stats.samples += count
+                # Время зависания распределяется между стеками пропорционально выборкам
+                stats.blocked_ms += duration_ms * count / total_samples
+                stats.last_seen = now
+            dominant_stats = self._stacks[dominant]
+            dominant_stats.stalls += 1
+            dominant_stats.max_stall_ms = max(dominant_stats.max_stall_ms, duration_ms)
+            self._recent.append({'time': now, 'duration_ms': duration_ms, 'stack': format_signature(dominant)})
+
+        logger.warning(f"Интерфейс не отвечал {duration_ms:.0f} мс: {format_signature(dominant)}")
+
+    # -------------------------------------------------------------------------
+    # Отчеты
+    # -------------------------------------------------------------------------
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Блокирующие стеки по суммарному времени зависаний"""
+        with self._lock:
+            rows = [{
+                'stack': format_signature(stats.signature),
+                'location': format_signature(stats.signature[-2:]),
+                'stalls': stats.stalls,
+                'samples': stats.samples,
+                'blocked_ms': stats.blocked_ms,
+                'max_stall_ms': stats.max_stall_ms,
+                'last_seen': stats.last_seen,
+            } for stats in self._stacks.values()]
+
+        rows.sort(key=lambda row: row['blocked_ms'], reverse=True)
+        return rows[:limit]
+
+    def recent_stalls(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(reversed(self._recent))
+
+    def latency_summary(self) -> Dict[str, float]:
+        """Задержка цикла событий относительно периода пульса"""
+        with self._lock:
+            return {
+                'beats': self.latency.count,
+                'p50_ms': self.latency.percentile(0.5),
+                'p95_ms': self.latency.percentile(0.95),
+                'p99_ms': self.latency.percentile(0.99),
+                'max_ms': self.latency.max_ms,
+            }
+
+    def save_report(self, path: str):
+        """Сохранение агрегированного отчета сессии (для сравнения между сессиями операторов)"""
+        report = {
+            'threshold_ms': self.threshold_ms,
+            'latency': self.latency_summary(),
+            'stacks': self.top(limit=200),
+            'recent': self.recent_stalls(),
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"Отчет о зависаниях интерфейса сохранен: {path}")
+
+
+# Глобальный сторож зависаний главного потока
+stall_watchdog = StallWatchdog(threshold_ms=float(os.getenv('STALL_THRESHOLD_MS', '200')))